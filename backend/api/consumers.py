@@ -42,6 +42,19 @@ class BaseAuthenticatedConsumer(AsyncWebsocketConsumer):
         except User.DoesNotExist:
             return None
 
+    @database_sync_to_async
+    def check_restaurant_owner(self, user, restaurant_id):
+        """Vérifie que l'utilisateur est le restaurateur owner du restaurant"""
+        from api.models import Restaurant
+        try:
+            restaurant = Restaurant.objects.select_related('owner').get(
+                id=restaurant_id
+            )
+        except (Restaurant.DoesNotExist, ValueError, TypeError):
+            return False
+        profile = getattr(user, 'restaurateur_profile', None)
+        return profile is not None and restaurant.owner_id == profile.id
+
 
 class OrderConsumer(BaseAuthenticatedConsumer):
     """Consumer WebSocket pour les mises à jour de commandes en temps réel"""
@@ -524,6 +537,7 @@ class SessionConsumer(BaseAuthenticatedConsumer):
         try:
             await self.send(text_data=json.dumps({
                 'type': 'cart_update',
+                'version': event.get('version'),
                 'items': event.get('items', []),
                 'total': event.get('total', 0),
                 'items_count': event.get('items_count', 0),
@@ -532,21 +546,38 @@ class SessionConsumer(BaseAuthenticatedConsumer):
         except Exception as e:
             logger.warning(f"cart_updated: impossible d'envoyer au client: {e}")
 
+    async def cart_diff(self, event):
+        """
+        Reçoit un diff versionné du panier (articles ajoutés / modifiés /
+        retirés depuis from_version) et le propage au client. Le client
+        qui détecte un trou de version redemande l'état via 'cart_ping'.
+        """
+        try:
+            await self.send(text_data=json.dumps({
+                'type': 'cart_diff',
+                'from_version': event.get('from_version'),
+                'version': event.get('version'),
+                'changes': event.get('changes', []),
+                'total': event.get('total', 0),
+                'items_count': event.get('items_count', 0),
+                'timestamp': time.time(),
+            }))
+        except Exception as e:
+            logger.warning(f"cart_diff: impossible d'envoyer au client: {e}")
+
 
     async def send_cart_state(self):
         """
-        Envoie l'état actuel du panier de la session au client qui vient
-        de se connecter (appelé depuis connect()).
+        Envoie l'état versionné du panier de la session au client qui vient
+        de se connecter ou qui a détecté un trou de version (cart_ping).
         """
         if not getattr(self, 'session_id', None):
             return
         try:
-            items, total, count = await self._get_cart_data()
+            snapshot = await self._get_cart_data()
             await self.send(text_data=json.dumps({
                 'type': 'cart_state',
-                'items': items,
-                'total': total,
-                'items_count': count,
+                **snapshot,
                 'timestamp': time.time(),
             }))
         except Exception as e:
@@ -555,21 +586,10 @@ class SessionConsumer(BaseAuthenticatedConsumer):
 
     @database_sync_to_async
     def _get_cart_data(self):
-        """Récupère les données du panier depuis la base."""
-        import json as _json
-        from api.models import SessionCartItem
-        from api.serializers.collaborative_session_serializers import SessionCartItemSerializer
-
-        items = SessionCartItem.objects.filter(
-            session_id=self.session_id
-        ).select_related('participant', 'participant__user', 'menu_item')
-
-        serializer = SessionCartItemSerializer(items, many=True)
-        # Convertir UUID/Decimal/datetime en types JSON natifs via round-trip
-        items_data = _json.loads(_json.dumps(list(serializer.data), default=str))
-        total = float(sum(float(item.get('total_price', 0)) for item in items_data))
-        count = sum(int(item.get('quantity', 0)) for item in items_data)
-        return items_data, total, count
+        """Instantané du panier (version, articles, total), servi depuis le cache."""
+        from api.services.session_cart import get_cart_snapshot
+
+        return get_cart_snapshot(self.session_id)
     
     # ==================== HELPERS ====================
     
@@ -629,8 +649,11 @@ class FloorPlanConsumer(BaseAuthenticatedConsumer):
 
     Socket unidirectionnel (serveur → client) : seul un ping est toléré en
     entrée, toute mutation passe par l'API REST (permissions DRF).
-    Le payload poussé ne contient aucune donnée métier — le client refait
-    un GET /floor-plan/ (débounce côté client).
+    Chaque message porte la version du plan et l'état de la table concernée
+    (`table`) : le client l'applique sur son dernier GET /floor-plan/ et ne
+    refait un GET (débounce côté client) que si la version saute, si
+    `table` est absent (layout_changed…) ou après une reconnexion dont la
+    version diffère de la sienne.
     """
 
     async def connect(self):
@@ -675,11 +698,12 @@ class FloorPlanConsumer(BaseAuthenticatedConsumer):
             )
             await self.accept()
 
-            # 5. Confirmer la connexion
+            # 5. Confirmer la connexion (version courante du plan)
             await self.send(text_data=json.dumps({
                 'type': 'connected',
                 'message': 'Connected to floor plan',
                 'restaurant_id': str(self.restaurant_id),
+                'version': await self.get_floorplan_version(),
                 'timestamp': time.time()
             }))
 
@@ -737,6 +761,9 @@ class FloorPlanConsumer(BaseAuthenticatedConsumer):
                 'type': 'floorplan_update',
                 'event': event.get('event', 'update'),
                 'table_id': event.get('table_id'),
+                'version': event.get('version'),
+                'table': event.get('table'),
+                'tables': event.get('tables'),
                 'timestamp': event.get('timestamp')
             }))
         except Exception as e:
@@ -745,17 +772,123 @@ class FloorPlanConsumer(BaseAuthenticatedConsumer):
     # ==================== HELPERS ====================
 
     @database_sync_to_async
-    def check_restaurant_owner(self, user, restaurant_id):
-        """Vérifie que l'utilisateur est le restaurateur owner du restaurant"""
-        from api.models import Restaurant
+    def get_floorplan_version(self):
+        """Version courante du plan de salle (None si cache indisponible)"""
+        from api.services.floor_plan import get_version
         try:
-            restaurant = Restaurant.objects.select_related('owner').get(
-                id=restaurant_id
+            return get_version(self.restaurant_id)
+        except Exception as e:
+            logger.warning(f"FloorPlanWS: Version unavailable: {e}")
+            return None
+
+
+class KitchenConsumer(BaseAuthenticatedConsumer):
+    """
+    Consumer WebSocket du flux cuisine.
+
+    URL : ws/kitchen/<restaurant_id>/?token=<JWT>
+
+    Mêmes règles que FloorPlanConsumer : token JWT obligatoire et
+    restaurateur propriétaire vérifiés AVANT accept(), socket
+    unidirectionnel (ping toléré en entrée).
+    Chaque message porte le ticket courant d'une commande (même projection
+    que GET /orders/kitchen_feed/) ou son retrait (`removed`). À la
+    connexion ou après une coupure, le client repart d'un GET
+    kitchen_feed avec son dernier curseur.
+    """
+
+    async def connect(self):
+        """Gérer la connexion WebSocket du flux cuisine"""
+        try:
+            self.restaurant_id = self.scope['url_route']['kwargs']['restaurant_id']
+            self.kitchen_group_name = f'kitchen_{self.restaurant_id}'
+
+            query_string = self.scope.get('query_string', b'').decode()
+            query_params = dict(param.split('=') for param in query_string.split('&') if '=' in param)
+            token = query_params.get('token')
+
+            if not token:
+                logger.warning("KitchenWS: No token provided")
+                await self.close(code=4001)
+                return
+
+            user = await self.authenticate_connection(token)
+            if not user:
+                logger.warning("KitchenWS: Authentication failed")
+                await self.close(code=4003)
+                return
+
+            is_owner = await self.check_restaurant_owner(user, self.restaurant_id)
+            if not is_owner:
+                logger.warning(
+                    f"KitchenWS: User {user.id} is not owner of restaurant {self.restaurant_id}"
+                )
+                await self.close(code=4403)
+                return
+
+            self.user = user
+
+            await self.channel_layer.group_add(
+                self.kitchen_group_name,
+                self.channel_name
             )
-        except (Restaurant.DoesNotExist, ValueError, TypeError):
-            return False
-        profile = getattr(user, 'restaurateur_profile', None)
-        return profile is not None and restaurant.owner_id == profile.id
+            await self.accept()
+
+            await self.send(text_data=json.dumps({
+                'type': 'connected',
+                'message': 'Connected to kitchen feed',
+                'restaurant_id': str(self.restaurant_id),
+                'timestamp': time.time()
+            }))
+
+            logger.info(
+                f"KitchenWS connected: restaurant {self.restaurant_id}, user {user.id}"
+            )
+
+        except Exception as e:
+            logger.error(f"KitchenWS connection error: {e}")
+            await self.close(code=4000)
+
+    async def disconnect(self, close_code):
+        """Gérer la déconnexion"""
+        try:
+            if hasattr(self, 'kitchen_group_name'):
+                await self.channel_layer.group_discard(
+                    self.kitchen_group_name,
+                    self.channel_name
+                )
+        except Exception as e:
+            logger.error(f"KitchenWS disconnect error: {e}")
+
+    async def receive(self, text_data):
+        """Gérer les messages reçus — ping uniquement, socket unidirectionnel"""
+        try:
+            data = json.loads(text_data)
+            if data.get('type') == 'ping':
+                await self.send(text_data=json.dumps({
+                    'type': 'pong',
+                    'timestamp': time.time()
+                }))
+            else:
+                logger.warning(f"KitchenWS: Unknown message type: {data.get('type')}")
+        except json.JSONDecodeError:
+            logger.error("KitchenWS: Invalid JSON received")
+
+    async def kitchen_ticket(self, event):
+        """
+        Handler des tickets cuisine, appelé par notify_kitchen_ticket()
+        (api.services.kitchen_feed) via group_send type='kitchen.ticket'
+        """
+        try:
+            await self.send(text_data=json.dumps({
+                'type': 'kitchen_ticket',
+                'order_id': event.get('order_id'),
+                'removed': event.get('removed', False),
+                'ticket': event.get('ticket'),
+                'timestamp': event.get('timestamp')
+            }))
+        except Exception as e:
+            logger.error(f"KitchenWS: Error sending ticket: {e}")
 
 
 # ==================== FONCTIONS UTILITAIRES POUR NOTIFICATIONS ====================
@@ -0,0 +1,75 @@
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import Restaurant, RestaurateurProfile
+from api.services.authz import invalidate_user_context
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compte les requêtes SQL d\'une requête restaurateur authentifiée, contexte d\'autorisation recalculé vs en cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=3, help='Restaurants du restaurateur (défaut: 3)')
+        parser.add_argument('--runs', type=int, default=10, help='Requêtes mesurées par mode (défaut: 10)')
+        parser.add_argument(
+            '--path',
+            default='/api/v1/table/',
+            help='Endpoint restaurateur mesuré ({restaurant} remplacé par un id, défaut: /api/v1/table/)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                # Données de bench jetables
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = User.objects.create_user(username='bench-authz', password='bench')
+        user.groups.add(Group.objects.get_or_create(name='restaurateur')[0])
+        profile = RestaurateurProfile.objects.create(
+            user=user, siret='99999999999999', is_active=True,
+            is_validated=True, stripe_verified=True,
+        )
+        restaurants = [
+            Restaurant.objects.create(
+                name=f'Bench {i}', owner=profile, siret=f'9999999998{i:04d}',
+                address=f'{i} Rue du Bench', city='Paris', zip_code='75001',
+            )
+            for i in range(options['restaurants'])
+        ]
+        path = options['path'].format(restaurant=restaurants[0].id)
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        def measure(cold):
+            counts = []
+            for _ in range(options['runs']):
+                if cold:
+                    invalidate_user_context(user.id)
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(path)
+                counts.append(len(queries))
+            return response.status_code, sum(counts) / len(counts)
+
+        cold_status, cold = measure(cold=True)
+        warm_status, warm = measure(cold=False)
+
+        self.stdout.write(
+            f'🐢 Contexte recalculé : {cold:.1f} requêtes SQL/requête '
+            f'(GET {path} → {cold_status})'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'⚡ Contexte en cache  : {warm:.1f} requêtes SQL/requête '
+            f'(GET {path} → {warm_status}, -{cold - warm:.1f})'
+        ))
@@ -0,0 +1,89 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.services.availability import (
+    DEFAULT_DURATION_MINUTES,
+    SLOT_STEP_MINUTES,
+    AvailabilityIndex,
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare la recherche de créneaux (boucles imbriquées vs index d\'intervalles) sur une journée synthétique'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=60, help='Nombre de tables (défaut: 60)')
+        parser.add_argument('--reservations', type=int, default=300, help='Réservations du jour (défaut: 300)')
+        parser.add_argument('--runs', type=int, default=20, help='Répétitions (défaut: 20)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        day = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()))
+        duration = timedelta(minutes=DEFAULT_DURATION_MINUTES)
+        step = timedelta(minutes=SLOT_STEP_MINUTES)
+        opening, closing = day + timedelta(hours=11), day + timedelta(hours=23)
+
+        table_ids = list(range(1, options['tables'] + 1))
+        reservations = []
+        for _ in range(options['reservations']):
+            starts_at = opening + step * rng.randrange(0, 21)
+            reservations.append({
+                'table_id': rng.choice(table_ids),
+                'starts_at': starts_at,
+                'ends_at': starts_at + duration,
+            })
+
+        slots = []
+        cursor = opening
+        while cursor + duration <= closing:
+            slots.append(cursor)
+            cursor += step
+
+        def nested():
+            return [
+                sum(
+                    1 for tid in table_ids
+                    if not any(
+                        r['table_id'] == tid
+                        and r['starts_at'] < slot + duration
+                        and r['ends_at'] > slot
+                        for r in reservations
+                    )
+                )
+                for slot in slots
+            ]
+
+        def indexed():
+            index = AvailabilityIndex(
+                table_ids,
+                ((r['table_id'], r['starts_at'], r['ends_at']) for r in reservations),
+            )
+            return [index.count_free(slot, slot + duration) for slot in slots]
+
+        if nested() != indexed():
+            self.stderr.write(self.style.ERROR('❌ Résultats divergents'))
+            return
+
+        runs = options['runs']
+        started = time.perf_counter()
+        for _ in range(runs):
+            nested()
+        nested_ms = (time.perf_counter() - started) / runs * 1000
+
+        started = time.perf_counter()
+        for _ in range(runs):
+            indexed()
+        indexed_ms = (time.perf_counter() - started) / runs * 1000
+
+        self.stdout.write(
+            f'🐢 Boucles imbriquées : {nested_ms:.2f} ms/requête '
+            f'({len(slots)} créneaux × {len(table_ids)} tables × {len(reservations)} résas)'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'⚡ Index d\'intervalles : {indexed_ms:.2f} ms/requête '
+            f'(×{nested_ms / indexed_ms:,.0f})'
+        ))
@@ -0,0 +1,85 @@
+import base64
+import io
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageOps
+
+from api.services.menu_ai import image_utils
+
+
+def sample_page(width, height, page):
+    """Photo de carte factice : bruit de capteur + lignes de texte"""
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    image = Image.blend(Image.new('RGB', (width, height), 'white'), noise, 0.15)
+    draw = ImageDraw.Draw(image)
+    # Jeton unique : chaque exécution part d'un cache froid
+    draw.text((40, 40), f"Carte page {page} {uuid.uuid4()}", fill='black')
+    for line in range(60, height - 60, max(40, height // 60)):
+        draw.text((80, line), f"Plat {line} .......... {line % 30 + 5},50 EUR", fill='black')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def legacy_prepare(raw):
+    """Ancien prétraitement : décodage pleine résolution, base64 systématique"""
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(raw))).convert('RGB')
+    ratio = image_utils.MAX_EDGE_PX / max(image.size)
+    if ratio < 1:
+        image = image.resize(
+            (round(image.width * ratio), round(image.height * ratio)), Image.LANCZOS
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=image_utils.JPEG_QUALITY, optimize=True)
+    return base64.b64encode(buffer.getvalue())
+
+
+class Command(BaseCommand):
+    help = 'Mesure le prétraitement des photos de carte (import IA) sur des cartes multi-pages factices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=6,
+            help='Nombre de pages de la carte (défaut: 6)'
+        )
+        parser.add_argument(
+            '--size',
+            default='4032x3024',
+            help='Résolution des photos, LARGEURxHAUTEUR (défaut: 4032x3024, ~12 Mpx)'
+        )
+
+    def handle(self, *args, **options):
+        width, height = (int(v) for v in options['size'].lower().split('x'))
+        pages = [sample_page(width, height, n) for n in range(1, options['pages'] + 1)]
+        total_mb = sum(len(p) for p in pages) / 1e6
+        self.stdout.write(f"🖼️ {len(pages)} page(s) {width}x{height}, {total_mb:.1f} Mo")
+
+        started = time.perf_counter()
+        for raw in pages:
+            legacy_prepare(raw)
+        legacy_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        prepared = image_utils.prepare_images(pages)
+        cold_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        image_utils.prepare_images(pages)
+        warm_elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'🐢 Séquentiel, pleine résolution : {legacy_elapsed:.2f}s '
+            f'({legacy_elapsed / len(pages) * 1000:.0f} ms/page)'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'⚡ Parallèle, décodage réduit     : {cold_elapsed:.2f}s '
+            f'({image_utils.IMAGE_WORKERS} thread(s), '
+            f'{sum(len(p.data) for p in prepared) / 1e3:,.0f} Ko envoyés)'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'♻️ Reprise (cache)                : {warm_elapsed:.2f}s'
+        ))
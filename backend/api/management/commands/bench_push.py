@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import PushTicket
+from api.services.notification_service import NotificationService
+from api.utils.expo_stub import ExpoStubServer
+
+
+class Command(BaseCommand):
+    help = 'Mesure le débit d\'envoi push (pushes/s) contre un serveur Expo factice local'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=2000,
+            help='Nombre de messages à envoyer (défaut: 2000)'
+        )
+        parser.add_argument(
+            '--per-notification',
+            type=int,
+            default=1,
+            help='Tokens par notification (1 = un appel par destinataire, défaut: 1)'
+        )
+
+    def handle(self, *args, **options):
+        total = options['messages']
+        per_notification = max(1, options['per_notification'])
+        tokens = [f"ExponentPushToken[bench-{i}]" for i in range(total)]
+        notifications = [
+            {"tokens": tokens[i:i + per_notification], "title": "Bench", "body": "Bench"}
+            for i in range(0, total, per_notification)
+        ]
+
+        with ExpoStubServer() as stub:
+            service = NotificationService()
+            service.expo_push_url = stub.push_url
+
+            # Envoi unitaire : une requête par notification (connexion réutilisée)
+            started = time.perf_counter()
+            for notification in notifications:
+                service._send_push_notification(**notification)
+            unit_elapsed = time.perf_counter() - started
+            unit_requests = len(stub.requests)
+
+            # Envoi groupé : notifications fusionnées par lots de 100 messages
+            started = time.perf_counter()
+            service.send_batch(notifications)
+            batch_elapsed = time.perf_counter() - started
+            batch_requests = len(stub.requests) - unit_requests
+
+            PushTicket.objects.filter(ticket_id__in=list(stub.tickets)).delete()
+
+        self.stdout.write(
+            f'📤 Unitaire : {total / unit_elapsed:,.0f} pushes/s '
+            f'({unit_requests} requêtes, {unit_elapsed:.2f}s)'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'📦 Groupé   : {total / batch_elapsed:,.0f} pushes/s '
+            f'({batch_requests} requêtes, {batch_elapsed:.2f}s)'
+        ))
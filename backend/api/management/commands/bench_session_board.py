@@ -0,0 +1,102 @@
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import (
+    CollaborativeTableSession, Restaurant, RestaurateurProfile, SessionParticipant, Table,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def legacy_table_status(restaurant):
+    """Ancien plan d'occupation : une requête par table et par session"""
+    statuses = []
+    for table in Table.objects.filter(restaurant=restaurant):
+        session = CollaborativeTableSession.objects.filter(
+            table=table, status__in=['active', 'locked', 'payment'], is_archived=False
+        ).first()
+        statuses.append(session.participant_count if session else None)
+    return statuses
+
+
+class Command(BaseCommand):
+    help = 'Compte les requêtes SQL du plan d\'occupation et de l\'archivage groupé des sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=100, help='Tables du restaurant (défaut: 100)')
+        parser.add_argument(
+            '--occupied',
+            type=float,
+            default=0.6,
+            help='Part des tables occupées par une session (défaut: 0.6)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                # Données de bench jetables
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = User.objects.create_user(username='bench-sessions', password='bench')
+        user.groups.add(Group.objects.get_or_create(name='restaurateur')[0])
+        profile = RestaurateurProfile.objects.create(
+            user=user, siret='99999999999999', is_active=True,
+            is_validated=True, stripe_verified=True,
+        )
+        restaurant = Restaurant.objects.create(
+            name='Bench sessions', owner=profile, siret='99999999980000',
+            address='1 Rue du Bench', city='Paris', zip_code='75001',
+        )
+        tables = Table.objects.bulk_create(
+            Table(restaurant=restaurant, number=str(n), capacity=4)
+            for n in range(1, options['tables'] + 1)
+        )
+        occupied = tables[:round(len(tables) * options['occupied'])]
+        sessions = [
+            CollaborativeTableSession.objects.create(
+                restaurant=restaurant, table=table, table_number=table.number, status='active'
+            )
+            for table in occupied
+        ]
+        SessionParticipant.objects.bulk_create(
+            SessionParticipant(session=session, guest_name=f'Invité {n}', status='active')
+            for session in sessions for n in range(3)
+        )
+        self.stdout.write(f'🍽️ {len(tables)} table(s), {len(sessions)} occupée(s)')
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with CaptureQueriesContext(connection) as legacy:
+            legacy_table_status(restaurant)
+        with CaptureQueriesContext(connection) as board:
+            response = client.get(
+                f'/api/v1/restaurants/sessions/sessions/table_status/?restaurant_id={restaurant.id}'
+            )
+        with CaptureQueriesContext(connection) as archive:
+            archived = client.post(
+                '/api/v1/restaurants/sessions/sessions/bulk_archive/',
+                {'session_ids': [str(session.id) for session in sessions]},
+                format='json',
+            )
+
+        self.stdout.write(
+            f'🐢 Plan d\'occupation, requête par table : {len(legacy)} requêtes SQL'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'⚡ Plan d\'occupation, Prefetch + Count  : {len(board)} requêtes SQL '
+            f'(GET table_status → {response.status_code}, vue complète)'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'🗄️ Archivage groupé                     : {len(archive)} requêtes SQL '
+            f'({archived.data.get("total_archived")} session(s))'
+        ))
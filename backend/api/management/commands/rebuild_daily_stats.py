@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.services.daily_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit la table RestaurantDailyStats depuis les commandes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant',
+            type=int,
+            action='append',
+            help='ID du restaurant (répétable, défaut: tous)'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Premier jour à reconstruire (AAAA-MM-JJ)'
+        )
+        parser.add_argument(
+            '--until',
+            type=str,
+            help='Dernier jour à reconstruire (AAAA-MM-JJ, inclus)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Reconstruire les N derniers jours (alternative à --since)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_day = date.fromisoformat(options['since']) if options['since'] else None
+            end_day = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError as e:
+            raise CommandError(f'Date invalide : {e}')
+
+        if options['days'] is not None:
+            start_day = timezone.localdate() - timedelta(days=options['days'])
+
+        scope = ', '.join(map(str, options['restaurant'])) if options['restaurant'] else 'tous'
+        until = end_day or "aujourd'hui"
+        self.stdout.write(
+            f'📊 Reconstruction des statistiques journalières '
+            f'(restaurants: {scope}, du {start_day or "début"} au {until})'
+        )
+
+        rows = rebuild_daily_stats(
+            restaurant_ids=options['restaurant'],
+            start_day=start_day,
+            end_day=end_day,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {rows} ligne(s) écrite(s)'))
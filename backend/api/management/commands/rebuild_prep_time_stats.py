@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.services.prep_time import PREP_TIME_REBUILD_DAYS, rebuild_prep_time_stats
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit la table PrepTimeStats (temps de préparation appris) depuis les commandes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant',
+            type=int,
+            action='append',
+            help='ID du restaurant (répétable, défaut: tous)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=PREP_TIME_REBUILD_DAYS,
+            help=f'Historique relu en jours (défaut: {PREP_TIME_REBUILD_DAYS})'
+        )
+
+    def handle(self, *args, **options):
+        scope = ', '.join(map(str, options['restaurant'])) if options['restaurant'] else 'tous'
+        self.stdout.write(
+            f'⏱️ Reconstruction des temps de préparation '
+            f'(restaurants: {scope}, {options["days"]} derniers jours)'
+        )
+
+        rows = rebuild_prep_time_stats(
+            restaurant_ids=options['restaurant'],
+            days=options['days'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {rows} ligne(s) écrite(s)'))
@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.vat_ledger import rebuild_vat_ledger
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit le grand livre TVA (OrderVatLine) depuis les commandes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant',
+            type=int,
+            action='append',
+            help='ID du restaurant (répétable, défaut: tous)'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Premier jour à reconstruire (AAAA-MM-JJ)'
+        )
+        parser.add_argument(
+            '--until',
+            type=str,
+            help='Dernier jour à reconstruire (AAAA-MM-JJ, inclus)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_day = date.fromisoformat(options['since']) if options['since'] else None
+            end_day = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError as e:
+            raise CommandError(f'Date invalide : {e}')
+
+        scope = ', '.join(map(str, options['restaurant'])) if options['restaurant'] else 'tous'
+        self.stdout.write(
+            f'🧾 Reconstruction du grand livre TVA '
+            f'(restaurants: {scope}, du {start_day or "début"} au {end_day or "dernier jour"})'
+        )
+
+        rows = rebuild_vat_ledger(
+            restaurant_ids=options['restaurant'],
+            start_day=start_day,
+            end_day=end_day,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {rows} ligne(s) écrite(s)'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-16 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0066_restaurant_stripe_terminal_location_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushTicket',
+            fields=[
+                ('ticket_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('expo_token', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Ticket push Expo',
+                'verbose_name_plural': 'Tickets push Expo',
+                'db_table': 'push_tickets',
+            },
+        ),
+    ]
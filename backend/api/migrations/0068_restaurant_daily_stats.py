@@ -0,0 +1,58 @@
+# Generated by Django 5.0.2 on 2026-10-16 20:51
+
+import datetime
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+from api.services.daily_stats import iter_daily_rows
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Order = apps.get_model('api', 'Order')
+    RestaurantDailyStats = apps.get_model('api', 'RestaurantDailyStats')
+
+    batch = []
+    for row in iter_daily_rows(Order.objects.all()):
+        batch.append(RestaurantDailyStats(**row))
+        if len(batch) >= 1000:
+            RestaurantDailyStats.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        RestaurantDailyStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0067_push_tickets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_bucket', models.CharField(choices=[('commissionable', 'Stripe (commissionnable)'), ('card_offline', 'TPE restaurant'), ('cash', 'Espèces'), ('other', 'Non renseigné')], max_length=20)),
+                ('payment_status', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('prep_time_total', models.DurationField(default=datetime.timedelta)),
+                ('prep_time_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.restaurant')),
+            ],
+            options={
+                'verbose_name': 'Statistiques journalières',
+                'verbose_name_plural': 'Statistiques journalières',
+                'db_table': 'restaurant_daily_stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='restaurantdailystats',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'day', 'payment_bucket', 'payment_status', 'status'), name='uniq_restaurant_daily_stats_bucket'),
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
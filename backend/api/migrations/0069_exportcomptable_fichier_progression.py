@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-16 21:20
+
+import api.models.accounting_models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0068_restaurant_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportcomptable',
+            name='fichier',
+            field=models.FileField(blank=True, upload_to=api.models.accounting_models.export_upload_path),
+        ),
+        migrations.AddField(
+            model_name='exportcomptable',
+            name='progression',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Avancement de la génération (%)'),
+        ),
+    ]
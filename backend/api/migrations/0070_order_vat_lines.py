@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-16 21:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0069_exportcomptable_fichier_progression'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderVatLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_created_at', models.DateTimeField()),
+                ('vat_rate', models.DecimalField(decimal_places=3, max_digits=4)),
+                ('base_ht', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('vat_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_ttc', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vat_lines', to='api.order')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vat_lines', to='api.restaurant')),
+            ],
+            options={
+                'verbose_name': 'Ligne TVA de commande',
+                'verbose_name_plural': 'Lignes TVA de commande',
+                'db_table': 'order_vat_lines',
+                'indexes': [models.Index(fields=['restaurant', 'order_created_at'], name='order_vat_l_restaur_36cfb1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('order', 'vat_rate'), name='unique_order_vat_rate')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0070_order_vat_lines'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed', 'preparing', 'ready'])), fields=['restaurant', 'updated_at'], name='order_kitchen_active_idx'),
+        ),
+    ]
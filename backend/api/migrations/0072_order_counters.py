@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0071_order_kitchen_active_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('value', models.PositiveIntegerField(default=0)),
+                ('session_id', models.UUIDField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Compteur de commandes',
+                'verbose_name_plural': 'Compteurs de commandes',
+                'db_table': 'order_counters',
+            },
+        ),
+    ]
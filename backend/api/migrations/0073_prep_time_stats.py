@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0072_order_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrepTimeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('avg_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prep_time_stats', to='api.restaurant')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='prep_time_stats', to='api.menucategory')),
+            ],
+            options={
+                'verbose_name': 'Temps de préparation appris',
+                'verbose_name_plural': 'Temps de préparation appris',
+                'db_table': 'restaurant_prep_time_stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='preptimestats',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'category', 'hour'), name='uniq_restaurant_prep_time_stats', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.2 on 2026-10-17 10:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from api.utils.directory_index import build_search_text, geohash_encode
+
+
+def backfill_directory_index(apps, schema_editor):
+    Restaurant = apps.get_model('api', 'Restaurant')
+    cuisine_labels = dict(Restaurant._meta.get_field('cuisine').choices)
+
+    batch = []
+    for restaurant in Restaurant.objects.only(
+        'id', 'name', 'address', 'city', 'cuisine', 'latitude', 'longitude'
+    ).iterator():
+        if restaurant.latitude is not None and restaurant.longitude is not None:
+            restaurant.geohash = geohash_encode(restaurant.latitude, restaurant.longitude)
+        restaurant.search_text = build_search_text(
+            restaurant.name, restaurant.address, restaurant.city, restaurant.cuisine,
+            cuisine_labels.get(restaurant.cuisine, ''),
+        )
+        batch.append(restaurant)
+        if len(batch) >= 500:
+            Restaurant.objects.bulk_update(batch, ['geohash', 'search_text'])
+            batch = []
+    if batch:
+        Restaurant.objects.bulk_update(batch, ['geohash', 'search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0073_prep_time_stats'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='restaurant',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='restaurant_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(backfill_directory_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-17 11:20
+
+import api.models.table_models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0074_restaurant_directory_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QrExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'Génération en cours'), ('complete', 'Terminé'), ('failed', 'Échec')], db_index=True, default='pending', max_length=20, verbose_name='Statut')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progression (%)')),
+                ('base_url', models.CharField(max_length=255, verbose_name='URL de base')),
+                ('file', models.FileField(blank=True, null=True, upload_to=api.models.table_models.qr_export_upload_path, verbose_name='Fichier PDF')),
+                ('file_name', models.CharField(blank=True, default='', max_length=255)),
+                ('file_size', models.PositiveIntegerField(default=0)),
+                ('tables_count', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, default='', verbose_name="Message d'erreur")),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='qr_export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Créé par')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='qr_export_jobs', to='api.restaurant', verbose_name='Restaurant')),
+            ],
+            options={
+                'verbose_name': 'Export de QR codes',
+                'verbose_name_plural': 'Exports de QR codes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0075_qr_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftorder',
+            name='order',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='guest_draft', to='api.order'),
+        ),
+    ]
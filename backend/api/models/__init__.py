@@ -43,14 +43,16 @@ from .formule_models import (
 )
 
 # Tables
-from .table_models import Table
+from .table_models import Table, QrExportJob
 
 # Orders
 from .order_models import (
     OrderManager,
     Order,
     OrderItem,
-    OrderItemComponent
+    OrderItemComponent,
+    OrderVatLine,
+    OrderCounter,
 )
 
 # Collaborative Sessions
@@ -101,6 +103,7 @@ from .accounting_models import (
 # Notification
 from .notification_models import (
     PushNotificationToken,
+    PushTicket,
     NotificationPreferences,
     Notification
 )
@@ -122,6 +125,9 @@ from api.models.reservation_models import Reservation
 # Occupation des tables (walk-ins, blocages)
 from api.models.table_occupancy_models import TableOccupancy
 
+# Agrégats statistiques
+from api.models.stats_models import PrepTimeStats, RestaurantDailyStats
+
 __all__ = [
     # Validators
     'validate_siret',
@@ -157,12 +163,15 @@ __all__ = [
 
     # Tables
     'Table',
+    'QrExportJob',
 
     # Orders
     'OrderManager',
     'Order',
     'OrderItem',
     'OrderItemComponent',
+    'OrderVatLine',
+    'OrderCounter',
 
     # Collaborative Sessions
     'ActiveSessionManager',
@@ -198,6 +207,7 @@ __all__ = [
 
     # Notification
     'PushNotificationToken',
+    'PushTicket',
     'NotificationPreferences',
     'Notification',
 
@@ -218,4 +228,8 @@ __all__ = [
 
     # Occupation des tables
     'TableOccupancy',
+
+    # Agrégats statistiques
+    'RestaurantDailyStats',
+    'PrepTimeStats',
 ]
\ No newline at end of file
@@ -255,6 +255,10 @@ class RecapitulatifTVA(models.Model):
 
 
 
+def export_upload_path(instance, filename):
+    return f"exports/{instance.restaurateur_id}/{filename}"
+
+
 class ExportComptable(models.Model):
     """Historique des exports comptables"""
     
@@ -281,6 +285,7 @@ class ExportComptable(models.Model):
     fichier_url = models.URLField(max_length=500, blank=True)
     fichier_nom = models.CharField(max_length=255)
     fichier_taille = models.PositiveIntegerField(default=0)  # En bytes
+    fichier = models.FileField(upload_to=export_upload_path, blank=True)
     
     statut = models.CharField(
         max_length=20,
@@ -293,6 +298,10 @@ class ExportComptable(models.Model):
     )
     
     message_erreur = models.TextField(blank=True)
+    progression = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Avancement de la génération (%)"
+    )
     
     # Métadonnées
     nombre_lignes = models.PositiveIntegerField(default=0)
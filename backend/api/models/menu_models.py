@@ -525,6 +525,15 @@ class DraftOrder(models.Model):
         max_length=20,
         default="created"  # created|pi_succeeded|failed|expired|confirmed_cash
     )
+    # Commande produite par create_order_from_draft (statut du brouillon,
+    # rejeu de confirmation) : lien direct, indexé par l'unicité.
+    order = models.OneToOneField(
+        'Order',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='guest_draft'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(default=default_expires_at)
 
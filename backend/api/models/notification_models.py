@@ -65,6 +65,25 @@ class PushNotificationToken(models.Model):
         self.save(update_fields=['last_used_at'])
 
 
+class PushTicket(models.Model):
+    """
+    Ticket Expo en attente de reçu.
+    Les reçus (disponibles ~15 min après l'envoi, pendant 24h) indiquent
+    les tokens devenus invalides (DeviceNotRegistered).
+    """
+    ticket_id = models.CharField(max_length=64, primary_key=True)
+    expo_token = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'push_tickets'
+        verbose_name = 'Ticket push Expo'
+        verbose_name_plural = 'Tickets push Expo'
+
+    def __str__(self):
+        return f"Ticket {self.ticket_id}"
+
+
 class NotificationPreferences(models.Model):
     """
     Préférences de notification par utilisateur.
@@ -190,8 +209,25 @@ class Notification(models.Model):
             models.Index(fields=['user', 'is_read', '-created_at']),
             models.Index(fields=['notification_type']),
             models.Index(fields=['order_id']),
+            # Boîte de réception : pagination par curseur (created_at, id)
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                name='notif_inbox_keyset_idx',
+            ),
+            # Compteur de non lues (recalcul) : non lues uniquement
+            models.Index(
+                fields=['user', 'expires_at'],
+                name='notif_unread_idx',
+                condition=models.Q(is_read=False),
+            ),
+            # Purge des notifications expirées
+            models.Index(
+                fields=['expires_at'],
+                name='notif_expiring_idx',
+                condition=models.Q(expires_at__isnull=False),
+            ),
         ]
-    
+
     def __str__(self):
         return f"{self.notification_type}: {self.title}"
     
@@ -1,7 +1,7 @@
 """
 Modèles Order pour EatQuickeR
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -52,6 +52,56 @@ class OrderManager(models.Manager):
             ).count()
         }
 
+    def tables_statistics(self, restaurant, since=None):
+        """
+        Statistiques de toutes les tables en une requête groupée :
+        {table_number: {total_orders, total_revenue, average_order_value,
+        active_orders}}. `since` restreint aux commandes créées depuis.
+        """
+        orders = self.filter(restaurant=restaurant, table_number__isnull=False)
+        if since is not None:
+            orders = orders.filter(created_at__gte=since)
+
+        rows = (
+            orders.order_by()
+            .values('table_number')
+            .annotate(
+                total_orders=models.Count('id'),
+                total_revenue=models.Sum('total_amount'),
+                average_order_value=models.Avg('total_amount'),
+                active_orders=models.Count('id', filter=models.Q(
+                    status__in=['pending', 'confirmed', 'preparing', 'ready']
+                )),
+            )
+            .order_by('table_number')
+        )
+        return {
+            row['table_number']: {
+                'total_orders': row['total_orders'],
+                'total_revenue': row['total_revenue'] or 0,
+                'average_order_value': row['average_order_value'] or 0,
+                'active_orders': row['active_orders'],
+            }
+            for row in rows
+        }
+
+    def active_by_table(self, restaurant):
+        """Commandes actives du restaurant groupées par table (une requête + items)"""
+        orders = (
+            self.filter(
+                restaurant=restaurant,
+                table_number__isnull=False,
+                status__in=['pending', 'confirmed', 'preparing', 'ready'],
+            )
+            .select_related('restaurant', 'user')
+            .prefetch_related('items')
+            .order_by('-created_at')
+        )
+        by_table = {}
+        for order in orders:
+            by_table.setdefault(order.table_number, []).append(order)
+        return by_table
+
 
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -172,16 +222,33 @@ class Order(models.Model):
             models.Index(fields=['restaurant', 'table_number', 'status']),
             models.Index(fields=['table_session_id']),
             models.Index(fields=['restaurant', 'created_at']),
+            # Flux cuisine : commandes en cours uniquement (quelques dizaines
+            # par restaurant), parcourues par date de modification
+            models.Index(
+                fields=['restaurant', 'updated_at'],
+                name='order_kitchen_active_idx',
+                condition=models.Q(status__in=['pending', 'confirmed', 'preparing', 'ready']),
+            ),
         ]
 
-    def calculate_vat_breakdown(self):
+    def calculate_vat_breakdown(self, lines=None):
         """Calcule la répartition de la TVA par taux.
 
         Pour une ligne formule (kind='formule'), la TVA est ventilée au niveau
         des composants (taux potentiellement mixtes : plat 10 %, vin 20 %...),
         donc on descend dans `item.components` au lieu d'utiliser le taux de la
         ligne (qui n'aurait pas de sens).
+
+        `lines` permet de passer des lignes déjà en mémoire sous forme de
+        couples (OrderItem, [OrderItemComponent]) — utilisé par la création
+        groupée pour éviter de relire items et composants en base.
         """
+        if lines is None:
+            lines = (
+                (item, item.components.all())
+                for item in self.items.prefetch_related('components')
+            )
+
         vat_breakdown = {}
 
         def _add(rate, ttc, tva):
@@ -195,9 +262,9 @@ class Order(models.Model):
             bucket['tva'] += tva
             bucket['ht'] += (ttc - tva)
 
-        for item in self.items.all():
+        for item, components in lines:
             if item.kind == 'formule':
-                for c in item.components.all():
+                for c in components:
                     ttc = (c.allocated_price + c.extra_price) * item.quantity
                     _add(c.vat_rate, ttc, c.vat_amount * item.quantity)
             else:
@@ -210,97 +277,109 @@ class Order(models.Model):
 
         self.vat_details = vat_breakdown
         return vat_breakdown
+
+    def record_vat_lines(self, replace=True):
+        """Écrit vat_details dans le grand livre TVA (une ligne OrderVatLine par taux).
+
+        À appeler une fois la commande finalisée (lignes et vat_details
+        fixés). `replace=False` pour une commande neuve : pas de DELETE.
+        """
+        if replace:
+            self.vat_lines.all().delete()
+        OrderVatLine.objects.bulk_create([
+            OrderVatLine(
+                order=self,
+                restaurant_id=self.restaurant_id,
+                order_created_at=self.created_at,
+                vat_rate=(Decimal(str(rate)) / 100).quantize(Decimal('0.001')),
+                base_ht=Decimal(str(bucket['ht'])),
+                vat_amount=Decimal(str(bucket['tva'])),
+                total_ttc=Decimal(str(bucket['ttc'])),
+            )
+            for rate, bucket in (self.vat_details or {}).items()
+        ])
     
     def __str__(self):
         return f"Order #{self.order_number} - {self.get_payment_status_display()}"
     
+    # Champs dont les signaux ont besoin de connaître la valeur précédente.
+    # On garde en mémoire la valeur chargée/écrite en base pour éviter de
+    # relire la ligne dans chaque pre_save.
+    TRACKED_FIELDS = ('status', 'payment_status')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields)
+
+    def _snapshot_tracked_fields(self, fields=None):
+        """Mémorise les valeurs persistées des champs suivis (hors champs différés)"""
+        loaded = getattr(self, '_loaded_values', None) if fields is not None else None
+        loaded = dict(loaded or {})
+        for field in self.TRACKED_FIELDS:
+            if field in self.__dict__ and (fields is None or field in fields):
+                loaded[field] = self.__dict__[field]
+        self._loaded_values = loaded
+
+    def get_previous_values(self):
+        """
+        Valeurs persistées des champs suivis, ou None si elles ne sont pas
+        connues en mémoire (instance construite à la main, champ différé).
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or any(field not in loaded for field in self.TRACKED_FIELDS):
+            return None
+        return loaded
+
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            self.order_number = self.generate_order_number()
+        allocate = self.pk is None and (not self.order_number or self.table_number)
+        if not allocate:
+            self._save_order(*args, **kwargs)
+            return
 
+        # Le verrou des compteurs (api.services.order_numbers) doit couvrir
+        # l'insertion. savepoint=False : aucune requête de plus quand la
+        # création est déjà dans une transaction.
+        with transaction.atomic(savepoint=False):
+            # Séquence d'abord : elle ne dépend plus du numéro, et inversement
+            if self.table_number:
+                self.set_order_sequence()
+            if not self.order_number:
+                self.order_number = self.generate_order_number()
+            self._save_order(*args, **kwargs)
+
+    def _save_order(self, *args, **kwargs):
         # Générer un token opaque pour les commandes invité (user=None)
         # si aucun token n'est encore défini.
         if self.user is None and not self.guest_access_token:
             self.guest_access_token = secrets.token_urlsafe(32)
 
-        # Gestion automatique de la séquence pour la table
-        if not self.pk and self.table_number:
-            self.set_order_sequence()
-        
         super().save(*args, **kwargs)
-    
+        # Avec update_fields, seuls ces champs sont réellement écrits en base
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
     def generate_order_number(self):
-        """Génère un numéro de commande unique pour la production"""
-        from django.utils import timezone
-        from django.db.models import Max
-        import random
-        
-        prefix = "T" if self.order_type == "dine_in" else "E"
-        today = timezone.now().date()
-        
-        # Pour les commandes de table avec séquence
-        if self.table_number and hasattr(self, 'order_sequence'):
-            return f"{prefix}{self.table_number}-{self.order_sequence:02d}"
-        
-        # Méthode basée sur le max existant
-        last_order = Order.objects.filter(
-            restaurant=self.restaurant,
-            created_at__date=today,
-            order_number__regex=f'^{prefix}[0-9]+$'  # Seulement les numéros standard
-        ).aggregate(
-            max_num=Max('order_number')
-        )
-        
-        if last_order['max_num']:
-            try:
-                # Extraire le numéro du dernier order_number
-                last_num = int(last_order['max_num'][1:])
-                next_num = last_num + 1
-            except (ValueError, IndexError):
-                next_num = 1
-        else:
-            next_num = 1
-        
-        # Générer le numéro avec vérification anti-collision
-        max_attempts = 100
-        for attempt in range(max_attempts):
-            order_number = f"{prefix}{next_num:03d}"
-            
-            # Vérifier que ce numéro n'existe pas déjà
-            if not Order.objects.filter(order_number=order_number).exists():
-                return order_number
-            
-            next_num += 1
-        
-        # Fallback ultime : ajouter timestamp + random pour garantir l'unicité
-        # Format : E001_143525_42 (pour 14:35:25 + nombre aléatoire)
-        timestamp = timezone.now().strftime('%H%M%S')
-        random_suffix = random.randint(10, 99)
-        return f"{prefix}{next_num:03d}_{timestamp}_{random_suffix}"
-    
+        """Numéro unique du jour, alloué par le compteur du restaurant"""
+        from api.services.order_numbers import allocate_order_number, order_number_prefix
+
+        return allocate_order_number(self.restaurant_id, order_number_prefix(self.order_type))
+
     def set_order_sequence(self):
-        """Définit la séquence de commande pour cette table"""
+        """Définit la session et la séquence de commande pour cette table"""
         if not self.table_number:
             return
-        
-        # Trouver la dernière commande active de cette table
-        last_order = Order.objects.filter(
-            restaurant=self.restaurant,
-            table_number=self.table_number,
-            status__in=['pending', 'confirmed', 'preparing', 'ready']
-        ).order_by('-created_at').first()
-        
-        if last_order and last_order.table_session_id:
-            # Continuer la session existante
-            self.table_session_id = last_order.table_session_id
-            self.order_sequence = last_order.order_sequence + 1
-            self.is_main_order = False
-        else:
-            # Nouvelle session de table
-            self.table_session_id = uuid.uuid4()
-            self.order_sequence = 1
-            self.is_main_order = True
-    
+        from api.services.order_numbers import allocate_table_sequence
+
+        self.table_session_id, self.order_sequence = allocate_table_sequence(
+            self.restaurant_id, self.table_number
+        )
+        self.is_main_order = self.order_sequence == 1
+
     def can_be_cancelled(self):
         """Vérifie si une commande peut être annulée"""
         # Ne peut plus être annulée si déjà servie ou annulée
@@ -317,29 +396,27 @@ class Order(models.Model):
         return True
     
     def get_preparation_time(self):
-        """Calcule le temps de préparation estimé en minutes"""
-        if not self.items.exists():
-            return 10  # Temps par défaut
-        
-        total_time = 0
-        for item in self.items.all():
-            # Vérifier que quantity n'est pas None
-            quantity = item.quantity
-            if quantity is None or quantity <= 0:
-                continue  # Ignorer les items avec quantité invalide
-            
-            # Utiliser preparation_time du MenuItem si disponible
-            prep_time = getattr(item.menu_item, 'preparation_time', 5)
-            if prep_time is None:
-                prep_time = 5  # Valeur par défaut si preparation_time est None
-            
-            total_time += prep_time * quantity
-        
-        # Ajouter un temps de base et un buffer
-        base_time = 5
-        buffer = max(5, total_time * 0.2)  # 20% de buffer, minimum 5min
-        
-        return int(base_time + total_time + buffer)
+        """
+        Temps de préparation estimé en minutes : temps appris du restaurant
+        (api.services.prep_time) ou, sans historique, temps des plats.
+        """
+        from api.services.prep_time import predict_prep_minutes
+
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            lines = [
+                (
+                    item.menu_item.category_id if item.menu_item else None,
+                    item.menu_item.preparation_time if item.menu_item else None,
+                    item.quantity,
+                )
+                for item in self.items.all()
+            ]
+        else:
+            lines = list(self.items.values_list(
+                'menu_item__category_id', 'menu_item__preparation_time', 'quantity'
+            ))
+
+        return predict_prep_minutes(self.restaurant_id, lines, at=self.created_at)
     
     @property
     def table_orders(self):
@@ -497,6 +574,15 @@ class OrderItem(models.Model):
             super().save(*args, **kwargs)
             return
 
+        self.apply_dish_vat()
+        super().save(*args, **kwargs)
+
+    def apply_dish_vat(self):
+        """Fixe vat_rate / vat_amount d'une ligne plat, sans écriture en base.
+
+        Partagé par save() et par la création groupée (bulk_create ne passe
+        pas par save()) : une seule formule de TVA pour les deux chemins.
+        """
         # Récupérer le taux TVA du MenuItem avec arrondi
         if self.menu_item and not self.vat_rate:
             menu_vat_rate = self.menu_item.vat_rate or Decimal('0.10')
@@ -517,8 +603,6 @@ class OrderItem(models.Model):
         if self.total_price:
             price_excl_vat = self.total_price / (1 + self.vat_rate)
             self.vat_amount = self.total_price - price_excl_vat
-        
-        super().save(*args, **kwargs)
     
     def clean(self):
         """Validation avant sauvegarde"""
@@ -607,4 +691,66 @@ class OrderItemComponent(models.Model):
         ordering = ['order_item', 'display_order']
 
     def __str__(self):
-        return f"{self.course_name}: {self.menu_item_name}"
\ No newline at end of file
+        return f"{self.course_name}: {self.menu_item_name}"
+
+
+class OrderVatLine(models.Model):
+    """Grand livre TVA : montants d'une commande pour un taux, figés à la finalisation.
+
+    Dénormalise restaurant et date de commande pour que les récapitulatifs,
+    exports CSV et FEC s'obtiennent par agrégation SQL, sans reparcourir
+    lignes et composants de chaque commande.
+    """
+    order = models.ForeignKey(
+        'Order',
+        on_delete=models.CASCADE,
+        related_name='vat_lines',
+    )
+    restaurant = models.ForeignKey(
+        'Restaurant',
+        on_delete=models.CASCADE,
+        related_name='vat_lines',
+    )
+    order_created_at = models.DateTimeField()
+    vat_rate = models.DecimalField(max_digits=4, decimal_places=3)
+    base_ht = models.DecimalField(max_digits=10, decimal_places=2)
+    vat_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    total_ttc = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'order_vat_lines'
+        verbose_name = "Ligne TVA de commande"
+        verbose_name_plural = "Lignes TVA de commande"
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'vat_rate'], name='unique_order_vat_rate'),
+        ]
+        indexes = [
+            models.Index(fields=['restaurant', 'order_created_at']),
+        ]
+
+    def __str__(self):
+        return f"Commande {self.order_id} — TVA {self.vat_rate}: {self.vat_amount}"
+
+
+class OrderCounter(models.Model):
+    """Compteur d'allocation : numéros de commande du jour, séquences de table.
+
+    Une ligne par portée (`key`), incrémentée en une instruction par
+    api.services.order_numbers. Le verrou de ligne reste tenu jusqu'à la fin
+    de la transaction appelante : les allocations concurrentes d'une même
+    portée s'ordonnent au lieu de se chevaucher.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    # Jour du compteur quotidien (remis à 1 au changement de jour)
+    day = models.DateField(null=True, blank=True)
+    value = models.PositiveIntegerField(default=0)
+    # Session de table en cours (séquences de table)
+    session_id = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'order_counters'
+        verbose_name = "Compteur de commandes"
+        verbose_name_plural = "Compteurs de commandes"
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
@@ -4,6 +4,7 @@ Modèles Restaurant pour EatQuickeR
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -15,6 +16,7 @@ import random
 import string
 
 from .validators import validate_siret, validate_phone
+from api.utils.directory_index import build_search_text, geohash_encode
 
 class Restaurant(models.Model):
     """Modèle Restaurant étendu pour correspondre au frontend"""
@@ -118,6 +120,11 @@ class Restaurant(models.Model):
         null=True,
         verbose_name="Longitude"
     )
+
+    # Index du répertoire public (api.utils.directory_index), recalculés à
+    # chaque sauvegarde
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
     
     # Statut et gestion
     is_active = models.BooleanField(default=True, verbose_name="Restaurant actif")
@@ -199,11 +206,21 @@ class Restaurant(models.Model):
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
-    
+
+    # Champs sources des index du répertoire
+    DIRECTORY_SOURCE_FIELDS = ('name', 'address', 'city', 'cuisine', 'latitude', 'longitude')
+
     class Meta:
         verbose_name = "Restaurant"
         verbose_name_plural = "Restaurants"
         ordering = ['-created_at']
+        indexes = [
+            # Recherche texte `search_text LIKE '%terme%'` (pg_trgm)
+            GinIndex(
+                fields=['search_text'], name='restaurant_search_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.city}"
@@ -215,8 +232,24 @@ class Restaurant(models.Model):
                 self.is_manually_overridden = False
                 self.manual_override_reason = None
                 self.manual_override_until = None
+
+        self.refresh_directory_index()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.DIRECTORY_SOURCE_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'geohash', 'search_text'}
         
         super().save(*args, **kwargs)
+
+    def refresh_directory_index(self):
+        """Recalcule le géohash et le texte de recherche du répertoire"""
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        self.search_text = build_search_text(
+            self.name, self.address, self.city, self.cuisine,
+            dict(self.CUISINE_CHOICES).get(self.cuisine, ''),
+        )
     
     @property
     def can_receive_orders(self):
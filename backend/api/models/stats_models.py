@@ -0,0 +1,110 @@
+"""
+Agrégats statistiques des commandes.
+
+RestaurantDailyStats — une ligne par (restaurant, jour, seau de paiement,
+statut de paiement, statut de commande). Le jour est la date locale
+(TIME_ZONE) de création de la commande. Table dérivée : maintenue par jour
+à partir des événements de commande (cf. api.services.daily_stats) et
+entièrement reconstructible via `python manage.py rebuild_daily_stats`.
+
+PrepTimeStats — temps de préparation appris par (restaurant, catégorie,
+heure de la journée), mis à jour à chaque commande prête ou servie
+(cf. api.services.prep_time) et reconstructible via
+`python manage.py rebuild_prep_time_stats`.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import models
+
+
+class RestaurantDailyStats(models.Model):
+    # Seaux de paiement — cf. api.utils.commission_utils
+    BUCKET_COMMISSIONABLE = 'commissionable'
+    BUCKET_CARD_OFFLINE = 'card_offline'
+    BUCKET_CASH = 'cash'
+    BUCKET_OTHER = 'other'
+
+    PAYMENT_BUCKET_CHOICES = [
+        (BUCKET_COMMISSIONABLE, 'Stripe (commissionnable)'),
+        (BUCKET_CARD_OFFLINE, 'TPE restaurant'),
+        (BUCKET_CASH, 'Espèces'),
+        (BUCKET_OTHER, 'Non renseigné'),
+    ]
+
+    restaurant = models.ForeignKey(
+        'Restaurant', on_delete=models.CASCADE, related_name='daily_stats'
+    )
+    day = models.DateField()
+    payment_bucket = models.CharField(max_length=20, choices=PAYMENT_BUCKET_CHOICES)
+    payment_status = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+
+    orders_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    # Temps de préparation (created_at → ready_at) des commandes servies
+    prep_time_total = models.DurationField(default=timedelta)
+    prep_time_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'restaurant_daily_stats'
+        verbose_name = 'Statistiques journalières'
+        verbose_name_plural = 'Statistiques journalières'
+        # L'unicité (restaurant, day, ...) sert aussi d'index aux lectures par période
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'day', 'payment_bucket', 'payment_status', 'status'],
+                name='uniq_restaurant_daily_stats_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.restaurant_id} {self.day} {self.payment_bucket}/"
+            f"{self.payment_status}/{self.status}: {self.orders_count}"
+        )
+
+
+class PrepTimeStats(models.Model):
+    # category_id de la ligne « commande entière »
+    ORDER_SCOPE = None
+
+    restaurant = models.ForeignKey(
+        'Restaurant', on_delete=models.CASCADE, related_name='prep_time_stats'
+    )
+    # Catégorie de plats, ou NULL (ORDER_SCOPE) pour la commande entière
+    category = models.ForeignKey(
+        'MenuCategory', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='prep_time_stats',
+    )
+    # Heure locale de création de la commande (0-23)
+    hour = models.PositiveSmallIntegerField()
+
+    samples = models.PositiveIntegerField(default=0)
+    # Moyenne glissante (created_at → prête) en secondes
+    avg_seconds = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'restaurant_prep_time_stats'
+        verbose_name = 'Temps de préparation appris'
+        verbose_name_plural = 'Temps de préparation appris'
+        constraints = [
+            # NULLS NOT DISTINCT : une seule ligne « commande entière » par
+            # heure ; la clé sert d'arbitre à l'upsert ON CONFLICT
+            models.UniqueConstraint(
+                fields=['restaurant', 'category', 'hour'],
+                name='uniq_restaurant_prep_time_stats',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.restaurant_id} cat={self.category_id} {self.hour}h: "
+            f"{self.avg_seconds / 60:.1f} min ({self.samples})"
+        )
@@ -143,4 +143,75 @@ class Table(models.Model):
             return f"{base_url}/table/{self.qr_code}"
         return None
 
+
+def qr_export_upload_path(instance, filename):
+    return f"qr_exports/{instance.restaurant_id}/{filename}"
+
+
+class QrExportJob(models.Model):
+    """
+    Export PDF des QR codes d'un restaurant, généré en tâche de fond
+    (api.services.qr_render) puis téléchargé via `file`.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', "En attente"
+        RUNNING = 'running', "Génération en cours"
+        COMPLETE = 'complete', "Terminé"
+        FAILED = 'failed', "Échec"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    restaurant = models.ForeignKey(
+        'Restaurant',
+        on_delete=models.CASCADE,
+        related_name='qr_export_jobs',
+        verbose_name="Restaurant"
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='qr_export_jobs',
+        verbose_name="Créé par"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+        verbose_name="Statut"
+    )
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Progression (%)")
+
+    # Base des URLs encodées (`{base_url}/t/{code}/`), fixée à la demande
+    base_url = models.CharField(max_length=255, verbose_name="URL de base")
+
+    file = models.FileField(
+        upload_to=qr_export_upload_path,
+        null=True, blank=True,
+        verbose_name="Fichier PDF"
+    )
+    file_name = models.CharField(max_length=255, blank=True, default='')
+    file_size = models.PositiveIntegerField(default=0)
+    tables_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='', verbose_name="Message d'erreur")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Export de QR codes"
+        verbose_name_plural = "Exports de QR codes"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Export QR {self.restaurant_id} ({self.get_status_display()})"
+
+    @property
+    def is_expired(self):
+        return bool(self.expires_at and self.expires_at < timezone.now())
+
+
 # Manager personnalisé pour les commandes
\ No newline at end of file
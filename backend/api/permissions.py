@@ -1,14 +1,19 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from api.models import RestaurateurProfile
+from api.services.authz import get_user_context, in_groups, owns_restaurant, restaurateur_profile
 import rest_framework.permissions as permissions
 
+# Groupes, profil restaurateur et restaurants possédés sont lus dans le
+# contexte d'autorisation de la requête (api.services.authz) : résolu une
+# fois par requête, en cache entre les requêtes.
+
+
 class IsInGroup(BasePermission):
     """
     Vérifie si l'utilisateur appartient à un groupe donné.
     """
 
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name__in=self.groups).exists()
+        return in_groups(request, self.groups)
 
     def __init__(self, groups=None):
         if groups is not None:
@@ -19,10 +24,7 @@ class IsInGroup(BasePermission):
             self.groups = []
 
 class IsRestaurateur(IsInGroup):
-    def has_permission(self, request, view):
-        user = request.user
-        print(f"[DEBUG] {user.username} - groupes : {[g.name for g in user.groups.all()]}")
-        return user and user.groups.filter(name="restaurateur").exists()
+    required_groups = ["restaurateur"]
 
 class IsAdmin(IsInGroup):
     required_groups = ["admin"]
@@ -31,6 +33,11 @@ class IsClient(IsInGroup):
     required_groups = ["client"]
 
 
+def _stripe_verified(request):
+    profile = restaurateur_profile(request)
+    return bool(profile and profile["stripe_verified"])
+
+
 class IsOwnerOrReadOnly(BasePermission):
     """Permission pour les propriétaires de restaurants ou lecture seule"""
     
@@ -41,15 +48,13 @@ class IsOwnerOrReadOnly(BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            restaurateur_profile = RestaurateurProfile.objects.get(user=request.user)
-            return restaurateur_profile.stripe_verified
-        except RestaurateurProfile.DoesNotExist:
-            return False
+        return _stripe_verified(request)
     
 class IsOrderOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.client == request.user or obj.restaurant.owner.user == request.user
+        if not request.user.is_authenticated:
+            return False
+        return obj.user_id == request.user.id or owns_restaurant(request, obj.restaurant_id)
 
 class IsValidatedRestaurateur(permissions.BasePermission):
     """Permission pour les restaurateurs validés Stripe"""
@@ -58,11 +63,7 @@ class IsValidatedRestaurateur(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            restaurateur_profile = RestaurateurProfile.objects.get(user=request.user)
-            return restaurateur_profile.stripe_verified
-        except RestaurateurProfile.DoesNotExist:
-            return False
+        return _stripe_verified(request)
 
 class CanCreateRestaurant(permissions.BasePermission):
     """Permission pour créer des restaurants (restaurateurs validés seulement)"""
@@ -74,11 +75,7 @@ class CanCreateRestaurant(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            restaurateur_profile = RestaurateurProfile.objects.get(user=request.user)
-            return restaurateur_profile.stripe_verified
-        except RestaurateurProfile.DoesNotExist:
-            return False
+        return _stripe_verified(request)
 
 
 # ============================================================================
@@ -97,11 +94,8 @@ class IsRestaurateurOrAdmin(permissions.BasePermission):
             return True
         
         # Vérifier si c'est un restaurateur actif et vérifié
-        try:
-            restaurateur = RestaurateurProfile.objects.get(user=request.user)
-            return restaurateur.is_active and restaurateur.stripe_verified
-        except RestaurateurProfile.DoesNotExist:
-            return False
+        restaurateur = restaurateur_profile(request)
+        return bool(restaurateur and restaurateur["is_active"] and restaurateur["stripe_verified"])
     
     def has_object_permission(self, request, view, obj):
         # Admin peut tout voir
@@ -109,21 +103,20 @@ class IsRestaurateurOrAdmin(permissions.BasePermission):
             return True
         
         # Restaurateur ne peut voir que ses propres données
-        try:
-            restaurateur = RestaurateurProfile.objects.get(user=request.user)
-            
-            # Vérifier selon le type d'objet
-            if hasattr(obj, 'restaurateur'):
-                return obj.restaurateur == restaurateur
-            elif hasattr(obj, 'restaurant'):
-                return obj.restaurant.owner == restaurateur
-            elif hasattr(obj, 'owner'):
-                return obj.owner == restaurateur
-            
-            return False
-        except RestaurateurProfile.DoesNotExist:
+        restaurateur = restaurateur_profile(request)
+        if restaurateur is None:
             return False
 
+        # Vérifier selon le type d'objet
+        if hasattr(obj, 'restaurateur_id'):
+            return obj.restaurateur_id == restaurateur["id"]
+        elif hasattr(obj, 'restaurant_id'):
+            return owns_restaurant(request, obj.restaurant_id)
+        elif hasattr(obj, 'owner_id'):
+            return obj.owner_id == restaurateur["id"]
+
+        return False
+
 
 class CanExportComptabilite(permissions.BasePermission):
     """Permission pour exporter les données comptables"""
@@ -136,23 +129,18 @@ class CanExportComptabilite(permissions.BasePermission):
         if request.user.is_staff:
             return True
         
-        try:
-            restaurateur = RestaurateurProfile.objects.get(user=request.user)
-            
-            # Vérifier les conditions
-            if not restaurateur.is_active or not restaurateur.stripe_verified:
-                return False
-            
-            # Configuration comptable existante
-            from api.models import ComptabiliteSettings
-            if not ComptabiliteSettings.objects.filter(restaurateur=restaurateur).exists():
-                return False
-            
-            return True
-            
-        except RestaurateurProfile.DoesNotExist:
+        context = get_user_context(request)
+        restaurateur = context["profile"]
+        if restaurateur is None:
+            return False
+
+        # Vérifier les conditions
+        if not restaurateur["is_active"] or not restaurateur["stripe_verified"]:
             return False
 
+        # Configuration comptable existante
+        return context["compta_siret"] is not None
+
 
 class CanGenerateFEC(permissions.BasePermission):
     """Permission spécifique pour générer le FEC (document légal)"""
@@ -161,34 +149,27 @@ class CanGenerateFEC(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
         
-        try:
-            restaurateur = RestaurateurProfile.objects.get(user=request.user)
-            
-            # Conditions strictes pour FEC
-            if not (restaurateur.is_active and restaurateur.is_validated and restaurateur.stripe_verified):
-                return False
-            
-            # SIRET valide
-            from api.models import ComptabiliteSettings
-            try:
-                settings = ComptabiliteSettings.objects.get(restaurateur=restaurateur)
-                if not settings.siret or len(settings.siret) != 14:
-                    return False
-            except ComptabiliteSettings.DoesNotExist:
-                return False
-            
-            # Au moins une commande dans l'année
-            from api.models import Order
-            from django.utils import timezone
-            current_year = timezone.now().year
-            
-            has_orders = Order.objects.filter(
-                restaurant__owner=restaurateur,
-                created_at__year=current_year,
-                payment_status='paid'
-            ).exists()
-            
-            return has_orders
-            
-        except (RestaurateurProfile.DoesNotExist, AttributeError):
-            return False
\ No newline at end of file
+        context = get_user_context(request)
+        restaurateur = context["profile"]
+        if restaurateur is None:
+            return False
+
+        # Conditions strictes pour FEC
+        if not (restaurateur["is_active"] and restaurateur["is_validated"] and restaurateur["stripe_verified"]):
+            return False
+
+        # SIRET valide
+        siret = context["compta_siret"]
+        if not siret or len(siret) != 14:
+            return False
+
+        # Au moins une commande dans l'année
+        from api.models import Order
+        from django.utils import timezone
+        current_year = timezone.now().year
+
+        return Order.objects.filter(
+            restaurant_id__in=context["restaurant_id_set"],
+            created_at__year=current_year,
+            payment_status='paid'
+        ).exists()
\ No newline at end of file
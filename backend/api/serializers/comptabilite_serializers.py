@@ -149,6 +149,7 @@ class ExportComptableSerializer(serializers.ModelSerializer):
             "fichier_nom",
             "fichier_taille",
             "statut",
+            "progression",
             "message_erreur",
             "nombre_lignes",
             "checksum_md5",
@@ -213,6 +213,9 @@ class FormuleClientItemSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def _requested_lang(self):
+        # Le contexte `lang` (menus publics compilés) prime sur ?lang=
+        if 'lang' in self.context:
+            return self.context['lang']
         request = self.context.get('request')
         if not request:
             return ''
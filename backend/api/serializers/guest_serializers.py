@@ -20,7 +20,7 @@ class GuestFormuleSerializer(serializers.Serializer):
 
     Validation structurelle uniquement : l'éligibilité (formule active du
     restaurant, plats disponibles, min/max) est vérifiée côté vue avec le
-    restaurant résolu, via api.utils.formule_validation.validate_guest_formules.
+    restaurant résolu, via api.services.cart_pricing.price_guest_cart.
     """
     formule = serializers.UUIDField()
     quantity = serializers.IntegerField(min_value=1, max_value=50, default=1)
@@ -62,6 +62,14 @@ class DraftStatusQuery(serializers.Serializer):
     draft_order_id = serializers.UUIDField()
 
 
+class DraftStatusPollQuery(DraftStatusQuery):
+    """Query serializer for draft status, with optional long-polling"""
+    wait = serializers.IntegerField(
+        required=False, default=0, min_value=0,
+        help_text="Secondes d'attente maximale d'une commande (long-polling, plafonné)"
+    )
+
+
 class DraftStatusResponse(serializers.Serializer):
     """Response serializer for draft status"""
     status = serializers.CharField()
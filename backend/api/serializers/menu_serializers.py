@@ -66,7 +66,12 @@ class MenuItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'dietary_tags', 'allergen_display', 'image_url']
 
     def _requested_lang(self):
-        """Code langue demandé via `?lang=` (vide -> français)."""
+        """Code langue demandé via `?lang=` (vide -> français).
+
+        Le contexte `lang` (menus publics compilés) prime sur la requête.
+        """
+        if 'lang' in self.context:
+            return self.context['lang']
         request = self.context.get('request')
         if not request:
             return ''
@@ -170,10 +170,13 @@ class NotificationListSerializer(serializers.Serializer):
     """Serializer pour la liste paginée de notifications"""
     
     results = NotificationSerializer(many=True)
-    count = serializers.IntegerField()
-    page = serializers.IntegerField()
+    # Pagination par numéro de page (sans `cursor`)
+    count = serializers.IntegerField(required=False)
+    page = serializers.IntegerField(required=False)
     page_size = serializers.IntegerField()
-    total_pages = serializers.IntegerField()
+    total_pages = serializers.IntegerField(required=False)
+    # Pagination par curseur (`cursor`) : null sur la dernière page
+    next_cursor = serializers.CharField(required=False, allow_null=True)
 
 
 class UnreadCountSerializer(serializers.Serializer):
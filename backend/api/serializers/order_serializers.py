@@ -9,6 +9,7 @@ from django.db import transaction
 from decimal import ROUND_HALF_UP
 from django.contrib.auth.models import User
 from django.db.models import Sum
+import uuid
 
 from api.utils.daily_menu_pricing import (
     get_active_daily_menu,
@@ -257,6 +258,17 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 formula_per_cat = None
                 formula_menu_item_ids = set()
 
+        # ─── Résolution groupée : un seul SELECT pour tout le panier ──
+        # Les ids invalides sont ignorés ici ; l'erreur est levée dans la
+        # boucle ci-dessous, à la position de la ligne fautive.
+        requested_ids = set()
+        for item in value:
+            try:
+                requested_ids.add(int(item.get('menu_item')))
+            except (ValueError, TypeError):
+                pass
+        menu_items_by_id = MenuItem.objects.select_related('menu__restaurant').in_bulk(requested_ids)
+
         for i, item in enumerate(value):
             if 'menu_item' not in item:
                 raise serializers.ValidationError(f"Item {i}: menu_item requis")
@@ -265,7 +277,9 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
             try:
                 menu_item_id = int(item['menu_item'])
-                menu_item = MenuItem.objects.select_related('menu__restaurant').get(id=menu_item_id)
+                menu_item = menu_items_by_id.get(menu_item_id)
+                if menu_item is None:
+                    raise MenuItem.DoesNotExist
 
                 if restaurant_id and str(menu_item.menu.restaurant.id) != str(restaurant_id):
                     raise serializers.ValidationError(
@@ -339,18 +353,33 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         restaurant_id = self.initial_data.get('restaurant')
         normalized = []
 
+        # Toutes les formules du panier (et leurs crans/plats) en une passe.
+        # Un id mal formé est simplement introuvable (erreur à sa position).
+        formule_ids = set()
+        for f in value:
+            try:
+                formule_ids.add(uuid.UUID(str(f.get('formule'))))
+            except ValueError:
+                pass
+        formules_by_id = {
+            str(formule.id): formule
+            for formule in (
+                Formule.objects
+                .prefetch_related('courses__items__menu_item')
+                .filter(id__in=formule_ids, restaurant_id=restaurant_id, is_active=True)
+            )
+        }
+
         for idx, f in enumerate(value):
             formule_id = f.get('formule')
             if not formule_id:
                 raise serializers.ValidationError(f"Formule {idx}: champ 'formule' requis")
 
             try:
-                formule = (
-                    Formule.objects
-                    .prefetch_related('courses__items__menu_item')
-                    .get(id=formule_id, restaurant_id=restaurant_id, is_active=True)
-                )
-            except Formule.DoesNotExist:
+                formule = formules_by_id.get(str(uuid.UUID(str(formule_id))))
+            except ValueError:
+                formule = None
+            if formule is None:
                 raise serializers.ValidationError(
                     f"Formule {idx}: introuvable, inactive, ou hors de ce restaurant"
                 )
@@ -433,9 +462,6 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             if not validated_data.get('customer_name'):
                 validated_data['customer_name'] = request.user.get_full_name() or request.user.username
 
-        import uuid
-        validated_data['order_number'] = str(uuid.uuid4())[:8].upper()
-
         # Montants provisoires : recalculés depuis les lignes réelles plus bas.
         validated_data.update({
             'subtotal': Decimal('0.00'),
@@ -453,33 +479,36 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
         order = Order.objects.create(**validated_data)
 
-        # ── Lignes à la carte ────────────────────────────────────────────
+        # ── Construction des lignes en mémoire ───────────────────────────
+        # Tout est calculé ici (TVA comprise) puis écrit en deux bulk_create :
+        # le nombre de requêtes ne dépend plus de la taille du panier, ce qui
+        # raccourcit d'autant la transaction et la durée des verrous.
+        lines = []  # [(OrderItem, [OrderItemComponent])]
+
+        # Lignes à la carte
         for item_data in items_data:
-            try:
-                OrderItem.objects.create(
-                    order=order,
-                    kind='dish',
-                    menu_item=item_data['menu_item'],
-                    quantity=item_data['quantity'],
-                    customizations=item_data['customizations'],
-                    special_instructions=item_data['special_instructions'],
-                    unit_price=item_data['unit_price'],
-                    total_price=item_data['total_price'],
-                    vat_rate=item_data['vat_rate']
-                )
-            except Exception as e:
-                raise serializers.ValidationError(
-                    f"Erreur lors de la création de l'item {item_data['menu_item'].name}: {str(e)}"
-                )
+            line = OrderItem(
+                order=order,
+                kind='dish',
+                menu_item=item_data['menu_item'],
+                quantity=item_data['quantity'],
+                customizations=item_data['customizations'],
+                special_instructions=item_data['special_instructions'],
+                unit_price=item_data['unit_price'],
+                total_price=item_data['total_price'],
+                vat_rate=item_data['vat_rate']
+            )
+            line.apply_dish_vat()  # même formule que OrderItem.save()
+            lines.append((line, []))
 
-        # ── Lignes formule (1 OrderItem + N OrderItemComponent) ──────────
+        # Lignes formule (1 OrderItem + N OrderItemComponent)
         for f in formules_data:
             formule = f['formule']
             quantity = f['quantity']
             unit_price, comps = build_formule_components(formule, f['chosen'])
             line_vat = sum(c['vat_amount'] for c in comps) * quantity
 
-            line = OrderItem.objects.create(
+            line = OrderItem(
                 order=order,
                 kind='formule',
                 menu_item=None,
@@ -490,16 +519,23 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 total_price=(unit_price * quantity).quantize(Decimal('0.01')),
                 vat_amount=line_vat.quantize(Decimal('0.01')),
             )
-            OrderItemComponent.objects.bulk_create([
-                OrderItemComponent(order_item=line, **c) for c in comps
-            ])
+            lines.append((line, [OrderItemComponent(order_item=line, **c) for c in comps]))
+
+        # Arrondi identique à celui de la colonne numeric(10, 2) : les valeurs
+        # en mémoire sont exactement celles qu'une relecture renverrait.
+        cents = Decimal('0.01')
+        for line, _ in lines:
+            line.total_price = Decimal(line.total_price).quantize(cents, rounding=ROUND_HALF_UP)
+            line.vat_amount = Decimal(line.vat_amount).quantize(cents, rounding=ROUND_HALF_UP)
 
-        # ── Recalcul des totaux depuis les lignes réelles ────────────────
+        OrderItem.objects.bulk_create([line for line, _ in lines])
+        OrderItemComponent.objects.bulk_create([c for _, comps in lines for c in comps])
+
+        # ── Totaux depuis les lignes en mémoire, écrits en un seul UPDATE ─
         # subtotal = somme TTC ; tax = somme des TVA (taux mixtes corrects via
         # la ventilation par composant pour les formules).
-        order.refresh_from_db()
-        subtotal = order.items.aggregate(s=Sum('total_price'))['s'] or Decimal('0.00')
-        order.calculate_vat_breakdown()  # remplit order.vat_details
+        subtotal = sum((line.total_price for line, _ in lines), Decimal('0.00'))
+        order.calculate_vat_breakdown(lines=lines)  # remplit order.vat_details
         tax_amount = sum(
             (Decimal(str(b['tva'])) for b in order.vat_details.values()),
             Decimal('0.00')
@@ -507,7 +543,17 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         order.subtotal = subtotal
         order.tax_amount = tax_amount
         order.total_amount = subtotal
-        order.save(update_fields=['subtotal', 'tax_amount', 'total_amount', 'vat_details'])
+        order.updated_at = timezone.now()
+        # QuerySet.update : pas de pre_save (3 SELECT de la même ligne) ni de
+        # post_save — le statut ne change pas, aucune notification à émettre.
+        Order.objects.filter(pk=order.pk).update(
+            subtotal=order.subtotal,
+            tax_amount=order.tax_amount,
+            total_amount=order.total_amount,
+            vat_details=order.vat_details,
+            updated_at=order.updated_at,
+        )
+        order.record_vat_lines(replace=False)
 
         if order.table_session_id:
             try:
@@ -74,3 +74,24 @@ class AvailabilityQuerySerializer(serializers.Serializer):
     restaurant_id = serializers.IntegerField()
     date = serializers.DateField()
     party_size = serializers.IntegerField(min_value=1, max_value=30, default=2)
+
+
+class AvailabilityRangeQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 31
+
+    restaurant_id = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    party_size = serializers.IntegerField(min_value=1, max_value=30, default=2)
+
+    def validate(self, attrs):
+        days = (attrs['end_date'] - attrs['start_date']).days + 1
+        if days < 1:
+            raise serializers.ValidationError(
+                "end_date doit être postérieure ou égale à start_date."
+            )
+        if days > self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"La plage ne peut pas dépasser {self.MAX_DAYS} jours."
+            )
+        return attrs
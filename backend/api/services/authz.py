@@ -0,0 +1,164 @@
+"""
+Contexte d'autorisation d'un utilisateur : groupes, profil restaurateur,
+restaurants possédés.
+
+Lecture :
+    Les classes de permission et les helpers de propriété lisent tous le
+    même contexte, résolu une fois par requête (mémorisé sur la requête)
+    et conservé en cache sous authz:user:<id>. Une requête authentifiée
+    de restaurateur ne relit plus groupes, profil et propriétaire du
+    restaurant à chaque vérification.
+
+Invalidation (api.signals) :
+    changement de groupes (m2m_changed), sauvegarde/suppression de
+    l'utilisateur, du profil restaurateur, des paramètres comptables,
+    création/suppression d'un restaurant ou changement de propriétaire.
+    AUTHZ_CONTEXT_TTL borne les cas non signalés (suppression d'un
+    Group, update() en masse).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+AUTHZ_CONTEXT_TTL = getattr(settings, "AUTHZ_CONTEXT_TTL", 300)
+
+_REQUEST_ATTR = "_authz_context"
+
+
+def context_key(user_id):
+    return f"authz:user:{user_id}"
+
+
+def build_user_context(user):
+    """Contexte sérialisable de l'utilisateur (3 à 4 requêtes)"""
+    from api.models import ComptabiliteSettings, Restaurant, RestaurateurProfile
+
+    context = {
+        "date_joined": user.date_joined.isoformat(),
+        "groups": sorted(user.groups.values_list("name", flat=True)),
+        "profile": None,
+        "restaurant_ids": [],
+        "compta_siret": None,
+    }
+
+    profile = (
+        RestaurateurProfile.objects.filter(user_id=user.pk)
+        .values("id", "is_active", "is_validated", "stripe_verified")
+        .first()
+    )
+    if profile is not None:
+        context["profile"] = profile
+        context["restaurant_ids"] = sorted(
+            Restaurant.objects.filter(owner_id=profile["id"]).values_list("id", flat=True)
+        )
+        context["compta_siret"] = (
+            ComptabiliteSettings.objects.filter(restaurateur_id=profile["id"])
+            .values_list("siret", flat=True)
+            .first()
+        )
+    return context
+
+
+def get_user_context(request):
+    """
+    Contexte d'autorisation de l'utilisateur de la requête, ou None s'il
+    n'est pas authentifié. Mémorisé sur la requête HTTP sous-jacente :
+    partagé par toutes les permissions et vues de la requête.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+
+    http_request = getattr(request, "_request", request)
+    context = getattr(http_request, _REQUEST_ATTR, None)
+    if context is not None and context["user_id"] == user.pk:
+        return context
+
+    key = context_key(user.pk)
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, contexte d'autorisation calculé: {e}")
+        cached = None
+
+    # date_joined écarte une entrée laissée par un autre utilisateur du même
+    # identifiant (base de test recréée, restauration…)
+    if cached is None or cached.get("date_joined") != user.date_joined.isoformat():
+        cached = build_user_context(user)
+        try:
+            cache.set(key, cached, timeout=AUTHZ_CONTEXT_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Contexte d'autorisation non mis en cache: {e}")
+
+    context = {
+        **cached,
+        "user_id": user.pk,
+        "group_set": frozenset(cached["groups"]),
+        "restaurant_id_set": frozenset(cached["restaurant_ids"]),
+    }
+    setattr(http_request, _REQUEST_ATTR, context)
+    return context
+
+
+def _delete_contexts(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation du contexte d'autorisation impossible: {e}")
+
+
+def invalidate_user_context(*user_ids):
+    """
+    Périme le contexte en cache des utilisateurs donnés, tout de suite et
+    après le commit : une requête concurrente a pu remettre en cache
+    l'état antérieur entre-temps.
+    """
+    keys = [context_key(user_id) for user_id in user_ids if user_id]
+    if not keys:
+        return
+    _delete_contexts(keys)
+    transaction.on_commit(lambda: _delete_contexts(keys))
+
+
+def invalidate_profile_context(*profile_ids):
+    """Périme le contexte des utilisateurs des profils restaurateur donnés"""
+    from api.models import RestaurateurProfile
+
+    profile_ids = [profile_id for profile_id in profile_ids if profile_id]
+    if profile_ids:
+        invalidate_user_context(*RestaurateurProfile.objects.filter(
+            id__in=profile_ids
+        ).values_list("user_id", flat=True))
+
+
+# =============================================================================
+# PRÉDICATS
+# =============================================================================
+
+def in_groups(request, groups):
+    context = get_user_context(request)
+    return bool(context) and not context["group_set"].isdisjoint(groups)
+
+
+def restaurateur_profile(request):
+    """Profil restaurateur du contexte (dict) ou None"""
+    context = get_user_context(request)
+    return context["profile"] if context else None
+
+
+def owned_restaurant_ids(request):
+    context = get_user_context(request)
+    return context["restaurant_id_set"] if context else frozenset()
+
+
+def owns_restaurant(request, restaurant_id):
+    """Le restaurant appartient-il au restaurateur connecté ? (sans requête)"""
+    try:
+        restaurant_id = int(restaurant_id)
+    except (TypeError, ValueError):
+        return False
+    return restaurant_id in owned_restaurant_ids(request)
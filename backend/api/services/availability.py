@@ -0,0 +1,159 @@
+"""
+Moteur de disponibilité des tables (réservations + occupations walk-in).
+
+Un index est construit une fois pour une fenêtre [start, end) avec deux
+requêtes : réservations bloquantes et occupations actives qui la
+chevauchent. Chaque table y a ses intervalles occupés triés par début et
+le maximum cumulé des fins ; « la table est-elle libre sur [s, e) ? » se
+résout par un bisect, sans reparcourir les réservations de la journée.
+
+Utilisé par la recherche de créneaux (jour ou plage de jours), la
+création et la réaffectation de réservations, et les suggestions de
+tables libres du plan de salle.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from api.models import Reservation
+from api.models.table_occupancy_models import TableOccupancy
+
+SLOT_STEP_MINUTES = 30
+DEFAULT_DURATION_MINUTES = 90
+
+# Délai minimal entre maintenant et un créneau proposé
+MIN_LEAD_MINUTES = 30
+
+
+class AvailabilityIndex:
+    """Intervalles occupés par table, interrogeables en O(log n)."""
+
+    def __init__(self, table_ids, intervals=()):
+        self.table_ids = list(table_ids)
+        by_table = {tid: [] for tid in self.table_ids}
+        for table_id, starts_at, ends_at in intervals:
+            if table_id in by_table:
+                by_table[table_id].append((starts_at, ends_at))
+
+        self._starts = {}
+        self._max_ends = {}
+        for table_id, busy in by_table.items():
+            busy.sort()
+            max_ends = []
+            running = None
+            for _, ends_at in busy:
+                running = ends_at if running is None or ends_at > running else running
+                max_ends.append(running)
+            self._starts[table_id] = [s for s, _ in busy]
+            self._max_ends[table_id] = max_ends
+
+    @classmethod
+    def build(cls, table_ids, starts_at, ends_at, exclude_reservation_id=None):
+        """Index des tables données pour la fenêtre [starts_at, ends_at)."""
+        table_ids = list(table_ids)
+        reservations = Reservation.objects.filter(
+            table_id__in=table_ids,
+            status__in=Reservation.BLOCKING_STATUSES,
+            starts_at__lt=ends_at,
+            ends_at__gt=starts_at,
+        )
+        if exclude_reservation_id:
+            reservations = reservations.exclude(id=exclude_reservation_id)
+        intervals = list(reservations.values_list('table_id', 'starts_at', 'ends_at'))
+        intervals += list(
+            TableOccupancy.objects.overlapping(table_ids, starts_at, ends_at)
+            .values_list('table_id', 'started_at', 'expected_end_at')
+        )
+        return cls(table_ids, intervals)
+
+    def is_free(self, table_id, starts_at, ends_at):
+        # Intervalles commençant avant ends_at : libre si aucun ne finit
+        # après starts_at, i.e. si le max cumulé de leurs fins est <= starts_at.
+        i = bisect_left(self._starts[table_id], ends_at)
+        return i == 0 or self._max_ends[table_id][i - 1] <= starts_at
+
+    def free_tables(self, starts_at, ends_at):
+        """Tables libres sur [starts_at, ends_at), dans l'ordre de l'index."""
+        return [tid for tid in self.table_ids if self.is_free(tid, starts_at, ends_at)]
+
+    def first_free(self, starts_at, ends_at):
+        return next(
+            (tid for tid in self.table_ids if self.is_free(tid, starts_at, ends_at)),
+            None,
+        )
+
+    def count_free(self, starts_at, ends_at):
+        return sum(1 for tid in self.table_ids if self.is_free(tid, starts_at, ends_at))
+
+
+# =============================================================================
+# CRÉNEAUX
+# =============================================================================
+
+def weekly_periods(restaurant):
+    """
+    Périodes d'ouverture par jour de la semaine, en une requête.
+
+    OpeningHours.day_of_week : 0 = dimanche (convention frontend existante).
+    """
+    weekly = {}
+    for oh in restaurant.opening_hours.filter(is_closed=False).prefetch_related('periods'):
+        periods = [(p.start_time, p.end_time) for p in oh.periods.all()]
+        if not periods and oh.opening_time and oh.closing_time:
+            # Rétrocompatibilité ancien format
+            periods = [(oh.opening_time, oh.closing_time)]
+        weekly[oh.day_of_week] = periods
+    return weekly
+
+
+def periods_for(weekly, date):
+    """Python date.weekday() : 0 = lundi → conversion vers day_of_week."""
+    return weekly.get((date.weekday() + 1) % 7, [])
+
+
+def _slot_starts(weekly, date, duration, step, not_before):
+    tz = timezone.get_current_timezone()
+    for start_time, end_time in periods_for(weekly, date):
+        cursor = timezone.make_aware(datetime.combine(date, start_time), tz)
+        period_end = timezone.make_aware(datetime.combine(date, end_time), tz)
+        while cursor + duration <= period_end:
+            if cursor > not_before:
+                yield cursor
+            cursor += step
+
+
+def available_slots(restaurant, table_ids, dates,
+                    duration_minutes=DEFAULT_DURATION_MINUTES,
+                    step_minutes=SLOT_STEP_MINUTES):
+    """
+    Créneaux réservables pour chaque date : {date: [{starts_at, time, available_tables}]}.
+
+    Un seul index couvre toute la plage de dates.
+    """
+    dates = sorted(dates)
+    result = {date: [] for date in dates}
+    if not dates or not table_ids:
+        return result
+
+    tz = timezone.get_current_timezone()
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=step_minutes)
+    not_before = timezone.now() + timedelta(minutes=MIN_LEAD_MINUTES)
+    window_start = timezone.make_aware(datetime.combine(dates[0], datetime.min.time()), tz)
+    window_end = timezone.make_aware(
+        datetime.combine(dates[-1] + timedelta(days=1), datetime.min.time()), tz
+    )
+
+    weekly = weekly_periods(restaurant)
+    index = AvailabilityIndex.build(table_ids, window_start, window_end)
+    for date in dates:
+        for cursor in _slot_starts(weekly, date, duration, step, not_before):
+            free = index.count_free(cursor, cursor + duration)
+            if free > 0:
+                result[date].append({
+                    'starts_at': cursor.isoformat(),
+                    'time': timezone.localtime(cursor).strftime('%H:%M'),
+                    'available_tables': free,
+                })
+    return result
@@ -0,0 +1,221 @@
+"""
+Tarification groupée d'un panier invité (GuestPrepare, create_order_from_draft).
+
+Tous les plats du panier sont chargés en une requête, toutes ses formules
+(crans et plats éligibles) en une passe de prefetch : le nombre de requêtes
+ne dépend pas de la taille du panier. Le résultat (`PricedCart`) porte les
+objets résolus, le montant en centimes et la forme JSON des formules
+stockée dans DraftOrder.formules ; create_order_from_draft en construit
+directement les lignes de commande.
+
+Deux modes :
+    strict=True  — préparation (GuestPrepare) : plats disponibles, formules
+                   actives, contraintes min/max des crans ; une erreur
+                   lève Http404 (plat) ou ValidationError (formule).
+    strict=False — confirmation (create_order_from_draft) : on re-résout le
+                   draft aux prix courants ; une formule ou un choix disparu
+                   est ignoré, comme auparavant.
+"""
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.http import Http404
+from rest_framework import serializers
+
+from api.models import Formule, MenuItem
+
+
+@dataclass
+class PricedItem:
+    """Ligne à la carte : plat résolu et prix unitaire TTC courant"""
+    menu_item: MenuItem
+    quantity: int
+    options: dict = field(default_factory=dict)
+
+    @property
+    def unit_price(self):
+        return self.menu_item.price
+
+    @property
+    def amount_cents(self):
+        return int(Decimal(self.unit_price) * 100) * self.quantity
+
+
+@dataclass
+class PricedFormule:
+    """Formule résolue : choix [{course, menu_item, extra_price}] par cran"""
+    formule: Formule
+    quantity: int
+    chosen: list = field(default_factory=list)
+
+    @property
+    def unit_price(self):
+        """Prix de base + Σ suppléments (= build_formule_components.unit_price)"""
+        return Decimal(self.formule.price) + sum(
+            (Decimal(c['extra_price'] or 0) for c in self.chosen), Decimal('0')
+        )
+
+    @property
+    def amount_cents(self):
+        return int(self.unit_price * 100) * self.quantity
+
+    def as_json(self):
+        return {
+            'formule': str(self.formule.id),
+            'quantity': self.quantity,
+            'selections': [
+                {'course': str(c['course'].id), 'menu_item': c['menu_item'].id}
+                for c in self.chosen
+            ],
+        }
+
+
+@dataclass
+class PricedCart:
+    items: list = field(default_factory=list)
+    formules: list = field(default_factory=list)
+
+    @property
+    def amount_cents(self):
+        return (
+            sum(item.amount_cents for item in self.items)
+            + sum(f.amount_cents for f in self.formules)
+        )
+
+    def formules_json(self):
+        """Forme stockée dans DraftOrder.formules"""
+        return [f.as_json() for f in self.formules]
+
+
+# =============================================================================
+# RÉSOLUTION
+# =============================================================================
+
+def price_guest_cart(restaurant, items, formules=None, strict=True):
+    """
+    Résout et tarifie un panier invité.
+
+    Args:
+        restaurant: restaurant déjà résolu.
+        items:      [{menu_item_id, quantity, options?}] (GuestItemSerializer
+                    ou DraftOrder.items).
+        formules:   [{formule, quantity, selections:[{course, menu_item}]}].
+        strict:     voir le docstring du module.
+    """
+    return PricedCart(
+        items=_price_items(restaurant, items or [], strict),
+        formules=_price_formules(restaurant, formules or [], strict),
+    )
+
+
+def _price_items(restaurant, items, strict):
+    menu_items = MenuItem.objects.filter(
+        id__in={int(it['menu_item_id']) for it in items},
+        menu__restaurant=restaurant,
+    )
+    if strict:
+        menu_items = menu_items.filter(is_available=True)
+    by_id = {mi.id: mi for mi in menu_items}
+
+    priced = []
+    for it in items:
+        mi = by_id.get(int(it['menu_item_id']))
+        if mi is None:
+            if strict:
+                raise Http404("Plat introuvable ou indisponible")
+            raise MenuItem.DoesNotExist(f"MenuItem {it['menu_item_id']} introuvable")
+        priced.append(PricedItem(
+            menu_item=mi,
+            quantity=int(it['quantity']),
+            options=it.get('options') or {},
+        ))
+    return priced
+
+
+def _load_formules(restaurant, formules, strict):
+    """Formules du panier avec crans et plats éligibles, en une passe"""
+    ids = set()
+    for f in formules:
+        try:
+            ids.add(uuid.UUID(str(f['formule'])))
+        except ValueError:
+            pass
+    if not ids:
+        return {}
+    queryset = Formule.objects.prefetch_related('courses__items__menu_item').filter(
+        id__in=ids, restaurant=restaurant
+    )
+    if strict:
+        queryset = queryset.filter(is_active=True)
+    return {str(formule.id): formule for formule in queryset}
+
+
+def _price_formules(restaurant, formules, strict):
+    formules_by_id = _load_formules(restaurant, formules, strict)
+
+    priced = []
+    for idx, f in enumerate(formules):
+        try:
+            formule = formules_by_id.get(str(uuid.UUID(str(f['formule']))))
+        except ValueError:
+            formule = None
+        if formule is None:
+            if strict:
+                raise serializers.ValidationError(
+                    f"Formule {idx}: introuvable, inactive, ou hors de ce restaurant"
+                )
+            continue
+
+        courses = list(formule.courses.all())
+        courses_by_id = {str(c.id): c for c in courses}
+        picked = {str(c.id): 0 for c in courses}
+        chosen = []
+
+        for sel in f.get('selections', []):
+            course = courses_by_id.get(str(sel['course']))
+            if course is None:
+                if strict:
+                    raise serializers.ValidationError(
+                        f"Formule {idx}: cran inconnu pour cette formule"
+                    )
+                continue
+            course_items = {ci.menu_item_id: ci for ci in course.items.all()}
+            course_item = course_items.get(int(sel['menu_item']))
+            if strict and not (
+                course_item and course_item.is_available and course_item.menu_item.is_available
+            ):
+                raise serializers.ValidationError(
+                    f"Formule {idx}: plat indisponible dans le cran « {course.name} »"
+                )
+            if course_item is None:
+                continue
+            picked[str(course.id)] += 1
+            chosen.append({
+                'course': course,
+                'menu_item': course_item.menu_item,
+                'extra_price': course_item.extra_price,
+            })
+
+        if strict:
+            for course in courses:
+                n = picked[str(course.id)]
+                if course.is_required and n < course.min_choices:
+                    raise serializers.ValidationError(
+                        f"Formule {idx}: « {course.name} » nécessite au moins "
+                        f"{course.min_choices} choix"
+                    )
+                if n > course.max_choices:
+                    raise serializers.ValidationError(
+                        f"Formule {idx}: « {course.name} » accepte au plus "
+                        f"{course.max_choices} choix"
+                    )
+        elif not chosen:
+            continue
+
+        priced.append(PricedFormule(
+            formule=formule,
+            quantity=int(f.get('quantity', 1)),
+            chosen=chosen,
+        ))
+    return priced
@@ -0,0 +1,284 @@
+"""
+Menus publics compilés (scan QR, carte, formules, menu du jour).
+
+Lecture :
+    Chaque document public d'un restaurant est sérialisé une fois par
+    langue, encodé en JSON, compressé (gzip, brotli si disponible) et
+    stocké en cache avec un ETag dérivé du contenu. Une requête servie
+    depuis le cache ne coûte aucune requête SQL ; `If-None-Match`
+    identique renvoie 304.
+
+Écriture :
+    Toute modification d'un élément de carte (plat, catégorie, menu,
+    menu du jour, formule, restaurant) incrémente après commit la
+    génération du restaurant : les documents de la génération précédente
+    ne sont plus lus et expirent d'eux-mêmes. Les écritures par
+    QuerySet.update() ne déclenchent pas de signal — COMPILED_MENU_TTL
+    borne l'écart.
+"""
+import gzip
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from api.models import (
+    DailyMenu, DailyMenuItem, Formule, FormuleCourse, FormuleCourseItem,
+    Menu, MenuCategory, MenuItem, MenuSubCategory,
+)
+from api.models.ai_menu_models import SUPPORTED_LANGUAGE_CODES
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie maximale d'un document compilé (secondes)
+COMPILED_MENU_TTL = getattr(settings, "COMPILED_MENU_TTL", 60 * 60)
+
+MENUS = 'menus'
+FORMULES = 'formules'
+DAILY = 'daily'
+QR = 'qr'
+
+# Documents dont le contenu ne dépend pas de ?lang=
+_UNLOCALIZED = (DAILY, QR)
+
+
+def generation_key(restaurant_id):
+    return f"compiled_menu:gen:{restaurant_id}"
+
+
+def document_key(kind, restaurant_id, lang, generation):
+    if kind == DAILY:
+        # Le menu du jour change de document à minuit
+        lang = timezone.now().date().isoformat()
+    return f"compiled_menu:{kind}:{restaurant_id}:{generation}:{lang}"
+
+
+def get_generation(restaurant_id):
+    return cache.get(generation_key(restaurant_id)) or 0
+
+
+def bump_generation(restaurant_id):
+    key = generation_key(restaurant_id)
+    cache.add(key, 0, timeout=None)
+    return cache.incr(key)
+
+
+def normalize_lang(raw):
+    """Code langue supporté, '' pour le français ou une langue inconnue"""
+    code = (raw or '').strip().lower()
+    return code if code in SUPPORTED_LANGUAGE_CODES and code != 'fr' else ''
+
+
+# =============================================================================
+# CONSTRUCTION
+# =============================================================================
+
+def _menus(restaurant_id, context):
+    from api.serializers.menu_serializers import MenuSerializer
+
+    menus = Menu.objects.filter(
+        restaurant_id=restaurant_id, is_available=True
+    ).select_related('restaurant__owner').prefetch_related(
+        Prefetch('items', queryset=MenuItem.objects.select_related('category', 'subcategory'))
+    )
+    return 200, MenuSerializer(menus, many=True, context=context).data
+
+
+def _formules(restaurant_id, context):
+    from api.serializers.formule_serializers import FormuleClientSerializer
+
+    formules = (
+        Formule.objects
+        .filter(restaurant_id=restaurant_id, is_active=True)
+        .prefetch_related('courses__items__menu_item')
+        .order_by('order', 'name')
+    )
+    return 200, FormuleClientSerializer(formules, many=True, context=context).data
+
+
+def _daily(restaurant_id, context):
+    from api.serializers.daily_menu_serializers import DailyMenuPublicSerializer
+
+    daily_menu = DailyMenu.objects.select_related('restaurant').filter(
+        restaurant_id=restaurant_id,
+        date=timezone.now().date(),
+        is_active=True,
+    ).first()
+    if daily_menu is None:
+        return 404, {'message': 'Aucun menu du jour disponible pour ce restaurant'}
+    return 200, DailyMenuPublicSerializer(daily_menu, context=context).data
+
+
+def _qr(restaurant_id, context):
+    """Carte active regroupée par catégorie (TableQRRouterView)"""
+    menu = Menu.objects.filter(restaurant_id=restaurant_id, is_available=True).first()
+    if menu is None:
+        return 404, None
+
+    categories = {}
+    items = MenuItem.objects.filter(
+        menu=menu, is_available=True
+    ).select_related('category').order_by('category', 'name')
+    for item in items:
+        label = item.category.name if item.category else ''
+        categories.setdefault(label, []).append({
+            "id": str(item.id),
+            "name": item.name,
+            "description": item.description,
+            "price": float(item.price),
+            "allergens": item.allergen_display,
+            "dietary_tags": item.dietary_tags,
+            "is_vegetarian": item.is_vegetarian,
+            "is_vegan": item.is_vegan,
+            "is_gluten_free": item.is_gluten_free,
+        })
+
+    return 200, {"id": str(menu.id), "name": menu.name, "categories": categories}
+
+
+BUILDERS = {
+    MENUS: _menus,
+    FORMULES: _formules,
+    DAILY: _daily,
+    QR: _qr,
+}
+
+
+def compile_document(kind, restaurant_id, lang, request=None):
+    """Sérialise, encode et compresse un document public"""
+    status, data = BUILDERS[kind](restaurant_id, {'request': request, 'lang': lang})
+    body = JSONRenderer().render(data)
+    digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+    return {
+        'status': status,
+        'data': data if kind == QR else None,
+        'etag': f'W/"{digest}"',
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=6, mtime=0),
+        'br': brotli.compress(body) if brotli else None,
+    }
+
+
+def get_document(kind, restaurant_id, lang='', request=None):
+    """
+    Document compilé courant, depuis le cache ou reconstruit. `request`
+    sert uniquement aux URLs absolues des images lors de la construction.
+    """
+    lang = '' if kind in _UNLOCALIZED else normalize_lang(lang)
+    try:
+        generation = get_generation(restaurant_id)
+        key = document_key(kind, restaurant_id, lang, generation)
+        entry = cache.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, menu {kind} compilé à la volée ({restaurant_id}): {e}")
+        return compile_document(kind, restaurant_id, lang, request)
+
+    if entry is not None:
+        return entry
+
+    entry = compile_document(kind, restaurant_id, lang, request)
+    # Modification pendant la construction : ne pas figer un état dépassé
+    if get_generation(restaurant_id) == generation:
+        cache.set(key, entry, timeout=COMPILED_MENU_TTL)
+    return entry
+
+
+# =============================================================================
+# RÉPONSE HTTP
+# =============================================================================
+
+def _accepted_encoding(request, entry):
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if entry['br'] is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Comparaison faible : un proxy peut avoir retiré ou ajouté le W/
+    bare = etag.removeprefix('W/')
+    return any(tag.removeprefix('W/') == bare for tag in parse_etags(header))
+
+
+def document_response(request, entry):
+    """Réponse HTTP d'un document compilé (304, corps précompressé ou brut)"""
+    if entry['status'] == 200 and _etag_matches(request, entry['etag']):
+        response = HttpResponse(status=304)
+    else:
+        encoding = _accepted_encoding(request, entry)
+        response = HttpResponse(
+            entry[encoding] if encoding else entry['identity'],
+            status=entry['status'],
+            content_type='application/json',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = entry['etag']
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def serve_document(request, kind, restaurant_id):
+    lang = request.GET.get('lang', '')
+    return document_response(request, get_document(kind, restaurant_id, lang, request))
+
+
+# =============================================================================
+# INVALIDATION
+# =============================================================================
+
+# Modèle → (modèle parent, attribut FK, chemin vers restaurant_id depuis le parent)
+_PARENTS = {
+    MenuItem: (Menu, 'menu_id', 'restaurant_id'),
+    MenuSubCategory: (MenuCategory, 'category_id', 'restaurant_id'),
+    DailyMenuItem: (DailyMenu, 'daily_menu_id', 'restaurant_id'),
+    FormuleCourse: (Formule, 'formule_id', 'restaurant_id'),
+    FormuleCourseItem: (FormuleCourse, 'course_id', 'formule__restaurant_id'),
+}
+
+
+def restaurant_id_for(instance):
+    """Restaurant d'un élément de carte (None si le parent a disparu)"""
+    if type(instance).__name__ == 'Restaurant':
+        return instance.pk
+    if hasattr(instance, 'restaurant_id'):
+        return instance.restaurant_id
+
+    parent, fk, path = _PARENTS[type(instance)]
+    return parent.objects.filter(pk=getattr(instance, fk)).values_list(path, flat=True).first()
+
+
+def invalidate_restaurant_menus(restaurant_id):
+    """Périme après commit les documents compilés d'un restaurant"""
+    if restaurant_id is None:
+        return
+
+    def bump():
+        try:
+            bump_generation(restaurant_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Menus compilés non invalidés ({restaurant_id}): {e}")
+
+    transaction.on_commit(bump)
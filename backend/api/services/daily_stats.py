@@ -0,0 +1,271 @@
+"""
+Agrégats journaliers des commandes (RestaurantDailyStats).
+
+Écriture :
+    Chaque sauvegarde/suppression de commande marque son jour comme à
+    recalculer ; le recalcul (une requête GROUP BY sur une journée d'un
+    restaurant) est regroupé et exécuté hors requête par Celery.
+    `rebuild_daily_stats` reconstruit tout ou partie de la table par upsert
+    (INSERT … ON CONFLICT) : deux recalculs concurrents d'une même journée
+    ne se heurtent pas à l'unicité et ne s'effacent pas mutuellement.
+
+Lecture :
+    `order_rollup` fusionne les jours complets lus dans l'agrégat et la
+    journée en cours, seule lue sur les commandes brutes.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value, When,
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.models import Order, RestaurantDailyStats
+from api.utils.commission_utils import COMMISSIONABLE_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Regroupement des recalculs d'un même jour (secondes)
+DAILY_STATS_REFRESH_DELAY = getattr(settings, "DAILY_STATS_REFRESH_DELAY", 10)
+
+BUCKET_COMMISSIONABLE = RestaurantDailyStats.BUCKET_COMMISSIONABLE
+BUCKET_CARD_OFFLINE = RestaurantDailyStats.BUCKET_CARD_OFFLINE
+BUCKET_CASH = RestaurantDailyStats.BUCKET_CASH
+BUCKET_OTHER = RestaurantDailyStats.BUCKET_OTHER
+
+PAYMENT_BUCKET = Case(
+    When(payment_method__in=COMMISSIONABLE_METHODS, then=Value(BUCKET_COMMISSIONABLE)),
+    When(payment_method='card', then=Value(BUCKET_CARD_OFFLINE)),
+    When(payment_method__in=['cash', 'cash_pending'], then=Value(BUCKET_CASH)),
+    default=Value(BUCKET_OTHER),
+    output_field=CharField(),
+)
+
+# Mêmes critères que OrderViewSet.statistics (servies avec ready_at)
+_PREPARED = Q(status='served', ready_at__isnull=False)
+
+_ORDER_AGGREGATES = {
+    'orders_count': Count('id'),
+    'total_amount': Sum('total_amount'),
+    'prep_time_total': Sum(
+        ExpressionWrapper(F('ready_at') - F('created_at'), output_field=DurationField()),
+        filter=_PREPARED,
+    ),
+    'prep_time_count': Count('id', filter=_PREPARED),
+}
+
+_ROLLUP_AGGREGATES = {
+    'orders_count': Sum('orders_count'),
+    'total_amount': Sum('total_amount'),
+    'prep_time_total': Sum('prep_time_total'),
+    'prep_time_count': Sum('prep_time_count'),
+}
+
+_GROUP_FIELDS = ('payment_bucket', 'payment_status', 'status')
+
+
+def day_bounds(day):
+    """[début, fin) d'une journée locale, en datetimes aware"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _normalize(row):
+    row['orders_count'] = row['orders_count'] or 0
+    row['total_amount'] = Decimal(str(row['total_amount'] or 0))
+    row['prep_time_total'] = row['prep_time_total'] or timedelta()
+    row['prep_time_count'] = row['prep_time_count'] or 0
+    return row
+
+
+def _grouped_orders(queryset, extra_fields=()):
+    """Commandes brutes groupées comme l'agrégat"""
+    return (
+        queryset
+        .annotate(payment_bucket=PAYMENT_BUCKET)
+        .values(*extra_fields, *_GROUP_FIELDS)
+        .annotate(**_ORDER_AGGREGATES)
+        .order_by()
+    )
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+def order_rollup(restaurant_ids, start_day=None, end_day=None, by_day=False):
+    """
+    Totaux des commandes groupés par (seau de paiement, statut de paiement,
+    statut), pour les jours [start_day, end_day) — None = sans borne.
+
+    Les jours passés viennent de RestaurantDailyStats, la journée en cours
+    des commandes brutes. Avec `by_day`, chaque ligne porte aussi `day`.
+    """
+    if isinstance(restaurant_ids, int) or hasattr(restaurant_ids, 'pk'):
+        restaurant_ids = [getattr(restaurant_ids, 'pk', restaurant_ids)]
+
+    today = timezone.localdate()
+    extra_fields = ('day',) if by_day else ()
+    rows = []
+
+    rollup = RestaurantDailyStats.objects.filter(
+        restaurant_id__in=restaurant_ids, day__lt=today
+    )
+    if start_day is not None:
+        rollup = rollup.filter(day__gte=start_day)
+    if end_day is not None:
+        rollup = rollup.filter(day__lt=end_day)
+
+    if start_day is None or start_day < today:
+        rows.extend(
+            rollup.values(*extra_fields, *_GROUP_FIELDS)
+            .annotate(**_ROLLUP_AGGREGATES)
+            .order_by()
+        )
+
+    if (start_day is None or start_day <= today) and (end_day is None or end_day > today):
+        today_start, today_end = day_bounds(today)
+        raw_today = _grouped_orders(
+            Order.objects.filter(
+                restaurant_id__in=restaurant_ids,
+                created_at__gte=today_start,
+                created_at__lt=today_end,
+            )
+        )
+        for row in raw_today:
+            if by_day:
+                row['day'] = today
+            rows.append(row)
+
+    return [_normalize(row) for row in rows]
+
+
+def order_rows(queryset):
+    """Commandes d'un queryset, groupées et normalisées comme `order_rollup`"""
+    return [_normalize(row) for row in _grouped_orders(queryset)]
+
+
+def paid_by_bucket(rows):
+    """{seau: {'total': Decimal, 'count': int}} des commandes payées"""
+    result = {
+        bucket: {'total': Decimal('0'), 'count': 0}
+        for bucket in (BUCKET_COMMISSIONABLE, BUCKET_CARD_OFFLINE, BUCKET_CASH, BUCKET_OTHER)
+    }
+    for row in rows:
+        if row['payment_status'] == 'paid':
+            result[row['payment_bucket']]['total'] += row['total_amount']
+            result[row['payment_bucket']]['count'] += row['orders_count']
+    return result
+
+
+def count_where(rows, **criteria):
+    """Nombre de commandes des lignes vérifiant field=valeur pour chaque critère"""
+    return sum(
+        row['orders_count'] for row in rows
+        if all(row[field] == value for field, value in criteria.items())
+    )
+
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+def iter_daily_rows(orders):
+    """
+    Lignes de l'agrégat (restaurant, jour, groupe) d'un queryset de
+    commandes, normalisées. Accepte aussi le modèle historique d'une
+    migration.
+    """
+    grouped = _grouped_orders(
+        orders.annotate(day=TruncDate('created_at')),
+        extra_fields=('restaurant_id', 'day'),
+    )
+    # Ordre fixe : deux upserts concurrents verrouillent les lignes dans le même ordre
+    grouped = grouped.order_by('restaurant_id', 'day', *_GROUP_FIELDS)
+    for row in grouped.iterator():
+        yield _normalize(row)
+
+
+def rebuild_daily_stats(restaurant_ids=None, start_day=None, end_day=None):
+    """
+    Recalcule l'agrégat depuis les commandes brutes pour les jours
+    [start_day, end_day] (inclus ; None = sans borne). Retourne le nombre
+    de lignes écrites.
+    """
+    orders = Order.objects.all()
+    existing = RestaurantDailyStats.objects.all()
+
+    if restaurant_ids is not None:
+        orders = orders.filter(restaurant_id__in=restaurant_ids)
+        existing = existing.filter(restaurant_id__in=restaurant_ids)
+    if start_day is not None:
+        orders = orders.filter(created_at__gte=day_bounds(start_day)[0])
+        existing = existing.filter(day__gte=start_day)
+    if end_day is not None:
+        orders = orders.filter(created_at__lt=day_bounds(end_day)[1])
+        existing = existing.filter(day__lte=end_day)
+
+    started = timezone.now()
+    with transaction.atomic():
+        written = RestaurantDailyStats.objects.bulk_create(
+            (RestaurantDailyStats(**row) for row in iter_daily_rows(orders)),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['restaurant', 'day', *_GROUP_FIELDS],
+            update_fields=[*_ORDER_AGGREGATES, 'updated_at'],
+        )
+        # Groupes disparus (commande changée de statut, supprimée) : lignes
+        # que ni ce recalcul ni un recalcul concurrent plus récent n'a réécrites
+        existing.filter(updated_at__lt=started).delete()
+
+    return len(written)
+
+
+def refresh_daily_stats(restaurant_id, day):
+    """Recalcule la journée `day` d'un restaurant"""
+    return rebuild_daily_stats([restaurant_id], start_day=day, end_day=day)
+
+
+def _refresh_key(restaurant_id, day):
+    return f"daily_stats:refresh:{restaurant_id}:{day.isoformat()}"
+
+
+def schedule_daily_stats_refresh(restaurant_id, day):
+    """
+    Planifie après commit le recalcul d'une journée. Les demandes d'une
+    même journée dans la fenêtre DAILY_STATS_REFRESH_DELAY sont regroupées.
+    """
+    transaction.on_commit(lambda: _schedule_refresh(restaurant_id, day))
+
+
+def _schedule_refresh(restaurant_id, day):
+    try:
+        if not cache.add(_refresh_key(restaurant_id, day), True, timeout=DAILY_STATS_REFRESH_DELAY):
+            return
+        from api.tasks import refresh_restaurant_daily_stats
+
+        refresh_restaurant_daily_stats.apply_async(
+            args=[restaurant_id, day.isoformat()], countdown=DAILY_STATS_REFRESH_DELAY
+        )
+    except Exception:
+        logger.exception(f"❌ Planification stats impossible, recalcul immédiat ({restaurant_id} {day})")
+        refresh_daily_stats(restaurant_id, day)
+
+
+def schedule_refresh_for_orders(orders):
+    """Planifie le recalcul des journées touchées par ces commandes"""
+    days = defaultdict(set)
+    for restaurant_id, created_at in orders:
+        days[restaurant_id].add(timezone.localdate(created_at))
+    for restaurant_id, restaurant_days in days.items():
+        for day in restaurant_days:
+            schedule_daily_stats_refresh(restaurant_id, day)
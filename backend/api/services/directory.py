@@ -0,0 +1,156 @@
+"""
+Répertoire public des restaurants partenaires.
+
+Proximité :
+    `nearest_restaurants` restreint les candidats aux cellules géohash
+    couvrant le disque de recherche (colonne indexée, cf.
+    api.utils.directory_index), puis garde les `limit` plus proches sous
+    le rayon (Haversine) sans trier tous les candidats.
+
+Recherche texte :
+    `DirectorySearchFilter` remplace la recherche `icontains` sur quatre
+    colonnes par une condition par terme sur `search_text` (index
+    trigrammes), insensible à la casse et aux accents.
+
+Facettes :
+    Cuisines et villes proposées sont calculées une fois et gardées en
+    cache ; toute sauvegarde de restaurant ou de profil restaurateur les
+    périme après commit (api.signals). DIRECTORY_FACETS_TTL borne les
+    modifications par QuerySet.update().
+"""
+import heapq
+import logging
+from math import asin, cos, radians, sin, sqrt
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import filters
+
+from api.models import Restaurant
+from api.utils.directory_index import covering_cells, normalize_text
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+DIRECTORY_FACETS_TTL = getattr(settings, "DIRECTORY_FACETS_TTL", 10 * 60)
+
+FACETS_KEY = "directory:facets"
+
+
+def public_restaurants():
+    """Restaurants publiquement listables (actifs et pouvant encaisser)"""
+    return Restaurant.objects.filter(
+        is_active=True,
+        owner__is_active=True,
+        owner__stripe_verified=True,
+        is_stripe_active=True,
+        is_manually_overridden=False,
+    )
+
+
+# =============================================================================
+# PROXIMITÉ
+# =============================================================================
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def within_radius(queryset, lat, lng, radius_km):
+    """Candidats du disque : cellules géohash couvrantes + bounding-box"""
+    cells = Q()
+    for cell in covering_cells(lat, lng, radius_km):
+        cells |= Q(geohash__startswith=cell)
+
+    # ~111 km / degré de latitude ; longitude corrigée par cos(lat)
+    lat_delta = radius_km / 111.0
+    lon_delta = radius_km / (111.0 * max(cos(radians(lat)), 0.01))
+    return queryset.filter(
+        cells,
+        latitude__gte=lat - lat_delta,
+        latitude__lte=lat + lat_delta,
+        longitude__gte=lng - lon_delta,
+        longitude__lte=lng + lon_delta,
+    )
+
+
+def nearest_restaurants(queryset, lat, lng, radius_km, limit):
+    """Les `limit` restaurants les plus proches sous le rayon : [(distance_km, restaurant)]"""
+    scored = (
+        (haversine_km(lat, lng, float(r.latitude), float(r.longitude)), r)
+        for r in within_radius(queryset, lat, lng, radius_km)
+    )
+    return heapq.nsmallest(
+        limit,
+        ((distance, r) for distance, r in scored if distance <= radius_km),
+        key=lambda pair: pair[0],
+    )
+
+
+# =============================================================================
+# RECHERCHE TEXTE
+# =============================================================================
+
+class DirectorySearchFilter(filters.SearchFilter):
+    """?search= : chaque terme doit figurer dans le texte indexé du restaurant"""
+
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            term = normalize_text(term)
+            if term:
+                queryset = queryset.filter(search_text__contains=term)
+        return queryset
+
+
+# =============================================================================
+# FACETTES
+# =============================================================================
+
+def compute_directory_facets():
+    restaurants = public_restaurants().order_by()
+    cuisine_labels = dict(Restaurant.CUISINE_CHOICES)
+    cuisines = restaurants.values_list('cuisine', flat=True).distinct().order_by('cuisine')
+    return {
+        'cuisines': [
+            {'value': cuisine, 'label': cuisine_labels.get(cuisine, cuisine)}
+            for cuisine in cuisines if cuisine
+        ],
+        'cities': list(restaurants.values_list('city', flat=True).distinct().order_by('city')),
+    }
+
+
+def get_directory_facets():
+    """Cuisines et villes du répertoire public (en cache)"""
+    try:
+        facets = cache.get(FACETS_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, facettes du répertoire calculées: {e}")
+        return compute_directory_facets()
+
+    if facets is None:
+        facets = compute_directory_facets()
+        try:
+            cache.set(FACETS_KEY, facets, timeout=DIRECTORY_FACETS_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Facettes du répertoire non mises en cache: {e}")
+    return facets
+
+
+def _delete_facets():
+    try:
+        cache.delete(FACETS_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation des facettes du répertoire impossible: {e}")
+
+
+def invalidate_directory_facets():
+    """Périme les facettes tout de suite et après le commit courant"""
+    _delete_facets()
+    transaction.on_commit(_delete_facets)
@@ -0,0 +1,125 @@
+"""
+Statut d'un brouillon de commande invité (guest_draft_status) en long-polling.
+
+Le client qui attend la confirmation Stripe appelle
+GET /guest/draft-status/?draft_order_id=…&wait=<s> : tant que le brouillon
+n'a produit aucune commande, la requête reste ouverte au plus `wait`
+secondes (bornées par GUEST_DRAFT_WAIT_MAX) et répond dès que
+create_order_from_draft a validé sa transaction.
+
+Réveil :
+    `notify_draft_resolved` publie, après le commit, sur le groupe
+    guest_draft_<id> du channel layer (Redis pub/sub) ; la requête en attente
+    y est abonnée, quel que soit le worker qui la sert. Sans channel layer
+    (ou s'il est indisponible) la requête répond tout de suite et le client
+    reprend son polling.
+
+Attente :
+    `wait_for_draft` est une coroutine : la vue async l'attend sur la boucle
+    de daphne sans occuper de thread, et rend sa connexion à la base avant
+    d'attendre. Au-delà de GUEST_DRAFT_MAX_WAITERS attentes simultanées sur
+    un nœud, la requête répond tout de suite (le client reprend son polling).
+"""
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection, transaction
+
+from api.models import DraftOrder
+
+logger = logging.getLogger(__name__)
+
+# Attente maximale d'un long-poll (secondes), sous le timeout des proxys
+GUEST_DRAFT_WAIT_MAX = getattr(settings, "GUEST_DRAFT_WAIT_MAX", 25)
+
+# Long-polls simultanés par nœud ASGI (chacun tient un canal Redis)
+GUEST_DRAFT_MAX_WAITERS = getattr(settings, "GUEST_DRAFT_MAX_WAITERS", 200)
+
+# Long-polls en cours sur ce nœud : modifié sur la boucle asyncio uniquement
+_waiters = 0
+
+# Brouillon encore en attente de commande
+PENDING_DRAFT_STATUSES = ("created", "pi_succeeded")
+
+
+def draft_group_name(draft_id):
+    return f"guest_draft_{draft_id}"
+
+
+def is_pending(draft):
+    return draft.order_id is None and draft.status in PENDING_DRAFT_STATUSES
+
+
+def notify_draft_resolved(draft_id):
+    """Réveille les long-polls du brouillon après le commit (fire-and-forget)"""
+    try:
+        transaction.on_commit(lambda: _send_draft_resolved(draft_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Notification brouillon {draft_id} échouée: {e}")
+
+
+def _send_draft_resolved(draft_id):
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(
+            draft_group_name(draft_id), {"type": "draft.resolved", "draft_order_id": str(draft_id)}
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Notification brouillon {draft_id} échouée: {e}")
+
+
+async def wait_for_draft(draft_id, timeout):
+    """
+    Attend au plus `timeout` secondes que le brouillon soit résolu.
+    L'appelant relit le brouillon ensuite.
+    """
+    global _waiters
+    timeout = min(timeout, GUEST_DRAFT_WAIT_MAX)
+    if timeout <= 0:
+        return
+    if _waiters >= GUEST_DRAFT_MAX_WAITERS:
+        logger.warning(f"⚠️ Long-poll brouillon {draft_id} refusé: {_waiters} attentes en cours")
+        return
+    _waiters += 1
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        await _wait(channel_layer, draft_id, timeout)
+    except Exception as e:
+        logger.warning(f"⚠️ Long-poll brouillon {draft_id} interrompu: {e}")
+    finally:
+        _waiters -= 1
+
+
+def _still_pending(draft_id):
+    """Relit le brouillon puis rend la connexion : rien n'est tenu pendant l'attente"""
+    try:
+        return DraftOrder.objects.filter(
+            pk=draft_id, order__isnull=True, status__in=PENDING_DRAFT_STATUSES
+        ).exists()
+    finally:
+        # Dans une transaction (tests), la connexion est celle de l'appelant
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+async def _wait(channel_layer, draft_id, timeout):
+    group = draft_group_name(draft_id)
+    channel_name = await channel_layer.new_channel()
+    await channel_layer.group_add(group, channel_name)
+    try:
+        # Relecture après l'abonnement : un commit survenu entre la lecture
+        # de la vue et group_add n'est pas manqué.
+        if not await sync_to_async(_still_pending)(draft_id):
+            return
+        await asyncio.wait_for(channel_layer.receive(channel_name), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await channel_layer.group_discard(group, channel_name)
@@ -0,0 +1,296 @@
+"""
+Instantané du plan de salle (FloorPlanViewSet.list) et deltas WebSocket.
+
+Lecture :
+    L'instantané d'un restaurant est construit une fois puis servi depuis
+    le cache jusqu'au prochain événement plan de salle ou jusqu'à la
+    prochaine transition horaire (réservation « bientôt », fin de créneau,
+    occupation dépassée), bornée par FLOORPLAN_SNAPSHOT_TTL.
+
+Écriture :
+    Chaque événement (notify_floorplan_update) incrémente la version du
+    plan, invalide l'instantané et pousse au groupe floorplan_{id} le
+    nouvel état de la table concernée (de toutes les tables concernées
+    pour les événements groupés des tâches de maintenance). Le client
+    applique les deltas dans l'ordre des versions et ne refait un GET que
+    s'il détecte un trou ou reçoit un delta sans table (layout_changed,
+    paramètres…).
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from api.models import Order, Reservation, Table
+from api.models.table_occupancy_models import TableOccupancy
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre d'affichage "réservée bientôt" sur le plan
+RESERVED_SOON_MINUTES = 90
+
+# Durée de vie maximale d'un instantané (secondes)
+FLOORPLAN_SNAPSHOT_TTL = getattr(settings, "FLOORPLAN_SNAPSHOT_TTL", 60)
+
+ACTIVE_ORDER_STATUSES = ('pending', 'confirmed', 'preparing', 'ready')
+
+# Événements qui touchent la structure du plan : pas de delta par table,
+# le client refait un GET.
+REFETCH_EVENTS = ('layout_changed', 'settings_changed')
+
+
+def snapshot_key(restaurant_id):
+    return f"floorplan:snapshot:{restaurant_id}"
+
+
+def version_key(restaurant_id):
+    return f"floorplan:version:{restaurant_id}"
+
+
+def get_version(restaurant_id):
+    return cache.get(version_key(restaurant_id)) or 0
+
+
+def bump_version(restaurant_id):
+    """Invalide l'instantané et incrémente atomiquement la version du plan"""
+    key = version_key(restaurant_id)
+    cache.delete(snapshot_key(restaurant_id))
+    cache.add(key, 0, timeout=None)
+    return cache.incr(key)
+
+
+# =============================================================================
+# CONSTRUCTION
+# =============================================================================
+
+def _tables(restaurant_id, table_id=None, table_ids=None):
+    """Tables actives annotées de la présence d'une commande app en cours"""
+    active_orders = Order.objects.filter(
+        restaurant_id=OuterRef('restaurant_id'),
+        table_number=OuterRef('number'),
+        status__in=ACTIVE_ORDER_STATUSES,
+    )
+    tables = Table.objects.filter(
+        restaurant_id=restaurant_id, is_active=True
+    ).annotate(has_app_orders=Exists(active_orders))
+    if table_id is not None:
+        tables = tables.filter(id=table_id)
+    if table_ids is not None:
+        tables = tables.filter(id__in=table_ids)
+    return list(tables.order_by('number'))
+
+
+def _merge(tables, now):
+    """
+    Fusionne réservations et occupations actives des tables données.
+
+    Retourne (entrées, prochaine transition horaire ou None).
+    """
+    soon = now + timedelta(minutes=RESERVED_SOON_MINUTES)
+    table_ids = [t.id for t in tables]
+
+    # Instants où un statut change sans événement : fin de créneau, début
+    # de réservation, entrée dans la fenêtre "soon", occupation dépassée.
+    # La requête couvre aussi les réservations qui entreront dans la
+    # fenêtre avant l'expiration de l'instantané.
+    transitions = []
+    res_by_table = {}
+    for r in Reservation.objects.filter(
+        table_id__in=table_ids,
+        status__in=('confirmed', 'seated'),
+        starts_at__lt=soon + timedelta(seconds=FLOORPLAN_SNAPSHOT_TTL),
+        ends_at__gt=now,
+    ).select_related('pre_order').order_by('starts_at'):
+        if r.starts_at >= soon:
+            transitions.append(r.starts_at - timedelta(minutes=RESERVED_SOON_MINUTES))
+            continue
+        res_by_table.setdefault(r.table_id, []).append(r)
+        transitions.append(r.ends_at)
+        if r.starts_at > now:
+            transitions.append(r.starts_at)
+
+    occ_by_table = {
+        o.table_id: o
+        for o in TableOccupancy.objects.active().filter(table_id__in=table_ids)
+    }
+
+    entries = []
+    for table in tables:
+        occ = occ_by_table.get(table.id)
+        if occ and occ.expected_end_at > now:
+            transitions.append(occ.expected_end_at)
+        entries.append(_table_entry(table, occ, res_by_table.get(table.id, []), now))
+
+    return entries, min(transitions) if transitions else None
+
+
+def _table_entry(table, occ, table_res, now):
+    """Statut d'une table (priorité : blocked > seated > occupied > reserved_soon > free)"""
+    seated_res = next(
+        (r for r in table_res
+         if r.status == 'seated' and r.starts_at <= now < r.ends_at),
+        None,
+    )
+    next_res = next(
+        (r for r in table_res if r.starts_at > now), None
+    )
+    has_app_orders = table.has_app_orders
+
+    if occ and occ.source == 'blocked':
+        table_status = 'blocked'
+    elif seated_res:
+        table_status = 'seated'
+    elif occ or has_app_orders:
+        table_status = 'occupied'
+    elif next_res:
+        table_status = 'reserved_soon'
+    else:
+        table_status = 'free'
+
+    return {
+        'id': str(table.id),
+        'number': table.number,
+        'capacity': table.capacity,
+        'capacity_max': getattr(table, 'capacity_max', None),
+        'zone': getattr(table, 'zone', '') or '',
+        'pos_x': getattr(table, 'pos_x', None),
+        'pos_y': getattr(table, 'pos_y', None),
+        'shape': getattr(table, 'shape', 'square'),
+        'status': table_status,
+        'has_app_orders': has_app_orders,
+        'occupancy': {
+            'id': str(occ.id),
+            'source': occ.source,
+            'party_size': occ.party_size,
+            'started_at': occ.started_at,
+            'expected_end_at': occ.expected_end_at,
+            'is_overdue': occ.is_overdue,
+            'notes': occ.notes,
+        } if occ else None,
+        'current_reservation': {
+            'id': str(seated_res.id),
+            'customer_name': seated_res.customer_name,
+            'party_size': seated_res.party_size,
+            'ends_at': seated_res.ends_at,
+            'has_paid_pre_order': seated_res.has_paid_pre_order,
+        } if seated_res else None,
+        'next_reservation': {
+            'id': str(next_res.id),
+            'customer_name': next_res.customer_name,
+            'party_size': next_res.party_size,
+            'starts_at': next_res.starts_at,
+            'time': timezone.localtime(next_res.starts_at).strftime('%H:%M'),
+            'has_paid_pre_order': next_res.has_paid_pre_order,
+        } if next_res else None,
+    }
+
+
+def build_floor_plan(restaurant, version=0):
+    """Construit l'instantané complet du plan de salle. Retourne (données, TTL)."""
+    now = timezone.now()
+    tables, next_transition = _merge(_tables(restaurant.id), now)
+
+    counts = {}
+    for t in tables:
+        counts[t['status']] = counts.get(t['status'], 0) + 1
+
+    timeout = FLOORPLAN_SNAPSHOT_TTL
+    if next_transition is not None:
+        timeout = max(1, min(timeout, int((next_transition - now).total_seconds()) + 1))
+
+    return {
+        'restaurant_id': str(restaurant.id),
+        'version': version,
+        'timestamp': now.isoformat(),
+        'reservations_enabled': getattr(restaurant, 'reservations_enabled', False),
+        'tables': tables,
+        'summary': counts,
+    }, timeout
+
+
+def get_floor_plan(restaurant):
+    """
+    Instantané du plan de salle, depuis le cache si possible.
+
+    Il n'est mis en cache que si aucun événement n'est survenu pendant la
+    construction : sinon il pourrait précéder un delta déjà diffusé.
+    """
+    try:
+        cached = cache.get(snapshot_key(restaurant.id))
+        if cached is not None:
+            return cached
+        version = get_version(restaurant.id)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, plan de salle construit en direct: {e}")
+        return build_floor_plan(restaurant)[0]
+
+    snapshot, timeout = build_floor_plan(restaurant, version)
+    try:
+        if get_version(restaurant.id) == version:
+            cache.set(snapshot_key(restaurant.id), snapshot, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"⚠️ Instantané plan de salle non mis en cache: {e}")
+    return snapshot
+
+
+# =============================================================================
+# DELTAS
+# =============================================================================
+
+def table_delta(restaurant_id, table_id):
+    """
+    État courant d'une table, sérialisé JSON pour le channel layer.
+
+    Une table supprimée ou désactivée est renvoyée avec removed=True.
+    """
+    tables = _tables(restaurant_id, table_id=table_id)
+    if not tables:
+        return {'id': str(table_id), 'removed': True}
+    entries, _ = _merge(tables, timezone.now())
+    return json.loads(json.dumps(entries[0], cls=DjangoJSONEncoder))
+
+
+def tables_delta(restaurant_id, table_ids):
+    """État courant de plusieurs tables en une lecture (cf. table_delta)"""
+    tables = _tables(restaurant_id, table_ids=table_ids)
+    entries = _merge(tables, timezone.now())[0] if tables else []
+    found = {entry['id'] for entry in entries}
+    entries += [
+        {'id': str(table_id), 'removed': True}
+        for table_id in table_ids if str(table_id) not in found
+    ]
+    return json.loads(json.dumps(entries, cls=DjangoJSONEncoder))
+
+
+def build_floorplan_event(restaurant_id, event, table_id=None, table_ids=None):
+    """
+    Message group_send d'un événement plan de salle.
+
+    La version est incrémentée avant la lecture de l'état de la table :
+    un delta porte toujours un état au moins aussi récent que sa version.
+    Avec `table_ids` (tâches de maintenance), un seul événement porte
+    l'état de toutes les tables concernées (`tables`).
+    """
+    version = bump_version(restaurant_id)
+    table = None
+    tables = None
+    if event not in REFETCH_EVENTS:
+        if table_id:
+            table = table_delta(restaurant_id, table_id)
+        elif table_ids:
+            tables = tables_delta(restaurant_id, table_ids)
+    return {
+        'type': 'floorplan.update',
+        'event': event,
+        'table_id': str(table_id) if table_id else None,
+        'version': version,
+        'table': table,
+        'tables': tables,
+        'timestamp': timezone.now().isoformat(),
+    }
+
@@ -0,0 +1,181 @@
+"""
+Flux cuisine : tickets des commandes en cours et deltas WebSocket.
+
+Lecture :
+    Un ticket est une projection compacte de la commande (lignes,
+    composants de formule, instructions, minutes écoulées), construite
+    en un nombre constant de requêtes quel que soit le nombre de
+    commandes. Avec `?since=<curseur>`, seules les commandes en cours
+    modifiées après le curseur sont renvoyées, accompagnées de la liste
+    des commandes encore en cours : le client retire les tickets absents.
+    Les deux requêtes passent par l'index partiel order_kitchen_active_idx.
+
+Écriture :
+    L'outbox des commandes (order_events) pousse au groupe kitchen_{id}
+    le ticket courant de toute commande qui entre, reste ou sort du
+    flux cuisine.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from api.models import Order, OrderItem, OrderItemComponent
+from api.services.floor_plan import ACTIVE_ORDER_STATUSES
+
+logger = logging.getLogger(__name__)
+
+KITCHEN_STATUSES = ACTIVE_ORDER_STATUSES
+
+# Recouvrement du curseur : une transaction validée peu après la lecture
+# précédente porte un updated_at antérieur au curseur brut. Les tickets
+# renvoyés deux fois sont idempotents côté client.
+KITCHEN_FEED_OVERLAP_SECONDS = getattr(settings, "KITCHEN_FEED_OVERLAP_SECONDS", 5)
+
+# Seuils d'urgence (minutes écoulées depuis la commande)
+WARNING_MINUTES = 20
+URGENT_MINUTES = 30
+
+
+def kitchen_group(restaurant_id):
+    return f"kitchen_{restaurant_id}"
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(moment):
+    """Curseur opaque : horodatage en microsecondes"""
+    return str((moment - _EPOCH) // _MICROSECOND)
+
+
+def decode_cursor(raw):
+    """Datetime d'un curseur ; ValueError si le curseur est invalide"""
+    micros = int(raw)
+    if micros < 0:
+        raise ValueError(raw)
+    return _EPOCH + micros * _MICROSECOND
+
+
+# =============================================================================
+# TICKETS
+# =============================================================================
+
+def _with_lines(orders):
+    """Précharge lignes et composants : 3 requêtes pour tout le lot"""
+    items = OrderItem.objects.select_related('menu_item', 'formule').prefetch_related(
+        Prefetch('components', queryset=OrderItemComponent.objects.order_by('display_order'))
+    ).order_by('created_at', 'id')
+    return (
+        orders.select_related(None)
+        .prefetch_related(None)
+        .prefetch_related(Prefetch('items', queryset=items))
+        .order_by('created_at')
+    )
+
+
+def urgency_level(minutes):
+    if minutes > URGENT_MINUTES:
+        return 'urgent'
+    if minutes > WARNING_MINUTES:
+        return 'warning'
+    return 'normal'
+
+
+def build_ticket(order, now):
+    lines = [
+        {
+            'id': item.id,
+            'kind': item.kind,
+            'name': item.display_name,
+            'quantity': item.quantity,
+            'special_instructions': item.special_instructions,
+            'customizations': item.customizations,
+            'components': [
+                {'course': c.course_name, 'name': c.menu_item_name}
+                for c in item.components.all()
+            ],
+        }
+        for item in order.items.all()
+    ]
+    elapsed = max(0, int((now - order.created_at).total_seconds() // 60))
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'status': order.status,
+        'order_type': order.order_type,
+        'table_number': order.table_number,
+        'customer_name': order.customer_name or order.guest_contact_name or '',
+        'notes': order.notes,
+        'lines': lines,
+        'items_count': sum(line['quantity'] for line in lines),
+        'created_at': order.created_at.isoformat(),
+        'updated_at': order.updated_at.isoformat(),
+        'ready_at': order.ready_at.isoformat() if order.ready_at else None,
+        'elapsed_minutes': elapsed,
+        'urgency_level': urgency_level(elapsed),
+    }
+
+
+def kitchen_feed(orders, since=None):
+    """
+    Flux cuisine des commandes `orders` (déjà restreintes au restaurant et
+    au propriétaire). Sans `since` : tous les tickets en cours. Avec `since`
+    (datetime) : tickets modifiés depuis + identifiants encore en cours.
+    """
+    now = timezone.now()
+    active = orders.filter(status__in=KITCHEN_STATUSES)
+
+    changed = active
+    if since is not None:
+        changed = active.filter(updated_at__gt=since)
+
+    feed = {
+        'cursor': encode_cursor(now - timedelta(seconds=KITCHEN_FEED_OVERLAP_SECONDS)),
+        'full': since is None,
+        'tickets': [build_ticket(order, now) for order in _with_lines(changed)],
+        'server_time': now.isoformat(),
+    }
+    if since is not None:
+        feed['active_ids'] = list(active.order_by().values_list('id', flat=True))
+    return feed
+
+
+# =============================================================================
+# DELTAS
+# =============================================================================
+
+def notify_kitchen_ticket(order, event):
+    """
+    Pousse le ticket d'une commande du flux cuisine (ou son retrait) au
+    groupe kitchen_{restaurant_id}. Appelé par l'outbox après regroupement.
+    """
+    was_active = not event.get('created') and event.get('old_status') in KITCHEN_STATUSES
+    if not (was_active or order.status in KITCHEN_STATUSES):
+        return
+
+    ticket = None
+    if order.status in KITCHEN_STATUSES:
+        current = _with_lines(Order.objects.filter(pk=order.pk)).first()
+        if current is not None and current.status in KITCHEN_STATUSES:
+            ticket = build_ticket(current, timezone.now())
+
+    message = {
+        'type': 'kitchen.ticket',
+        'order_id': order.pk,
+        'removed': ticket is None,
+        'ticket': ticket,
+        'timestamp': timezone.now().isoformat(),
+    }
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(kitchen_group(order.restaurant_id), message)
+    except Exception as e:
+        logger.warning(f"⚠️ Ticket cuisine non diffusé (commande {order.pk}): {e}")
@@ -0,0 +1,107 @@
+"""
+Outils des tâches périodiques de maintenance (api.tasks).
+
+Traitement ensembliste :
+    `update_in_batches` verrouille un lot de lignes éligibles
+    (SELECT … FOR UPDATE SKIP LOCKED), applique un UPDATE unique au lot
+    puis valide. Les lignes déjà verrouillées par une requête HTTP ou un
+    autre worker sont laissées au passage suivant au lieu de bloquer la
+    tâche ; deux exécutions concurrentes se partagent le travail.
+
+Métriques :
+    `record_task_run` mesure la durée et le nombre de lignes touchées
+    d'une exécution, les journalise et conserve la dernière mesure en
+    cache (task_metrics:<tâche>) pour la supervision.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_BATCH_SIZE = getattr(settings, "MAINTENANCE_BATCH_SIZE", 500)
+
+# Conservation de la dernière mesure (secondes)
+TASK_METRICS_TTL = 7 * 24 * 3600
+
+
+def metrics_key(task_name):
+    return f"task_metrics:{task_name}"
+
+
+class TaskRun:
+    """Mesure d'une exécution de tâche (lignes touchées par catégorie)"""
+
+    def __init__(self, task_name):
+        self.task_name = task_name
+        self.rows = {}
+        self.duration_ms = None
+
+    def add(self, label, count):
+        self.rows[label] = self.rows.get(label, 0) + count
+
+    @property
+    def total(self):
+        return sum(self.rows.values())
+
+    def as_dict(self):
+        return {
+            'task': self.task_name,
+            'duration_ms': self.duration_ms,
+            'rows': dict(self.rows),
+            'total': self.total,
+            'finished_at': timezone.now().isoformat(),
+        }
+
+
+@contextmanager
+def record_task_run(task_name):
+    """Chronomètre le bloc et publie ses métriques, même en cas d'erreur"""
+    run = TaskRun(task_name)
+    started = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"📊 {task_name}: {run.total} ligne(s) en {run.duration_ms} ms {run.rows}"
+        )
+        try:
+            cache.set(metrics_key(task_name), run.as_dict(), timeout=TASK_METRICS_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Métriques {task_name} non enregistrées: {e}")
+
+
+def get_task_metrics(task_name):
+    """Dernière mesure enregistrée pour cette tâche (ou None)"""
+    return cache.get(metrics_key(task_name))
+
+
+def update_in_batches(queryset, apply, fields=(), of=('self',), batch_size=None):
+    """
+    Traite `queryset` par lots verrouillés SKIP LOCKED.
+
+    Chaque lot est une liste de tuples (pk, *fields) ; `apply(rows)`
+    exécute l'UPDATE ensembliste dans la transaction du verrou et doit
+    faire sortir les lignes du filtre (sinon elles seraient reprises au
+    lot suivant). Retourne les tuples de toutes les lignes traitées.
+    """
+    batch_size = batch_size or MAINTENANCE_BATCH_SIZE
+    claimed = []
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.order_by()
+                .select_for_update(skip_locked=True, of=of)
+                .values_list('pk', *fields)[:batch_size]
+            )
+            if rows:
+                apply(rows)
+        claimed.extend(rows)
+        if len(rows) < batch_size:
+            return claimed
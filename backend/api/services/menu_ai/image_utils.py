@@ -6,49 +6,90 @@ Levier de coût principal : une photo brute de smartphone (~12 Mpx) coûte
 ~1 600 tokens — soit un facteur ~10. On redimensionne donc systématiquement
 avant tout appel API.
 
+Les pages d'un job sont préparées en parallèle (``prepare_images``), lues
+en flux depuis le stockage ; les JPEG sont décodés directement à échelle
+réduite. Le base64 n'est calculé que si le fournisseur le demande.
+
 Emplacement : backend/api/services/menu_ai/image_utils.py
 """
 from __future__ import annotations
 
 import base64
+import hashlib
 import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cached_property
 
+from django.conf import settings
+from django.core.cache import cache
 from PIL import Image, ImageOps
 
+logger = logging.getLogger(__name__)
+
 # Côté le plus long, en pixels. 1568 est le seuil au-delà duquel Anthropic
 # redimensionne de toute façon ; c'est aussi un bon compromis pour OpenAI
 # (tuiles de 512 px). Inutile d'envoyer plus.
 MAX_EDGE_PX = 1568
 JPEG_QUALITY = 85
 
+# Pages prétraitées en parallèle : Pillow relâche le GIL pendant le
+# décodage, le redimensionnement et l'encodage, des threads suffisent.
+IMAGE_WORKERS = getattr(settings, 'MENU_AI_IMAGE_WORKERS', 4)
+
+# Images prêtes gardées le temps des reprises de la tâche (max_retries=2).
+PREPARED_IMAGE_TTL = getattr(settings, 'MENU_AI_PREPARED_IMAGE_TTL', 60 * 60)
+
+_HASH_CHUNK = 1024 * 1024
+
 
 @dataclass
 class PreparedImage:
     """Image prête à être envoyée à un fournisseur de vision."""
 
     data: bytes          # JPEG ré-encodé
-    base64: str          # même contenu, encodé base64 (ASCII)
     media_type: str      # toujours 'image/jpeg' ici
     width: int
     height: int
 
+    @cached_property
+    def base64(self) -> str:
+        """Même contenu encodé base64 (ASCII), calculé au premier accès."""
+        return base64.b64encode(self.data).decode('ascii')
+
     @property
     def data_url(self) -> str:
         """Format attendu par l'API OpenAI (data URL)."""
         return f"data:{self.media_type};base64,{self.base64}"
 
 
-def prepare_image(raw: bytes) -> PreparedImage:
-    """Ouvre, corrige l'orientation, redimensionne et ré-encode une image.
+def _cache_key(digest: str) -> str:
+    return f"menu_ai:img:{MAX_EDGE_PX}:{JPEG_QUALITY}:{digest}"
 
-    - ``exif_transpose`` : les photos de smartphone embarquent une orientation
-      EXIF ; sans correction, l'OCR lit une carte tournée de 90°.
-    - Conversion RGB : supprime le canal alpha et les modes exotiques
-      (CMYK, palette P) que JPEG ne sait pas encoder.
-    - Redimensionnement : côté long plafonné à ``MAX_EDGE_PX``.
-    """
-    image = Image.open(io.BytesIO(raw))
+
+def _content_hash(stream) -> str:
+    """Empreinte SHA-256 du flux, lu par morceaux, puis rembobiné."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(_HASH_CHUNK), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _draft_size(size: tuple[int, int]) -> tuple[int, int]:
+    """Taille minimale à décoder pour que le côté long atteigne ``MAX_EDGE_PX``."""
+    ratio = MAX_EDGE_PX / max(size)
+    return max(1, int(size[0] * ratio) + 1), max(1, int(size[1] * ratio) + 1)
+
+
+def _prepare(stream) -> PreparedImage:
+    image = Image.open(stream)
+
+    # JPEG : décodage directement à l'échelle 1/2, 1/4 ou 1/8 la plus
+    # proche au-dessus de la cible (DCT réduite) au lieu des 12 Mpx.
+    if image.format == 'JPEG' and max(image.size) > MAX_EDGE_PX:
+        image.draft('RGB', _draft_size(image.size))
 
     # Applique l'orientation EXIF puis la supprime des métadonnées.
     image = ImageOps.exif_transpose(image)
@@ -63,16 +104,78 @@ def prepare_image(raw: bytes) -> PreparedImage:
             max(1, round(image.width * ratio)),
             max(1, round(image.height * ratio)),
         )
-        image = image.resize(new_size, Image.LANCZOS)
+        # reducing_gap : réduction entière (reduce) rapide avant le LANCZOS
+        image = image.resize(new_size, Image.LANCZOS, reducing_gap=3.0)
 
     buffer = io.BytesIO()
     image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
-    data = buffer.getvalue()
 
     return PreparedImage(
-        data=data,
-        base64=base64.b64encode(data).decode('ascii'),
+        data=buffer.getvalue(),
         media_type='image/jpeg',
         width=image.width,
         height=image.height,
     )
+
+
+def prepare_image(raw) -> PreparedImage:
+    """Ouvre, corrige l'orientation, redimensionne et ré-encode une image.
+
+    ``raw`` : contenu binaire ou fichier binaire ouvert (lu en flux).
+
+    - ``draft`` (JPEG) : la photo est décodée à échelle réduite.
+    - ``exif_transpose`` : les photos de smartphone embarquent une orientation
+      EXIF ; sans correction, l'OCR lit une carte tournée de 90°.
+    - Conversion RGB : supprime le canal alpha et les modes exotiques
+      (CMYK, palette P) que JPEG ne sait pas encoder.
+    - Redimensionnement : côté long plafonné à ``MAX_EDGE_PX``.
+
+    Le résultat est mis en cache sous l'empreinte du contenu : une reprise
+    de la tâche ne refait pas le travail.
+    """
+    stream = io.BytesIO(raw) if isinstance(raw, (bytes, bytearray)) else raw
+    key = _cache_key(_content_hash(stream))
+
+    try:
+        cached = cache.get(key)
+    except Exception as exc:  # noqa: BLE001 - le cache n'est qu'un raccourci
+        logger.warning("Cache des images indisponible : %s", exc)
+        cached = None
+    if cached is not None:
+        data, width, height = cached
+        return PreparedImage(data=data, media_type='image/jpeg', width=width, height=height)
+
+    prepared = _prepare(stream)
+    try:
+        cache.set(key, (prepared.data, prepared.width, prepared.height), timeout=PREPARED_IMAGE_TTL)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Image preparee non mise en cache : %s", exc)
+    return prepared
+
+
+def _prepare_source(source) -> PreparedImage:
+    if isinstance(source, PreparedImage):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return prepare_image(source)
+    # Fichier stocké (FieldFile) : ouvert et lu en flux dans le thread
+    source.open('rb')
+    try:
+        return prepare_image(source)
+    finally:
+        source.close()
+
+
+def prepare_images(sources) -> list[PreparedImage]:
+    """Prépare les pages en parallèle, dans l'ordre de ``sources``.
+
+    ``sources`` : contenus binaires, fichiers stockés (FieldFile) ou images
+    déjà prêtes.
+    """
+    sources = list(sources)
+    if len(sources) <= 1 or IMAGE_WORKERS <= 1:
+        return [_prepare_source(source) for source in sources]
+    with ThreadPoolExecutor(
+        max_workers=min(IMAGE_WORKERS, len(sources)), thread_name_prefix='menu-ai-img',
+    ) as pool:
+        return list(pool.map(_prepare_source, sources))
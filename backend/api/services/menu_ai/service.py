@@ -3,6 +3,9 @@ Orchestration du pipeline d'import de menu par IA :
 
     photos --> extraction (vision) --> charte graphique --> traduction N langues
 
+La traduction est deleguee a l'etage concurrent de `translation.py`
+(langues et lots en parallele, memo des textes deja traduits).
+
 Ce module est :
 - independant de Celery     -> testable en synchrone ;
 - independant du fournisseur -> il consomme le contrat `MenuVisionProvider`.
@@ -18,8 +21,9 @@ import logging
 import re
 from typing import Callable, Optional
 
-from .base import MenuAIError, MenuVisionProvider
-from .image_utils import prepare_image
+from .base import MenuAIConfigError, MenuAIError, MenuVisionProvider
+from .image_utils import prepare_images
+from .translation import translate_texts
 
 logger = logging.getLogger(__name__)
 
@@ -268,8 +272,8 @@ def run_menu_extraction(
     """Execute le pipeline complet et renvoie un resultat pret a persister.
 
     Args:
-        images_bytes:     contenus binaires bruts des photos de carte, dans
-                          l'ordre des pages.
+        images_bytes:     photos de carte dans l'ordre des pages : contenus
+                          binaires ou fichiers stockes (lus en flux).
         target_languages: codes ISO des langues cibles (hors francais).
         provider:         fournisseur a utiliser ; par defaut celui configure.
         on_phase:         callback optionnel('processing'|'translating') pour
@@ -294,7 +298,7 @@ def run_menu_extraction(
         raise MenuAIError("Aucune image a analyser.")
 
     provider = provider or get_vision_provider()
-    prepared = [prepare_image(raw) for raw in images_bytes]
+    prepared = prepare_images(images_bytes)
 
     # -- 1. Extraction vision (toutes les pages en un appel) -----------------
     if on_phase:
@@ -321,19 +325,24 @@ def run_menu_extraction(
         if on_phase:
             on_phase('translating')
 
-        for lang in languages:
-            label = language_labels[lang]
-            try:
-                translation = provider.translate(payload, label)
-                _apply_translations(categories, lang, translation.data or {})
-                total_input += translation.input_tokens
-                total_output += translation.output_tokens
-                models_used.add(translation.model)
-            except Exception as exc:  # noqa: BLE001 - traduction non bloquante
-                logger.warning(
-                    "Traduction '%s' echouee (le contenu francais reste dispo) : %s",
-                    lang, exc,
-                )
+        # Langues et lots en parallele, textes deja traduits lus dans le memo
+        try:
+            translation = translate_texts(provider, payload.values(), languages, language_labels)
+        except MenuAIConfigError as exc:
+            logger.warning(
+                "Traduction impossible (le contenu francais reste dispo) : %s", exc,
+            )
+        else:
+            for lang in languages:
+                known = translation.get(lang)
+                # translate_texts indexe les traductions par texte nettoye
+                _apply_translations(categories, lang, {
+                    key: known[source] for key, text in payload.items()
+                    if (source := text.strip()) in known
+                })
+            total_input += translation.input_tokens
+            total_output += translation.output_tokens
+            models_used |= translation.models
 
     items_total = _count_items(categories)
     subcategories_total = sum(len(c.get('subcategories', [])) for c in categories)
@@ -32,7 +32,8 @@ def process_menu_scan_job(self, job_id):
         pending -> processing -> translating -> ready   (succes)
         pending -> processing -> failed                 (echec)
 
-    - Idempotent : relit toujours les photos depuis zero.
+    - Idempotent : relit toujours les photos depuis zero ; leur pretraitement
+      est en cache (empreinte du contenu) pour les reprises.
     - Une erreur de configuration (cle API manquante...) -> echec immediat,
       sans retry (inutile de retenter).
     - Une autre erreur (reseau, rate limit, JSON invalide) -> retry x2, puis
@@ -58,16 +59,13 @@ def process_menu_scan_job(self, job_id):
     job.error_message = ''
     job.save(update_fields=['status', 'error_message', 'updated_at'])
 
-    # ── Lecture des photos (compatible stockage local et S3) ───────────────
-    images_bytes: list[bytes] = []
-    for scan_image in job.images.order_by('order', 'created_at'):
-        try:
-            scan_image.image.open('rb')
-            images_bytes.append(scan_image.image.read())
-        finally:
-            scan_image.image.close()
+    # ── Photos (stockage local ou S3), lues en flux au pretraitement ───────
+    images = [
+        scan_image.image
+        for scan_image in job.images.order_by('order', 'created_at')
+    ]
 
-    if not images_bytes:
+    if not images:
         job.status = MenuScanJob.Status.FAILED
         job.error_message = "Aucune photo de carte attachee a ce job."
         job.save(update_fields=['status', 'error_message', 'updated_at'])
@@ -91,7 +89,7 @@ def process_menu_scan_job(self, job_id):
     # ── Extraction + traduction ─────────────────────────────────────────────
     try:
         result = run_menu_extraction(
-            images_bytes=images_bytes,
+            images_bytes=images,
             target_languages=job.target_languages or [],
             on_phase=_set_phase,
         )
@@ -7,7 +7,8 @@ traduction du pipeline d'import IA (provider.translate).
 
 Ne retraduit PAS ce qui est deja traduit : pour chaque objet et chaque langue
 cible, on ne traduit que si la cle de langue est absente de `translations`.
-Le restaurateur paie donc uniquement le delta.
+Le restaurateur paie donc uniquement le delta, et les libelles deja
+traduits pour un autre restaurant sont lus dans le memo de traduction.
 """
 from __future__ import annotations
 
@@ -29,39 +30,6 @@ def _missing_languages(obj, target_languages: list[str]) -> list[str]:
     return missing
 
 
-def _translate_name_only(provider, name: str, lang_label: str) -> Optional[str]:
-    """Traduit un unique libelle (nom) vers une langue. None si echec."""
-    try:
-        result = provider.translate({'name': name}, lang_label)
-        value = (result.data or {}).get('name')
-        if isinstance(value, str) and value.strip():
-            return value.strip()
-    except Exception as exc:  # noqa: BLE001 - best effort
-        logger.warning("Traduction '%s' echouee pour « %s » : %s", lang_label, name, exc)
-    return None
-
-
-def _translate_item(provider, name: str, description: str, lang_label: str) -> dict:
-    """Traduit nom + description d'un plat vers une langue. {} si tout echoue."""
-    payload = {'name': name}
-    if description:
-        payload['description'] = description
-    try:
-        result = provider.translate(payload, lang_label)
-        data = result.data or {}
-        out = {}
-        n = data.get('name')
-        d = data.get('description')
-        if isinstance(n, str) and n.strip():
-            out['name'] = n.strip()
-        if isinstance(d, str) and d.strip():
-            out['description'] = d.strip()
-        return out
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("Traduction '%s' echouee pour « %s » : %s", lang_label, name, exc)
-        return {}
-
-
 def translate_restaurant_menu(
     restaurant_id,
     target_languages: list[str],
@@ -70,6 +38,11 @@ def translate_restaurant_menu(
 ) -> dict:
     """Complete les traductions manquantes de tout le menu d'un restaurant.
 
+    Tous les textes a traduire (noms, descriptions) sont collectes puis
+    traduits en une passe par l'etage concurrent (cf. translation.py) :
+    langues et lots en parallele, textes deja connus lus dans le memo.
+    Les objets modifies sont ensuite enregistres par `bulk_update`.
+
     Args:
         restaurant_id:     PK du restaurant.
         target_languages:  codes ISO des langues cibles (hors 'fr').
@@ -80,10 +53,11 @@ def translate_restaurant_menu(
         dict de bilan : { items_translated, categories_translated,
                           subcategories_translated, languages, skipped }
     """
-    from django.conf import settings
     from api.models import MenuItem, MenuCategory, MenuSubCategory
     from api.models.ai_menu_models import SUPPORTED_LANGUAGES
+    from api.services.compiled_menu import invalidate_restaurant_menus
     from . import get_vision_provider
+    from .translation import translate_texts
 
     language_labels = dict(SUPPORTED_LANGUAGES)
 
@@ -97,14 +71,18 @@ def translate_restaurant_menu(
 
     provider = provider or get_vision_provider()
 
-    categories = list(MenuCategory.objects.filter(restaurant_id=restaurant_id))
-    subcategories = list(
-        MenuSubCategory.objects.filter(category__restaurant_id=restaurant_id)
-    )
-    items = list(MenuItem.objects.filter(menu__restaurant_id=restaurant_id))
+    # (cle du bilan, modele, objets, description traduite) : categories et
+    # sous-categories sont traduites sur le nom seul
+    groups = [
+        ('categories_translated', MenuCategory,
+         list(MenuCategory.objects.filter(restaurant_id=restaurant_id)), False),
+        ('subcategories_translated', MenuSubCategory,
+         list(MenuSubCategory.objects.filter(category__restaurant_id=restaurant_id)), False),
+        ('items_translated', MenuItem,
+         list(MenuItem.objects.filter(menu__restaurant_id=restaurant_id)), True),
+    ]
 
-    total = len(categories) + len(subcategories) + len(items)
-    done = 0
+    total = sum(len(objs) for _, _, objs, _ in groups)
     report = {
         'items_translated': 0,
         'categories_translated': 0,
@@ -113,78 +91,72 @@ def translate_restaurant_menu(
         'skipped': 0,
     }
 
-    def _tick():
-        nonlocal done
-        done += 1
-        if on_progress:
-            on_progress(done, total)
-
-    # ── Categories (nom seul) ───────────────────────────────────────────────
-    for cat in categories:
-        missing = _missing_languages(cat, langs)
-        if not missing:
-            report['skipped'] += 1
-            _tick()
-            continue
-        translations = dict(getattr(cat, 'translations', None) or {})
-        changed = False
-        for lang in missing:
-            translated = _translate_name_only(provider, cat.name, language_labels[lang])
-            if translated:
-                translations[lang] = {'name': translated}
-                changed = True
-        if changed:
-            cat.translations = translations
-            cat.save(update_fields=['translations'])
-            report['categories_translated'] += 1
-        _tick()
-
-    # ── Sous-categories (nom seul) ──────────────────────────────────────────
-    for sub in subcategories:
-        missing = _missing_languages(sub, langs)
-        if not missing:
-            report['skipped'] += 1
-            _tick()
-            continue
-        translations = dict(getattr(sub, 'translations', None) or {})
+    # ── Collecte : (objet, langues manquantes) et textes sources ────────────
+    pending = []
+    texts = set()
+    for _, _, objs, with_description in groups:
+        for obj in objs:
+            missing = _missing_languages(obj, langs)
+            if not missing:
+                report['skipped'] += 1
+                continue
+            description = (obj.description or '').strip() if with_description else ''
+            pending.append((obj, missing, description))
+            texts.add(obj.name)
+            if description:
+                texts.add(description)
+
+    languages = sorted({lang for _, missing, _ in pending for lang in missing})
+
+    def _on_batch(done_batches, total_batches):
+        # L'ecriture finale pose le dernier objet
+        if on_progress and total:
+            on_progress(min(report['skipped'] + int(
+                (total - report['skipped']) * done_batches / total_batches
+            ), total - 1), total)
+
+    translation = translate_texts(
+        provider, texts, languages, language_labels, on_batch=_on_batch,
+    )
+
+    # ── Application et enregistrement groupe ────────────────────────────────
+    changed_ids = set()
+    for obj, missing, description in pending:
+        translations = dict(getattr(obj, 'translations', None) or {})
         changed = False
         for lang in missing:
-            translated = _translate_name_only(provider, sub.name, language_labels[lang])
-            if translated:
-                translations[lang] = {'name': translated}
-                changed = True
+            known = translation.get(lang)
+            name = known.get((obj.name or '').strip())
+            # Nom et description peuvent venir de lots differents : un bucket
+            # incomplet passerait pour traduit (_missing_languages) et la
+            # description ne serait jamais reprise
+            if not name or (description and not known.get(description)):
+                continue
+            bucket = {'name': name}
+            if description:
+                bucket['description'] = known[description]
+            translations[lang] = bucket
+            changed = True
         if changed:
-            sub.translations = translations
-            sub.save(update_fields=['translations'])
-            report['subcategories_translated'] += 1
-        _tick()
-
-    # ── Plats (nom + description) ───────────────────────────────────────────
-    for item in items:
-        missing = _missing_languages(item, langs)
-        if not missing:
-            report['skipped'] += 1
-            _tick()
-            continue
-        translations = dict(getattr(item, 'translations', None) or {})
-        changed = False
-        for lang in missing:
-            tr = _translate_item(
-                provider, item.name, item.description or '', language_labels[lang],
-            )
-            if tr:
-                translations[lang] = tr
-                changed = True
+            obj.translations = translations
+            changed_ids.add(id(obj))
+
+    for report_key, model, objs, _ in groups:
+        changed = [obj for obj in objs if id(obj) in changed_ids]
         if changed:
-            item.translations = translations
-            item.save(update_fields=['translations'])
-            report['items_translated'] += 1
-        _tick()
+            model.objects.bulk_update(changed, ['translations'], batch_size=200)
+            report[report_key] = len(changed)
+
+    if changed_ids:
+        invalidate_restaurant_menus(restaurant_id)
+    if on_progress:
+        on_progress(total, total)
 
     logger.info(
         "Traduction menu resto %s terminee : %s plat(s), %s categorie(s), "
-        "%s sous-categorie(s) traduits.",
+        "%s sous-categorie(s) traduits (%s appel(s), %s texte(s) deja connus).",
         restaurant_id, report['items_translated'],
         report['categories_translated'], report['subcategories_translated'],
+        translation.calls, translation.memo_hits,
     )
     return report
@@ -0,0 +1,224 @@
+"""
+Etage de traduction concurrent du pipeline IA.
+
+Partage par l'import de menu (service.run_menu_extraction) et la traduction
+du menu existant (translate_menu.translate_restaurant_menu) :
+
+- les textes sources sont dedoublonnes puis decoupes en lots de
+  MENU_AI_TRANSLATION_BATCH_SIZE valeurs ;
+- les couples (langue, lot) sont repartis sur un pool de
+  MENU_AI_TRANSLATION_CONCURRENCY threads (appels fournisseur bloquants) ;
+- chaque appel passe par le limiteur de debit de son fournisseur
+  (MENU_AI_RATE_LIMITS, requetes/minute, partage par tous les threads du
+  processus) et est retente avec attente exponentielle ;
+- un memo (cache) cle (texte source, langue) evite de retraduire les
+  libelles courants (« Frites », « Salade verte »), tous restaurants
+  confondus.
+
+Best-effort : un lot en echec est journalise et simplement absent du
+resultat ; le francais reste disponible.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .base import MenuAIConfigError
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CONCURRENCY = getattr(settings, 'MENU_AI_TRANSLATION_CONCURRENCY', 4)
+TRANSLATION_BATCH_SIZE = getattr(settings, 'MENU_AI_TRANSLATION_BATCH_SIZE', 60)
+TRANSLATION_MEMO_TTL = getattr(settings, 'MENU_AI_TRANSLATION_MEMO_TTL', 90 * 24 * 3600)
+TRANSLATION_RETRIES = getattr(settings, 'MENU_AI_TRANSLATION_RETRIES', 2)
+RETRY_BACKOFF_SECONDS = 1.0
+
+# Requetes par minute et par fournisseur (0 = sans limite)
+RATE_LIMITS = getattr(settings, 'MENU_AI_RATE_LIMITS', {'anthropic': 50, 'openai': 60})
+
+
+# -----------------------------------------------------------------------------
+# Limiteur de debit
+# -----------------------------------------------------------------------------
+class RateLimiter:
+    """Espacement minimal entre deux appels, partage entre threads."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider_name: str) -> RateLimiter:
+    """Limiteur du fournisseur, commun a tout le processus."""
+    with _limiters_lock:
+        limiter = _limiters.get(provider_name)
+        if limiter is None:
+            limiter = _limiters[provider_name] = RateLimiter(RATE_LIMITS.get(provider_name, 0))
+        return limiter
+
+
+# -----------------------------------------------------------------------------
+# Memo (texte source, langue) -> traduction
+# -----------------------------------------------------------------------------
+def _memo_key(text: str, lang: str) -> str:
+    return f"menu_ai:tr:{lang}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+
+def memo_get_many(texts: list[str], lang: str) -> dict[str, str]:
+    """Traductions deja connues de `texts` vers `lang`."""
+    keys = {_memo_key(text, lang): text for text in texts}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception as exc:  # noqa: BLE001 - le memo n'est qu'un raccourci
+        logger.warning("Memo de traduction indisponible : %s", exc)
+        return {}
+    return {keys[key]: value for key, value in found.items()}
+
+
+def memo_set_many(translations: dict[str, str], lang: str) -> None:
+    try:
+        cache.set_many(
+            {_memo_key(text, lang): value for text, value in translations.items()},
+            timeout=TRANSLATION_MEMO_TTL,
+        )
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Memo de traduction non mis a jour : %s", exc)
+
+
+# -----------------------------------------------------------------------------
+# Traduction concurrente
+# -----------------------------------------------------------------------------
+@dataclass
+class TranslationResult:
+    """Traductions par langue : {lang: {texte_fr: texte_traduit}}."""
+
+    translations: dict[str, dict[str, str]] = field(default_factory=dict)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    models: set = field(default_factory=set)
+    calls: int = 0
+    memo_hits: int = 0
+    failed_batches: int = 0
+
+    def get(self, lang: str) -> dict[str, str]:
+        return self.translations.get(lang, {})
+
+
+def _translate_batch(provider, limiter, batch: list[str], label: str):
+    """Traduit un lot (avec reprises) ; renvoie (ProviderResult, {texte: traduction})."""
+    payload = {f't{n}': text for n, text in enumerate(batch)}
+    for attempt in range(TRANSLATION_RETRIES + 1):
+        limiter.acquire()
+        try:
+            result = provider.translate(payload, label)
+            break
+        except MenuAIConfigError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - erreur fournisseur, on retente
+            if attempt == TRANSLATION_RETRIES:
+                raise
+            delay = RETRY_BACKOFF_SECONDS * (2 ** attempt)
+            logger.info("Traduction '%s' : nouvel essai dans %.1fs (%s)", label, delay, exc)
+            time.sleep(delay)
+
+    data = result.data or {}
+    translated = {}
+    for key, text in payload.items():
+        value = data.get(key)
+        if isinstance(value, str) and value.strip():
+            translated[text] = value.strip()
+    return result, translated
+
+
+def translate_texts(
+    provider,
+    texts: Iterable[str],
+    languages: list[str],
+    language_labels: dict[str, str],
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> TranslationResult:
+    """Traduit `texts` (francais) vers chaque langue de `languages`.
+
+    Args:
+        provider:        fournisseur (contrat `MenuVisionProvider`).
+        texts:           textes sources ; doublons et chaines vides ignores.
+        languages:       codes ISO cibles.
+        language_labels: {code: libelle} transmis au fournisseur.
+        on_batch:        callback(lots_termines, lots_total).
+
+    Raises:
+        MenuAIConfigError : configuration du fournisseur invalide (non
+                            transitoire, inutile de poursuivre).
+    """
+    sources = sorted({text.strip() for text in texts if text and text.strip()})
+    result = TranslationResult()
+
+    jobs = []
+    for lang in languages:
+        known = memo_get_many(sources, lang) if sources else {}
+        result.translations[lang] = dict(known)
+        result.memo_hits += len(known)
+        missing = [text for text in sources if text not in known]
+        for start in range(0, len(missing), TRANSLATION_BATCH_SIZE):
+            jobs.append((lang, missing[start:start + TRANSLATION_BATCH_SIZE]))
+
+    if not jobs:
+        return result
+
+    limiter = get_rate_limiter(provider.name)
+    done = 0
+    workers = max(1, min(TRANSLATION_CONCURRENCY, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='menu-ai-tr') as pool:
+        futures = {
+            pool.submit(_translate_batch, provider, limiter, batch, language_labels[lang]): lang
+            for lang, batch in jobs
+        }
+        for future in as_completed(futures):
+            lang = futures[future]
+            done += 1
+            try:
+                provider_result, translated = future.result()
+            except MenuAIConfigError:
+                for pending in futures:
+                    pending.cancel()
+                raise
+            except Exception as exc:  # noqa: BLE001 - traduction non bloquante
+                result.failed_batches += 1
+                logger.warning(
+                    "Traduction '%s' echouee pour un lot (le contenu francais reste dispo) : %s",
+                    lang, exc,
+                )
+            else:
+                result.calls += 1
+                result.input_tokens += provider_result.input_tokens
+                result.output_tokens += provider_result.output_tokens
+                result.models.add(provider_result.model)
+                result.translations[lang].update(translated)
+                memo_set_many(translated, lang)
+            if on_batch:
+                on_batch(done, len(jobs))
+
+    return result
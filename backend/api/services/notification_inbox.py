@@ -0,0 +1,264 @@
+"""
+Boîte de réception des notifications : pagination par curseur, compteur
+de non lues en cache et purge des notifications expirées.
+
+Lecture :
+    `inbox_page` pagine par curseur sur (created_at, id) décroissants :
+    chaque page est un parcours borné de l'index notif_inbox_keyset_idx,
+    sans OFFSET ni count(), quelle que soit la profondeur de la page.
+
+Compteur :
+    unread_count(user) vit en cache (notifications:unread:<user>). Il est
+    recalculé depuis la base au premier appel (index partiel
+    notif_unread_idx) puis tenu à jour par incr/decr atomiques, après le
+    commit, à la création, la lecture et la suppression. Son TTL ne
+    dépasse jamais la prochaine expiration d'une notification non lue : le
+    badge ne compte pas une notification expirée. « Tout marquer comme
+    lu » supprime la clé plutôt que de la forcer à zéro, pour ne pas
+    écraser une création concurrente. Cache indisponible : on compte en
+    base, comme auparavant.
+
+    Courses : l'incr de RedisCache (EXISTS puis INCR) recrée sans TTL une
+    clé expirée entre les deux appels, avec la valeur `delta` ; un tel
+    résultat (ou un compteur négatif) supprime la clé. Chaque mise à jour
+    marque aussi le recalcul éventuellement en cours
+    (notifications:unread:<user>:recount) : un recalcul croisé par une
+    mise à jour ne garde pas sa valeur, qui a pu manquer ou compter deux
+    fois ce changement.
+
+Purge :
+    `purge_expired_notifications` supprime les notifications expirées par
+    lots verrouillés (update_in_batches) ; le compteur n'en tient déjà pas
+    compte.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from api.models import Notification
+from api.services.kitchen_feed import decode_cursor as decode_moment
+from api.services.kitchen_feed import encode_cursor as encode_moment
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie maximale du compteur en cache (secondes) : borne la dérive
+# si une mise à jour est perdue
+NOTIFICATION_UNREAD_TTL = getattr(settings, "NOTIFICATION_UNREAD_TTL", 3600)
+
+NOTIFICATION_PAGE_SIZE = 20
+NOTIFICATION_PAGE_SIZE_MAX = 100
+
+
+def unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def recount_key(user_id):
+    return f"notifications:unread:{user_id}:recount"
+
+
+# Marque posée par une mise à jour sur le recalcul en cours
+_ADJUSTED = "adjusted"
+
+
+def not_expired(now=None):
+    now = now or timezone.now()
+    return Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+
+
+# =============================================================================
+# PAGINATION PAR CURSEUR
+# =============================================================================
+
+def encode_cursor(notification):
+    """Curseur opaque : <created_at en µs>.<id>"""
+    return f"{encode_moment(notification.created_at)}.{notification.id.hex}"
+
+
+def decode_cursor(raw):
+    """(created_at, id) d'un curseur ; ValueError si le curseur est invalide"""
+    moment, _, notification_id = raw.partition('.')
+    try:
+        return decode_moment(moment), uuid.UUID(notification_id)
+    except (OverflowError, OSError) as e:
+        raise ValueError(raw) from e
+
+
+def inbox(user, unread_only=False, notification_type=None):
+    """Notifications non expirées de l'utilisateur, plus récentes d'abord"""
+    queryset = Notification.objects.filter(user=user).filter(not_expired())
+    if unread_only:
+        queryset = queryset.filter(is_read=False)
+    if notification_type:
+        queryset = queryset.filter(notification_type=notification_type)
+    return queryset.order_by('-created_at', '-id')
+
+
+def inbox_page(queryset, cursor=None, page_size=NOTIFICATION_PAGE_SIZE):
+    """
+    Page suivant le curseur (None : première page).
+
+    Retourne (notifications, next_cursor) ; next_cursor vaut None sur la
+    dernière page. Lève ValueError si le curseur est invalide.
+    """
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id)
+        )
+    notifications = list(queryset[:page_size + 1])
+    if len(notifications) <= page_size:
+        return notifications, None
+    notifications = notifications[:page_size]
+    return notifications, encode_cursor(notifications[-1])
+
+
+# =============================================================================
+# COMPTEUR DE NON LUES
+# =============================================================================
+
+def _count_unread(user_id):
+    """(nombre de non lues, prochaine expiration parmi elles) — une requête"""
+    now = timezone.now()
+    stats = Notification.objects.filter(
+        not_expired(now), user_id=user_id, is_read=False
+    ).aggregate(count=Count('id'), next_expiry=Min('expires_at'))
+    return stats['count'], stats['next_expiry'], now
+
+
+def unread_count(user_id):
+    """Nombre de notifications non lues et non expirées de l'utilisateur"""
+    key = unread_key(user_id)
+    try:
+        cached = cache.get(key)
+        if cached is not None:
+            return max(cached, 0)
+    except Exception as e:
+        logger.warning(f"⚠️ Compteur de notifications {user_id} illisible: {e}")
+        return _count_unread(user_id)[0]
+
+    token = uuid.uuid4().hex
+    try:
+        cache.set(recount_key(user_id), token, timeout=NOTIFICATION_UNREAD_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Compteur de notifications {user_id} non enregistré: {e}")
+        return _count_unread(user_id)[0]
+
+    count, next_expiry, now = _count_unread(user_id)
+    timeout = NOTIFICATION_UNREAD_TTL
+    if next_expiry is not None:
+        timeout = max(1, min(timeout, int((next_expiry - now) / timedelta(seconds=1)) + 1))
+    try:
+        if cache.add(key, count, timeout=timeout) and cache.get(recount_key(user_id)) != token:
+            # Une mise à jour a croisé le recalcul : valeur incertaine
+            cache.delete(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Compteur de notifications {user_id} non enregistré: {e}")
+    return count
+
+
+def _adjust(user_ids, delta):
+    try:
+        cache.set_many(
+            {recount_key(user_id): _ADJUSTED for user_id in user_ids},
+            timeout=NOTIFICATION_UNREAD_TTL,
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Compteurs de notifications non mis à jour: {e}")
+        _invalidate(user_ids)
+        return
+
+    for user_id in user_ids:
+        key = unread_key(user_id)
+        try:
+            value = cache.incr(key, delta)
+            if value < 0 or value == delta:
+                # Négatif : dérive. Égal à delta : la clé a pu expirer entre
+                # EXISTS et INCR et être recréée sans TTL.
+                cache.delete(key)
+        except ValueError:
+            # Pas de compteur en cache : le prochain unread_count le recalcule
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Compteur de notifications {user_id} non mis à jour: {e}")
+
+
+def _invalidate(user_ids):
+    try:
+        cache.delete_many([unread_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning(f"⚠️ Compteurs de notifications non invalidés: {e}")
+
+
+def _after_commit(func, user_ids):
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if user_ids:
+        transaction.on_commit(lambda: func(user_ids))
+
+
+def notifications_created(notifications):
+    """+1 par notification non lue créée, après le commit"""
+    expiring = [n.user_id for n in notifications if n.expires_at is not None]
+    if expiring:
+        # Le TTL du compteur doit suivre la nouvelle expiration
+        _after_commit(_invalidate, expiring)
+    _after_commit(
+        lambda user_ids: _adjust(user_ids, 1),
+        [n.user_id for n in notifications if n.expires_at is None and not n.is_read],
+    )
+
+
+def mark_read(notification):
+    """Marque la notification lue ; décrémente le compteur si elle ne l'était pas"""
+    now = timezone.now()
+    marked = Notification.objects.filter(pk=notification.pk, is_read=False).update(
+        is_read=True, read_at=now
+    )
+    if marked:
+        notification.is_read = True
+        notification.read_at = now
+        if not notification.is_expired:
+            _after_commit(lambda user_ids: _adjust(user_ids, -1), [notification.user_id])
+    return notification
+
+
+def mark_all_read(user):
+    """Marque toutes les notifications lues ; retourne leur nombre"""
+    count = Notification.objects.filter(user=user, is_read=False).update(
+        is_read=True, read_at=timezone.now()
+    )
+    if count:
+        _after_commit(_invalidate, [user.id])
+    return count
+
+
+def delete_notification(notification):
+    """Supprime la notification ; décrémente le compteur si elle était non lue"""
+    unread = Notification.objects.filter(
+        not_expired(), pk=notification.pk, is_read=False
+    ).delete()[0]
+    if unread:
+        _after_commit(lambda user_ids: _adjust(user_ids, -1), [notification.user_id])
+    else:
+        Notification.objects.filter(pk=notification.pk).delete()
+
+
+# =============================================================================
+# PURGE
+# =============================================================================
+
+def purge_expired_notifications(batch_size=None):
+    """Supprime les notifications expirées par lots ; retourne leur nombre"""
+    from api.services.maintenance import update_in_batches
+
+    def purge(rows):
+        Notification.objects.filter(pk__in=[pk for pk, in rows]).delete()
+
+    expired = Notification.objects.filter(expires_at__lte=timezone.now())
+    return len(update_in_batches(expired, purge, batch_size=batch_size))
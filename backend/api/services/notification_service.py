@@ -7,14 +7,47 @@ via l'API Expo Push Notifications.
 """
 
 import logging
+import time
 import requests
-from typing import Optional, Dict, Any, List
+from datetime import timedelta
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, List, Iterable
 from django.conf import settings
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
-# URL de l'API Expo Push
-EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+# URLs de l'API Expo Push (surchargeables pour pointer vers un serveur factice)
+EXPO_PUSH_URL = getattr(settings, "EXPO_PUSH_URL", "https://exp.host/--/api/v2/push/send")
+EXPO_RECEIPTS_URL = getattr(
+    settings, "EXPO_RECEIPTS_URL", "https://exp.host/--/api/v2/push/getReceipts"
+)
+EXPO_ACCESS_TOKEN = getattr(settings, "EXPO_ACCESS_TOKEN", None)
+
+# Limites Expo : 100 messages par envoi, 1000 ids par demande de reçus
+EXPO_PUSH_CHUNK_SIZE = 100
+EXPO_RECEIPTS_CHUNK_SIZE = 1000
+
+# Connexions HTTP conservées par le pool (keep-alive)
+EXPO_POOL_SIZE = 10
+EXPO_TIMEOUT = 10
+
+# Relances (cf. _post_with_retry) : 0.5s, 1s, 2s
+EXPO_MAX_RETRIES = 3
+EXPO_RETRY_BACKOFF = 0.5
+
+# Expo conseille d'attendre ~15 min avant de demander les reçus,
+# qui restent disponibles 24h.
+PUSH_RECEIPT_DELAY = timedelta(minutes=15)
+PUSH_TICKET_TTL = timedelta(hours=24)
+
+# Erreur Expo indiquant un token à désactiver
+DEVICE_NOT_REGISTERED = "DeviceNotRegistered"
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 
 class NotificationService:
@@ -24,6 +57,32 @@ class NotificationService:
 
     def __init__(self):
         self.expo_push_url = EXPO_PUSH_URL
+        self.expo_receipts_url = EXPO_RECEIPTS_URL
+        self.max_retries = EXPO_MAX_RETRIES
+        self.retry_backoff = EXPO_RETRY_BACKOFF
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        """Session HTTP partagée (connexions réutilisées entre les envois)"""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=EXPO_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "Content-Type": "application/json",
+            })
+            if EXPO_ACCESS_TOKEN:
+                session.headers["Authorization"] = f"Bearer {EXPO_ACCESS_TOKEN}"
+            self._session = session
+        return self._session
+
+    @session.setter
+    def session(self, value):
+        self._session = value
 
     # =========================================================================
     # MÉTHODES UTILITAIRES
@@ -42,6 +101,19 @@ class NotificationService:
             logger.error(f"Erreur récupération tokens user {user_id}: {e}")
             return []
 
+    def _get_users_push_tokens(self, user_ids: Iterable[int]) -> List[str]:
+        """Récupérer en une requête les tokens push de plusieurs utilisateurs"""
+        try:
+            from api.models import PushNotificationToken
+            tokens = PushNotificationToken.objects.filter(
+                user_id__in=list(user_ids),
+                is_active=True
+            ).values_list('expo_token', flat=True)
+            return list(tokens)
+        except Exception as e:
+            logger.error(f"Erreur récupération tokens users: {e}")
+            return []
+
     def _get_guest_push_tokens(self, phone: str) -> List[str]:
         """Récupérer les tokens push d'un invité par téléphone"""
         try:
@@ -65,7 +137,7 @@ class NotificationService:
             logger.error(f"Erreur récupération tokens restaurateur: {e}")
             return []
 
-    def _send_push_notification(
+    def _build_messages(
         self,
         tokens: List[str],
         title: str,
@@ -75,14 +147,8 @@ class NotificationService:
         sound: str = "default",
         badge: Optional[int] = None,
         channel_id: str = "default"
-    ) -> bool:
-        """
-        Envoyer une notification push via Expo API.
-        """
-        if not tokens:
-            logger.debug("Aucun token push disponible")
-            return False
-
+    ) -> List[Dict[str, Any]]:
+        """Construire les messages Expo (un par token valide)"""
         messages = []
         for token in tokens:
             if not token.startswith("ExponentPushToken"):
@@ -105,36 +171,197 @@ class NotificationService:
                 message["badge"] = badge
 
             messages.append(message)
+        return messages
+
+    def _send_push_notification(
+        self,
+        tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        priority: str = "default",
+        sound: str = "default",
+        badge: Optional[int] = None,
+        channel_id: str = "default"
+    ) -> bool:
+        """
+        Envoyer une notification push via Expo API.
+        """
+        if not tokens:
+            logger.debug("Aucun token push disponible")
+            return False
+
+        messages = self._build_messages(
+            tokens, title, body, data, priority, sound, badge, channel_id
+        )
 
         if not messages:
             logger.debug("Aucun message valide à envoyer")
             return False
 
-        try:
-            response = requests.post(
-                self.expo_push_url,
-                json=messages,
-                headers={
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                },
-                timeout=10
-            )
+        return self.send_messages(messages)
+
+    def _post_with_retry(self, url: str, payload, idempotent: bool = False) -> Optional[Any]:
+        """
+        POST vers Expo avec relances (backoff exponentiel). Retourne le champ
+        `data` de la réponse, ou None.
+
+        Relancé dans tous les cas : 429 (requête refusée, non traitée) et
+        échec de connexion (rien n'a été envoyé). Un 5xx ou un délai de
+        lecture dépassé ne dit pas si Expo a traité la requête : relancer
+        /push/send pourrait livrer deux fois la même notification, on ne le
+        fait donc que pour une requête `idempotent` (getReceipts).
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+
+            try:
+                response = self.session.post(url, json=payload, timeout=EXPO_TIMEOUT)
+            except requests.exceptions.ConnectionError as e:
+                # ConnectTimeout compris : la requête n'est pas partie
+                logger.warning(f"⚠️ Connexion Expo impossible (tentative {attempt + 1}): {e}")
+                continue
+            except requests.exceptions.Timeout:
+                logger.warning(f"⏱️ Timeout Expo (tentative {attempt + 1})")
+                if idempotent:
+                    continue
+                return None
+            except Exception as e:
+                logger.error(f"❌ Erreur envoi push: {e}")
+                return None
 
             if response.status_code == 200:
-                result = response.json()
-                logger.info(f"✅ Push envoyé: {len(messages)} message(s)")
-                return True
-            else:
-                logger.error(f"❌ Erreur Expo Push: {response.status_code} - {response.text}")
-                return False
+                try:
+                    return response.json().get("data")
+                except ValueError:
+                    logger.error("❌ Réponse Expo illisible")
+                    return None
+
+            if response.status_code == 429 or (idempotent and response.status_code >= 500):
+                logger.warning(
+                    f"⚠️ Expo indisponible ({response.status_code}), tentative {attempt + 1}"
+                )
+                continue
 
-        except requests.exceptions.Timeout:
-            logger.error("❌ Timeout lors de l'envoi push")
+            logger.error(f"❌ Erreur Expo Push: {response.status_code} - {response.text}")
+            return None
+
+        logger.error(f"❌ Expo injoignable après {self.max_retries + 1} tentative(s)")
+        return None
+
+    def send_messages(self, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Envoyer des messages Expo déjà construits, par lots de 100.
+        Les tickets retournés sont conservés pour la relève des reçus.
+        """
+        if not messages:
             return False
+
+        all_sent = True
+        for chunk in _chunks(messages, EXPO_PUSH_CHUNK_SIZE):
+            tickets = self._post_with_retry(self.expo_push_url, chunk)
+            if tickets is None:
+                all_sent = False
+                continue
+
+            self._handle_tickets(chunk, tickets)
+            logger.info(f"✅ Push envoyé: {len(chunk)} message(s)")
+
+        return all_sent
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> bool:
+        """
+        Regrouper plusieurs notifications (destinataires et contenus
+        différents) dans les mêmes requêtes Expo.
+
+        Chaque élément reprend les arguments de `_send_push_notification`
+        (tokens, title, body, data, priority, sound, badge, channel_id).
+        """
+        messages = []
+        for notification in notifications:
+            messages.extend(self._build_messages(**notification))
+        return self.send_messages(messages)
+
+    def _handle_tickets(self, messages: List[Dict[str, Any]], tickets: List[Dict[str, Any]]):
+        """Conserver les tickets acceptés, désactiver les tokens refusés"""
+        from api.models import PushTicket
+
+        pending = []
+        dead_tokens = []
+        for message, ticket in zip(messages, tickets or []):
+            if ticket.get("status") == "ok" and ticket.get("id"):
+                pending.append(PushTicket(ticket_id=ticket["id"], expo_token=message["to"]))
+            elif (ticket.get("details") or {}).get("error") == DEVICE_NOT_REGISTERED:
+                dead_tokens.append(message["to"])
+            else:
+                logger.warning(f"⚠️ Ticket Expo en erreur: {ticket.get('message')}")
+
+        try:
+            if pending:
+                PushTicket.objects.bulk_create(pending, ignore_conflicts=True)
+            self._deactivate_tokens(dead_tokens)
         except Exception as e:
-            logger.error(f"❌ Erreur envoi push: {e}")
-            return False
+            logger.error(f"Erreur traitement tickets push: {e}")
+
+    def _deactivate_tokens(self, tokens: Iterable[str]) -> int:
+        """Désactiver les tokens signalés DeviceNotRegistered par Expo"""
+        tokens = set(tokens)
+        if not tokens:
+            return 0
+
+        from api.models import PushNotificationToken
+        count = PushNotificationToken.objects.filter(
+            expo_token__in=tokens,
+            is_active=True
+        ).update(is_active=False, updated_at=timezone.now())
+        if count:
+            logger.info(f"🔕 {count} token(s) push désactivé(s) (DeviceNotRegistered)")
+        return count
+
+    def process_push_receipts(self, limit: int = 10000) -> Dict[str, int]:
+        """
+        Relever les reçus Expo des tickets en attente et désactiver les
+        tokens DeviceNotRegistered. Les tickets sans reçu restent en attente
+        jusqu'à expiration (24h).
+        """
+        from api.models import PushTicket
+
+        now = timezone.now()
+        expired, _ = PushTicket.objects.filter(created_at__lt=now - PUSH_TICKET_TTL).delete()
+
+        tickets = dict(
+            PushTicket.objects.filter(created_at__lte=now - PUSH_RECEIPT_DELAY)
+            .order_by('created_at')
+            .values_list('ticket_id', 'expo_token')[:limit]
+        )
+
+        processed = []
+        dead_tokens = set()
+        for ids in _chunks(list(tickets), EXPO_RECEIPTS_CHUNK_SIZE):
+            receipts = self._post_with_retry(self.expo_receipts_url, {"ids": ids}, idempotent=True)
+            if receipts is None:
+                continue
+
+            for ticket_id, receipt in receipts.items():
+                if ticket_id not in tickets:
+                    continue
+                processed.append(ticket_id)
+                if receipt.get("status") == "error":
+                    error = (receipt.get("details") or {}).get("error")
+                    if error == DEVICE_NOT_REGISTERED:
+                        dead_tokens.add(tickets[ticket_id])
+                    else:
+                        logger.warning(f"⚠️ Reçu Expo en erreur: {error or receipt.get('message')}")
+
+        PushTicket.objects.filter(ticket_id__in=processed).delete()
+        deactivated = self._deactivate_tokens(dead_tokens)
+
+        return {
+            "checked": len(processed),
+            "deactivated": deactivated,
+            "expired": expired,
+        }
 
     def _save_notification(
         self,
@@ -148,7 +375,8 @@ class NotificationService:
         """Sauvegarder la notification en base de données"""
         try:
             from api.models import Notification
-            Notification.objects.create(
+            from api.services.notification_inbox import notifications_created
+            notification = Notification.objects.create(
                 user_id=user_id,
                 notification_type=notification_type,
                 title=title,
@@ -156,6 +384,7 @@ class NotificationService:
                 data=data or {},
                 priority=priority
             )
+            notifications_created([notification])
         except Exception as e:
             logger.error(f"Erreur sauvegarde notification: {e}")
 
@@ -173,11 +402,50 @@ class NotificationService:
         priority: str = "default",
         save: bool = True
     ) -> bool:
-        """Envoyer une notification à un utilisateur"""
-        tokens = self._get_user_push_tokens(user_id)
+        """Envoyer une notification à un utilisateur (cf. send_to_users)"""
+        return self.send_to_users(
+            [user_id], title, body, data=data, notification_type=notification_type,
+            priority=priority, save=save
+        )
+
+    def send_to_users(
+        self,
+        user_ids: Iterable[int],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        notification_type: str = "general",
+        priority: str = "default",
+        save: bool = True
+    ) -> bool:
+        """
+        Envoyer la même notification à plusieurs utilisateurs : tokens lus en
+        une requête, notifications enregistrées en un INSERT, messages
+        envoyés par lots de 100.
+        """
+        user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+        if not user_ids:
+            return False
+        tokens = self._get_users_push_tokens(user_ids)
 
         if save:
-            self._save_notification(user_id, title, body, notification_type, data, priority)
+            try:
+                from api.models import Notification
+                from api.services.notification_inbox import notifications_created
+                notifications = Notification.objects.bulk_create([
+                    Notification(
+                        user_id=user_id,
+                        notification_type=notification_type,
+                        title=title,
+                        body=body,
+                        data=data or {},
+                        priority=priority
+                    )
+                    for user_id in user_ids
+                ])
+                notifications_created(notifications)
+            except Exception as e:
+                logger.error(f"Erreur sauvegarde notifications: {e}")
 
         return self._send_push_notification(
             tokens=tokens,
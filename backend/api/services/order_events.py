@@ -0,0 +1,189 @@
+"""
+Outbox des notifications de commande (WebSocket / SSE / push).
+
+Les receivers post_save d'Order n'envoient plus rien eux-mêmes : ils
+enregistrent un événement compact après le commit de la transaction, et
+une tâche Celery effectue la diffusion un court instant plus tard.
+
+Plusieurs sauvegardes de la même commande dans la fenêtre de regroupement
+ne produisent qu'une seule diffusion : le premier événement fixe l'état
+de départ (statuts avant modification), la tâche relit la commande et
+compare avec l'état courant.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre de regroupement des sauvegardes d'une même commande (secondes)
+ORDER_EVENTS_COALESCE_SECONDS = getattr(settings, "ORDER_EVENTS_COALESCE_SECONDS", 2)
+
+# Durée de vie de l'événement en attente : couvre un worker un peu lent,
+# sans bloquer les diffusions suivantes si la tâche est perdue.
+ORDER_EVENTS_PENDING_TTL = max(ORDER_EVENTS_COALESCE_SECONDS * 30, 60)
+
+
+def pending_event_key(order_id):
+    return f"order_events:pending:{order_id}"
+
+
+def build_order_event(order, created):
+    """Événement compact : identifiant + état de départ de la commande"""
+    if created:
+        old_status = order.status
+        old_payment_status = order.payment_status
+    else:
+        old_status = getattr(order, "_old_status", None)
+        old_payment_status = getattr(order, "_old_payment_status", None)
+
+    return {
+        "order_id": order.pk,
+        "created": bool(created),
+        "old_status": old_status,
+        "old_payment_status": old_payment_status,
+        "old_waiting_time": getattr(order, "_old_waiting_time", None),
+    }
+
+
+def enqueue_order_event(order, created):
+    """Planifie la diffusion des notifications après le commit courant"""
+    event = build_order_event(order, created)
+    transaction.on_commit(lambda: schedule_order_event(event))
+
+
+def enqueue_bulk_order_events(order_ids, old_status, old_payment_status):
+    """
+    Événements de commandes modifiées par un UPDATE en masse (qui ne passe
+    pas par les signaux post_save), planifiés après le commit courant.
+    """
+    events = [
+        {
+            "order_id": order_id,
+            "created": False,
+            "old_status": old_status,
+            "old_payment_status": old_payment_status,
+            "old_waiting_time": None,
+        }
+        for order_id in order_ids
+    ]
+
+    def schedule_all():
+        for event in events:
+            schedule_order_event(event)
+
+    transaction.on_commit(schedule_all)
+
+
+def schedule_order_event(event):
+    """
+    Enregistre l'événement et planifie la tâche de diffusion.
+
+    `cache.add` est atomique : seul le premier événement de la fenêtre est
+    conservé et planifie la tâche, les suivants sont absorbés.
+    """
+    key = pending_event_key(event["order_id"])
+
+    try:
+        if not cache.add(key, event, timeout=ORDER_EVENTS_PENDING_TTL):
+            logger.debug(f"🔁 Notification commande {event['order_id']} regroupée")
+            return
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, diffusion immédiate: {e}")
+        dispatch_order_event(event)
+        return
+
+    try:
+        from api.tasks import dispatch_order_events
+
+        dispatch_order_events.apply_async(
+            args=[event["order_id"]], countdown=ORDER_EVENTS_COALESCE_SECONDS
+        )
+    except Exception:
+        logger.exception(
+            f"❌ Planification impossible, diffusion immédiate (commande {event['order_id']})"
+        )
+        cache.delete(key)
+        dispatch_order_event(event)
+
+
+def pop_pending_event(order_id):
+    """Récupère et libère l'événement en attente pour cette commande"""
+    key = pending_event_key(order_id)
+    event = cache.get(key)
+    cache.delete(key)
+    return event
+
+
+def dispatch_order_event(event):
+    """
+    Diffusion unique WS/SSE/push à partir de l'état de départ de l'événement
+    et de l'état courant de la commande.
+    """
+    from api.models import Order
+    from api.signals import (
+        order_updated,
+        send_order_push_notifications,
+        send_payment_push_notifications,
+    )
+
+    order = (
+        Order.objects.select_related("restaurant")
+        .filter(pk=event["order_id"])
+        .first()
+    )
+    if order is None:
+        logger.info(f"ℹ️ Commande {event['order_id']} supprimée, notification ignorée")
+        return False
+
+    order._old_status = event.get("old_status")
+    order._old_payment_status = event.get("old_payment_status")
+    order._old_waiting_time = event.get("old_waiting_time")
+
+    handlers = (
+        order_updated,
+        send_order_push_notifications,
+        send_payment_push_notifications,
+    )
+
+    if event.get("created"):
+        for handler in handlers:
+            handler(sender=Order, instance=order, created=True)
+
+    # Changements survenus pendant la fenêtre (ou depuis la création) ;
+    # les handlers ne font rien si l'état n'a pas bougé.
+    for handler in handlers:
+        handler(sender=Order, instance=order, created=False)
+
+    notify_table_activity(order, event)
+
+    from api.services.kitchen_feed import notify_kitchen_ticket
+    notify_kitchen_ticket(order, event)
+
+    return True
+
+
+def notify_table_activity(order, event):
+    """Delta plan de salle quand la table gagne ou perd sa commande active"""
+    if not order.table_number:
+        return
+    from api.models import Table
+    from api.services.floor_plan import ACTIVE_ORDER_STATUSES
+    from api.utils.floorplan_notifications import notify_floorplan_update
+
+    was_active = (
+        not event.get("created")
+        and event.get("old_status") in ACTIVE_ORDER_STATUSES
+    )
+    if was_active == (order.status in ACTIVE_ORDER_STATUSES):
+        return
+
+    table_id = (
+        Table.objects.filter(restaurant_id=order.restaurant_id, number=order.table_number)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if table_id:
+        notify_floorplan_update(order.restaurant_id, event="order_activity", table_id=table_id)
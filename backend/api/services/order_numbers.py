@@ -0,0 +1,124 @@
+"""
+Allocation des numéros de commande et des séquences de table.
+
+Chaque portée a sa ligne OrderCounter :
+    order:<restaurant>:<préfixe>   numéros du jour (T sur place, E à
+                                   emporter, G commande groupée)
+    table:<restaurant>:<table>     session de table et séquence courantes
+
+Le compteur est incrémenté en une instruction (INSERT … ON CONFLICT DO
+UPDATE … RETURNING) : pas de Max() sur les commandes du jour ni de boucle
+de vérification, le numéro est unique par construction. Le verrou de ligne
+dure jusqu'au commit de la commande, les allocations concurrentes d'une
+même portée s'ordonnent ; un rollback rend la valeur.
+
+À appeler dans la transaction qui insère la commande (Order.save s'en
+charge).
+"""
+import uuid
+
+from django.db import connection
+from django.utils import timezone
+
+from api.models import Order, OrderCounter
+
+ACTIVE_ORDER_STATUSES = ('pending', 'confirmed', 'preparing', 'ready')
+
+DINE_IN_PREFIX = 'T'
+TAKEAWAY_PREFIX = 'E'
+GROUP_PREFIX = 'G'
+
+
+def _increment(key, day=None):
+    """
+    Incrémente le compteur `key` (créé à 1 au premier appel, remis à 1 si
+    `day` change). Retourne (valeur, session_id).
+    """
+    qn = connection.ops.quote_name
+    table = qn(OrderCounter._meta.db_table)
+    key_col, day_col, value_col, session_col = (
+        qn(OrderCounter._meta.get_field(name).column)
+        for name in ('key', 'day', 'value', 'session_id')
+    )
+    sql = (
+        f"INSERT INTO {table} ({key_col}, {day_col}, {value_col}, {session_col}) "
+        f"VALUES (%s, %s, 1, NULL) "
+        f"ON CONFLICT ({key_col}) DO UPDATE SET "
+        f"{value_col} = CASE WHEN {table}.{day_col} IS NOT DISTINCT FROM EXCLUDED.{day_col} "
+        f"THEN {table}.{value_col} + 1 ELSE 1 END, "
+        f"{day_col} = EXCLUDED.{day_col} "
+        f"RETURNING {value_col}, {session_col}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [key, day])
+        return cursor.fetchone()
+
+
+def order_number_prefix(order_type):
+    return DINE_IN_PREFIX if order_type == 'dine_in' else TAKEAWAY_PREFIX
+
+
+def allocate_order_number(restaurant_id, prefix, day=None):
+    """
+    Numéro suivant du jour pour ce restaurant, ex. T007-12-261016 : le
+    rang du jour en tête (lisible en cuisine), restaurant et date pour
+    l'unicité globale du champ.
+    """
+    day = day or timezone.localdate()
+    value, _ = _increment(f"order:{restaurant_id}:{prefix}", day)
+    return f"{prefix}{value:03d}-{restaurant_id}-{day:%y%m%d}"
+
+
+def allocate_table_sequence(restaurant_id, table_number):
+    """
+    (table_session_id, order_sequence) de la prochaine commande de la table.
+
+    La session du compteur se poursuit tant qu'elle a une commande en
+    cours. Sinon la table repart sur la session de sa dernière commande en
+    cours (réassignée hors allocateur, ex. TableSession) ou sur une
+    nouvelle session. Deux requêtes dans tous les cas.
+    """
+    key = f"table:{restaurant_id}:{table_number}"
+    _increment(key)
+
+    # Instruction distincte, après le verrou de l'incrément : elle voit les
+    # commandes que les transactions précédentes de cette table viennent
+    # de valider.
+    qn = connection.ops.quote_name
+    counters = qn(OrderCounter._meta.db_table)
+    orders = qn(Order._meta.db_table)
+    c = {name: qn(OrderCounter._meta.get_field(name).column) for name in ('key', 'value', 'session_id')}
+    o = {
+        name: qn(Order._meta.get_field(name).column)
+        for name in ('restaurant', 'table_number', 'status', 'table_session_id',
+                     'order_sequence', 'created_at')
+    }
+    active = ', '.join(['%s'] * len(ACTIVE_ORDER_STATUSES))
+    alive = (
+        f"EXISTS (SELECT 1 FROM {orders} WHERE {orders}.{o['table_session_id']} = "
+        f"{counters}.{c['session_id']} AND {orders}.{o['status']} IN ({active}))"
+    )
+    latest = (
+        f"(SELECT {{column}} FROM {orders} WHERE {orders}.{o['restaurant']} = %s "
+        f"AND {orders}.{o['table_number']} = %s AND {orders}.{o['status']} IN ({active}) "
+        f"ORDER BY {orders}.{o['created_at']} DESC LIMIT 1)"
+    )
+    sql = (
+        f"UPDATE {counters} SET "
+        f"{c['session_id']} = CASE WHEN {alive} THEN {counters}.{c['session_id']} "
+        f"ELSE COALESCE({latest.format(column=o['table_session_id'])}, %s) END, "
+        f"{c['value']} = CASE WHEN {alive} THEN {counters}.{c['value']} "
+        f"ELSE COALESCE({latest.format(column=o['order_sequence'])} + 1, 1) END "
+        f"WHERE {counters}.{c['key']} = %s "
+        f"RETURNING {c['session_id']}, {c['value']}"
+    )
+    scope = [restaurant_id, table_number, *ACTIVE_ORDER_STATUSES]
+    params = [
+        *ACTIVE_ORDER_STATUSES, *scope, uuid.uuid4(),
+        *ACTIVE_ORDER_STATUSES, *scope,
+        key,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        session_id, value = cursor.fetchone()
+    return session_id, value
@@ -1,9 +1,10 @@
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
 from django.utils import timezone
 from api.models import Order, OrderItem, OrderItemComponent, DraftOrder
-from api.models import MenuItem, Formule, FormuleCourse, FormuleCourseItem
 from api.utils.formule_pricing import build_formule_components
+from api.services.cart_pricing import PricedCart, price_guest_cart
+from api.services.draft_status import notify_draft_resolved
 
 # Statuts qui indiquent qu'un draft a déjà été consommé ou invalidé.
 # Tout draft portant l'un de ces statuts doit bloquer la création d'une commande.
@@ -13,7 +14,7 @@ _TERMINAL_DRAFT_STATUSES = frozenset({"confirmed_cash", "confirmed_online", "exp
 _CONSUMABLE_DRAFT_STATUSES = frozenset({"created", "pi_succeeded"})
 
 
-def create_order_from_draft(draft: DraftOrder, paid: bool) -> Order:
+def create_order_from_draft(draft: DraftOrder, paid: bool, priced: PricedCart = None) -> Order:
     """
     Crée une Order finale depuis une DraftOrder (invité).
 
@@ -32,11 +33,17 @@ def create_order_from_draft(draft: DraftOrder, paid: bool) -> Order:
       d'un bloc `@transaction.atomic` annulerait aussi le `save()`, laissant le
       statut coincé à 'created'.
 
+    Lignes :
+    - `priced` : panier déjà tarifé (price_guest_cart) par l'appelant ; à
+      défaut, le draft est re-tarifé en bloc aux prix courants (nombre de
+      requêtes indépendant de la taille du panier), lignes et composants
+      écrits en deux bulk_create.
+
     Raises:
         ValueError: si le draft est expiré, déjà consommé, ou a un statut inattendu.
     """
     try:
-        return _create_order_from_draft_atomic(draft, paid)
+        return _create_order_from_draft_atomic(draft, paid, priced)
     except ValueError as exc:
         # La transaction atomique interne a été rollbackée.
         # Si la raison est l'expiration, on écrit 'expired' dans une nouvelle
@@ -46,11 +53,12 @@ def create_order_from_draft(draft: DraftOrder, paid: bool) -> Order:
                 pk=draft.pk,
                 status__in=_CONSUMABLE_DRAFT_STATUSES,  # idempotent : n'écrase pas un statut terminal
             ).update(status="expired")
+            notify_draft_resolved(draft.pk)
         raise
 
 
 @transaction.atomic
-def _create_order_from_draft_atomic(draft: DraftOrder, paid: bool) -> Order:
+def _create_order_from_draft_atomic(draft: DraftOrder, paid: bool, priced: PricedCart = None) -> Order:
     """
     Cœur transactionnel de create_order_from_draft — ne pas appeler directement.
     """
@@ -106,82 +114,69 @@ def _create_order_from_draft_atomic(draft: DraftOrder, paid: bool) -> Order:
         guest_phone=draft.phone,
         guest_email=draft.email or None,
     )
-
-    # ── Créer les items ──────────────────────────────────────────────────────
-    for it in draft.items:
-        mi = MenuItem.objects.get(
-            id=it["menu_item_id"],
-            menu__restaurant=draft.restaurant
-        )
-        qty = int(it["quantity"])
-        unit_price = mi.price
-        OrderItem.objects.create(
+    # Lien direct draft → commande (statut du brouillon, rejeu) ; les
+    # long-polls en attente sont réveillés une fois la transaction validée.
+    draft.order = order
+    draft.save(update_fields=["order"])
+    notify_draft_resolved(draft.pk)
+
+    # ── Construire les lignes en mémoire ─────────────────────────────────────
+    # Plats et formules re-résolus en bloc (prix/TVA courants) ; composants
+    # de formule figés via build_formule_components — exactement comme
+    # OrderCreateSerializer.create. Un choix de formule disparu est ignoré.
+    if priced is None:
+        priced = price_guest_cart(draft.restaurant, draft.items, draft.formules, strict=False)
+
+    lines = []  # [(OrderItem, [OrderItemComponent])]
+    for item in priced.items:
+        line = OrderItem(
             order=order,
-            menu_item=mi,
-            quantity=qty,
-            unit_price=unit_price,
-            total_price=unit_price * qty,
-            customizations=it.get("options") or {},
+            menu_item=item.menu_item,
+            quantity=item.quantity,
+            unit_price=item.unit_price,
+            total_price=item.unit_price * item.quantity,
+            customizations=item.options,
             special_instructions=""
         )
+        line.apply_dish_vat()  # même formule que OrderItem.save()
+        lines.append((line, []))
 
-    # ── Créer les formules (1 OrderItem 'formule' + N OrderItemComponent) ────
-    # draft.formules : [{formule, quantity, selections:[{course, menu_item}]}]
-    # On re-résout depuis la DB (prix/TVA courants) et on fige les composants via
-    # build_formule_components — exactement comme OrderCreateSerializer.create.
-    for f in (getattr(draft, "formules", None) or []):
-        try:
-            formule = Formule.objects.get(id=f["formule"], restaurant=draft.restaurant)
-        except Formule.DoesNotExist:
-            continue
-
-        chosen = []
-        for sel in f.get("selections", []):
-            try:
-                course = FormuleCourse.objects.get(id=sel["course"], formule=formule)
-                course_item = FormuleCourseItem.objects.select_related("menu_item").get(
-                    course=course, menu_item_id=sel["menu_item"]
-                )
-            except (FormuleCourse.DoesNotExist, FormuleCourseItem.DoesNotExist):
-                continue
-            chosen.append({
-                "course": course,
-                "menu_item": course_item.menu_item,
-                "extra_price": course_item.extra_price,
-            })
-
-        if not chosen:
-            continue
-
-        f_qty = int(f.get("quantity", 1))
-        unit_price, comps = build_formule_components(formule, chosen)
-        line_vat = sum((c["vat_amount"] for c in comps), Decimal("0.00")) * f_qty
-
-        line = OrderItem.objects.create(
+    for f in priced.formules:
+        unit_price, comps = build_formule_components(f.formule, f.chosen)
+        line_vat = sum((c["vat_amount"] for c in comps), Decimal("0.00")) * f.quantity
+
+        line = OrderItem(
             order=order,
             kind="formule",
             menu_item=None,
-            formule=formule,
-            label=formule.name,
-            quantity=f_qty,
+            formule=f.formule,
+            label=f.formule.name,
+            quantity=f.quantity,
             unit_price=unit_price,
-            total_price=(unit_price * f_qty).quantize(Decimal("0.01")),
+            total_price=(unit_price * f.quantity).quantize(Decimal("0.01")),
             vat_amount=line_vat.quantize(Decimal("0.01")),
         )
-        OrderItemComponent.objects.bulk_create([
-            OrderItemComponent(order_item=line, **c) for c in comps
-        ])
+        lines.append((line, [OrderItemComponent(order_item=line, **c) for c in comps]))
+
+    # Arrondi de la colonne numeric(10, 2) : valeurs en mémoire = relecture
+    cents = Decimal("0.01")
+    for line, _ in lines:
+        line.total_price = Decimal(line.total_price).quantize(cents, rounding=ROUND_HALF_UP)
+        line.vat_amount = Decimal(line.vat_amount).quantize(cents, rounding=ROUND_HALF_UP)
+
+    OrderItem.objects.bulk_create([line for line, _ in lines])
+    OrderItemComponent.objects.bulk_create([c for _, comps in lines for c in comps])
 
     # ── Ventilation TVA (plats + formules, taux mixtes) ──────────────────────
-    # Recalcule la TVA réelle depuis les lignes créées et renseigne tax_amount /
-    # vat_details. calculate_vat_breakdown descend dans les OrderItemComponent
-    # pour les formules (taux potentiellement mixtes). subtotal reste le montant
-    # payé (draft.amount) — même convention que les total_price recalculés.
-    order.calculate_vat_breakdown()
+    # Recalcule la TVA réelle depuis les lignes en mémoire et renseigne
+    # tax_amount / vat_details. subtotal reste le montant payé (draft.amount)
+    # — même convention que les total_price recalculés.
+    order.calculate_vat_breakdown(lines=lines)
     order.tax_amount = sum(
         (Decimal(str(bucket["tva"])) for bucket in order.vat_details.values()),
         Decimal("0.00"),
     )
     order.save(update_fields=["tax_amount", "vat_details"])
+    order.record_vat_lines(replace=False)
 
-    return order
\ No newline at end of file
+    return order
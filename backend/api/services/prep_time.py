@@ -0,0 +1,258 @@
+"""
+Temps de préparation appris (PrepTimeStats) et prédiction.
+
+Écriture :
+    Quand une commande devient prête (ou servie sans être passée par
+    « prête »), sa durée created_at → prête alimente, après le commit,
+    la ligne « commande entière » et une ligne par catégorie de ses plats,
+    à l'heure locale de sa création. Un seul INSERT … ON CONFLICT DO
+    UPDATE met à jour une moyenne glissante : les PREP_TIME_MEMORY
+    dernières commandes pèsent, l'historique ancien s'efface de lui-même.
+    `rebuild_prep_time_stats` reconstruit la table depuis les commandes.
+
+Lecture :
+    `load_prep_time_model` lit en une requête les lignes utiles d'un
+    restaurant ; le modèle répond ensuite sans requête (heure de la
+    commande si elle a assez d'échantillons, sinon toutes heures
+    confondues). `predict_prep_minutes` retombe sur l'estimation statique
+    (temps de préparation des plats) tant que l'historique manque.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.models import Order, OrderItem, PrepTimeStats
+
+logger = logging.getLogger(__name__)
+
+# Nombre de commandes récentes prises en compte par la moyenne glissante
+PREP_TIME_MEMORY = getattr(settings, "PREP_TIME_MEMORY", 50)
+
+# Échantillons requis avant de se fier à une moyenne
+PREP_TIME_MIN_SAMPLES = getattr(settings, "PREP_TIME_MIN_SAMPLES", 3)
+
+# Historique relu par rebuild_prep_time_stats (jours)
+PREP_TIME_REBUILD_DAYS = 30
+
+# Statuts où la cuisine a terminé
+PREP_DONE_STATUSES = ('ready', 'served')
+
+ORDER_SCOPE = PrepTimeStats.ORDER_SCOPE
+
+# Estimation statique (sans historique)
+DEFAULT_ITEM_PREP_MINUTES = 5
+BASE_PREP_MINUTES = 5
+
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+def _done_at(order):
+    return order.ready_at or order.served_at
+
+
+def _upsert(restaurant_id, hour, seconds, category_ids):
+    """Ajoute un échantillon aux lignes (restaurant, catégorie, heure) — une requête"""
+    qn = connection.ops.quote_name
+    table = qn(PrepTimeStats._meta.db_table)
+    restaurant_col, category_col, hour_col, samples_col, avg_col, updated_col = (
+        qn(PrepTimeStats._meta.get_field(name).column)
+        for name in ('restaurant', 'category', 'hour', 'samples', 'avg_seconds', 'updated_at')
+    )
+    scopes = [ORDER_SCOPE, *sorted(set(category_ids) - {ORDER_SCOPE})]
+    now = timezone.now()
+    values = ', '.join(['(%s, %s::uuid, %s, 1, %s, %s)'] * len(scopes))
+    params = []
+    for category_id in scopes:
+        category = str(category_id) if category_id is not None else None
+        params.extend([restaurant_id, category, hour, seconds, now])
+
+    sql = (
+        f"INSERT INTO {table} ({restaurant_col}, {category_col}, {hour_col}, "
+        f"{samples_col}, {avg_col}, {updated_col}) VALUES {values} "
+        f"ON CONFLICT ({restaurant_col}, {category_col}, {hour_col}) DO UPDATE SET "
+        f"{avg_col} = {table}.{avg_col} + (EXCLUDED.{avg_col} - {table}.{avg_col}) "
+        f"/ LEAST({table}.{samples_col} + 1, %s), "
+        f"{samples_col} = {table}.{samples_col} + 1, "
+        f"{updated_col} = EXCLUDED.{updated_col}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, PREP_TIME_MEMORY])
+
+
+def record_prep_time(order_id, restaurant_id, created_at, done_at):
+    """Enregistre la durée de préparation d'une commande (deux requêtes)"""
+    seconds = (done_at - created_at).total_seconds()
+    if seconds <= 0:
+        return False
+
+    category_ids = set(
+        OrderItem.objects.filter(order_id=order_id, menu_item__category_id__isnull=False)
+        .values_list('menu_item__category_id', flat=True)
+    )
+    _upsert(restaurant_id, timezone.localtime(created_at).hour, seconds, category_ids)
+    return True
+
+
+def schedule_prep_time_record(order):
+    """Enregistre la durée de préparation de la commande après le commit courant"""
+    done_at = _done_at(order)
+    if done_at is None or order.created_at is None:
+        return
+    args = (order.pk, order.restaurant_id, order.created_at, done_at)
+
+    def record():
+        try:
+            record_prep_time(*args)
+        except Exception:
+            logger.exception(f"❌ Temps de préparation non enregistré (commande {args[0]})")
+
+    transaction.on_commit(record)
+
+
+def rebuild_prep_time_stats(restaurant_ids=None, days=PREP_TIME_REBUILD_DAYS):
+    """
+    Recalcule la table depuis les commandes terminées des `days` derniers
+    jours (moyenne simple). Retourne le nombre de lignes écrites.
+    """
+    orders = (
+        Order.objects.filter(
+            status__in=PREP_DONE_STATUSES,
+            created_at__gte=timezone.now() - timedelta(days=days),
+        )
+        .annotate(done_at=Coalesce('ready_at', 'served_at'))
+        .filter(done_at__gt=F('created_at'))
+    )
+    existing = PrepTimeStats.objects.all()
+    if restaurant_ids is not None:
+        orders = orders.filter(restaurant_id__in=restaurant_ids)
+        existing = existing.filter(restaurant_id__in=restaurant_ids)
+
+    categories = defaultdict(set)
+    for order_id, category_id in (
+        OrderItem.objects.filter(order__in=orders, menu_item__category_id__isnull=False)
+        .values_list('order_id', 'menu_item__category_id')
+        .distinct()
+        .iterator()
+    ):
+        categories[order_id].add(category_id)
+
+    totals = defaultdict(lambda: [0, 0.0])
+    for order_id, restaurant_id, created_at, done_at in (
+        orders.values_list('id', 'restaurant_id', 'created_at', 'done_at').iterator()
+    ):
+        seconds = (done_at - created_at).total_seconds()
+        hour = timezone.localtime(created_at).hour
+        for category_id in (ORDER_SCOPE, *categories.get(order_id, ())):
+            total = totals[(restaurant_id, category_id, hour)]
+            total[0] += 1
+            total[1] += seconds
+
+    with transaction.atomic():
+        existing.delete()
+        created = PrepTimeStats.objects.bulk_create(
+            (
+                PrepTimeStats(
+                    restaurant_id=restaurant_id, category_id=category_id, hour=hour,
+                    samples=samples, avg_seconds=total_seconds / samples,
+                )
+                for (restaurant_id, category_id, hour), (samples, total_seconds) in totals.items()
+            ),
+            batch_size=1000,
+        )
+
+    return len(created)
+
+
+# =============================================================================
+# LECTURE / PRÉDICTION
+# =============================================================================
+
+class PrepTimeModel:
+    """Temps appris d'un restaurant à une heure donnée, chargés en une requête"""
+
+    def __init__(self, rows, hour):
+        self.hour = hour
+        self._by_hour = {}
+        self._all_hours = defaultdict(lambda: [0, 0.0])
+        for category_id, row_hour, samples, avg_seconds in rows:
+            if row_hour == hour:
+                self._by_hour[category_id] = (samples, avg_seconds)
+            total = self._all_hours[category_id]
+            total[0] += samples
+            total[1] += samples * avg_seconds
+
+    @property
+    def samples(self):
+        """Commandes terminées connues du restaurant (toutes heures)"""
+        return self._all_hours.get(ORDER_SCOPE, (0, 0.0))[0]
+
+    def minutes(self, category_id=ORDER_SCOPE):
+        """Durée apprise en minutes (catégorie ou commande entière), ou None"""
+        samples, avg_seconds = self._by_hour.get(category_id, (0, 0.0))
+        if samples >= PREP_TIME_MIN_SAMPLES:
+            return avg_seconds / 60
+
+        samples, weighted = self._all_hours.get(category_id, (0, 0.0))
+        if samples >= PREP_TIME_MIN_SAMPLES:
+            return weighted / samples / 60
+        return None
+
+
+def load_prep_time_model(restaurant_id, category_ids=None, at=None):
+    """
+    Modèle du restaurant pour l'heure de `at` (défaut : maintenant). Limité
+    à la commande entière et aux `category_ids` donnés (None = toutes).
+    """
+    rows = PrepTimeStats.objects.filter(restaurant_id=restaurant_id)
+    if category_ids is not None:
+        # ORDER_SCOPE est NULL : `__in` ne le retiendrait pas
+        rows = rows.filter(Q(category__isnull=True) | Q(category_id__in=category_ids))
+    return PrepTimeModel(
+        rows.values_list('category_id', 'hour', 'samples', 'avg_seconds'),
+        timezone.localtime(at or timezone.now()).hour,
+    )
+
+
+def static_prep_minutes(lines):
+    """Estimation sans historique : somme des temps des plats + base + marge"""
+    total = 0
+    for _, preparation_time, quantity in lines:
+        if quantity is None or quantity <= 0:
+            continue
+        total += (preparation_time or DEFAULT_ITEM_PREP_MINUTES) * quantity
+    buffer = max(5, total * 0.2)  # 20% de marge, minimum 5 min
+    return int(BASE_PREP_MINUTES + total + buffer)
+
+
+def predict_prep_minutes(restaurant_id, lines, at=None, model=None):
+    """
+    Durée de préparation prévue (minutes) pour des lignes
+    (category_id, preparation_time, quantity).
+
+    Avec historique : la catégorie la plus lente de la commande (les
+    postes travaillent en parallèle), à défaut la commande entière, sans
+    descendre sous le plat le plus long. Sinon : estimation statique.
+    """
+    lines = list(lines)
+    category_ids = {category_id for category_id, _, _ in lines if category_id}
+    if model is None:
+        model = load_prep_time_model(restaurant_id, category_ids, at=at)
+
+    learned = [m for m in (model.minutes(c) for c in category_ids) if m is not None]
+    learned_minutes = max(learned) if learned else model.minutes()
+    if learned_minutes is None:
+        return static_prep_minutes(lines)
+
+    longest_item = max(
+        (preparation_time or 0 for _, preparation_time, quantity in lines if quantity),
+        default=0,
+    )
+    return int(round(max(learned_minutes, longest_item)))
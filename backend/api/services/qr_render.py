@@ -0,0 +1,279 @@
+"""
+Rendu des QR codes de table et de leur export PDF.
+
+Rendu :
+    Les PNG sont produits en mémoire (api.utils.qrcode_utils.render_qr_png,
+    logo décodé une fois par processus) et mémoïsés dans le cache sous une
+    empreinte de leur contenu (URL, taille, bordure, logo) : réimprimer les
+    QR d'un restaurant ne recalcule que les tables nouvelles ou renommées.
+    Les absents d'un lot sont rendus séquentiellement dans le processus
+    appelant : ni la requête GET export_qr ni le worker Celery (processus
+    démon) ne créent de processus de rendu.
+
+Export PDF :
+    POST /table/restaurants/{id}/export_qr/ crée un QrExportJob ; la tâche
+    generate_qr_export produit le PDF (images en mémoire, sans fichier
+    temporaire) et le stocke dans `job.file`, téléchargeable 30 jours.
+    purge_expired_qr_exports supprime ensuite le job et son fichier.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import QrExportJob, Table
+from api.utils.qrcode_utils import _get_logo_path, logo_cache_key, render_qr_png
+
+logger = logging.getLogger(__name__)
+
+QR_PNG_TTL = getattr(settings, "QR_PNG_TTL", 7 * 24 * 3600)
+
+QR_EXPORT_BOX_SIZE = 8
+QR_EXPORT_RETENTION_DAYS = 30
+
+
+def table_qr_code(table):
+    """Code QR de la table, ou celui que Table.save() lui attribuerait"""
+    return table.qr_code or f"R{table.restaurant_id}T{str(table.number).zfill(3)}"
+
+
+def table_qr_url(base_url, qr_code):
+    """URL Universal Links / App Links encodée dans le QR (cf. table_views._build_qr_url)"""
+    return f"{base_url.rstrip('/')}/t/{qr_code}/"
+
+
+def ensure_qr_codes(tables):
+    """Attribue en une requête les codes QR manquants (anciennes tables)"""
+    missing = [table for table in tables if not table.qr_code]
+    for table in missing:
+        table.qr_code = table_qr_code(table)
+    if missing:
+        Table.objects.bulk_update(missing, ['qr_code'])
+    return tables
+
+
+# =============================================================================
+# RENDU
+# =============================================================================
+
+def _png_key(data, box_size, border, logo_key):
+    digest = hashlib.sha256(f"{data}\n{box_size}\n{border}\n{logo_key}".encode()).hexdigest()
+    return f"qr:png:{digest}"
+
+
+def render_qr_pngs(urls, box_size=10, border=4, progress=None):
+    """
+    PNG (octets) des QR codes de `urls`, dans le même ordre.
+
+    Seuls les contenus absents du cache sont rendus. `progress(done, total)`
+    est appelé après chaque QR obtenu.
+    """
+    urls = list(urls)
+    logo_path = _get_logo_path() or ''
+    logo_key = logo_cache_key(logo_path) if logo_path else ''
+    keys = [_png_key(url, box_size, border, logo_key) for url in urls]
+
+    try:
+        pngs = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, QR codes rendus: {e}")
+        pngs = {}
+
+    missing = {}
+    for key, url in zip(keys, urls):
+        if key not in pngs:
+            missing.setdefault(key, url)
+
+    total = len(urls)
+    done = total - len(missing)
+    if progress and done:
+        progress(done, total)
+
+    rendered = {}
+    for key, url in missing.items():
+        rendered[key] = render_qr_png(url, box_size, border, logo_path)
+        done += 1
+        if progress:
+            progress(done, total)
+
+    if rendered:
+        try:
+            cache.set_many(rendered, timeout=QR_PNG_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ QR codes non mis en cache: {e}")
+        pngs.update(rendered)
+
+    return [pngs[key] for key in keys]
+
+
+def get_qr_png(url, box_size=10, border=4):
+    """PNG d'un seul QR code (mémoïsé)"""
+    return render_qr_pngs([url], box_size=box_size, border=border)[0]
+
+
+# =============================================================================
+# PDF
+# =============================================================================
+
+def qr_export_filename(restaurant_name):
+    return f"qr_codes_{restaurant_name.replace(' ', '_')}.pdf"
+
+
+def build_qr_pdf(restaurant_name, entries):
+    """
+    PDF des QR codes : une fiche par table.
+
+    `entries` : [(numéro de table, code QR, PNG)] ; retourne les octets du PDF.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import (
+        Image, Paragraph, SimpleDocTemplate, Spacer, Table as PDFTable, TableStyle,
+    )
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#059669')
+    )
+    card_style = TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BOX', (0, 0), (-1, -1), 2, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0fdf4')),
+    ])
+
+    story = [
+        Paragraph(f"QR Codes - {restaurant_name}", title_style),
+        Spacer(1, 20),
+    ]
+    for number, qr_code, png in entries:
+        card = PDFTable([
+            [Paragraph("<b>EatQuickeR</b>", styles['Heading2']), ""],
+            [Paragraph(f"<b>Table {number}</b>", styles['Heading3']), ""],
+            [Image(BytesIO(png), width=2*inch, height=2*inch), ""],
+            [Paragraph(f"<b>Code manuel :</b><br/>{qr_code}", styles['Normal']), ""],
+            [Paragraph("Scannez le QR code ou saisissez le code manuel", styles['Normal']), ""]
+        ], colWidths=[3*inch, 2*inch])
+        card.setStyle(card_style)
+        story.append(card)
+        story.append(Spacer(1, 30))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_restaurant_qr_pdf(restaurant, base_url, progress=None):
+    """(octets du PDF, nombre de tables) ; ValueError si le restaurant n'a aucune table"""
+    tables = ensure_qr_codes(list(
+        Table.objects.filter(restaurant=restaurant)
+        .only('id', 'restaurant_id', 'number', 'qr_code')
+        .order_by('number')
+    ))
+    if not tables:
+        raise ValueError("Aucune table trouvée pour ce restaurant")
+
+    pngs = render_qr_pngs(
+        [table_qr_url(base_url, table.qr_code) for table in tables],
+        box_size=QR_EXPORT_BOX_SIZE,
+        progress=progress,
+    )
+    content = build_qr_pdf(
+        restaurant.name,
+        [(table.number, table.qr_code, png) for table, png in zip(tables, pngs)],
+    )
+    return content, len(tables)
+
+
+# =============================================================================
+# EXPORT EN TÂCHE DE FOND
+# =============================================================================
+
+def run_qr_export(job):
+    """Génère le PDF d'un QrExportJob et le stocke dans `job.file`"""
+    last = [job.progress]
+
+    def progress(done, total):
+        # Le dernier pourcent est posé une fois le PDF stocké
+        percent = min(int(done * 100 / total), 99)
+        if percent > last[0]:
+            last[0] = percent
+            QrExportJob.objects.filter(pk=job.pk).update(progress=percent)
+
+    content, tables_count = render_restaurant_qr_pdf(job.restaurant, job.base_url, progress)
+
+    now = timezone.now()
+    job.file_name = qr_export_filename(job.restaurant.name)
+    job.file.save(job.file_name, ContentFile(content), save=False)
+    job.file_size = len(content)
+    job.tables_count = tables_count
+    job.progress = 100
+    job.status = QrExportJob.Status.COMPLETE
+    job.finished_at = now
+    job.expires_at = now + timedelta(days=QR_EXPORT_RETENTION_DAYS)
+    job.save()
+    return job
+
+
+def purge_expired_qr_exports(batch_size=None):
+    """
+    Supprime par lots les exports expirés et ceux en échec depuis plus de
+    QR_EXPORT_RETENTION_DAYS ; les PDF sont effacés du stockage après le
+    commit. Retourne le nombre d'exports supprimés.
+    """
+    from api.services.maintenance import update_in_batches
+
+    now = timezone.now()
+    expired = QrExportJob.objects.filter(
+        Q(expires_at__lt=now)
+        | Q(status=QrExportJob.Status.FAILED,
+            created_at__lt=now - timedelta(days=QR_EXPORT_RETENTION_DAYS))
+    )
+    storage = QrExportJob._meta.get_field('file').storage
+
+    def delete_files(names):
+        for name in names:
+            try:
+                storage.delete(name)
+            except Exception as e:
+                logger.warning(f"⚠️ PDF d'export QR non supprimé ({name}): {e}")
+
+    def purge(rows):
+        QrExportJob.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+        names = [name for _, name in rows if name]
+        if names:
+            transaction.on_commit(lambda: delete_files(names))
+
+    return len(update_in_batches(expired, purge, fields=('file',), batch_size=batch_size))
+
+
+def schedule_qr_export(job_id):
+    """Planifie la génération ; sans Celery, génération immédiate"""
+    from api.tasks import generate_qr_export
+
+    try:
+        generate_qr_export.delay(str(job_id))
+    except Exception:
+        logger.exception(
+            f"Planification impossible, export QR immédiat (job {job_id})"
+        )
+        generate_qr_export(str(job_id))
@@ -0,0 +1,155 @@
+"""
+Tableau d'occupation des tables et libération en masse des sessions
+collaboratives (RestaurantSessionManagementViewSet).
+
+Lecture :
+    `tables_with_active_session` charge les tables d'un restaurant et, par
+    un Prefetch unique, leur session active annotée du nombre de
+    participants actifs : deux requêtes quel que soit le nombre de tables.
+
+Écriture :
+    `archive_sessions` archive un queryset de sessions en un seul UPDATE,
+    ou par lots verrouillés pour les tâches périodiques (statut cancelled
+    sauf sessions déjà terminées, même note que
+    CollaborativeTableSession.archive()), notifie chaque session puis
+    pousse un seul delta plan de salle par restaurant.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Prefetch, Q, TextField, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from api.models import CollaborativeTableSession, SessionParticipant, Table
+
+logger = logging.getLogger(__name__)
+
+# Sessions qui occupent la table
+ACTIVE_SESSION_STATUSES = ('active', 'locked', 'payment')
+
+# Statuts conservés à l'archivage (les autres passent à cancelled)
+FINISHED_SESSION_STATUSES = ('completed', 'cancelled')
+
+
+def archive_note(reason):
+    """Expression SQL : ajoute « Archivé: reason » à session_notes"""
+    note = f"Archivé: {reason}"
+    return Case(
+        When(session_notes='', then=Value(note)),
+        default=Concat(F('session_notes'), Value(f"\n{note}")),
+        output_field=TextField(),
+    )
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+def tables_with_active_session(restaurant):
+    """
+    Tables du restaurant ; `table.active_session` vaut la session active la
+    plus récente (annotée `active_participants`) ou None.
+    """
+    sessions = CollaborativeTableSession.objects.filter(
+        status__in=ACTIVE_SESSION_STATUSES,
+    ).annotate(
+        active_participants=Count('participants', filter=Q(participants__status='active')),
+    ).order_by('-created_at')
+
+    tables = list(
+        Table.objects.filter(restaurant=restaurant).prefetch_related(
+            Prefetch('collaborative_sessions', queryset=sessions, to_attr='active_sessions')
+        )
+    )
+    for table in tables:
+        table.active_session = table.active_sessions[0] if table.active_sessions else None
+    return tables
+
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+_ARCHIVE_FIELDS = ('restaurant_id', 'table_id', 'table_number', 'share_code', 'status')
+
+
+def _archive_rows(rows, note):
+    """UPDATE des sessions `rows` (dicts, verrouillées par l'appelant)"""
+    ids = [row['id'] for row in rows]
+
+    participants = dict(
+        SessionParticipant.objects.filter(session_id__in=ids, status='active')
+        .order_by()
+        .values_list('session_id')
+        .annotate(count=Count('id'))
+    )
+
+    CollaborativeTableSession.all_objects.filter(id__in=ids).update(
+        is_archived=True,
+        archived_at=timezone.now(),
+        # update() ne déclenche pas auto_now sur updated_at, comme
+        # save(update_fields=[...]) auparavant
+        status=Case(
+            When(status__in=FINISHED_SESSION_STATUSES, then=F('status')),
+            default=Value('cancelled'),
+        ),
+        session_notes=note,
+    )
+
+    for row in rows:
+        if row['status'] not in FINISHED_SESSION_STATUSES:
+            row['status'] = 'cancelled'
+        row['participant_count'] = participants.get(row['id'], 0)
+    return rows
+
+
+def archive_sessions(sessions, reason, notify_reason=None, in_batches=False):
+    """
+    Archive les sessions non archivées du queryset et libère leurs tables.
+
+    Retourne la liste des sessions archivées (dict : id, share_code, status
+    après archivage, table_number, participant_count), dans l'ordre du
+    queryset. Avec `in_batches` (tâches périodiques), les sessions sont
+    traitées par lots SKIP LOCKED (update_in_batches), sans ordre garanti.
+    """
+    sessions = sessions.filter(is_archived=False)
+    note = archive_note(reason)
+
+    if in_batches:
+        from api.services.maintenance import update_in_batches
+
+        archived = []
+
+        def archive(rows):
+            archived.extend(_archive_rows(
+                [dict(zip(('id', *_ARCHIVE_FIELDS), row)) for row in rows], note
+            ))
+
+        update_in_batches(sessions, archive, fields=_ARCHIVE_FIELDS)
+    else:
+        with transaction.atomic():
+            rows = list(
+                sessions.select_for_update(of=('self',)).values('id', *_ARCHIVE_FIELDS)
+            )
+            archived = _archive_rows(rows, note) if rows else []
+
+    if not archived:
+        return []
+
+    from api.utils.websocket_notifications import notify_session_archived
+    from api.utils.floorplan_notifications import notify_floorplan_tables
+
+    for row in archived:
+        try:
+            notify_session_archived(session_id=str(row['id']), reason=notify_reason or reason)
+        except Exception as e:
+            logger.warning(f"⚠️ Notification WebSocket échouée pour {row['id']}: {e}")
+
+    notify_floorplan_tables(
+        [(row['restaurant_id'], row['table_id']) for row in archived],
+        event='table_released',
+    )
+
+    logger.info(f"🗄️ {len(archived)} session(s) archivée(s) - Raison: {reason}")
+    return archived
@@ -0,0 +1,284 @@
+"""
+État du panier partagé d'une session collaborative et diffs WebSocket.
+
+Lecture :
+    L'instantané du panier (articles, total, version) est construit une
+    fois puis servi depuis le cache jusqu'à la mutation suivante. Il n'est
+    envoyé qu'à la connexion et quand le client détecte un trou de version
+    (message cart_ping).
+
+Écriture :
+    Chaque mutation incrémente atomiquement la version du panier et stocke
+    ses changements (added / changed / removed / cleared) sous cette
+    version. Les mutations de la fenêtre de regroupement ne produisent
+    qu'une diffusion : un cart_diff couvrant toutes les versions non encore
+    diffusées, fusionnées par article. Si un changement a quitté le cache,
+    la diffusion bascule sur l'instantané complet (cart_updated).
+
+Côté client : un cart_diff s'applique si from_version <= version locale
+< version, est ignoré si version <= version locale, et déclenche un
+cart_ping si from_version > version locale.
+"""
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from api.models import CollaborativeTableSession, SessionCartItem
+from api.serializers.collaborative_session_serializers import SessionCartItemSerializer
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre de regroupement des mutations d'un même panier (secondes)
+SESSION_CART_COALESCE_SECONDS = getattr(settings, "SESSION_CART_COALESCE_SECONDS", 0.5)
+
+# Durée de vie du verrou de diffusion : couvre un worker un peu lent, sans
+# bloquer longtemps les diffusions suivantes si la tâche est perdue.
+SESSION_CART_PENDING_TTL = 30
+
+# Durée de vie des changements par version et de l'état du panier
+SESSION_CART_DIFF_TTL = getattr(settings, "SESSION_CART_DIFF_TTL", 300)
+SESSION_CART_STATE_TTL = getattr(settings, "SESSION_CART_STATE_TTL", 60 * 60 * 24)
+
+# Au-delà, un diff fusionné n'est pas plus léger que l'instantané
+MAX_DIFF_VERSIONS = 50
+
+
+def snapshot_key(session_id):
+    return f"session_cart:snapshot:{session_id}"
+
+
+def version_key(session_id):
+    return f"session_cart:version:{session_id}"
+
+
+def sent_version_key(session_id):
+    return f"session_cart:sent:{session_id}"
+
+
+def changes_key(session_id, version):
+    return f"session_cart:changes:{session_id}:{version}"
+
+
+def pending_key(session_id):
+    return f"session_cart:pending:{session_id}"
+
+
+def get_version(session_id):
+    return cache.get(version_key(session_id)) or 0
+
+
+def bump_version(session_id):
+    """Invalide l'instantané et incrémente atomiquement la version du panier"""
+    key = version_key(session_id)
+    cache.delete(snapshot_key(session_id))
+    cache.add(key, 0, timeout=SESSION_CART_STATE_TTL)
+    return cache.incr(key)
+
+
+# =============================================================================
+# CHANGEMENTS
+# =============================================================================
+
+def serialize_items(items):
+    """Articles sérialisés en types JSON natifs (UUID, Decimal → str)"""
+    data = SessionCartItemSerializer(items, many=True).data
+    return json.loads(json.dumps(list(data), cls=DjangoJSONEncoder))
+
+
+def item_change(op, item):
+    """Changement 'added' ou 'changed' portant l'article sérialisé"""
+    return {'op': op, 'item': serialize_items([item])[0]}
+
+
+def removed_change(item_id):
+    return {'op': 'removed', 'id': str(item_id)}
+
+
+def cleared_change():
+    return {'op': 'cleared'}
+
+
+def merge_changes(batches):
+    """
+    Fusionne des lots de changements successifs : un seul changement par
+    article (le dernier), un article ajouté puis retiré disparaît, et un
+    'cleared' efface tout ce qui le précède.
+    """
+    cleared = False
+    by_item = {}
+    for changes in batches:
+        for change in changes:
+            op = change['op']
+            if op == 'cleared':
+                cleared = True
+                by_item = {}
+                continue
+
+            item_id = change['id'] if op == 'removed' else change['item']['id']
+            previous = by_item.get(item_id)
+            if previous is not None and previous['op'] == 'added':
+                if op == 'removed':
+                    del by_item[item_id]
+                    continue
+                change = {'op': 'added', 'item': change['item']}
+            by_item.pop(item_id, None)
+            by_item[item_id] = change
+
+    return ([cleared_change()] if cleared else []) + list(by_item.values())
+
+
+def record_cart_change(session_id, changes):
+    """Stocke les changements d'une mutation sous une nouvelle version"""
+    version = bump_version(session_id)
+    cache.set(changes_key(session_id, version), changes, timeout=SESSION_CART_DIFF_TTL)
+    return version
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+def _items(session_id):
+    return SessionCartItem.objects.filter(session_id=session_id).select_related(
+        'participant', 'participant__user', 'menu_item'
+    )
+
+
+def cart_totals(session_id):
+    """(total, nombre d'articles) du panier, en une requête"""
+    totals = SessionCartItem.objects.filter(session_id=session_id).aggregate(
+        total=Sum(F('menu_item__price') * F('quantity')),
+        items_count=Sum('quantity'),
+    )
+    return float(totals['total'] or 0), int(totals['items_count'] or 0)
+
+
+def build_cart_snapshot(session_id, version=0):
+    items = serialize_items(_items(session_id))
+    return {
+        'version': version,
+        'items': items,
+        'total': float(sum(float(item.get('total_price', 0)) for item in items)),
+        'items_count': sum(int(item.get('quantity', 0)) for item in items),
+    }
+
+
+def get_cart_snapshot(session_id):
+    """
+    Instantané du panier, servi depuis le cache tant que sa version est
+    la version courante.
+    """
+    try:
+        version = get_version(session_id)
+        cached = cache.get(snapshot_key(session_id))
+    except Exception as e:
+        # Cache indisponible : état sans version, le client se resynchronise
+        logger.warning(f"⚠️ Instantané panier hors cache ({session_id}): {e}")
+        return build_cart_snapshot(session_id, version=None)
+
+    if cached is not None and cached['version'] == version:
+        return cached
+
+    snapshot = build_cart_snapshot(session_id, version)
+    # Mutation pendant la construction : ne pas figer un état déjà dépassé
+    if get_version(session_id) == version:
+        cache.set(snapshot_key(session_id), snapshot, timeout=SESSION_CART_STATE_TTL)
+    return snapshot
+
+
+# =============================================================================
+# DIFFUSION
+# =============================================================================
+
+def notify_cart_change(session_id, changes):
+    """Enregistre les changements et planifie la diffusion après le commit"""
+    transaction.on_commit(lambda: schedule_cart_broadcast(session_id, changes))
+
+
+def schedule_cart_broadcast(session_id, changes):
+    """
+    Enregistre les changements puis planifie la diffusion. `cache.add` est
+    atomique : seule la première mutation de la fenêtre planifie la tâche.
+    """
+    try:
+        record_cart_change(session_id, changes)
+        if not cache.add(pending_key(session_id), True, timeout=SESSION_CART_PENDING_TTL):
+            return
+    except Exception as e:
+        logger.warning(f"⚠️ Cache indisponible, panier complet diffusé ({session_id}): {e}")
+        broadcast_cart(session_id)
+        return
+
+    try:
+        from api.tasks import broadcast_session_cart
+
+        broadcast_session_cart.apply_async(
+            args=[str(session_id)], countdown=SESSION_CART_COALESCE_SECONDS
+        )
+    except Exception:
+        logger.exception(f"❌ Planification impossible, diffusion immédiate (session {session_id})")
+        broadcast_cart(session_id)
+
+
+def build_cart_message(session_id):
+    """
+    Message à diffuser pour les versions non encore envoyées : un diff
+    fusionné, ou l'instantané complet si un changement manque. None s'il
+    n'y a rien de nouveau.
+    """
+    version = get_version(session_id)
+    sent = cache.get(sent_version_key(session_id)) or 0
+    if version and version == sent:
+        return None
+
+    keys = [changes_key(session_id, v) for v in range(sent + 1, version + 1)]
+    found = cache.get_many(keys) if 0 < len(keys) <= MAX_DIFF_VERSIONS else {}
+
+    if keys and len(found) == len(keys):
+        total, items_count = cart_totals(session_id)
+        message = {
+            'type': 'cart_diff',
+            'from_version': sent,
+            'version': version,
+            'changes': merge_changes(found[key] for key in keys),
+            'total': total,
+            'items_count': items_count,
+        }
+    else:
+        message = {'type': 'cart_updated', **get_cart_snapshot(session_id)}
+
+    cache.set(sent_version_key(session_id), version, timeout=SESSION_CART_STATE_TTL)
+    return message
+
+
+def broadcast_cart(session_id):
+    """Diffuse au groupe session_{id} les changements en attente"""
+    try:
+        cache.delete(pending_key(session_id))
+        message = build_cart_message(session_id)
+    except Exception as e:
+        logger.warning(f"⚠️ Diff panier non calculé ({session_id}), panier complet: {e}")
+        message = {'type': 'cart_updated', **build_cart_snapshot(session_id, version=None)}
+
+    if message is None:
+        return
+
+    # Toute activité panier maintient la session vivante
+    CollaborativeTableSession.objects.filter(id=session_id).update(updated_at=timezone.now())
+
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            logger.warning("broadcast_cart: channel layer indisponible")
+            return
+        async_to_sync(channel_layer.group_send)(f'session_{session_id}', message)
+    except Exception as e:
+        logger.error(f"Diffusion panier échouée (session {session_id}): {e}")
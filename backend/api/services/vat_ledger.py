@@ -0,0 +1,275 @@
+"""
+Grand livre TVA (OrderVatLine).
+
+Écriture :
+    À la finalisation d'une commande, `Order.record_vat_lines` fige une
+    ligne par taux (base HT, TVA, TTC) à partir de `vat_details`.
+    `rebuild_vat_ledger` reconstruit tout ou partie du grand livre pour
+    les commandes antérieures.
+
+    `schedule_order_vat_refresh` réécrit, après le commit, le grand livre
+    d'une commande dont les lignes ont changé (signaux OrderItem).
+
+Lecture :
+    Récapitulatif mensuel, exports CSV et FEC agrègent ces lignes en SQL
+    (SUM ... FILTER par tranche de taux) au lieu de reparcourir lignes et
+    composants de chaque commande. Une commande payée sans ligne au grand
+    livre (antérieure au grand livre, pas encore reconstruite) est ventilée
+    depuis ses lignes, comme auparavant.
+"""
+import itertools
+import logging
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from api.models import Order, OrderVatLine
+from api.services.daily_stats import day_bounds
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+
+# Tranches des déclarations (CA3) : 5,5 %, 10 % et 20 %. Les taux réduits
+# (2,1 %...) tombent dans la première, tout taux > 10 % dans la dernière.
+RATE_BUCKETS = ('5.5', '10', '20')
+
+_BUCKET_FILTERS = {
+    '5.5': lambda p: Q(**{f'{p}vat_rate__lte': Decimal('0.055')}),
+    '10': lambda p: Q(**{f'{p}vat_rate__gt': Decimal('0.055'), f'{p}vat_rate__lte': Decimal('0.100')}),
+    '20': lambda p: Q(**{f'{p}vat_rate__gt': Decimal('0.100')}),
+}
+
+# Suffixe des champs RecapitulatifTVA (tva_5_5_base, tva_10_montant...)
+_RECAP_SUFFIX = {'5.5': '5_5', '10': '10', '20': '20'}
+
+REBUILD_CHUNK_SIZE = 500
+
+
+def rate_bucket(rate):
+    """Tranche de déclaration d'un taux (Decimal, ex. 0.100 → '10')"""
+    if rate <= Decimal('0.055'):
+        return '5.5'
+    if rate <= Decimal('0.100'):
+        return '10'
+    return '20'
+
+
+def _sum(field, condition=None):
+    return Coalesce(
+        Sum(field, filter=condition),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+def vat_recap(restaurateur, date_debut, date_fin):
+    """
+    Récapitulatif TVA des commandes payées de [date_debut, date_fin] (jours
+    inclus), en une seule requête. Les clés correspondent aux champs de
+    RecapitulatifTVA.
+    """
+    start, _ = day_bounds(date_debut)
+    _, end = day_bounds(date_fin)
+
+    aggregates = {
+        'ca_ttc': _sum('total_ttc'),
+        'ca_ht': _sum('base_ht'),
+        'tva_total': _sum('vat_amount'),
+        'nombre_factures': Count('order', distinct=True),
+    }
+    for key in RATE_BUCKETS:
+        condition = _BUCKET_FILTERS[key]('')
+        suffix = _RECAP_SUFFIX[key]
+        aggregates[f'tva_{suffix}_base'] = _sum('base_ht', condition)
+        aggregates[f'tva_{suffix}_montant'] = _sum('vat_amount', condition)
+
+    recap = OrderVatLine.objects.filter(
+        restaurant__owner=restaurateur,
+        order__payment_status='paid',
+        order_created_at__gte=start,
+        order_created_at__lt=end,
+    ).aggregate(**aggregates)
+
+    # Commandes sans grand livre : ventilées depuis leurs lignes
+    unledgered = Order.objects.filter(
+        restaurant__owner=restaurateur,
+        payment_status='paid',
+        created_at__gte=start,
+        created_at__lt=end,
+        vat_lines__isnull=True,
+    )
+    for order in unledgered:
+        breakdown = _items_breakdown(order)
+        for key, amounts in breakdown.items():
+            suffix = _RECAP_SUFFIX[key]
+            recap[f'tva_{suffix}_base'] += amounts['base']
+            recap[f'tva_{suffix}_montant'] += amounts['tva']
+            recap['ca_ht'] += amounts['base']
+            recap['tva_total'] += amounts['tva']
+            recap['ca_ttc'] += amounts['base'] + amounts['tva']
+        recap['nombre_factures'] += 1
+    return recap
+
+
+def annotate_order_vat(orders):
+    """
+    Ajoute à chaque commande `vat_base_ht` et `vat_<tranche>` (vat_5_5,
+    vat_10, vat_20), sommés en SQL depuis le grand livre, et `vat_line_count`.
+    """
+    annotations = {
+        'vat_base_ht': _sum('vat_lines__base_ht'),
+        'vat_line_count': Count('vat_lines'),
+    }
+    for key in RATE_BUCKETS:
+        annotations[f'vat_{_RECAP_SUFFIX[key]}'] = _sum(
+            'vat_lines__vat_amount', _BUCKET_FILTERS[key]('vat_lines__')
+        )
+    return orders.annotate(**annotations)
+
+
+def iter_orders_with_vat(orders):
+    """
+    Commandes annotées par `annotate_order_vat` ; celles sans grand livre
+    reçoivent les mêmes attributs, calculés depuis leurs lignes.
+    """
+    for order in annotate_order_vat(orders):
+        if not order.vat_line_count:
+            breakdown = _items_breakdown(order)
+            order.vat_base_ht = sum((b['base'] for b in breakdown.values()), ZERO)
+            for key, amounts in breakdown.items():
+                setattr(order, f'vat_{_RECAP_SUFFIX[key]}', amounts['tva'])
+        yield order
+
+
+def _items_breakdown(order):
+    """Ventilation par tranche depuis vat_details, ou à défaut les lignes"""
+    details = order.vat_details or order.calculate_vat_breakdown()
+    breakdown = {key: {'base': ZERO, 'tva': ZERO} for key in RATE_BUCKETS}
+    for rate, amounts in details.items():
+        bucket = breakdown[rate_bucket(Decimal(str(rate)) / 100)]
+        bucket['base'] += Decimal(str(amounts['ht']))
+        bucket['tva'] += Decimal(str(amounts['tva']))
+    return breakdown
+
+
+def order_vat_breakdown(order):
+    """
+    Ventilation {'5.5': {'base', 'tva'}, '10': ..., '20': ...} d'une commande,
+    lue sur ses lignes de grand livre (à précharger avec
+    `prefetch_related('vat_lines')` pour un lot de commandes). Sans grand
+    livre, la ventilation est calculée depuis la commande.
+    """
+    lines = list(order.vat_lines.all())
+    if not lines:
+        return _items_breakdown(order)
+    breakdown = {key: {'base': ZERO, 'tva': ZERO} for key in RATE_BUCKETS}
+    for line in lines:
+        bucket = breakdown[rate_bucket(line.vat_rate)]
+        bucket['base'] += line.base_ht
+        bucket['tva'] += line.vat_amount
+    return breakdown
+
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+def refresh_order_vat(order_id):
+    """
+    Recalcule vat_details / tax_amount d'une commande depuis ses lignes et
+    réécrit son grand livre. Sans effet si la commande n'existe plus.
+    """
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None:
+        return
+    with transaction.atomic():
+        order.calculate_vat_breakdown()
+        tax_amount = sum(
+            (Decimal(str(b['tva'])) for b in order.vat_details.values()), ZERO
+        )
+        Order.objects.filter(pk=order.pk).update(
+            vat_details=order.vat_details, tax_amount=tax_amount
+        )
+        order.record_vat_lines(replace=True)
+
+
+# Horodatage logique des planifications / réécritures (par thread) : une
+# réécriture postérieure à une planification la couvre déjà.
+_ticks = itertools.count()
+_refreshed = threading.local()
+_REFRESHED_MAX = 10_000
+
+
+def _refresh_after_commit(order_id, scheduled_at):
+    done = getattr(_refreshed, 'ticks', None)
+    if done is None or len(done) > _REFRESHED_MAX:
+        done = _refreshed.ticks = {}
+    if done.get(order_id, -1) > scheduled_at:
+        return
+    done[order_id] = next(_ticks)
+    try:
+        refresh_order_vat(order_id)
+    except Exception:
+        logger.exception(f"❌ Grand livre TVA non mis à jour (commande {order_id})")
+
+
+def schedule_order_vat_refresh(order_id):
+    """
+    Planifie après commit la réécriture du grand livre de la commande. Les
+    callbacks d'une même transaction s'exécutent à la suite après le
+    commit : seul le premier réécrit, les suivants sont déjà couverts.
+    """
+    scheduled_at = next(_ticks)
+    transaction.on_commit(lambda: _refresh_after_commit(order_id, scheduled_at))
+
+
+def rebuild_vat_ledger(restaurant_ids=None, start_day=None, end_day=None):
+    """
+    Réécrit les lignes du grand livre des commandes de [start_day, end_day]
+    (None = sans borne). Les commandes sans `vat_details` (antérieures à la
+    ventilation par taux) sont d'abord recalculées depuis leurs lignes.
+    Retourne le nombre de lignes écrites.
+    """
+    orders = Order.objects.all()
+    if restaurant_ids:
+        orders = orders.filter(restaurant_id__in=restaurant_ids)
+    if start_day:
+        orders = orders.filter(created_at__gte=day_bounds(start_day)[0])
+    if end_day:
+        orders = orders.filter(created_at__lt=day_bounds(end_day)[1])
+
+    orders = orders.order_by('pk').prefetch_related('items__components')
+    written = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        with transaction.atomic():
+            OrderVatLine.objects.filter(order__in=[o.pk for o in batch]).delete()
+            for order in batch:
+                if not order.vat_details:
+                    order.calculate_vat_breakdown(
+                        lines=((item, item.components.all()) for item in order.items.all())
+                    )
+                    Order.objects.filter(pk=order.pk).update(vat_details=order.vat_details)
+                order.record_vat_lines(replace=False)
+                written += len(order.vat_details)
+        batch.clear()
+
+    for order in orders.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        batch.append(order)
+        if len(batch) >= REBUILD_CHUNK_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    logger.info("Grand livre TVA reconstruit : %s ligne(s)", written)
+    return written
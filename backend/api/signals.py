@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save, pre_save, post_migrate
+from django.db.models.signals import post_save, pre_save, post_delete, post_migrate, m2m_changed
 from django.contrib.auth.models import User, Group
 from django.dispatch import receiver
 from django.apps import apps as django_apps
@@ -231,22 +231,64 @@ def get_notification_service():
 # =============================================================================
 # CAPTURE CHANGEMENTS DE COMMANDE (POUR WS/SSE)
 # =============================================================================
+def get_previous_order_values(instance):
+    """
+    Valeurs persistées (status, payment_status) d'une commande avant save.
+
+    Lues depuis l'instance (suivi en mémoire, cf. Order.TRACKED_FIELDS) ;
+    la ligne n'est relue en base que si l'instance ne les connaît pas.
+    Retourne None si la commande n'existe pas (encore) en base.
+    """
+    if not instance.pk:
+        return None
+
+    previous = instance.get_previous_values()
+    if previous is None:
+        try:
+            previous = getattr(instance, "_previous_values_fallback", None)
+            if previous is None:
+                old_instance = Order.objects.get(pk=instance.pk)
+                previous = {
+                    field: getattr(old_instance, field, None)
+                    for field in Order.TRACKED_FIELDS
+                }
+                previous["waiting_time"] = getattr(old_instance, "waiting_time", None)
+                # Partagé par les autres receivers pre_save de ce même save()
+                instance._previous_values_fallback = previous
+        except Order.DoesNotExist:
+            return None
+    return previous
+
+
 @receiver(pre_save, sender="api.Order")
 def capture_order_changes(sender, instance, **kwargs):
     """Capturer les changements avant sauvegarde (status, waiting_time)"""
     if instance.pk:
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._old_status = getattr(old_instance, "status", None)
-            instance._old_waiting_time = getattr(old_instance, "waiting_time", None)
-        except sender.DoesNotExist:
-            instance._old_status = None
-            instance._old_waiting_time = None
+        previous = get_previous_order_values(instance) or {}
+        instance._old_status = previous.get("status")
+        instance._old_waiting_time = previous.get("waiting_time")
+
+
+@receiver(post_save, sender="api.Order", dispatch_uid="order_outbox_save")
+def enqueue_order_notifications(sender, instance, created, **kwargs):
+    """
+    Enregistre un événement dans l'outbox des notifications de commande.
+    La diffusion WS/SSE/push a lieu hors requête, après le commit, et les
+    sauvegardes rapprochées d'une même commande sont regroupées.
+    """
+    from api.services.order_events import enqueue_order_event
+
+    try:
+        enqueue_order_event(instance, created)
+    except Exception as e:
+        logger.error(f"❌ Erreur enregistrement notification commande #{instance.id}: {e}")
+    finally:
+        # Le fallback base ne vaut que pour ce save()
+        instance.__dict__.pop("_previous_values_fallback", None)
 
 
-@receiver(post_save, sender="api.Order")
 def order_updated(sender, instance, created, **kwargs):
-    """Signal déclenché lors de la mise à jour d'une commande (WebSocket/SSE)"""
+    """Diffusion WebSocket/SSE d'une mise à jour de commande (via l'outbox)"""
     try:
         # Champs additionnels communs au payload
         extra_data_common = {
@@ -370,19 +412,103 @@ def test_websocket_notification(order_id, test_message="Test notification"):
 def update_order_timestamps(sender, instance, **kwargs):
     """Met à jour les timestamps selon le changement de statut"""
     if instance.pk:  # Uniquement pour les updates
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
+        previous = get_previous_order_values(instance)
+        if previous is None:
+            return
 
-            # Capture du moment où la commande devient ready
-            if old_instance.status != "ready" and instance.status == "ready":
-                instance.ready_at = timezone.now()
+        old_status = previous.get("status")
 
-            # Capture du moment où la commande est servie
-            if old_instance.status != "served" and instance.status == "served":
-                instance.served_at = timezone.now()
+        # Capture du moment où la commande devient ready
+        if old_status != "ready" and instance.status == "ready":
+            instance.ready_at = timezone.now()
 
-        except Order.DoesNotExist:
-            pass
+        # Capture du moment où la commande est servie
+        if old_status != "served" and instance.status == "served":
+            instance.served_at = timezone.now()
+
+
+# =============================================================================
+# TEMPS DE PRÉPARATION APPRIS
+# =============================================================================
+@receiver(post_save, sender=Order, dispatch_uid="order_prep_time_save")
+def record_order_prep_time(sender, instance, created, **kwargs):
+    """Alimente PrepTimeStats quand la commande devient prête (ou servie directement)"""
+    from api.services.prep_time import PREP_DONE_STATUSES, schedule_prep_time_record
+
+    old_status = getattr(instance, "_old_status", None)
+    if created or old_status is None:
+        return
+    if old_status in PREP_DONE_STATUSES or instance.status not in PREP_DONE_STATUSES:
+        return
+
+    try:
+        schedule_prep_time_record(instance)
+    except Exception as e:
+        logger.error(f"❌ Erreur enregistrement temps de préparation commande #{instance.id}: {e}")
+
+
+# =============================================================================
+# AGRÉGATS STATISTIQUES JOURNALIERS
+# =============================================================================
+@receiver(post_save, sender=Order, dispatch_uid="order_daily_stats_save")
+@receiver(post_delete, sender=Order, dispatch_uid="order_daily_stats_delete")
+def refresh_order_daily_stats(sender, instance, **kwargs):
+    """Recalcul (différé, regroupé) de la journée de la commande dans RestaurantDailyStats"""
+    from api.services.daily_stats import schedule_daily_stats_refresh
+
+    try:
+        if instance.created_at:
+            schedule_daily_stats_refresh(
+                instance.restaurant_id, timezone.localdate(instance.created_at)
+            )
+    except Exception as e:
+        logger.error(f"❌ Erreur planification stats commande #{instance.id}: {e}")
+
+
+# =============================================================================
+# GRAND LIVRE TVA
+# =============================================================================
+@receiver(post_save, sender="api.OrderItem", dispatch_uid="vat_ledger_item_save")
+@receiver(post_delete, sender="api.OrderItem", dispatch_uid="vat_ledger_item_delete")
+@receiver(post_save, sender="api.OrderItemComponent", dispatch_uid="vat_ledger_component_save")
+@receiver(post_delete, sender="api.OrderItemComponent", dispatch_uid="vat_ledger_component_delete")
+def refresh_order_vat_ledger(sender, instance, **kwargs):
+    """Réécrit (après commit, une fois par commande) le grand livre TVA quand une ligne change"""
+    from api.services.vat_ledger import schedule_order_vat_refresh
+
+    try:
+        order_id = (
+            instance.order_item.order_id if sender.__name__ == "OrderItemComponent"
+            else instance.order_id
+        )
+        schedule_order_vat_refresh(order_id)
+    except Exception as e:
+        logger.error(f"❌ Erreur planification grand livre TVA ({sender.__name__} {instance.pk}): {e}")
+
+
+# =============================================================================
+# MENUS PUBLICS COMPILÉS
+# =============================================================================
+_COMPILED_MENU_SOURCES = (
+    "api.Restaurant", "api.Menu", "api.MenuItem", "api.MenuCategory",
+    "api.MenuSubCategory", "api.DailyMenu", "api.DailyMenuItem",
+    "api.Formule", "api.FormuleCourse", "api.FormuleCourseItem",
+)
+
+
+def invalidate_compiled_menus(sender, instance, **kwargs):
+    """Périme les documents de carte publics compilés du restaurant concerné"""
+    from api.services.compiled_menu import invalidate_restaurant_menus, restaurant_id_for
+
+    try:
+        invalidate_restaurant_menus(restaurant_id_for(instance))
+    except Exception as e:
+        logger.error(f"❌ Erreur invalidation menus compilés ({sender.__name__} {instance.pk}): {e}")
+
+
+for _source in _COMPILED_MENU_SOURCES:
+    post_save.connect(invalidate_compiled_menus, sender=_source, dispatch_uid=f"compiled_menu_save_{_source}")
+    post_delete.connect(invalidate_compiled_menus, sender=_source, dispatch_uid=f"compiled_menu_delete_{_source}")
 
 
 # =============================================================================
@@ -412,7 +538,6 @@ def participant_post_save(sender, instance, created, **kwargs):
 # =============================================================================
 # NOTIFICATIONS PUSH – COMMANDES
 # =============================================================================
-@receiver(post_save, sender=Order)
 def send_order_push_notifications(sender, instance, created, **kwargs):
     """
     Notifs push liées aux commandes (création + changements de statut)
@@ -450,8 +575,8 @@ def send_order_push_notifications(sender, instance, created, **kwargs):
         elif new_status == "cancelled":
             # Priorité utilisateur connecté, fallback invité
             if instance.user_id:
-                push_notifications.send_to_user(
-                    user_id=instance.user_id,
+                push_notifications.send_to_users(
+                    [instance.user_id],
                     title="❌ Commande annulée",
                     body=f"Votre commande #{instance.order_number} a été annulée.",
                     data={"order_id": instance.id, "action": "view_order"},
@@ -481,14 +606,10 @@ def capture_payment_status_change(sender, instance, **kwargs):
     (complémentaire à capture_order_changes / update_order_timestamps)
     """
     if instance.pk:
-        try:
-            old = Order.objects.get(pk=instance.pk)
-            instance._old_payment_status = old.payment_status
-        except Order.DoesNotExist:
-            instance._old_payment_status = None
+        previous = get_previous_order_values(instance) or {}
+        instance._old_payment_status = previous.get("payment_status")
 
 
-@receiver(post_save, sender=Order)
 def send_payment_push_notifications(sender, instance, created, **kwargs):
     """
     Notif push → paiement reçu
@@ -628,6 +749,7 @@ def capture_restaurant_stripe_change(sender, instance, **kwargs):
             instance._old_stripe_active = getattr(
                 old_instance, "is_stripe_active", False
             )
+            instance._old_owner_id = old_instance.owner_id
         except Restaurant.DoesNotExist:
             instance._old_stripe_active = False
 
@@ -650,8 +772,8 @@ def send_restaurant_status_notifications(sender, instance, created, **kwargs):
             # Restaurant activé pour les paiements
             owner_id = instance.owner.user_id
 
-            push_notifications.send_to_user(
-                user_id=owner_id,
+            push_notifications.send_to_users(
+                [owner_id],
                 title="🎉 Paiements activés !",
                 body=f"Votre restaurant {instance.name} peut maintenant recevoir des paiements via l'application.",
                 data={"restaurant_id": instance.id, "action": "view_restaurant"},
@@ -662,3 +784,73 @@ def send_restaurant_status_notifications(sender, instance, created, **kwargs):
 
     except Exception as e:
         logger.error(f"❌ Erreur notification restaurant: {e}")
+
+
+# =============================================================================
+# CACHE D'AUTORISATION
+# =============================================================================
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_authz_on_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Groupes modifiés (user.groups.* ou group.user_set.*)"""
+    from api.services.authz import invalidate_user_context
+
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_user_context(instance.pk)
+    elif action in ("post_add", "post_remove") and pk_set:
+        invalidate_user_context(*pk_set)
+    elif action == "pre_clear":
+        invalidate_user_context(*instance.user_set.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=RestaurateurProfile)
+@receiver(post_delete, sender=RestaurateurProfile)
+def invalidate_authz_on_profile_change(sender, instance, **kwargs):
+    from api.services.authz import invalidate_user_context
+
+    invalidate_user_context(instance.user_id)
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def invalidate_authz_on_restaurant_owner_change(sender, instance, created=False, **kwargs):
+    """Restaurants possédés : création, suppression, changement de propriétaire"""
+    from api.services.authz import invalidate_profile_context
+
+    if kwargs.get("signal") is post_save and not created:
+        old_owner_id = getattr(instance, "_old_owner_id", instance.owner_id)
+        if old_owner_id == instance.owner_id:
+            return
+        invalidate_profile_context(old_owner_id, instance.owner_id)
+        return
+    invalidate_profile_context(instance.owner_id)
+
+
+def invalidate_authz_on_compta_settings_change(sender, instance, **kwargs):
+    from api.services.authz import invalidate_profile_context
+
+    invalidate_profile_context(instance.restaurateur_id)
+
+
+post_save.connect(
+    invalidate_authz_on_compta_settings_change, sender="api.ComptabiliteSettings",
+    dispatch_uid="authz_compta_settings_save",
+)
+post_delete.connect(
+    invalidate_authz_on_compta_settings_change, sender="api.ComptabiliteSettings",
+    dispatch_uid="authz_compta_settings_delete",
+)
+
+
+# =============================================================================
+# RÉPERTOIRE PUBLIC
+# =============================================================================
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_save, sender=RestaurateurProfile)
+@receiver(post_delete, sender=RestaurateurProfile)
+def invalidate_directory_facets_on_change(sender, instance, **kwargs):
+    """Cuisines / villes proposées : visibilité, ville ou cuisine modifiée"""
+    from api.services.directory import invalidate_directory_facets
+
+    invalidate_directory_facets()
@@ -50,6 +50,18 @@ def archive_session_delayed(session_id, reason="Archivage automatique après com
         return f"Erreur: {str(e)}"
 
 
+def _archive_sessions(sessions, reason, notify_reason):
+    """
+    Archive en masse les sessions du queryset par lots verrouillés (SKIP
+    LOCKED), via session_board.archive_sessions : même note et même statut
+    que l'archivage manuel, notification WebSocket de chaque session et
+    delta plan de salle. Retourne le nombre archivé.
+    """
+    from api.services.session_board import archive_sessions
+
+    return len(archive_sessions(sessions, reason, notify_reason=notify_reason, in_batches=True))
+
+
 @shared_task(name='api.tasks.auto_archive_eligible_sessions')
 def auto_archive_eligible_sessions():
     """
@@ -58,66 +70,45 @@ def auto_archive_eligible_sessions():
     - Les sessions active/locked sans activité depuis plus de 30 minutes
     """
     from api.models import CollaborativeTableSession
+    from api.services.maintenance import record_task_run
 
     logger.info("🔄 Démarrage de l'archivage automatique des sessions...")
 
     try:
-        now = timezone.now()
-        cutoff_completed = now - timedelta(minutes=5)
-        cutoff_inactive  = now - timedelta(minutes=30)
-
-        # --- Cas 1 : sessions terminées/annulées en attente d'archivage ---
-        completed_sessions = CollaborativeTableSession.objects.filter(
-            status__in=['completed', 'cancelled'],
-            is_archived=False,
-            completed_at__lt=cutoff_completed
-        )
-
-        # --- Cas 2 : sessions actives/verrouillées sans activité récente ---
-        # updated_at (auto_now=True) reflète la dernière écriture sur l'objet.
-        # Une session qui n'a pas bougé depuis 30 min est considérée abandonnée.
-        stale_sessions = CollaborativeTableSession.objects.filter(
-            status__in=['active', 'locked'],
-            is_archived=False,
-            updated_at__lt=cutoff_inactive
-        )
+        with record_task_run('auto_archive_eligible_sessions') as run:
+            now = timezone.now()
+            cutoff_completed = now - timedelta(minutes=5)
+            cutoff_inactive  = now - timedelta(minutes=30)
+
+            # --- Cas 1 : sessions terminées/annulées en attente d'archivage ---
+            completed_sessions = CollaborativeTableSession.objects.filter(
+                status__in=['completed', 'cancelled'],
+                is_archived=False,
+                completed_at__lt=cutoff_completed
+            )
 
-        count_completed = 0
-        count_stale     = 0
+            # --- Cas 2 : sessions actives/verrouillées sans activité récente ---
+            # updated_at (auto_now=True) reflète la dernière écriture sur l'objet.
+            # Une session qui n'a pas bougé depuis 30 min est considérée abandonnée.
+            stale_sessions = CollaborativeTableSession.objects.filter(
+                status__in=['active', 'locked'],
+                is_archived=False,
+                updated_at__lt=cutoff_inactive
+            )
 
-        for session in completed_sessions:
-            try:
-                session.archive(reason="Archivage automatique (5min après completion)")
-                count_completed += 1
-                try:
-                    notify_session_archived(
-                        session_id=str(session.id),
-                        reason="Archivage automatique"
-                    )
-                except Exception as e:
-                    logger.warning(f"Notification WebSocket échouée pour {session.id}: {e}")
-            except Exception as e:
-                logger.error(f"Erreur archivage session complétée {session.id}: {e}")
+            count_completed = _archive_sessions(
+                completed_sessions,
+                reason="Archivage automatique (5min après completion)",
+                notify_reason="Archivage automatique",
+            )
+            run.add('completed', count_completed)
 
-        for session in stale_sessions:
-            try:
-                # Marquer cancelled avant d'archiver pour cohérence des données
-                # (utilise update() pour ne pas déclencher auto_now sur updated_at)
-                CollaborativeTableSession.objects.filter(id=session.id).update(
-                    status='cancelled'
-                )
-                session.refresh_from_db()
-                session.archive(reason="Archivage automatique (inactivité >30min)")
-                count_stale += 1
-                try:
-                    notify_session_archived(
-                        session_id=str(session.id),
-                        reason="Session inactive archivée automatiquement"
-                    )
-                except Exception as e:
-                    logger.warning(f"Notification WebSocket échouée pour {session.id}: {e}")
-            except Exception as e:
-                logger.error(f"Erreur archivage session inactive {session.id}: {e}")
+            count_stale = _archive_sessions(
+                stale_sessions,
+                reason="Archivage automatique (inactivité >30min)",
+                notify_reason="Session inactive archivée automatiquement",
+            )
+            run.add('stale', count_stale)
 
         total = count_completed + count_stale
         logger.info(
@@ -218,37 +209,26 @@ def force_archive_abandoned_sessions(hours=12):
     AVEC notifications WebSocket
     """
     from api.models import CollaborativeTableSession
+    from api.services.maintenance import record_task_run
 
     logger.info(f"⚠️ Recherche de sessions abandonnées (>{hours}h)...")
 
     try:
-        cutoff_time = timezone.now() - timedelta(hours=hours)
-
-        abandoned_sessions = CollaborativeTableSession.objects.filter(
-            status__in=['active', 'locked'],
-            is_archived=False,
-            updated_at__lt=cutoff_time
-        )
-
-        count = 0
-        for session in abandoned_sessions:
-            try:
-                # Utiliser update() pour bypasser les signaux Django
-                CollaborativeTableSession.objects.filter(id=session.id).update(status='cancelled')
-                session.status = 'cancelled'
-                session.archive(reason=f"Session abandonnée (inactif >{hours}h)")
-                count += 1
+        with record_task_run('force_archive_abandoned_sessions') as run:
+            cutoff_time = timezone.now() - timedelta(hours=hours)
 
-                try:
-                    notify_session_archived(
-                        session_id=str(session.id),
-                        reason="Session abandonnée"
-                    )
-                except Exception as e:
-                    logger.warning(f"Notification WebSocket échouée: {e}")
+            abandoned_sessions = CollaborativeTableSession.objects.filter(
+                status__in=['active', 'locked'],
+                is_archived=False,
+                updated_at__lt=cutoff_time
+            )
 
-            except Exception as e:
-                logger.error(f"Erreur archivage forcé session {session.id}: {e}")
+            count = _archive_sessions(
+                abandoned_sessions,
+                reason=f"Session abandonnée (inactif >{hours}h)",
+                notify_reason="Session abandonnée",
+            )
+            run.add('abandoned', count)
 
         logger.info(f"⚠️ {count} session(s) abandonnée(s) archivée(s)")
         return f"{count} session(s) abandonnée(s) archivée(s)"
@@ -270,55 +250,76 @@ def fire_scheduled_preorders():
     """Bascule en file cuisine les pré-commandes payées dont l'heure de
     préparation est atteinte (starts_at - prep_lead_minutes).
     S'exécute toutes les minutes via Celery Beat."""
-    from django.db import transaction
-    from api.models import Reservation
+    from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
+    from api.models import Order, Reservation
+    from api.services.daily_stats import schedule_refresh_for_orders
+    from api.services.maintenance import record_task_run, update_in_batches
+    from api.services.order_events import enqueue_bulk_order_events
+    from api.utils.floorplan_notifications import notify_floorplan_tables
+
+    with record_task_run('fire_scheduled_preorders') as run:
+        now = timezone.now()
 
-    now = timezone.now()
-    fired = 0
-
-    # prep_lead_minutes variable par résa → borne large puis filtre Python
-    candidates = Reservation.objects.select_related('pre_order').filter(
-        status='confirmed',
-        kitchen_fired_at__isnull=True,
-        pre_order__isnull=False,
-        pre_order__payment_status='paid',
-        pre_order__status='scheduled',
-        starts_at__lte=now + timedelta(minutes=60),
-    )
+        # Heure de déclenchement calculée par la base (prep_lead_minutes
+        # variable par résa) ; la borne sur starts_at garde l'index.
+        lead = ExpressionWrapper(
+            F('prep_lead_minutes') * Value(timedelta(minutes=1)),
+            output_field=DurationField(),
+        )
+        due = Reservation.objects.annotate(
+            fire_at=ExpressionWrapper(F('starts_at') - lead, output_field=DateTimeField())
+        ).filter(
+            status='confirmed',
+            kitchen_fired_at__isnull=True,
+            pre_order__isnull=False,
+            pre_order__payment_status='paid',
+            pre_order__status='scheduled',
+            starts_at__lte=now + timedelta(minutes=60),
+            fire_at__lte=now,
+        )
 
-    for reservation in candidates:
-        if reservation.fire_kitchen_at > now:
-            continue
-        try:
-            with transaction.atomic():
-                locked = (
-                    Reservation.objects
-                    .select_for_update()
-                    .select_related('pre_order')
-                    .get(id=reservation.id)
-                )
-                if locked.fire_kitchen():
-                    fired += 1
-                    logger.info(
-                        f"🔥 Pré-commande {locked.pre_order_id} envoyée en cuisine "
-                        f"(résa {locked.id}, table "
-                        f"{locked.table.number if locked.table else '?'}, "
-                        f"arrivée {timezone.localtime(locked.starts_at):%H:%M})"
-                    )
-                    # TODO : push Firebase restaurateur (même canal que les
-                    # nouvelles commandes classiques)
-                    from api.utils.floorplan_notifications import notify_floorplan_update
-                    notify_floorplan_update(
-                        locked.restaurant_id,
-                        event='kitchen_fired',
-                        table_id=locked.table_id,
-                    )
-        except Exception as e:
-            logger.error(f"Erreur fire_kitchen résa {reservation.id}: {e}")
+        fired = []
+
+        def fire(rows):
+            # Les résas sont verrouillées par le lot ; les pré-commandes le sont
+            # ici (of= n'accepte pas de relation sur une requête values_list).
+            # Le filtre joint n'est pas réévalué sous le verrou : une
+            # pré-commande annulée ou remboursée depuis le scan est écartée,
+            # comme dans Reservation.fire_kitchen() ('scheduled' → 'pending').
+            ready = set(
+                Order.objects.select_for_update().filter(
+                    id__in=[row[3] for row in rows],
+                    status='scheduled',
+                    payment_status='paid',
+                ).values_list('id', flat=True)
+            )
+            rows = [row for row in rows if row[3] in ready]
+            if not rows:
+                return
+            order_ids = [row[3] for row in rows]
+            Order.objects.filter(id__in=order_ids).update(status='pending', updated_at=now)
+            Reservation.objects.filter(id__in=[row[0] for row in rows]).update(
+                kitchen_fired_at=now, updated_at=now
+            )
+            # update() ne déclenche pas les signaux : notifications (cuisine,
+            # client, push) via l'outbox des commandes.
+            # TODO : push Firebase restaurateur (même canal que les
+            # nouvelles commandes classiques)
+            enqueue_bulk_order_events(order_ids, old_status='scheduled', old_payment_status='paid')
+            fired.extend(rows)
+
+        update_in_batches(
+            due, fire,
+            fields=('restaurant_id', 'table_id', 'pre_order_id', 'pre_order__created_at'),
+        )
+        run.add('fired', len(fired))
 
-    if fired:
-        logger.info(f"✅ fire_scheduled_preorders: {fired} commande(s) déclenchée(s)")
-    return f"{fired} commande(s) déclenchée(s)"
+        if fired:
+            schedule_refresh_for_orders([(row[1], row[4]) for row in fired])
+            notify_floorplan_tables([(row[1], row[2]) for row in fired], event='kitchen_fired')
+            logger.info(f"✅ fire_scheduled_preorders: {len(fired)} commande(s) déclenchée(s)")
+
+    return f"{len(fired)} commande(s) déclenchée(s)"
 
 
 @shared_task(name='api.tasks.expire_pending_reservations')
@@ -326,54 +327,77 @@ def expire_pending_reservations():
     """Libère les créneaux des réservations dont le paiement n'a pas abouti
     dans le délai (RESERVATION_PAYMENT_HOLD_MINUTES).
     S'exécute toutes les minutes via Celery Beat."""
-    from django.db import transaction
-    from api.models import Reservation
+    from collections import defaultdict
+    from api.models import Order, Reservation
+    from api.services.daily_stats import schedule_refresh_for_orders
+    from api.services.maintenance import record_task_run, update_in_batches
+    from api.services.order_events import enqueue_bulk_order_events
+    from api.utils.floorplan_notifications import notify_floorplan_tables
+
+    with record_task_run('expire_pending_reservations') as run:
+        now = timezone.now()
+        stale = Reservation.objects.filter(
+            status='pending_payment',
+            expires_at__lt=now,
+        )
 
-    now = timezone.now()
-    expired = 0
+        # Paiement arrivé mais confirmation manquée (webhook) → rattrapage,
+        # équivalent ensembliste de Reservation.confirm_after_payment()
+        def confirm(rows):
+            Reservation.objects.filter(id__in=[row[0] for row in rows]).update(
+                status='confirmed', expires_at=None, updated_at=now
+            )
 
-    stale = Reservation.objects.select_related('pre_order').filter(
-        status='pending_payment',
-        expires_at__lt=now,
-    )
-    for reservation in stale:
-        try:
-            with transaction.atomic():
-                locked = (
-                    Reservation.objects
-                    .select_for_update()
-                    .select_related('pre_order')
-                    .get(id=reservation.id)
-                )
-                # Le webhook a pu passer entre la requête et le verrou
-                if locked.status != 'pending_payment':
-                    continue
-                if locked.pre_order and locked.pre_order.payment_status == 'paid':
-                    # Paiement arrivé mais confirmation manquée → rattrapage
-                    locked.confirm_after_payment()
-                    logger.warning(
-                        f"⚠️ Résa {locked.id} confirmée en rattrapage "
-                        f"(webhook manqué)"
-                    )
-                    continue
-                locked.status = 'expired'
-                locked.save(update_fields=['status', 'updated_at'])
-                if locked.pre_order and locked.pre_order.status == 'scheduled':
-                    locked.pre_order.status = 'cancelled'
-                    locked.pre_order.save(update_fields=['status'])
-                expired += 1
-                from api.utils.floorplan_notifications import notify_floorplan_update
-                notify_floorplan_update(
-                    locked.restaurant_id,
-                    event='reservation_cancelled',
-                    table_id=locked.table_id,
+        confirmed = update_in_batches(
+            stale.filter(pre_order__payment_status='paid'), confirm
+        )
+        for reservation_id, in confirmed:
+            logger.warning(
+                f"⚠️ Résa {reservation_id} confirmée en rattrapage (webhook manqué)"
+            )
+        run.add('confirmed', len(confirmed))
+
+        cancelled_orders = []
+
+        def expire(rows):
+            Reservation.objects.filter(id__in=[row[0] for row in rows]).update(
+                status='expired', updated_at=now
+            )
+            pre_orders = list(
+                Order.objects.select_for_update()
+                .filter(id__in=[row[3] for row in rows if row[3]], status='scheduled')
+                .values_list('id', 'payment_status', 'restaurant_id', 'created_at')
+            )
+            if not pre_orders:
+                return
+            Order.objects.filter(id__in=[order[0] for order in pre_orders]).update(
+                status='cancelled', updated_at=now
+            )
+            by_payment_status = defaultdict(list)
+            for order_id, payment_status, _, _ in pre_orders:
+                by_payment_status[payment_status].append(order_id)
+            for payment_status, order_ids in by_payment_status.items():
+                enqueue_bulk_order_events(
+                    order_ids, old_status='scheduled', old_payment_status=payment_status
                 )
-        except Exception as e:
-            logger.error(f"Erreur expiration résa {reservation.id}: {e}")
+            cancelled_orders.extend(order[2:] for order in pre_orders)
+
+        expired = update_in_batches(
+            stale.exclude(pre_order__payment_status='paid'), expire,
+            fields=('restaurant_id', 'table_id', 'pre_order_id'),
+        )
+        run.add('expired', len(expired))
+        run.add('pre_orders_cancelled', len(cancelled_orders))
+
+        if cancelled_orders:
+            schedule_refresh_for_orders(cancelled_orders)
+        notify_floorplan_tables(
+            [(row[1], row[2]) for row in expired], event='reservation_cancelled'
+        )
 
     if expired:
-        logger.info(f"✅ expire_pending_reservations: {expired} réservation(s) expirée(s)")
-    return f"{expired} réservation(s) expirée(s)"
+        logger.info(f"✅ expire_pending_reservations: {len(expired)} réservation(s) expirée(s)")
+    return f"{len(expired)} réservation(s) expirée(s)"
 
 
 @shared_task(name='api.tasks.mark_reservation_no_shows')
@@ -385,26 +409,32 @@ def mark_reservation_no_shows():
     son cycle normal — le restaurateur décide quoi en faire.
     S'exécute toutes les 5 minutes via Celery Beat."""
     from api.models import Reservation
+    from api.services.maintenance import record_task_run, update_in_batches
+    from api.utils.floorplan_notifications import notify_floorplan_tables
 
-    from api.utils.floorplan_notifications import notify_floorplan_update
+    with record_task_run('mark_reservation_no_shows') as run:
+        now = timezone.now()
+        stale = Reservation.objects.filter(
+            status='confirmed',
+            starts_at__lt=now - timedelta(minutes=NO_SHOW_GRACE_MINUTES),
+        )
 
-    now = timezone.now()
-    stale = Reservation.objects.filter(
-        status='confirmed',
-        starts_at__lt=now - timedelta(minutes=NO_SHOW_GRACE_MINUTES),
-    )
-    # Collecter les couples (restaurant, table) AVANT l'update en masse
-    affected = list(stale.values_list('restaurant_id', 'table_id'))
-    updated = stale.update(status='no_show', updated_at=now)
+        def mark(rows):
+            Reservation.objects.filter(id__in=[row[0] for row in rows]).update(
+                status='no_show', updated_at=now
+            )
 
-    for restaurant_id, table_id in affected:
-        notify_floorplan_update(
-            restaurant_id, event='reservation_no_show', table_id=table_id
+        # Couples (restaurant, table) relevés sur les lignes verrouillées
+        marked = update_in_batches(stale, mark, fields=('restaurant_id', 'table_id'))
+        run.add('no_show', len(marked))
+
+        notify_floorplan_tables(
+            [(row[1], row[2]) for row in marked], event='reservation_no_show'
         )
 
-    if updated:
-        logger.info(f"✅ mark_reservation_no_shows: {updated} no-show(s)")
-    return f"{updated} no-show(s)"
+    if marked:
+        logger.info(f"✅ mark_reservation_no_shows: {len(marked)} no-show(s)")
+    return f"{len(marked)} no-show(s)"
 
 
 @shared_task(name='api.tasks.auto_release_occupancies')
@@ -415,46 +445,40 @@ def auto_release_occupancies():
       sécurité si le staff oublie de libérer)
     Les occupations 'manual' ne sont PAS libérées à la fin des commandes :
     les clients peuvent rester à table. S'exécute toutes les 5 minutes."""
+    from django.db.models import Exists, OuterRef, Q
     from api.models import Order
     from api.models.table_occupancy_models import TableOccupancy
+    from api.services.maintenance import record_task_run, update_in_batches
+    from api.utils.floorplan_notifications import notify_floorplan_tables
 
-    now = timezone.now()
-    released = 0
+    with record_task_run('auto_release_occupancies') as run:
+        now = timezone.now()
 
-    for occ in TableOccupancy.objects.active().select_related('table'):
-        try:
+        still_active = Order.objects.filter(
+            restaurant_id=OuterRef('restaurant_id'),
+            table_number=OuterRef('table__number'),
+            status__in=['pending', 'confirmed', 'preparing', 'ready'],
+        )
+        stale = TableOccupancy.objects.active().filter(
             # Filet de sécurité : très overdue → libération
-            if now > occ.expected_end_at + timedelta(hours=2):
-                occ.release()
-                released += 1
-                logger.info(
-                    f"🧹 Table {occ.table.number} libérée (overdue >2h)"
-                )
-                from api.utils.floorplan_notifications import notify_floorplan_update
-                notify_floorplan_update(
-                    occ.restaurant_id, event='table_released', table_id=occ.table_id
-                )
-                continue
+            Q(expected_end_at__lt=now - timedelta(hours=2))
             # Occupations liées aux commandes : plus rien d'actif → libérer
-            if occ.source == 'order':
-                still_active = Order.objects.filter(
-                    restaurant=occ.restaurant,
-                    table_number=occ.table.number,
-                    status__in=['pending', 'confirmed', 'preparing', 'ready'],
-                ).exists()
-                if not still_active:
-                    occ.release()
-                    released += 1
-                    from api.utils.floorplan_notifications import notify_floorplan_update
-                    notify_floorplan_update(
-                        occ.restaurant_id, event='table_released', table_id=occ.table_id
-                    )
-        except Exception as e:
-            logger.error(f"Erreur libération occupation {occ.id}: {e}")
+            | (Q(source='order') & ~Exists(still_active))
+        )
+
+        def release(rows):
+            TableOccupancy.objects.filter(id__in=[row[0] for row in rows]).update(ended_at=now)
+
+        released = update_in_batches(stale, release, fields=('restaurant_id', 'table_id'))
+        run.add('released', len(released))
+
+        notify_floorplan_tables(
+            [(row[1], row[2]) for row in released], event='table_released'
+        )
 
     if released:
-        logger.info(f"✅ auto_release_occupancies: {released} table(s) libérée(s)")
-    return f"{released} table(s) libérée(s)"
+        logger.info(f"✅ auto_release_occupancies: {len(released)} table(s) libérée(s)")
+    return f"{len(released)} table(s) libérée(s)"
 
 # COMMANDES FANTÔMES
 # ============================================================================
@@ -497,6 +521,7 @@ def auto_cancel_stale_orders(hours=24):
 
         cancelled = 0
         flagged_paid = 0
+        cancelled_orders = []
 
         for order in stale_orders:
             try:
@@ -526,6 +551,7 @@ def auto_cancel_stale_orders(hours=24):
                     status='cancelled',
                     notes=new_notes,
                 )
+                cancelled_orders.append((order.restaurant_id, order.created_at))
                 cancelled += 1
                 logger.info(
                     f"👻 Commande #{order.id} ({order.order_number}) annulée "
@@ -534,6 +560,12 @@ def auto_cancel_stale_orders(hours=24):
             except Exception as e:
                 logger.error(f"Erreur annulation commande {order.id}: {e}")
 
+        # update() ne déclenche pas les signaux : recalcul explicite des
+        # statistiques journalières touchées.
+        if cancelled_orders:
+            from api.services.daily_stats import schedule_refresh_for_orders
+            schedule_refresh_for_orders(cancelled_orders)
+
         logger.info(
             f"✅ Commandes fantômes : {cancelled} annulée(s), "
             f"{flagged_paid} payée(s) signalée(s) pour traitement manuel"
@@ -642,11 +674,163 @@ def process_scheduled_account_deletions():
     return f"{count} compte(s) anonymisé(s), {errors} erreur(s)"
 
 
+@shared_task(name='api.tasks.dispatch_order_events', ignore_result=True)
+def dispatch_order_events(order_id):
+    """
+    Diffuse (WS/SSE/push) les changements d'une commande regroupés
+    pendant la fenêtre de l'outbox (cf. api.services.order_events).
+    """
+    from api.services.order_events import pop_pending_event, dispatch_order_event
+
+    event = pop_pending_event(order_id)
+    if event is None:
+        return "Aucun événement en attente"
+
+    dispatch_order_event(event)
+    return f"Notifications diffusées pour la commande {order_id}"
+
+
+@shared_task(name='api.tasks.broadcast_session_cart', ignore_result=True)
+def broadcast_session_cart(session_id):
+    """
+    Diffuse en un seul message les mutations du panier partagé regroupées
+    pendant la fenêtre (cf. api.services.session_cart).
+    """
+    from api.services.session_cart import broadcast_cart
+
+    broadcast_cart(session_id)
+    return f"Panier diffusé pour la session {session_id}"
+
+
+@shared_task(name='api.tasks.process_push_receipts', ignore_result=True)
+def process_push_receipts():
+    """
+    Relève les reçus Expo et désactive les tokens DeviceNotRegistered
+    (tâche périodique).
+    """
+    from api.services.notification_service import notification_service
+
+    result = notification_service.process_push_receipts()
+    logger.info(
+        f"📬 Reçus push : {result['checked']} relevé(s), "
+        f"{result['deactivated']} token(s) désactivé(s), {result['expired']} expiré(s)"
+    )
+    return result
+
+
+@shared_task(name='api.tasks.purge_expired_notifications')
+def purge_expired_notifications():
+    """Supprime par lots les notifications expirées (tâche périodique)"""
+    from api.services.maintenance import record_task_run
+    from api.services.notification_inbox import purge_expired_notifications as purge
+
+    with record_task_run('purge_expired_notifications') as run:
+        run.add('purged', purge())
+    return f"{run.total} notification(s) expirée(s) supprimée(s)"
+
+
+@shared_task(name='api.tasks.refresh_restaurant_daily_stats', ignore_result=True)
+def refresh_restaurant_daily_stats(restaurant_id, day):
+    """Recalcule une journée d'un restaurant dans RestaurantDailyStats"""
+    from datetime import date
+    from api.services.daily_stats import refresh_daily_stats
+
+    rows = refresh_daily_stats(restaurant_id, date.fromisoformat(day))
+    return f"{rows} ligne(s) de statistiques pour {restaurant_id} le {day}"
+
+
+@shared_task(name='api.tasks.rollup_daily_stats')
+def rollup_daily_stats(days=2):
+    """
+    Recalcule les `days` dernières journées pour tous les restaurants.
+    Rattrape les modifications faites par update() (sans signaux).
+    """
+    from api.services.daily_stats import rebuild_daily_stats
+
+    today = timezone.localdate()
+    rows = rebuild_daily_stats(start_day=today - timedelta(days=days), end_day=today)
+    logger.info(f"📊 Statistiques journalières : {rows} ligne(s) recalculée(s)")
+    return f"{rows} ligne(s) recalculée(s)"
+
 
 # ============================================================================
 # TÂCHES COMPTABILITÉ
 # ============================================================================
 
+@shared_task(name='api.tasks.generate_fec_export', ignore_result=True)
+def generate_fec_export(export_id):
+    """Génère et stocke le fichier FEC d'un ExportComptable en cours"""
+    from api.models import ExportComptable
+    from api.utils.fec_generator import run_fec_export
+
+    export = (
+        ExportComptable.objects.select_related('restaurateur')
+        .filter(id=export_id, statut='en_cours')
+        .first()
+    )
+    if export is None:
+        return f"Export {export_id} introuvable ou déjà traité"
+
+    try:
+        result = run_fec_export(export)
+    except Exception as e:
+        logger.exception(f"❌ Génération FEC échouée (export {export_id})")
+        ExportComptable.objects.filter(pk=export_id).update(
+            statut='erreur', message_erreur=str(e)
+        )
+        return f"Export {export_id} en erreur"
+
+    logger.info(
+        f"📒 FEC généré (export {export_id}) : {result.lines} ligne(s), {result.size} octets"
+    )
+    return f"{result.lines} ligne(s) écrite(s)"
+
+
+# ============================================================================
+# TÂCHES QR CODES
+# ============================================================================
+
+@shared_task(name='api.tasks.generate_qr_export', ignore_result=True)
+def generate_qr_export(job_id):
+    """Génère le PDF des QR codes d'un QrExportJob en attente"""
+    from api.models import QrExportJob
+    from api.services.qr_render import run_qr_export
+
+    # Réservation atomique : un job n'est traité qu'une fois
+    claimed = QrExportJob.objects.filter(
+        id=job_id, status=QrExportJob.Status.PENDING
+    ).update(status=QrExportJob.Status.RUNNING)
+    if not claimed:
+        return f"Export QR {job_id} introuvable ou déjà traité"
+
+    job = QrExportJob.objects.select_related('restaurant').get(pk=job_id)
+    try:
+        run_qr_export(job)
+    except Exception as e:
+        logger.exception(f"❌ Export QR échoué (job {job_id})")
+        QrExportJob.objects.filter(pk=job_id).update(
+            status=QrExportJob.Status.FAILED,
+            error_message=str(e),
+            finished_at=timezone.now(),
+        )
+        return f"Export QR {job_id} en erreur"
+
+    logger.info(
+        f"🔳 Export QR généré (job {job_id}) : {job.tables_count} table(s), {job.file_size} octets"
+    )
+    return f"{job.tables_count} QR code(s) exporté(s)"
+
+
+@shared_task(name='api.tasks.purge_expired_qr_exports')
+def purge_expired_qr_exports():
+    """Supprime les exports QR expirés et leurs PDF (tâche périodique)"""
+    from api.services.maintenance import record_task_run
+    from api.services.qr_render import purge_expired_qr_exports as purge
+
+    with record_task_run('purge_expired_qr_exports') as run:
+        run.add('purged', purge())
+    return f"{run.total} export(s) QR expiré(s) supprimé(s)"
+
 # from api.tasks.comptabilite_tasks import (
 #     generate_monthly_recap,
 #     sync_stripe_daily,
@@ -668,6 +852,15 @@ __all__ = [
     'auto_release_occupancies',
     'process_scheduled_account_deletions',
     'auto_cancel_stale_orders',
+    'dispatch_order_events',
+    'broadcast_session_cart',
+    'process_push_receipts',
+    'purge_expired_notifications',
+    'refresh_restaurant_daily_stats',
+    'rollup_daily_stats',
+    'generate_fec_export',
+    'generate_qr_export',
+    'purge_expired_qr_exports',
 ]
 
 from api.services.menu_ai import tasks as _menu_ai_tasks
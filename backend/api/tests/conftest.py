@@ -28,6 +28,16 @@ def make_collaborative_session(restaurant, table, host_user):
     return session
 
 
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    """Cache mémoire local et vide pour chaque test (pas de Redis requis)."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    from django.core.cache import cache
+    cache.clear()
+
+
 @pytest.fixture
 def host_user():
     return UserFactory()
@@ -621,13 +621,17 @@ class TestSessionConsumerCartHandlers:
 
         with patch.object(
             consumer, '_get_cart_data', new_callable=AsyncMock,
-            return_value=(mock_items, mock_total, mock_count)
+            return_value={
+                'version': 3, 'items': mock_items,
+                'total': mock_total, 'items_count': mock_count,
+            }
         ):
             await consumer.send_cart_state()
 
         consumer.send.assert_called_once()
         sent_payload = json.loads(consumer.send.call_args[1]['text_data'])
         assert sent_payload['type'] == 'cart_state'
+        assert sent_payload['version'] == 3
         assert sent_payload['items'] == mock_items
         assert sent_payload['total'] == mock_total
         assert sent_payload['items_count'] == mock_count
@@ -641,7 +645,7 @@ class TestSessionConsumerCartHandlers:
 
         with patch.object(
             consumer, '_get_cart_data', new_callable=AsyncMock,
-            return_value=([], 0.0, 0)
+            return_value={'version': 0, 'items': [], 'total': 0.0, 'items_count': 0}
         ):
             await consumer.send_cart_state()
 
@@ -672,7 +676,7 @@ class TestSessionConsumerCartHandlers:
     async def test_get_cart_data_returns_correct_structure(
         self, collaborative_session, cart_item
     ):
-        """Test que _get_cart_data retourne (items, total, count) avec les bons types.
+        """Test que _get_cart_data retourne l'instantané avec les bons types.
 
         items doit etre une list Python native (pas un ReturnList DRF) pour
         etre JSON-serialisable par le channel layer Redis.
@@ -680,8 +684,10 @@ class TestSessionConsumerCartHandlers:
         consumer = SessionConsumer()
         consumer.session_id = str(collaborative_session.id)
 
-        items, total, count = await consumer._get_cart_data()
+        snapshot = await consumer._get_cart_data()
+        items, total, count = snapshot['items'], snapshot['total'], snapshot['items_count']
 
+        assert 'version' in snapshot
         assert isinstance(items, list)
         # Verifier que c est une liste Python native, pas un ReturnList DRF
         assert type(items) is list
@@ -693,7 +699,8 @@ class TestSessionConsumerCartHandlers:
         consumer = SessionConsumer()
         consumer.session_id = str(collaborative_session.id)
 
-        items, total, count = await consumer._get_cart_data()
+        snapshot = await consumer._get_cart_data()
+        items, total, count = snapshot['items'], snapshot['total'], snapshot['items_count']
 
         assert items == []
         assert total == 0.0
@@ -706,7 +713,8 @@ class TestSessionConsumerCartHandlers:
         consumer = SessionConsumer()
         consumer.session_id = str(collaborative_session.id)
 
-        items, total, count = await consumer._get_cart_data()
+        snapshot = await consumer._get_cart_data()
+        items, total, count = snapshot['items'], snapshot['total'], snapshot['items_count']
 
         assert total == pytest.approx(25.0)
         assert count == 2  # quantité du cart_item
@@ -732,7 +740,8 @@ class TestSessionConsumerCartHandlers:
         consumer = SessionConsumer()
         consumer.session_id = str(collaborative_session.id)
 
-        items, total, count = await consumer._get_cart_data()
+        snapshot = await consumer._get_cart_data()
+        items, total, count = snapshot['items'], snapshot['total'], snapshot['items_count']
 
         # Total = (12.50 × 2) + (12.50 × 1) = 37.50
         assert total == pytest.approx(37.50)
@@ -746,7 +755,8 @@ class TestSessionConsumerCartHandlers:
         consumer = SessionConsumer()
         consumer.session_id = str(collaborative_session.id)
 
-        items, total, count = await consumer._get_cart_data()
+        snapshot = await consumer._get_cart_data()
+        items, total, count = snapshot['items'], snapshot['total'], snapshot['items_count']
 
         assert len(items) == 1
         item = items[0]
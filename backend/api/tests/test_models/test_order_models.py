@@ -9,7 +9,7 @@ Tests unitaires pour les modèles de commande
 import pytest
 from datetime import timedelta
 from decimal import Decimal
-from unittest.mock import patch, PropertyMock, MagicMock
+from unittest.mock import patch, PropertyMock
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -834,34 +834,21 @@ class TestGenerateOrderNumber:
         )
         assert order3.order_number not in ("T001", "T002")
 
-    def test_generate_order_number_fallback(self, restaurant, user):
-        """Test du fallback ultime avec timestamp (lignes 248-252)"""
-        order = Order(
-            restaurant=restaurant, user=user,
-            order_number="",
-            subtotal=Decimal('10.00'), total_amount=Decimal('11.00'),
-            order_type='dine_in'
-        )
-        # Mock Order.objects.filter().exists() to always return True (constant collision)
-        with patch.object(Order.objects, 'filter') as mock_filter:
-            # For aggregate call, return no max
-            mock_qs = MagicMock()
-            mock_qs.aggregate.return_value = {'max_num': None}
-            mock_qs.filter.return_value = mock_qs
-            # exists() always True → forces fallback
-            mock_qs.exists.return_value = True
-            mock_filter.return_value = mock_qs
-
-            result = order.generate_order_number()
-
-        # Fallback format: T001_HHMMSS_XX
-        assert "_" in result
-        assert result.startswith("T")
-
-    def test_generate_order_number_parse_error(self, restaurant, user):
-        """Test ValueError lors du parsing du dernier numéro (lignes 232-233)"""
-        # Créer une commande avec un numéro qui matchera le regex mais ne pourra
-        # pas être parsé comme int (simulated via mock)
+    def test_generate_order_number_daily_counter(self, restaurant, user):
+        """Numéros consécutifs du jour, restaurant et date en suffixe"""
+        numbers = [
+            Order.objects.create(
+                restaurant=restaurant, user=user,
+                subtotal=Decimal('10.00'), total_amount=Decimal('11.00'),
+                order_type='takeaway'
+            ).order_number
+            for _ in range(3)
+        ]
+        suffix = f"-{restaurant.id}-{timezone.localdate():%y%m%d}"
+        assert numbers == [f"E00{i}{suffix}" for i in (1, 2, 3)]
+
+    def test_generate_order_number_no_query_on_orders(self, restaurant, user):
+        """Allocation sans lecture des commandes existantes"""
         order = Order(
             restaurant=restaurant, user=user,
             order_number="",
@@ -869,17 +856,10 @@ class TestGenerateOrderNumber:
             order_type='dine_in'
         )
         with patch.object(Order.objects, 'filter') as mock_filter:
-            mock_qs = MagicMock()
-            # max_num exists but can't be parsed (e.g. "TXYZ")
-            mock_qs.aggregate.return_value = {'max_num': 'TXYZ'}
-            mock_qs.filter.return_value = mock_qs
-            mock_qs.exists.return_value = False
-            mock_filter.return_value = mock_qs
-
             result = order.generate_order_number()
 
-        # Should fall to except → next_num = 1
-        assert result.startswith("T")
+        mock_filter.assert_not_called()
+        assert result.startswith("T001-")
 
 
 # =============================================================================
@@ -1242,7 +1222,7 @@ class TestGenerateOrderNumberTableBranch:
     """Tests pour generate_order_number avec table_number"""
 
     def test_generate_order_number_with_table(self, restaurant, user):
-        """Test génération format table: {prefix}{table}-{sequence} (ligne 216)"""
+        """Test génération pour une commande de table"""
         order = Order.objects.create(
             restaurant=restaurant, user=user,
             order_number="",  # Forces generation
@@ -1250,9 +1230,10 @@ class TestGenerateOrderNumberTableBranch:
             subtotal=Decimal('10.00'), total_amount=Decimal('11.00'),
             order_type='dine_in'
         )
-        # generate_order_number runs before set_order_sequence, with default order_sequence=1
-        # Format: T5-01
-        assert order.order_number == "T5-01"
+        # Même compteur du jour que les autres commandes, séquence de table à part
+        assert order.order_number.startswith("T001-")
+        assert order.order_sequence == 1
+        assert order.is_main_order is True
 
 
 # =============================================================================
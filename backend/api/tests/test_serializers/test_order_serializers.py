@@ -777,4 +777,100 @@ class TestOrderSerializerEdgeCases:
             'items': [{'menu_item': menu_item.id, 'quantity': 1}]
         }
         serializer = OrderCreateSerializer(data=data, context={'request': mock_request})
-        assert serializer.is_valid(), serializer.errors
\ No newline at end of file
+        assert serializer.is_valid(), serializer.errors
+
+# =============================================================================
+# TESTS - Création groupée (nombre de requêtes constant)
+# =============================================================================
+
+@pytest.mark.django_db
+class TestOrderCreateQueryCount:
+    """La création d'une commande ne doit pas coûter une requête par ligne."""
+
+    # Requêtes SQL pour valider + créer une commande, quelle que soit la
+    # taille du panier (hors SAVEPOINT/RELEASE de la transaction) :
+    # restaurant x2, menu du jour, plats, séquence table (compteur +
+    # session), numéro de commande (compteur), INSERT commande, INSERT lignes, UPDATE totaux, INSERT grand
+    # livre TVA, TableSession. Les notifications partent après le commit
+    # (outbox), hors de la requête.
+    EXPECTED_QUERIES = 12
+
+    def _make_items(self, menu, menu_category, count):
+        return [
+            MenuItem.objects.create(
+                menu=menu,
+                category=menu_category,
+                name=f"Plat {i}",
+                price=Decimal('9.90') + i,
+                vat_category='FOOD' if i % 2 else 'DRINK_ALCOHOL',
+                is_available=True,
+            )
+            for i in range(count)
+        ]
+
+    def _count_queries(self, restaurant, menu_items, mock_request):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        data = {
+            'restaurant': restaurant.id,
+            'order_type': 'dine_in',
+            'table_number': 'T001',
+            'items': [{'menu_item': mi.id, 'quantity': 2} for mi in menu_items],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            serializer = OrderCreateSerializer(data=data, context={'request': mock_request})
+            assert serializer.is_valid(), serializer.errors
+            order = serializer.save()
+        queries = [
+            q['sql'] for q in ctx.captured_queries
+            if 'SAVEPOINT' not in q['sql']
+        ]
+        return order, queries
+
+    def test_query_count_independent_of_cart_size(
+        self, restaurant, menu, menu_category, mock_request
+    ):
+        small = self._make_items(menu, menu_category, 1)
+        large = self._make_items(menu, menu_category, 15)
+
+        _, small_queries = self._count_queries(restaurant, small, mock_request)
+        _, large_queries = self._count_queries(restaurant, large, mock_request)
+
+        assert len(small_queries) == len(large_queries)
+        assert len(large_queries) == self.EXPECTED_QUERIES
+        # Numéros et séquences viennent des compteurs, sans scan des commandes
+        assert not any('MAX(' in q.upper() for q in large_queries)
+
+    def test_vat_ledger_written_in_one_insert(
+        self, restaurant, menu, menu_category, mock_request
+    ):
+        """Deux taux de TVA : une seule requête pour tout le grand livre."""
+        menu_items = self._make_items(menu, menu_category, 4)
+        order, queries = self._count_queries(restaurant, menu_items, mock_request)
+
+        ledger_inserts = [q for q in queries if q.startswith('INSERT INTO "order_vat_lines"')]
+        assert len(ledger_inserts) == 1
+        assert order.vat_lines.count() == 2
+
+    def test_in_memory_totals_match_database(
+        self, restaurant, menu, menu_category, mock_request
+    ):
+        """Les totaux calculés en mémoire = ceux recalculés depuis la base."""
+        menu_items = self._make_items(menu, menu_category, 6)
+        order, _ = self._count_queries(restaurant, menu_items, mock_request)
+
+        fresh = Order.objects.get(pk=order.pk)
+        assert fresh.items.count() == 6
+        assert fresh.subtotal == sum(
+            (mi.price * 2 for mi in menu_items), Decimal('0.00')
+        )
+        assert fresh.total_amount == fresh.subtotal
+
+        expected = fresh.calculate_vat_breakdown()
+        assert set(order.vat_details) == set(expected)
+        for rate, bucket in expected.items():
+            assert Decimal(str(order.vat_details[rate]['tva'])) == bucket['tva']
+        assert fresh.tax_amount == sum(
+            (b['tva'] for b in expected.values()), Decimal('0.00')
+        )
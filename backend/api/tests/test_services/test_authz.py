@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/authz.py — contexte d'autorisation
+
+Axes couverts :
+  1. Contexte résolu une fois puis servi depuis le cache (permissions sans requête)
+  2. Invalidation : groupes, profil, création / changement de propriétaire
+  3. Requête restaurateur authentifiée : requêtes SQL en moins une fois le cache chaud
+"""
+
+import pytest
+from django.contrib.auth.models import Group
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.permissions import IsRestaurateur, IsValidatedRestaurateur
+from api.services import authz
+from api.tests.factories import RestaurantFactory, RestaurateurProfileFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def profile(db):
+    return RestaurateurProfileFactory(stripe_verified=True)
+
+
+@pytest.fixture
+def restaurant(profile):
+    return RestaurantFactory(owner=profile)
+
+
+def make_request(user):
+    request = APIRequestFactory().get("/")
+    request.user = user
+    return request
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestUserContext:
+
+    def test_permissions_served_from_cache(self, profile, restaurant, django_assert_num_queries):
+        authz.get_user_context(make_request(profile.user))
+
+        request = make_request(profile.user)
+        with django_assert_num_queries(0):
+            assert IsRestaurateur().has_permission(request, None)
+            assert IsValidatedRestaurateur().has_permission(request, None)
+            assert authz.owns_restaurant(request, restaurant.id)
+            assert not authz.owns_restaurant(request, restaurant.id + 1)
+
+    def test_memoized_per_request(self, profile, django_assert_num_queries):
+        request = make_request(profile.user)
+        context = authz.get_user_context(request)
+
+        with django_assert_num_queries(0):
+            assert authz.get_user_context(request) is context
+
+    def test_anonymous(self, db):
+        from django.contrib.auth.models import AnonymousUser
+
+        request = make_request(AnonymousUser())
+
+        assert authz.get_user_context(request) is None
+        assert not IsRestaurateur().has_permission(request, None)
+        assert not authz.owns_restaurant(request, 1)
+
+
+@pytest.mark.django_db
+class TestInvalidation:
+
+    def test_group_removed(self, profile):
+        assert IsRestaurateur().has_permission(make_request(profile.user), None)
+
+        profile.user.groups.remove(Group.objects.get(name="restaurateur"))
+
+        assert not IsRestaurateur().has_permission(make_request(profile.user), None)
+
+    def test_group_added_from_reverse_side(self, profile):
+        admin, _ = Group.objects.get_or_create(name="admin")
+        assert not authz.in_groups(make_request(profile.user), ["admin"])
+
+        admin.user_set.add(profile.user)
+
+        assert authz.in_groups(make_request(profile.user), ["admin"])
+
+    def test_profile_change(self, profile):
+        assert IsValidatedRestaurateur().has_permission(make_request(profile.user), None)
+
+        profile.stripe_verified = False
+        profile.save()
+
+        assert not IsValidatedRestaurateur().has_permission(make_request(profile.user), None)
+
+    def test_restaurant_created_and_transferred(self, profile):
+        assert authz.owned_restaurant_ids(make_request(profile.user)) == frozenset()
+
+        restaurant = RestaurantFactory(owner=profile)
+        assert authz.owns_restaurant(make_request(profile.user), restaurant.id)
+
+        other = RestaurateurProfileFactory()
+        authz.get_user_context(make_request(other.user))
+        restaurant.owner = other
+        restaurant.save()
+
+        assert not authz.owns_restaurant(make_request(profile.user), restaurant.id)
+        assert authz.owns_restaurant(make_request(other.user), restaurant.id)
+
+
+@pytest.mark.django_db
+class TestRestaurateurRequest:
+
+    def test_fewer_queries_with_warm_context(self, profile, restaurant):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client = APIClient()
+        client.force_authenticate(user=profile.user)
+
+        with CaptureQueriesContext(connection) as cold:
+            assert client.get("/api/v1/table/").status_code == 200
+        with CaptureQueriesContext(connection) as warm:
+            assert client.get("/api/v1/table/").status_code == 200
+
+        def group_queries(queries):
+            return [q["sql"] for q in queries.captured_queries if "auth_user_groups" in q["sql"]]
+
+        assert len(group_queries(cold)) == 1
+        assert group_queries(warm) == []
+        assert len(warm) < len(cold)
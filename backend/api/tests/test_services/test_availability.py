@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/availability.py — moteur de disponibilité
+
+Axes couverts :
+  1. Index d'intervalles (chevauchements, bornes semi-ouvertes)
+  2. Occupations walk-in prises en compte au même titre que les réservations
+  3. Endpoints availability / calendar / create / reassign
+"""
+
+import pytest
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import OpeningHours, OpeningPeriod, Reservation
+from api.models.table_occupancy_models import TableOccupancy
+from api.services.availability import AvailabilityIndex, available_slots
+from api.tests.factories import RestaurantFactory, TableFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    restaurant = RestaurantFactory()
+    restaurant.reservations_enabled = True
+    restaurant.save(update_fields=['reservations_enabled'])
+    for dow in range(7):
+        oh = OpeningHours.objects.create(restaurant=restaurant, day_of_week=dow)
+        OpeningPeriod.objects.create(opening_hours=oh, start_time=time(19, 0), end_time=time(22, 0))
+    return restaurant
+
+
+@pytest.fixture
+def tables(restaurant):
+    return [TableFactory(restaurant=restaurant, number=str(n), capacity=4) for n in (1, 2)]
+
+
+@pytest.fixture
+def tomorrow():
+    return timezone.localdate() + timedelta(days=1)
+
+
+def at(date, hour, minute=0):
+    return timezone.make_aware(datetime.combine(date, time(hour, minute)))
+
+
+def reserve(table, starts_at, status='confirmed'):
+    return Reservation.objects.create(
+        restaurant=table.restaurant,
+        table=table,
+        customer_name='Dupont',
+        customer_phone='0600000000',
+        starts_at=starts_at,
+        ends_at=starts_at + timedelta(minutes=90),
+        status=status,
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestAvailabilityIndex:
+
+    def test_overlapping_busy_intervals(self):
+        index = AvailabilityIndex([1], [(1, 2, 10), (1, 3, 4)])
+
+        # Le second intervalle, plus court, ne masque pas la fin du premier
+        assert not index.is_free(1, 5, 6)
+        assert index.is_free(1, 10, 12)
+        assert index.is_free(1, 0, 2)
+        assert not index.is_free(1, 0, 3)
+
+    def test_free_tables_keeps_order(self):
+        index = AvailabilityIndex([3, 1, 2], [(1, 0, 5)])
+
+        assert index.free_tables(1, 2) == [3, 2]
+        assert index.first_free(1, 2) == 3
+        assert index.count_free(6, 7) == 3
+
+
+@pytest.mark.django_db
+class TestAvailabilityEngine:
+
+    def test_occupancy_blocks_slots(self, restaurant, tables, tomorrow):
+        TableOccupancy.objects.create(
+            restaurant=restaurant, table=tables[0],
+            started_at=at(tomorrow, 18), expected_end_at=at(tomorrow, 23),
+        )
+        reserve(tables[1], at(tomorrow, 19))
+
+        slots = available_slots(restaurant, [t.id for t in tables], [tomorrow])[tomorrow]
+
+        # Table 1 occupée toute la soirée, table 2 réservée de 19:00 à 20:30
+        assert [s['time'] for s in slots] == ['20:30']
+
+    def test_range_uses_constant_queries(self, restaurant, tables, tomorrow, django_assert_num_queries):
+        dates = [tomorrow + timedelta(days=i) for i in range(14)]
+
+        # Horaires (+ périodes), réservations, occupations
+        with django_assert_num_queries(4):
+            result = available_slots(restaurant, [t.id for t in tables], dates)
+
+        assert all(len(result[d]) == 4 for d in dates)
+
+
+@pytest.mark.django_db
+class TestReservationEndpoints:
+
+    def test_calendar(self, restaurant, tables, tomorrow):
+        reserve(tables[0], at(tomorrow, 19))
+        reserve(tables[1], at(tomorrow, 19))
+
+        response = APIClient().get('/api/v1/reservations/calendar/', {
+            'restaurant_id': restaurant.id,
+            'start_date': tomorrow.isoformat(),
+            'end_date': (tomorrow + timedelta(days=1)).isoformat(),
+        })
+
+        assert response.status_code == 200
+        first, second = response.data['days']
+        assert [s['time'] for s in first['slots']] == ['20:30']
+        assert len(second['slots']) == 4
+
+    def test_calendar_range_is_bounded(self, restaurant, tomorrow):
+        response = APIClient().get('/api/v1/reservations/calendar/', {
+            'restaurant_id': restaurant.id,
+            'start_date': tomorrow.isoformat(),
+            'end_date': (tomorrow + timedelta(days=40)).isoformat(),
+        })
+
+        assert response.status_code == 400
+
+    def test_create_skips_occupied_table(self, restaurant, tables, tomorrow):
+        TableOccupancy.objects.create(
+            restaurant=restaurant, table=tables[0],
+            started_at=at(tomorrow, 18), expected_end_at=at(tomorrow, 23),
+        )
+
+        response = APIClient().post('/api/v1/reservations/', {
+            'restaurant': restaurant.id,
+            'starts_at': at(tomorrow, 19).isoformat(),
+            'party_size': 2,
+            'customer_name': 'Dupont',
+            'customer_phone': '0600000000',
+        }, format='json')
+
+        assert response.status_code == 201
+        assert response.data['table_number'] == '2'
+
+    def test_reassign(self, restaurant, tables, tomorrow):
+        reservation = reserve(tables[0], at(tomorrow, 19))
+        client = APIClient()
+        client.force_authenticate(user=restaurant.owner.user)
+        url = f'/api/v1/reservations/{reservation.id}/reassign/'
+
+        response = client.post(url, {}, format='json')
+        assert response.status_code == 200
+        assert response.data['table_number'] == '2'
+
+        reserve(tables[0], at(tomorrow, 20))
+        response = client.post(url, {'table_id': tables[0].id}, format='json')
+        assert response.status_code == 409
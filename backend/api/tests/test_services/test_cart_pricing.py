@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/cart_pricing.py — tarification groupée du panier invité
+
+Axes couverts :
+  1. Montant plats + formules (suppléments) ; forme JSON stockée dans le draft
+  2. Mode strict (préparation) : plat indisponible, cran obligatoire
+  3. Mode confirmation : choix disparu ignoré
+  4. Requêtes en nombre constant quelle que soit la taille du panier
+     (price_guest_cart, GuestPrepare, create_order_from_draft)
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.http import Http404
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from api.models import (
+    DraftOrder, Formule, FormuleCourse, FormuleCourseItem, Menu, MenuItem, Order,
+)
+from api.services.cart_pricing import price_guest_cart
+from api.services.orders import create_order_from_draft
+from api.tests.factories import RestaurantFactory, RestaurateurProfileFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    owner = RestaurateurProfileFactory(is_active=True, stripe_verified=True)
+    return RestaurantFactory(owner=owner, is_active=True, is_stripe_active=True)
+
+
+@pytest.fixture
+def dishes(restaurant):
+    menu = Menu.objects.create(name="Carte", restaurant=restaurant)
+    return [
+        MenuItem.objects.create(
+            menu=menu, name=f"Plat {n}", price=Decimal("10.00") + n, is_available=True,
+        )
+        for n in range(12)
+    ]
+
+
+@pytest.fixture
+def formule(restaurant, dishes):
+    """Formule Midi 19,90 € : entrée (obligatoire) + dessert (optionnel, +1,50 €)"""
+    formule = Formule.objects.create(restaurant=restaurant, name="Midi", price=Decimal("19.90"))
+    starter = FormuleCourse.objects.create(formule=formule, name="Entrée", order=1)
+    dessert = FormuleCourse.objects.create(
+        formule=formule, name="Dessert", order=2, is_required=False, min_choices=0,
+    )
+    for dish in dishes[:3]:
+        FormuleCourseItem.objects.create(course=starter, menu_item=dish)
+    FormuleCourseItem.objects.create(course=dessert, menu_item=dishes[3], extra_price=Decimal("1.50"))
+    return formule
+
+
+def selection(formule, course_name, dish):
+    course = formule.courses.get(name=course_name)
+    return {'course': course.id, 'menu_item': dish.id}
+
+
+def cart(dishes, formule, size):
+    items = [{'menu_item_id': dish.id, 'quantity': 2} for dish in dishes[:size]]
+    formules = [{
+        'formule': formule.id,
+        'quantity': 1,
+        'selections': [
+            selection(formule, "Entrée", dishes[n % 3]),
+            selection(formule, "Dessert", dishes[3]),
+        ],
+    } for n in range(size)]
+    return items, formules
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestPricing:
+
+    def test_amount_and_draft_shape(self, restaurant, dishes, formule):
+        items, formules = cart(dishes, formule, 2)
+
+        priced = price_guest_cart(restaurant, items, formules)
+
+        # Plats : 2 × 10,00 + 2 × 11,00 ; formules : 2 × (19,90 + 1,50)
+        assert priced.amount_cents == 4200 + 4280
+        assert priced.formules_json()[0] == {
+            'formule': str(formule.id),
+            'quantity': 1,
+            'selections': [
+                {'course': str(formules[0]['selections'][0]['course']), 'menu_item': dishes[0].id},
+                {'course': str(formules[0]['selections'][1]['course']), 'menu_item': dishes[3].id},
+            ],
+        }
+
+    def test_unavailable_item_rejected(self, restaurant, dishes):
+        MenuItem.objects.filter(pk=dishes[0].pk).update(is_available=False)
+
+        with pytest.raises(Http404):
+            price_guest_cart(restaurant, [{'menu_item_id': dishes[0].id, 'quantity': 1}])
+
+    def test_required_course_enforced(self, restaurant, dishes, formule):
+        formules = [{
+            'formule': formule.id, 'quantity': 1,
+            'selections': [selection(formule, "Dessert", dishes[3])],
+        }]
+
+        with pytest.raises(serializers.ValidationError):
+            price_guest_cart(restaurant, [], formules)
+
+    def test_confirmation_skips_removed_choice(self, restaurant, dishes, formule):
+        items, formules = cart(dishes, formule, 1)
+        FormuleCourseItem.objects.filter(menu_item=dishes[3]).delete()
+
+        priced = price_guest_cart(restaurant, items, formules, strict=False)
+
+        assert [c['menu_item'] for c in priced.formules[0].chosen] == [dishes[0]]
+
+
+@pytest.mark.django_db
+class TestConstantQueries:
+
+    def test_resolver(self, restaurant, dishes, formule):
+        # Paniers construits hors capture : selection() interroge la base
+        small_cart = cart(dishes, formule, 1)
+        large_cart = cart(dishes, formule, 12)
+
+        with CaptureQueriesContext(connection) as small:
+            price_guest_cart(restaurant, *small_cart)
+        with CaptureQueriesContext(connection) as large:
+            price_guest_cart(restaurant, *large_cart)
+
+        assert len(large) == len(small)
+
+    def test_guest_prepare(self, restaurant, dishes, formule):
+        client = APIClient()
+
+        def prepare(size):
+            items, formules = cart(dishes, formule, size)
+            payload = {
+                'restaurant_id': restaurant.id,
+                'items': items,
+                'formules': formules,
+                'customer_name': "Invité",
+                'phone': "+33612345678",
+                'payment_method': "cash",
+                'consent': True,
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post('/api/v1/guest/prepare/', payload, format='json')
+            assert response.status_code == 201
+            return len(queries)
+
+        with patch('api.views.guest_views.GuestThrottle.allow_request', return_value=True):
+            small = prepare(1)
+            assert prepare(12) <= small
+
+    def test_order_from_draft(self, restaurant, dishes, formule):
+        def confirm(size):
+            items, formules = cart(dishes, formule, size)
+            priced = price_guest_cart(restaurant, items, formules)
+            draft = DraftOrder.objects.create(
+                restaurant=restaurant, items=items, formules=priced.formules_json(),
+                amount=priced.amount_cents, customer_name="Invité", phone="+33612345678",
+                payment_method="cash",
+            )
+            with CaptureQueriesContext(connection) as queries:
+                order = create_order_from_draft(draft, paid=False)
+            assert order.items.count() == 2 * size
+            return len(queries)
+
+        small = confirm(1)
+        assert confirm(12) <= small
+        order = Order.objects.latest('id')
+        assert order.tax_amount > 0
+        assert order.items.filter(kind='formule').first().components.count() == 2
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/compiled_menu.py — menus publics compilés
+
+Axes couverts :
+  1. Document servi depuis le cache sans requête SQL
+  2. ETag / If-None-Match (304) et corps précompressé
+  3. Invalidation à la modification d'un plat
+"""
+
+import gzip
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.services import compiled_menu
+from api.tests.factories import MenuFactory, MenuItemFactory, RestaurantFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def public_client():
+    return APIClient()
+
+
+@pytest.fixture
+def item(db):
+    menu = MenuFactory(restaurant=RestaurantFactory(), is_available=True)
+    return MenuItemFactory(menu=menu, name='Tartare', price=Decimal('14.50'))
+
+
+def url(item):
+    return f'/api/v1/menus/public/{item.menu.restaurant_id}/menus/'
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestNormalizeLang:
+
+    def test_french_and_unknown_map_to_default(self):
+        assert compiled_menu.normalize_lang('fr') == ''
+        assert compiled_menu.normalize_lang('xx') == ''
+        assert compiled_menu.normalize_lang(None) == ''
+        assert compiled_menu.normalize_lang(' EN ') == 'en'
+
+
+@pytest.mark.django_db
+class TestCompiledMenu:
+
+    def test_cache_hit_without_query(self, public_client, item, django_assert_num_queries):
+        first = public_client.get(url(item))
+        assert first.status_code == 200
+
+        with django_assert_num_queries(0):
+            second = public_client.get(url(item))
+
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+        [menu] = json.loads(second.content)
+        assert [i['name'] for i in menu['items']] == ['Tartare']
+
+    def test_if_none_match_returns_304(self, public_client, item):
+        etag = public_client.get(url(item))['ETag']
+
+        response = public_client.get(url(item), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response['ETag'] == etag
+
+    def test_gzip_body(self, public_client, item):
+        identity = public_client.get(url(item)).content
+
+        response = public_client.get(url(item), HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == identity
+
+    def test_item_change_invalidates(self, public_client, item, django_capture_on_commit_callbacks):
+        etag = public_client.get(url(item))['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            item.name = 'Tartare de boeuf'
+            item.save()
+
+        response = public_client.get(url(item), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        [menu] = json.loads(response.content)
+        assert menu['items'][0]['name'] == 'Tartare de boeuf'
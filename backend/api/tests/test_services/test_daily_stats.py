@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/daily_stats.py — agrégat RestaurantDailyStats
+
+Axes couverts :
+  1. Reconstruction depuis les commandes brutes (jours, seaux, statuts)
+  2. Lecture : jours passés depuis l'agrégat, journée en cours en direct
+  3. Recalcul planifié après commit sur sauvegarde de commande
+  4. Lecteurs (commission_utils, endpoint statistics) alignés sur le brut
+"""
+
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Order, RestaurantDailyStats
+from api.services.daily_stats import (
+    order_rollup, paid_by_bucket, count_where, rebuild_daily_stats, refresh_daily_stats,
+    BUCKET_COMMISSIONABLE, BUCKET_CARD_OFFLINE, BUCKET_CASH,
+)
+from api.tests.factories import RestaurantFactory
+from api.utils.commission_utils import get_revenue_summary_periods, get_revenue_statistics
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+def make_order(restaurant, days_ago=0, amount="10.00", status="served",
+               payment_status="paid", payment_method="online"):
+    order = Order.objects.create(
+        restaurant=restaurant,
+        order_type="takeaway",
+        status=status,
+        payment_status=payment_status,
+        payment_method=payment_method,
+        subtotal=Decimal(amount),
+        total_amount=Decimal(amount),
+    )
+    if days_ago:
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+    return order
+
+
+@pytest.fixture
+def history(restaurant):
+    make_order(restaurant, days_ago=3, amount="20.00", payment_method="online")
+    make_order(restaurant, days_ago=3, amount="15.00", payment_method="card")
+    make_order(restaurant, days_ago=10, amount="8.00", payment_method="cash")
+    make_order(restaurant, days_ago=10, amount="30.00", status="cancelled", payment_status="unpaid", payment_method="")
+    make_order(restaurant, days_ago=40, amount="99.00", payment_method="online")
+    make_order(restaurant, amount="12.00", payment_method="terminal")
+    rebuild_daily_stats([restaurant.id])
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestDailyStatsRollup:
+
+    def test_rebuild_groups_by_day_and_bucket(self, restaurant, history):
+        rows = RestaurantDailyStats.objects.filter(restaurant=restaurant)
+        # 4 groupes (2 jours à 3 j, 2 à 10 j) + 1 à 40 j + aujourd'hui
+        assert rows.count() == 6
+        card = rows.get(payment_bucket=BUCKET_CARD_OFFLINE)
+        assert card.orders_count == 1
+        assert card.total_amount == Decimal("15.00")
+
+    def test_rollup_matches_raw_orders(self, restaurant, history):
+        start_day = timezone.localdate() - timedelta(days=30)
+        buckets = paid_by_bucket(order_rollup(restaurant, start_day))
+
+        assert buckets[BUCKET_COMMISSIONABLE] == {"total": Decimal("32.00"), "count": 2}
+        assert buckets[BUCKET_CARD_OFFLINE] == {"total": Decimal("15.00"), "count": 1}
+        assert buckets[BUCKET_CASH] == {"total": Decimal("8.00"), "count": 1}
+
+    def test_today_read_from_raw_orders(self, restaurant, history):
+        # Commande du jour absente de l'agrégat : lue en direct
+        make_order(restaurant, amount="5.00", payment_method="cash")
+
+        rows = order_rollup(restaurant, timezone.localdate())
+        assert count_where(rows) == 2
+        assert paid_by_bucket(rows)[BUCKET_CASH]["total"] == Decimal("5.00")
+
+    def test_past_days_not_read_from_raw_orders(self, restaurant, history):
+        # Modifiée par update() (pas de signal) : invisible jusqu'au recalcul
+        old = Order.objects.get(total_amount=Decimal("8.00"))
+        Order.objects.filter(pk=old.pk).update(total_amount=Decimal("9.00"))
+        start_day = timezone.localdate() - timedelta(days=30)
+        assert paid_by_bucket(order_rollup(restaurant, start_day))[BUCKET_CASH]["total"] == Decimal("8.00")
+
+        refresh_daily_stats(restaurant.id, timezone.localdate(Order.objects.get(pk=old.pk).created_at))
+
+        assert paid_by_bucket(order_rollup(restaurant, start_day))[BUCKET_CASH]["total"] == Decimal("9.00")
+
+    def test_rebuild_upserts_and_drops_stale_groups(self, restaurant, history):
+        old = Order.objects.get(total_amount=Decimal("8.00"))
+        Order.objects.filter(pk=old.pk).update(payment_status="refunded")
+        day = timezone.localdate(old.created_at)
+
+        # Recalculs répétés de la même journée : upsert, pas de conflit d'unicité
+        refresh_daily_stats(restaurant.id, day)
+        refresh_daily_stats(restaurant.id, day)
+
+        rows = RestaurantDailyStats.objects.filter(restaurant=restaurant, day=day)
+        assert rows.count() == 2
+        assert not rows.filter(payment_status="paid").exists()
+        assert RestaurantDailyStats.objects.filter(restaurant=restaurant).count() == 6
+
+    def test_order_save_schedules_refresh(self, restaurant, django_capture_on_commit_callbacks):
+        with patch("api.tasks.refresh_restaurant_daily_stats.apply_async") as apply_async, \
+                patch("api.services.daily_stats.cache.add", return_value=True), \
+                django_capture_on_commit_callbacks(execute=True):
+            make_order(restaurant)
+
+        apply_async.assert_called_once()
+        assert apply_async.call_args.kwargs["args"] == [restaurant.id, timezone.localdate().isoformat()]
+
+    def test_rebuild_command(self, restaurant, history):
+        RestaurantDailyStats.objects.all().delete()
+
+        call_command("rebuild_daily_stats", restaurant=[restaurant.id])
+
+        assert RestaurantDailyStats.objects.filter(restaurant=restaurant).count() == 6
+
+
+@pytest.mark.django_db
+class TestDailyStatsReaders:
+
+    def test_revenue_summary_periods(self, restaurant, history, django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            summary = get_revenue_summary_periods(restaurant)
+
+        assert summary["today"]["commissionable"] == 12.0
+        assert summary["week"]["gross"] == 47.0
+        assert summary["month"]["gross"] == 55.0
+        assert summary["month"]["cash"] == 8.0
+
+    def test_revenue_statistics(self, restaurant, history):
+        stats = get_revenue_statistics(restaurant, period_days=30)
+
+        assert stats["orders_count"] == {"total": 4, "commissionable": 2, "card_offline": 1, "cash": 1}
+        assert stats["gross_revenue"]["total"] == 55.0
+
+    def test_order_statistics_endpoint(self, restaurant, history):
+        client = APIClient()
+        client.force_authenticate(user=restaurant.owner.user)
+
+        response = client.get("/api/v1/orders/statistics/", {"period": "month"})
+
+        assert response.status_code == 200
+        stats = response.data["stats"]
+        assert stats["total_orders"] == 5
+        assert Decimal(stats["total_revenue"]) == Decimal("55.00")
+        assert stats["orders_by_status"] == {"served": 4, "cancelled": 1}
+
+    def test_restaurant_statistics_endpoint(self, restaurant, history):
+        restaurant.owner.stripe_verified = True
+        restaurant.owner.save()
+        client = APIClient()
+        client.force_authenticate(user=restaurant.owner.user)
+
+        response = client.get(f"/api/v1/restaurants/{restaurant.id}/statistics/", {"period_days": 7})
+
+        assert response.status_code == 200
+        assert response.data["overview"]["orders"]["total"] == 6
+        assert response.data["overview"]["orders"]["cancelled"] == 1
+        revenue = response.data["revenue"]
+        assert revenue["current_period"] == 47.0
+        assert revenue["previous_period"] == 8.0
+        assert revenue["by_payment_method"]["card_offline"]["count"] == 1
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour le répertoire public (api/services/directory.py,
+api/utils/directory_index.py)
+
+Axes couverts :
+  1. Géohash : encodage, cellules couvrant le disque de recherche
+  2. Index recalculés à la sauvegarde du restaurant (y compris update_fields)
+  3. Proximité : k plus proches sous le rayon
+  4. Recherche texte insensible aux accents, facettes en cache invalidées
+"""
+
+import pytest
+from decimal import Decimal
+from math import cos, radians, sin
+
+from rest_framework.test import APIClient
+
+from api.services import directory
+from api.tests.factories import RestaurantFactory, RestaurateurProfileFactory
+from api.utils.directory_index import covering_cells, geohash_encode
+
+
+PARIS = (48.8566, 2.3522)
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def owner(db):
+    return RestaurateurProfileFactory(is_active=True, stripe_verified=True)
+
+
+def place(owner, lat, lng, **fields):
+    return RestaurantFactory(
+        owner=owner, is_stripe_active=True,
+        latitude=Decimal(f"{lat:.6f}"), longitude=Decimal(f"{lng:.6f}"),
+        **fields,
+    )
+
+
+def offset(lat, lng, km, bearing):
+    """Point à `km` du point de départ dans la direction `bearing` (degrés)"""
+    return (
+        lat + km * cos(radians(bearing)) / 111.0,
+        lng + km * sin(radians(bearing)) / (111.0 * cos(radians(lat))),
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestGeohash:
+
+    def test_encode(self):
+        assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    @pytest.mark.parametrize("radius", [0.5, 2, 10, 50])
+    def test_cells_cover_disc(self, radius):
+        cells = covering_cells(*PARIS, radius)
+
+        assert len(cells) <= 9
+        for bearing in range(0, 360, 15):
+            point = offset(*PARIS, radius * 0.99, bearing)
+            assert any(geohash_encode(*point).startswith(cell) for cell in cells)
+
+
+@pytest.mark.django_db
+class TestDirectoryIndex:
+
+    def test_computed_on_save(self, owner):
+        restaurant = place(owner, *PARIS, name="Café Étoile")
+
+        assert restaurant.geohash == geohash_encode(*PARIS)
+        assert "cafe etoile" in restaurant.search_text
+        assert "francaise" in restaurant.search_text
+
+    def test_update_fields_refresh_index(self, owner):
+        restaurant = place(owner, *PARIS)
+
+        restaurant.latitude = Decimal("43.296482")
+        restaurant.longitude = Decimal("5.369780")
+        restaurant.save(update_fields=["latitude", "longitude"])
+        restaurant.refresh_from_db()
+
+        assert restaurant.geohash == geohash_encode(43.296482, 5.369780)
+
+
+@pytest.mark.django_db
+class TestNearest:
+
+    def test_k_nearest_within_radius(self, owner):
+        near = place(owner, *offset(*PARIS, 1, 90))
+        nearer = place(owner, *offset(*PARIS, 0.3, 200))
+        place(owner, *offset(*PARIS, 4, 10))
+        place(owner, *offset(*PARIS, 12, 45))  # hors rayon
+
+        scored = directory.nearest_restaurants(
+            directory.public_restaurants(), *PARIS, radius_km=5, limit=2
+        )
+
+        assert [r for _, r in scored] == [nearer, near]
+        assert scored[0][0] == pytest.approx(0.3, abs=0.05)
+
+    def test_nearby_endpoint(self, owner):
+        restaurant = place(owner, *offset(*PARIS, 2, 0))
+
+        response = APIClient().get(
+            "/api/v1/restaurants/public/nearby/",
+            {"lat": PARIS[0], "lng": PARIS[1], "radius": 5},
+        )
+
+        assert response.status_code == 200
+        assert [r["id"] for r in response.data["results"]] == [str(restaurant.id)]
+        assert response.data["results"][0]["distance_km"] == pytest.approx(2, abs=0.05)
+
+
+@pytest.mark.django_db
+class TestSearchAndFacets:
+
+    def test_search_ignores_case_and_accents(self, owner):
+        cafe = place(owner, *PARIS, name="Le Café des Arts")
+        place(owner, *PARIS, name="Pizzeria", cuisine="italian")
+
+        response = APIClient().get("/api/v1/restaurants/public/", {"search": "CAFE arts"})
+
+        assert response.status_code == 200
+        assert [r["id"] for r in response.data] == [str(cafe.id)]
+
+    def test_facets_cached_and_invalidated(self, owner, django_assert_num_queries, django_capture_on_commit_callbacks):
+        restaurant = place(owner, *PARIS)
+        assert directory.get_directory_facets()["cities"] == ["Paris"]
+
+        with django_assert_num_queries(0):
+            assert directory.get_directory_facets()["cuisines"] == [
+                {"value": "french", "label": "Française"}
+            ]
+
+        restaurant.city = "Lyon"
+        with django_capture_on_commit_callbacks(execute=True):
+            restaurant.save()
+
+        assert directory.get_directory_facets()["cities"] == ["Lyon"]
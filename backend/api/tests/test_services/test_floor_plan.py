@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/floor_plan.py — instantané et deltas
+
+Axes couverts :
+  1. Statuts fusionnés (occupation, réservation, commande app) en requêtes constantes
+  2. Instantané servi depuis le cache, invalidé et versionné par les événements
+  3. Delta WebSocket : état de la table après commit, refetch sur layout_changed
+  4. Événement groupé par restaurant (tâches de maintenance)
+"""
+
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Order, Reservation
+from api.models.table_occupancy_models import TableOccupancy
+from api.services import floor_plan
+from api.tests.factories import RestaurantFactory, TableFactory
+from api.utils.floorplan_notifications import notify_floorplan_tables, notify_floorplan_update
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+@pytest.fixture
+def tables(restaurant):
+    return [TableFactory(restaurant=restaurant, number=str(n)) for n in (1, 2, 3, 4)]
+
+
+@pytest.fixture
+def client(restaurant):
+    client = APIClient()
+    client.force_authenticate(user=restaurant.owner.user)
+    return client
+
+
+def reserve(table, minutes_from_now, status="confirmed"):
+    starts_at = timezone.now() + timedelta(minutes=minutes_from_now)
+    return Reservation.objects.create(
+        restaurant=table.restaurant,
+        table=table,
+        customer_name="Dupont",
+        customer_phone="0600000000",
+        starts_at=starts_at,
+        ends_at=starts_at + timedelta(minutes=90),
+        status=status,
+    )
+
+
+def statuses(snapshot):
+    return {t["number"]: t["status"] for t in snapshot["tables"]}
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestFloorPlanSnapshot:
+
+    def test_statuses_merged(self, restaurant, tables):
+        TableOccupancy.objects.create(restaurant=restaurant, table=tables[0], source="blocked")
+        reserve(tables[1], -10, status="seated")
+        Order.objects.create(
+            restaurant=restaurant, order_type="dine_in", table_number="3",
+            status="preparing", subtotal=Decimal("10.00"), total_amount=Decimal("10.00"),
+        )
+
+        snapshot, _ = floor_plan.build_floor_plan(restaurant)
+
+        assert statuses(snapshot) == {"1": "blocked", "2": "seated", "3": "occupied", "4": "free"}
+        assert snapshot["summary"] == {"blocked": 1, "seated": 1, "occupied": 1, "free": 1}
+
+    def test_query_count_is_constant(self, restaurant, tables, django_assert_num_queries):
+        for table in tables:
+            reserve(table, 30)
+            TableOccupancy.objects.create(restaurant=restaurant, table=table)
+
+        # Tables (+ commandes actives en sous-requête), réservations, occupations
+        with django_assert_num_queries(3):
+            floor_plan.build_floor_plan(restaurant)
+
+    def test_ttl_stops_at_next_transition(self, restaurant, tables):
+        # Entre dans la fenêtre "bientôt" dans ~30 s
+        reserve(tables[0], floor_plan.RESERVED_SOON_MINUTES + 0.5)
+
+        snapshot, timeout = floor_plan.build_floor_plan(restaurant)
+
+        assert statuses(snapshot)["1"] == "free"
+        assert timeout <= 31
+
+    def test_list_served_from_cache(self, client, restaurant, tables, django_assert_max_num_queries):
+        url = f"/api/v1/floor-plan/?restaurant_id={restaurant.id}"
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first.data["version"] == 0
+
+        # Seul le contrôle d'accès touche la base
+        with django_assert_max_num_queries(2):
+            second = client.get(url)
+        assert second.data["tables"] == first.data["tables"]
+
+    def test_event_invalidates_and_bumps_version(self, client, restaurant, tables, django_capture_on_commit_callbacks):
+        url = f"/api/v1/floor-plan/?restaurant_id={restaurant.id}"
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TableOccupancy.objects.create(restaurant=restaurant, table=tables[3])
+            notify_floorplan_update(restaurant.id, event="table_occupied", table_id=tables[3].id)
+
+        response = client.get(url)
+        assert response.data["version"] == 1
+        assert statuses(response.data)["4"] == "occupied"
+
+
+@pytest.mark.django_db
+class TestFloorPlanDeltas:
+
+    def test_delta_sent_after_commit(self, restaurant, tables, django_capture_on_commit_callbacks):
+        with patch("api.utils.floorplan_notifications.async_to_sync") as async_to_sync:
+            with django_capture_on_commit_callbacks(execute=False) as callbacks:
+                TableOccupancy.objects.create(restaurant=restaurant, table=tables[0])
+                notify_floorplan_update(restaurant.id, event="table_occupied", table_id=tables[0].id)
+            async_to_sync.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        group, message = async_to_sync.return_value.call_args.args
+        assert group == f"floorplan_{restaurant.id}"
+        assert message["version"] == 1
+        assert message["table"]["id"] == str(tables[0].id)
+        assert message["table"]["status"] == "occupied"
+        assert isinstance(message["table"]["occupancy"]["started_at"], str)
+
+    def test_layout_change_has_no_table_payload(self, restaurant, tables):
+        message = floor_plan.build_floorplan_event(restaurant.id, "layout_changed", tables[0].id)
+
+        assert message["table"] is None
+        assert message["version"] == 1
+
+    def test_removed_table(self, restaurant, tables):
+        tables[0].is_active = False
+        tables[0].save()
+
+        delta = floor_plan.table_delta(restaurant.id, tables[0].id)
+
+        assert delta == {"id": str(tables[0].id), "removed": True}
+
+    def test_grouped_event_per_restaurant(self, restaurant, tables, django_capture_on_commit_callbacks):
+        tables[1].is_active = False
+        tables[1].save()
+        other = TableFactory(restaurant=RestaurantFactory(), number="9")
+
+        with patch("api.utils.floorplan_notifications.async_to_sync") as async_to_sync:
+            with django_capture_on_commit_callbacks(execute=True):
+                notify_floorplan_tables(
+                    [
+                        (restaurant.id, tables[0].id),
+                        (restaurant.id, tables[1].id),
+                        (restaurant.id, tables[0].id),
+                        (other.restaurant_id, other.id),
+                    ],
+                    event="table_released",
+                )
+
+        messages = dict(c.args for c in async_to_sync.return_value.call_args_list)
+        assert len(messages) == 2
+
+        grouped = messages[f"floorplan_{restaurant.id}"]
+        assert grouped["version"] == 1
+        assert grouped["table"] is None
+        assert {t["id"]: t.get("removed", False) for t in grouped["tables"]} == {
+            str(tables[0].id): False,
+            str(tables[1].id): True,
+        }
+        assert messages[f"floorplan_{other.restaurant_id}"]["table"]["id"] == str(other.id)
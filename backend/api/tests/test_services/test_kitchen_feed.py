@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/kitchen_feed.py — flux cuisine
+
+Axes couverts :
+  1. Tickets en nombre constant de requêtes (lignes, composants, instructions)
+  2. Mode incrémental ?since= (commandes modifiées + active_ids)
+  3. Delta WebSocket à l'entrée / sortie du flux cuisine
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from django.utils import timezone
+
+from api.models import Order, OrderItem, OrderItemComponent
+from api.services import kitchen_feed
+from api.tests.factories import MenuItemFactory, RestaurantFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+@pytest.fixture
+def make_order(restaurant):
+    def _make(status='pending', lines=1):
+        order = Order.objects.create(
+            restaurant=restaurant,
+            order_type='dine_in',
+            table_number='T1',
+            status=status,
+            subtotal=Decimal('20.00'),
+            total_amount=Decimal('20.00'),
+        )
+        for _ in range(lines):
+            OrderItem.objects.create(
+                order=order,
+                menu_item=MenuItemFactory(menu__restaurant=restaurant, price=Decimal('5.00')),
+                quantity=2,
+                unit_price=Decimal('5.00'),
+                total_price=Decimal('10.00'),
+                special_instructions='Sans oignons',
+            )
+        return order
+    return _make
+
+
+def restaurant_orders(restaurant):
+    return Order.objects.filter(restaurant=restaurant)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestCursor:
+
+    def test_round_trip(self):
+        now = timezone.now()
+        assert kitchen_feed.decode_cursor(kitchen_feed.encode_cursor(now)) == now
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            kitchen_feed.decode_cursor('abc')
+
+
+@pytest.mark.django_db
+class TestKitchenFeed:
+
+    def test_constant_queries(self, restaurant, make_order, django_assert_num_queries):
+        for _ in range(3):
+            make_order(lines=2)
+        make_order(status='served')
+
+        # commandes + lignes + composants
+        with django_assert_num_queries(3):
+            feed = kitchen_feed.kitchen_feed(restaurant_orders(restaurant))
+
+        assert feed['full'] is True
+        assert len(feed['tickets']) == 3
+        ticket = feed['tickets'][0]
+        assert ticket['items_count'] == 4
+        assert ticket['lines'][0]['special_instructions'] == 'Sans oignons'
+        assert ticket['urgency_level'] == 'normal'
+
+    def test_formule_components(self, restaurant, make_order):
+        order = make_order(lines=0)
+        line = OrderItem.objects.create(
+            order=order, kind='formule', label='Formule midi', quantity=1,
+            unit_price=Decimal('15.00'), total_price=Decimal('15.00'),
+        )
+        OrderItemComponent.objects.create(
+            order_item=line, course_name='Plat', menu_item_name='Risotto', display_order=1
+        )
+        OrderItemComponent.objects.create(
+            order_item=line, course_name='Entrée', menu_item_name='Velouté', display_order=0
+        )
+
+        [ticket] = kitchen_feed.kitchen_feed(restaurant_orders(restaurant))['tickets']
+
+        assert ticket['lines'][0]['name'] == 'Formule midi'
+        assert ticket['lines'][0]['components'] == [
+            {'course': 'Entrée', 'name': 'Velouté'},
+            {'course': 'Plat', 'name': 'Risotto'},
+        ]
+
+    def test_since_returns_changes_only(self, restaurant, make_order):
+        unchanged = make_order()
+        changed = make_order()
+        done = make_order()
+        since = timezone.now()
+
+        changed.status = 'preparing'
+        changed.save()
+        done.status = 'served'
+        done.save()
+
+        feed = kitchen_feed.kitchen_feed(restaurant_orders(restaurant), since=since)
+
+        assert feed['full'] is False
+        assert [t['id'] for t in feed['tickets']] == [changed.id]
+        assert feed['tickets'][0]['status'] == 'preparing'
+        assert sorted(feed['active_ids']) == sorted([unchanged.id, changed.id])
+
+
+@pytest.mark.django_db
+class TestKitchenTicketPush:
+
+    @pytest.fixture
+    def channel_layer(self):
+        layer = AsyncMock()
+        with patch('api.services.kitchen_feed.get_channel_layer', return_value=layer):
+            yield layer
+
+    def test_active_order_pushes_ticket(self, make_order, channel_layer):
+        order = make_order()
+
+        kitchen_feed.notify_kitchen_ticket(order, {'created': True, 'old_status': 'pending'})
+
+        group, message = channel_layer.group_send.call_args.args
+        assert group == f'kitchen_{order.restaurant_id}'
+        assert message['type'] == 'kitchen.ticket'
+        assert message['removed'] is False
+        assert message['ticket']['id'] == order.id
+
+    def test_finished_order_pushes_removal(self, make_order, channel_layer):
+        order = make_order(status='served')
+
+        kitchen_feed.notify_kitchen_ticket(order, {'created': False, 'old_status': 'ready'})
+
+        _, message = channel_layer.group_send.call_args.args
+        assert message['removed'] is True
+        assert message['ticket'] is None
+
+    def test_unrelated_order_ignored(self, make_order, channel_layer):
+        order = make_order(status='served')
+
+        kitchen_feed.notify_kitchen_ticket(order, {'created': False, 'old_status': 'served'})
+
+        channel_layer.group_send.assert_not_called()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/menu_ai/image_utils.py — prétraitement des photos
+
+Axes couverts :
+  1. Côté long plafonné, JPEG décodé à échelle réduite, orientation EXIF
+  2. Résultat en cache par empreinte du contenu (reprises de la tâche)
+  3. Pages préparées en parallèle, dans l'ordre ; fichiers lus en flux
+"""
+
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
+
+from api.services.menu_ai import image_utils
+
+
+def photo(width, height, fmt='JPEG', color=(200, 30, 30), orientation=None):
+    image = Image.new('RGB', (width, height), color)
+    buffer = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(buffer, format=fmt, exif=exif)
+    else:
+        image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Nombre de décodages effectifs"""
+    calls = []
+    original = image_utils._prepare
+
+    def prepare(stream):
+        calls.append(stream)
+        return original(stream)
+
+    monkeypatch.setattr(image_utils, "_prepare", prepare)
+    return calls
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestPrepareImage:
+
+    @pytest.mark.parametrize("fmt", ["JPEG", "PNG"])
+    def test_longest_edge_capped(self, fmt):
+        prepared = image_utils.prepare_image(photo(4000, 3000, fmt))
+
+        assert (prepared.width, prepared.height) == (1568, 1176)
+        assert Image.open(io.BytesIO(prepared.data)).format == "JPEG"
+
+    def test_jpeg_decoded_at_reduced_scale(self, monkeypatch):
+        drafts = []
+        original = JpegImageFile.draft
+
+        def draft(self, mode, size):
+            drafts.append(size)
+            return original(self, mode, size)
+
+        monkeypatch.setattr(JpegImageFile, "draft", draft)
+        image_utils.prepare_image(photo(4000, 3000))
+
+        assert drafts and min(drafts[0]) >= 1176
+
+    def test_exif_orientation_applied(self):
+        prepared = image_utils.prepare_image(photo(300, 200, orientation=6))
+
+        assert (prepared.width, prepared.height) == (200, 300)
+
+    def test_base64_computed_on_demand(self):
+        prepared = image_utils.prepare_image(photo(100, 100))
+
+        assert "base64" not in prepared.__dict__
+        assert prepared.data_url.startswith("data:image/jpeg;base64,")
+
+
+class TestCache:
+
+    def test_retry_reuses_prepared_image(self, decoded):
+        raw = photo(2000, 1000)
+        first = image_utils.prepare_image(raw)
+
+        again = image_utils.prepare_image(raw)
+
+        assert len(decoded) == 1
+        assert again.data == first.data
+        assert (again.width, again.height) == (first.width, first.height)
+
+
+class TestPrepareImages:
+
+    def test_order_preserved(self, monkeypatch):
+        monkeypatch.setattr(image_utils, "IMAGE_WORKERS", 3)
+        sizes = [(2000, 1000), (500, 800), (100, 100), (3000, 3000)]
+
+        prepared = image_utils.prepare_images([photo(w, h) for w, h in sizes])
+
+        assert [(p.width, p.height) for p in prepared] == [
+            (1568, 784), (500, 800), (100, 100), (1568, 1568),
+        ]
+
+    def test_stored_file_streamed(self):
+        class StoredFile(ContentFile):
+            opened = closed = 0
+
+            def open(self, mode=None):
+                self.opened += 1
+                self.seek(0)
+                return self
+
+            def close(self):
+                self.closed += 1
+
+        stored = StoredFile(photo(300, 200))
+
+        prepared, = image_utils.prepare_images([stored])
+
+        assert (prepared.width, prepared.height) == (300, 200)
+        assert stored.opened == stored.closed == 1
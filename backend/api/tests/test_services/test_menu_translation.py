@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/menu_ai/translation.py — traduction concurrente
+
+Axes couverts :
+  1. Textes dedoublonnes, decoupes en lots, un appel par (langue, lot)
+  2. Memo (texte, langue) partage entre restaurants
+  3. Reprise des erreurs transitoires ; lot en echec tolere
+  4. run_menu_extraction et translate_restaurant_menu avec un faux fournisseur
+"""
+
+import io
+import threading
+
+import pytest
+from decimal import Decimal
+from PIL import Image
+
+from api.models import Menu, MenuCategory, MenuItem
+from api.services.menu_ai import translation
+from api.services.menu_ai.base import MenuVisionProvider, ProviderResult
+from api.services.menu_ai.service import run_menu_extraction
+from api.services.menu_ai.translate_menu import translate_restaurant_menu
+from api.tests.factories import RestaurantFactory, RestaurateurProfileFactory
+
+
+LABELS = {'en': 'Anglais', 'es': 'Espagnol'}
+
+
+class FakeProvider(MenuVisionProvider):
+    """Traduit en prefixant le libelle de langue ; echoue `failures` fois."""
+
+    name = 'fake'
+
+    def __init__(self, failures=0, extraction=None):
+        self.failures = failures
+        self.extraction = extraction or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def extract_menu(self, images):
+        return ProviderResult(data=self.extraction, model='fake-vision')
+
+    def translate(self, payload, target_language_label):
+        with self._lock:
+            self.calls.append((target_language_label, dict(payload)))
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("surcharge")
+        return ProviderResult(
+            data={key: f"[{target_language_label}] {text}" for key, text in payload.items()},
+            model='fake-text', input_tokens=10, output_tokens=5,
+        )
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture(autouse=True)
+def no_retry_backoff(monkeypatch):
+    monkeypatch.setattr(translation, "RETRY_BACKOFF_SECONDS", 0)
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (20, 20), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestTranslateTexts:
+
+    def test_deduplicated_and_memoized(self):
+        provider = FakeProvider()
+
+        result = translation.translate_texts(
+            provider, ["Frites", " Frites ", "Salade verte", ""], ['en', 'es'], LABELS,
+        )
+
+        assert len(provider.calls) == 2
+        assert result.get('en') == {
+            "Frites": "[Anglais] Frites", "Salade verte": "[Anglais] Salade verte",
+        }
+        assert result.input_tokens == 20
+
+        # Autre restaurant, memes libelles : aucun appel
+        again = translation.translate_texts(FakeProvider(), ["Frites"], ['es'], LABELS)
+        assert again.get('es') == {"Frites": "[Espagnol] Frites"}
+        assert again.calls == 0
+        assert again.memo_hits == 1
+
+    def test_batches_per_language(self, monkeypatch):
+        monkeypatch.setattr(translation, "TRANSLATION_BATCH_SIZE", 2)
+        provider = FakeProvider()
+        done = []
+
+        result = translation.translate_texts(
+            provider, [f"Plat {n}" for n in range(5)], ['en', 'es'], LABELS,
+            on_batch=lambda finished, total: done.append((finished, total)),
+        )
+
+        assert len(provider.calls) == 6
+        assert all(len(payload) <= 2 for _, payload in provider.calls)
+        assert len(result.get('es')) == 5
+        assert done[-1] == (6, 6)
+
+    def test_transient_error_retried(self):
+        provider = FakeProvider(failures=1)
+
+        result = translation.translate_texts(provider, ["Frites"], ['en'], LABELS)
+
+        assert result.get('en') == {"Frites": "[Anglais] Frites"}
+        assert result.failed_batches == 0
+        assert len(provider.calls) == 2
+
+    def test_failed_batch_tolerated(self):
+        provider = FakeProvider(failures=99)
+
+        result = translation.translate_texts(provider, ["Frites"], ['en'], LABELS)
+
+        assert result.get('en') == {}
+        assert result.failed_batches == 1
+        assert len(provider.calls) == translation.TRANSLATION_RETRIES + 1
+
+
+class TestMenuExtraction:
+
+    def test_translations_applied(self):
+        provider = FakeProvider(extraction={'categories': [{
+            'name': "Plats",
+            'items': [
+                {'name': "Steak frites", 'description': "Frites maison", 'price': "18"},
+                {'name': "Frites maison", 'price': "4"},
+            ],
+        }]})
+
+        result = run_menu_extraction([png_bytes()], ['en', 'es'], provider=provider)
+
+        category = result['extracted_data']['categories'][0]
+        assert category['translations']['es'] == {'name': "[Espagnol] Plats"}
+        assert category['items'][0]['translations']['en'] == {
+            'name': "[Anglais] Steak frites", 'description': "[Anglais] Frites maison",
+        }
+        # « Frites maison » (description puis nom) n'est envoye qu'une fois par langue
+        assert len(provider.calls) == 2
+        assert len(provider.calls[0][1]) == 3
+        assert result['model_used'] == "fake-text, fake-vision"
+
+
+@pytest.mark.django_db
+class TestRestaurantMenu:
+
+    def test_missing_translations_completed(self, django_assert_max_num_queries):
+        restaurant = RestaurantFactory(owner=RestaurateurProfileFactory())
+        menu = Menu.objects.create(name="Carte", restaurant=restaurant)
+        category = MenuCategory.objects.create(
+            restaurant=restaurant, name="Desserts", description="Faits maison",
+        )
+        items = [
+            MenuItem.objects.create(
+                menu=menu, category=category, name=f"Tarte {n}", description="Pommes",
+                price=Decimal("6.00"), vat_rate=Decimal("0.10"),
+            )
+            for n in range(10)
+        ]
+        done = MenuItem.objects.create(
+            menu=menu, category=category, name="Glace", price=Decimal("5.00"),
+            vat_rate=Decimal("0.10"), translations={'en': {'name': "Ice cream"}},
+        )
+        provider = FakeProvider()
+
+        with django_assert_max_num_queries(12):
+            report = translate_restaurant_menu(restaurant.id, ['en'], provider=provider)
+
+        assert report['items_translated'] == 10
+        assert report['categories_translated'] == 1
+        assert report['skipped'] == 1
+        assert len(provider.calls) == 1
+
+        items[3].refresh_from_db()
+        category.refresh_from_db()
+        assert items[3].translations['en'] == {
+            'name': "[Anglais] Tarte 3", 'description': "[Anglais] Pommes",
+        }
+        # Categories : nom seul
+        assert category.translations['en'] == {'name': "[Anglais] Desserts"}
+        done.refresh_from_db()
+        assert done.translations == {'en': {'name': "Ice cream"}}
+
+    def test_partial_translation_retried(self, monkeypatch):
+        """Description en echec : pas de bucket nom seul, l'objet reste a traduire"""
+        monkeypatch.setattr(translation, "TRANSLATION_BATCH_SIZE", 1)
+        restaurant = RestaurantFactory(owner=RestaurateurProfileFactory())
+        menu = Menu.objects.create(name="Carte", restaurant=restaurant)
+        item = MenuItem.objects.create(
+            menu=menu, name="Tarte", description="Pommes",
+            price=Decimal("6.00"), vat_rate=Decimal("0.10"),
+        )
+
+        class DescriptionDown(FakeProvider):
+            def translate(self, payload, target_language_label):
+                if "Pommes" in payload.values():
+                    raise RuntimeError("surcharge")
+                return super().translate(payload, target_language_label)
+
+        report = translate_restaurant_menu(restaurant.id, ['en'], provider=DescriptionDown())
+
+        assert report['items_translated'] == 0
+        item.refresh_from_db()
+        assert 'en' not in (item.translations or {})
+
+        translate_restaurant_menu(restaurant.id, ['en'], provider=FakeProvider())
+
+        item.refresh_from_db()
+        assert item.translations['en'] == {
+            'name': "[Anglais] Tarte", 'description': "[Anglais] Pommes",
+        }
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/notification_inbox.py
+
+Axes couverts :
+  1. Pagination par curseur (created_at, id) : parcours complet, ex æquo
+  2. Compteur de non lues en cache : création, lecture, suppression,
+     tout marquer comme lu, expiration, courses avec incr et recalcul
+  3. Purge des notifications expirées par lots
+"""
+
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Notification
+from api.services import notification_inbox
+from api.services.notification_service import NotificationService
+from api.tasks import purge_expired_notifications
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="inbox_user", password="testpass123")
+
+
+def notify(user, count, **kwargs):
+    return Notification.objects.bulk_create(
+        Notification(user=user, notification_type='system', title=f"N{n}", body="", **kwargs)
+        for n in range(count)
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_walks_all_pages_including_ties(self, user):
+        notify(user, 7)
+        # Même created_at pour tous : l'id départage
+        Notification.objects.filter(user=user).update(created_at=timezone.now())
+        queryset = notification_inbox.inbox(user)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = notification_inbox.inbox_page(queryset, cursor, page_size=3)
+            seen.extend(n.id for n in page)
+            if cursor is None:
+                break
+
+        assert len(seen) == 7
+        assert seen == sorted(seen, reverse=True)
+
+    def test_invalid_cursor(self, user):
+        with pytest.raises(ValueError):
+            notification_inbox.inbox_page(notification_inbox.inbox(user), "abc.def")
+
+
+@pytest.mark.django_db
+class TestUnreadCounter:
+
+    def test_counter_served_from_cache(self, user):
+        notify(user, 3)
+        notify(user, 2, is_read=True)
+
+        assert notification_inbox.unread_count(user.id) == 3
+        with CaptureQueriesContext(connection) as queries:
+            assert notification_inbox.unread_count(user.id) == 3
+        assert len(queries) == 0
+
+    def test_created_read_and_deleted(self, user, django_capture_on_commit_callbacks):
+        service = NotificationService()
+        assert notification_inbox.unread_count(user.id) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            service._save_notification(user.id, "t", "b", "system")
+            service.send_to_users([user.id], title="t", body="b")
+        assert notification_inbox.unread_count(user.id) == 2
+
+        first, second = Notification.objects.filter(user=user)
+        with django_capture_on_commit_callbacks(execute=True):
+            notification_inbox.mark_read(first)
+            notification_inbox.mark_read(first)
+        assert notification_inbox.unread_count(user.id) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            notification_inbox.delete_notification(second)
+        assert notification_inbox.unread_count(user.id) == 0
+        assert not Notification.objects.filter(pk=second.pk).exists()
+
+    def test_mark_all_read_resets(self, user, django_capture_on_commit_callbacks):
+        notify(user, 4)
+        assert notification_inbox.unread_count(user.id) == 4
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert notification_inbox.mark_all_read(user) == 4
+        assert notification_inbox.unread_count(user.id) == 0
+
+    def test_key_expired_mid_adjust(self, user):
+        from django.core.cache import cache
+
+        notify(user, 3)
+        assert notification_inbox.unread_count(user.id) == 3
+
+        def expired_then_incr(key, delta=1, version=None):
+            # RedisCache.incr : EXISTS voit la clé, elle expire, INCR la recrée sans TTL
+            cache.delete(key)
+            cache.set(key, delta, timeout=None)
+            return delta
+
+        notify(user, 1)
+        with patch.object(cache, "incr", side_effect=expired_then_incr):
+            notification_inbox._adjust([user.id], 1)
+
+        assert cache.get(notification_inbox.unread_key(user.id)) is None
+        assert notification_inbox.unread_count(user.id) == 4
+
+    def test_adjust_during_recount_discards_value(self, user, monkeypatch):
+        from django.core.cache import cache
+
+        notify(user, 2)
+        count_unread = notification_inbox._count_unread
+
+        def racing_count(user_id):
+            result = count_unread(user_id)
+            # Création validée après la lecture : absente du recalcul
+            monkeypatch.setattr(notification_inbox, "_count_unread", count_unread)
+            notify(user, 1)
+            notification_inbox._adjust([user_id], 1)
+            return result
+
+        monkeypatch.setattr(notification_inbox, "_count_unread", racing_count)
+
+        assert notification_inbox.unread_count(user.id) == 2
+        assert cache.get(notification_inbox.unread_key(user.id)) is None
+        assert notification_inbox.unread_count(user.id) == 3
+
+    def test_expired_not_counted(self, user):
+        notify(user, 1)
+        notify(user, 1, expires_at=timezone.now() - timedelta(hours=1))
+
+        assert notification_inbox.unread_count(user.id) == 1
+
+
+@pytest.mark.django_db
+class TestPurge:
+
+    def test_purges_expired_in_batches(self, user):
+        notify(user, 5, expires_at=timezone.now() - timedelta(minutes=1))
+        notify(user, 2, expires_at=timezone.now() + timedelta(days=1))
+        notify(user, 1)
+
+        assert notification_inbox.purge_expired_notifications(batch_size=2) == 5
+        assert Notification.objects.filter(user=user).count() == 3
+
+    def test_task(self, user):
+        notify(user, 2, expires_at=timezone.now() - timedelta(minutes=1))
+
+        assert purge_expired_notifications() == "2 notification(s) expirée(s) supprimée(s)"
@@ -1,6 +1,14 @@
 import types
+from datetime import timedelta
 
-from api.services.notification_service import NotificationService
+import pytest
+import requests
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from api.models import PushNotificationToken, PushTicket
+from api.services.notification_service import NotificationService, EXPO_PUSH_CHUNK_SIZE
+from api.utils.expo_stub import ExpoStubServer
 
 
 def test_send_push_notification_no_tokens():
@@ -14,10 +22,7 @@ def test_send_push_notification_filters_invalid_tokens(monkeypatch):
     def fake_post(*args, **kwargs):
         raise AssertionError("request should not be sent")
 
-    import importlib
-    module = importlib.import_module("api.services.notification_service")
-    dummy_requests = types.SimpleNamespace(post=fake_post, exceptions=types.SimpleNamespace())
-    monkeypatch.setattr(module, "requests", dummy_requests)
+    service.session = types.SimpleNamespace(post=fake_post)
 
     result = service._send_push_notification(tokens=["invalid-token"], title="t", body="b")
     assert result is False
@@ -29,10 +34,7 @@ def test_send_push_notification_success(monkeypatch):
     def fake_post(*args, **kwargs):
         return types.SimpleNamespace(status_code=200, json=lambda: {"data": []})
 
-    import importlib
-    module = importlib.import_module("api.services.notification_service")
-    dummy_requests = types.SimpleNamespace(post=fake_post, exceptions=types.SimpleNamespace())
-    monkeypatch.setattr(module, "requests", dummy_requests)
+    service.session = types.SimpleNamespace(post=fake_post)
 
     result = service._send_push_notification(
         tokens=["ExponentPushToken[abc]"],
@@ -45,20 +47,35 @@ def test_send_push_notification_success(monkeypatch):
 
 def test_send_push_notification_timeout(monkeypatch):
     service = NotificationService()
-
-    class DummyTimeout(Exception):
-        pass
+    service.retry_backoff = 0
+    calls = []
 
     def fake_post(*args, **kwargs):
-        raise DummyTimeout()
+        calls.append(kwargs)
+        raise requests.exceptions.ReadTimeout()
+
+    service.session = types.SimpleNamespace(post=fake_post)
 
-    import importlib
-    module = importlib.import_module("api.services.notification_service")
-    dummy_requests = types.SimpleNamespace(
-        post=fake_post,
-        exceptions=types.SimpleNamespace(Timeout=DummyTimeout),
+    result = service._send_push_notification(
+        tokens=["ExponentPushToken[abc]"],
+        title="t",
+        body="b",
     )
-    monkeypatch.setattr(module, "requests", dummy_requests)
+    # Envoi non idempotent : Expo a peut-être reçu la requête
+    assert result is False
+    assert len(calls) == 1
+
+
+def test_send_push_notification_connect_timeout_retried(monkeypatch):
+    service = NotificationService()
+    service.retry_backoff = 0
+    calls = []
+
+    def fake_post(*args, **kwargs):
+        calls.append(kwargs)
+        raise requests.exceptions.ConnectTimeout()
+
+    service.session = types.SimpleNamespace(post=fake_post)
 
     result = service._send_push_notification(
         tokens=["ExponentPushToken[abc]"],
@@ -66,3 +83,115 @@ def test_send_push_notification_timeout(monkeypatch):
         body="b",
     )
     assert result is False
+    assert len(calls) == service.max_retries + 1
+
+
+# =============================================================================
+# ENVOI GROUPÉ / REÇUS (serveur Expo factice)
+# =============================================================================
+
+@pytest.fixture
+def stub():
+    with ExpoStubServer(dead_tokens={"ExponentPushToken[dead]"}) as server:
+        yield server
+
+
+@pytest.fixture
+def service(stub):
+    service = NotificationService()
+    service.expo_push_url = stub.push_url
+    service.expo_receipts_url = stub.receipts_url
+    service.retry_backoff = 0
+    return service
+
+
+@pytest.mark.django_db
+def test_send_batch_merges_and_chunks(service, stub):
+    notifications = [
+        {"tokens": [f"ExponentPushToken[u{i}-a]", f"ExponentPushToken[u{i}-b]"], "title": "t", "body": f"b{i}"}
+        for i in range(75)
+    ]
+
+    assert service.send_batch(notifications) is True
+
+    # 150 messages → 2 requêtes (limite Expo de 100 messages)
+    assert [len(payload) for _, payload in stub.requests] == [EXPO_PUSH_CHUNK_SIZE, 50]
+    assert PushTicket.objects.count() == 150
+
+
+@pytest.mark.django_db
+def test_send_not_retried_on_server_error(service, stub):
+    # Expo a pu traiter la requête : la rejouer livrerait deux fois
+    stub.fail_next = 1
+
+    assert service._send_push_notification(tokens=["ExponentPushToken[abc]"], title="t", body="b") is False
+    assert len(stub.requests) == 1
+
+
+@pytest.mark.django_db
+def test_send_retries_when_throttled(service, stub):
+    stub.fail_next = 2
+    stub.fail_status = 429
+
+    assert service._send_push_notification(tokens=["ExponentPushToken[abc]"], title="t", body="b") is True
+    assert len(stub.requests) == 3
+
+
+@pytest.mark.django_db
+def test_receipts_retried_on_server_error(service, stub):
+    service._send_push_notification(tokens=["ExponentPushToken[abc]"], title="t", body="b")
+    PushTicket.objects.update(created_at=timezone.now() - timedelta(minutes=20))
+    stub.fail_next = 1
+
+    assert service.process_push_receipts()["checked"] == 1
+    assert len(stub.requests) == 3
+
+
+@pytest.mark.django_db
+def test_send_to_users_single_request(service, stub):
+    users = [User.objects.create_user(username=f"push{i}", password="x") for i in range(3)]
+    for user in users:
+        PushNotificationToken.objects.create(user=user, expo_token=f"ExponentPushToken[{user.username}]")
+
+    assert service.send_to_users([u.id for u in users], title="t", body="b", save=False) is True
+    assert len(stub.requests) == 1
+    assert len(stub.requests[0][1]) == 3
+
+
+
+@pytest.mark.django_db
+def test_send_to_user_goes_through_batch(service, stub):
+    user = User.objects.create_user(username="single", password="x")
+    PushNotificationToken.objects.create(user=user, expo_token="ExponentPushToken[single]")
+
+    assert service.send_to_user(user.id, title="t", body="b", save=False) is True
+    assert len(stub.requests) == 1
+
+
+@pytest.mark.django_db
+def test_receipts_deactivate_unregistered_tokens(service, stub):
+    alive = PushNotificationToken.objects.create(expo_token="ExponentPushToken[alive]", guest_phone="+33600000001")
+    dead = PushNotificationToken.objects.create(expo_token="ExponentPushToken[dead]", guest_phone="+33600000002")
+    service._send_push_notification(tokens=[alive.expo_token, dead.expo_token], title="t", body="b")
+
+    # Les reçus ne sont demandés qu'après le délai conseillé par Expo
+    assert service.process_push_receipts()["checked"] == 0
+    PushTicket.objects.update(created_at=timezone.now() - timedelta(minutes=20))
+
+    result = service.process_push_receipts()
+
+    assert result == {"checked": 2, "deactivated": 1, "expired": 0}
+    alive.refresh_from_db()
+    dead.refresh_from_db()
+    assert alive.is_active is True
+    assert dead.is_active is False
+    assert not PushTicket.objects.exists()
+
+
+@pytest.mark.django_db
+def test_receipts_purge_expired_tickets(service, stub):
+    PushTicket.objects.create(ticket_id="old", expo_token="ExponentPushToken[old]")
+    PushTicket.objects.update(created_at=timezone.now() - timedelta(hours=25))
+
+    assert service.process_push_receipts()["expired"] == 1
+    assert stub.requests == []
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/order_events.py — outbox des notifications
+
+Axes couverts :
+  1. Enregistrement après commit (rien n'est envoyé pendant la requête)
+  2. Regroupement des sauvegardes rapprochées d'une même commande
+  3. Diffusion unique à partir de l'état de départ et de l'état courant
+  4. Repli en diffusion immédiate si Celery est indisponible
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+from api.models import Order
+from api.services import order_events
+from api.tasks import dispatch_order_events
+from api.tests.factories import RestaurantFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def order(db):
+    return Order.objects.create(
+        restaurant=RestaurantFactory(),
+        order_type="takeaway",
+        status="pending",
+        payment_status="unpaid",
+        subtotal=Decimal("10.00"),
+        tax_amount=Decimal("1.00"),
+        total_amount=Decimal("11.00"),
+    )
+
+
+@pytest.fixture
+def mock_task():
+    with patch("api.tasks.dispatch_order_events.apply_async") as apply_async:
+        yield apply_async
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestOrderEventsOutbox:
+
+    def test_nothing_dispatched_before_commit(self, order, mock_task, django_capture_on_commit_callbacks):
+        # Seul l'outbox est compté : le recalcul des stats a son propre callback
+        with patch("api.services.daily_stats.schedule_daily_stats_refresh"), \
+                django_capture_on_commit_callbacks(execute=False) as callbacks:
+            order.status = "confirmed"
+            order.save()
+
+        assert len(callbacks) == 1
+        mock_task.assert_not_called()
+
+    def test_status_churn_is_coalesced(self, order, mock_task, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            for status in ("confirmed", "preparing", "ready"):
+                order.status = status
+                order.save()
+
+        mock_task.assert_called_once()
+        assert mock_task.call_args.kwargs["args"] == [order.id]
+        assert mock_task.call_args.kwargs["countdown"] == order_events.ORDER_EVENTS_COALESCE_SECONDS
+
+        # Le premier événement fixe l'état de départ
+        pending = order_events.pop_pending_event(order.id)
+        assert pending["old_status"] == "pending"
+        assert pending["created"] is False
+
+    def test_new_window_after_dispatch(self, order, mock_task, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            order.status = "confirmed"
+            order.save()
+
+        with patch("api.services.order_events.dispatch_order_event"):
+            dispatch_order_events(order.id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            order.status = "preparing"
+            order.save()
+
+        assert mock_task.call_count == 2
+
+    def test_dispatch_single_fan_out(self, order):
+        Order.objects.filter(pk=order.pk).update(status="ready", payment_status="paid")
+        event = {
+            "order_id": order.id,
+            "created": False,
+            "old_status": "pending",
+            "old_payment_status": "unpaid",
+            "old_waiting_time": None,
+        }
+        mock_ws = MagicMock()
+        mock_push = MagicMock()
+
+        with patch("api.signals.get_notification_service", return_value=mock_ws), \
+                patch("api.services.notification_service.notification_service", mock_push):
+            assert order_events.dispatch_order_event(event) is True
+
+        mock_ws.send_order_update.assert_called_once()
+        data = mock_ws.send_order_update.call_args.kwargs["data"]
+        assert data["old_status"] == "pending"
+        assert data["new_status"] == "ready"
+        mock_push.notify_order_ready.assert_called_once()
+        mock_push.notify_order_confirmed.assert_not_called()
+        mock_push.notify_payment_received.assert_called_once()
+
+    def test_dispatch_deleted_order(self, order):
+        event = order_events.build_order_event(order, created=False)
+        Order.objects.filter(pk=order.pk).delete()
+
+        with patch("api.signals.get_notification_service") as mock_ws:
+            assert order_events.dispatch_order_event(event) is False
+        mock_ws.assert_not_called()
+
+    def test_broker_down_falls_back_to_inline(self, order, django_capture_on_commit_callbacks):
+        with patch("api.tasks.dispatch_order_events.apply_async", side_effect=ConnectionError), \
+                patch("api.services.order_events.dispatch_order_event") as mock_dispatch, \
+                django_capture_on_commit_callbacks(execute=True):
+            order.status = "confirmed"
+            order.save()
+
+        mock_dispatch.assert_called_once()
+        assert mock_dispatch.call_args.args[0]["old_status"] == "pending"
+        # La fenêtre est libérée pour les sauvegardes suivantes
+        assert order_events.pop_pending_event(order.id) is None
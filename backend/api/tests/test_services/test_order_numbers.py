@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/order_numbers.py — compteurs de commandes
+
+Axes couverts :
+  1. Numéros du jour : séquence par restaurant et préfixe, remise à 1 le lendemain
+  2. Séquences de table : poursuite, nouvelle session, reprise d'une session externe
+  3. Créations concurrentes : aucun doublon de numéro ni de séquence
+"""
+
+import threading
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+
+from api.models import Order
+from api.services.order_numbers import (
+    GROUP_PREFIX,
+    allocate_order_number,
+    allocate_table_sequence,
+)
+from api.tests.factories import RestaurantFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+def create_order(restaurant, table_number='', status='pending'):
+    return Order.objects.create(
+        restaurant=restaurant,
+        order_type='dine_in' if table_number else 'takeaway',
+        table_number=table_number,
+        status=status,
+        subtotal=Decimal('10.00'),
+        total_amount=Decimal('10.00'),
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestOrderNumbers:
+
+    def test_sequence_per_restaurant_and_prefix(self, restaurant):
+        other = RestaurantFactory()
+        day = date(2026, 10, 16)
+
+        assert allocate_order_number(restaurant.id, 'T', day) == f"T001-{restaurant.id}-261016"
+        assert allocate_order_number(restaurant.id, 'T', day) == f"T002-{restaurant.id}-261016"
+        assert allocate_order_number(restaurant.id, GROUP_PREFIX, day) == f"G001-{restaurant.id}-261016"
+        assert allocate_order_number(other.id, 'T', day) == f"T001-{other.id}-261016"
+
+    def test_reset_next_day(self, restaurant):
+        allocate_order_number(restaurant.id, 'E', date(2026, 10, 16))
+        allocate_order_number(restaurant.id, 'E', date(2026, 10, 16))
+
+        assert allocate_order_number(restaurant.id, 'E', date(2026, 10, 17)) == f"E001-{restaurant.id}-261017"
+
+
+@pytest.mark.django_db
+class TestTableSequence:
+
+    def test_session_continues_while_orders_active(self, restaurant):
+        first = create_order(restaurant, '4')
+        second = create_order(restaurant, '4')
+
+        assert (first.order_sequence, second.order_sequence) == (1, 2)
+        assert second.table_session_id == first.table_session_id
+        assert first.is_main_order and not second.is_main_order
+
+    def test_new_session_after_table_cleared(self, restaurant):
+        first = create_order(restaurant, '4')
+        Order.objects.filter(pk=first.pk).update(status='served')
+
+        again = create_order(restaurant, '4')
+
+        assert again.order_sequence == 1
+        assert again.table_session_id != first.table_session_id
+
+    def test_adopts_session_assigned_elsewhere(self, restaurant):
+        first = create_order(restaurant, '4')
+        external = uuid.uuid4()
+        Order.objects.filter(pk=first.pk).update(table_session_id=external, order_sequence=3)
+
+        assert allocate_table_sequence(restaurant.id, '4') == (external, 4)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentAllocation:
+
+    THREADS = 8
+    PER_THREAD = 5
+
+    def test_no_duplicates_under_concurrency(self, restaurant):
+        created = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            try:
+                start.wait()
+                for _ in range(self.PER_THREAD):
+                    with transaction.atomic():
+                        order = create_order(restaurant, '7' if index % 2 else '')
+                    with lock:
+                        created.append(order)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        total = self.THREADS * self.PER_THREAD
+        numbers = [o.order_number for o in created]
+        assert len(set(numbers)) == total
+
+        table_orders = [o for o in created if o.table_number == '7']
+        assert sorted(o.order_sequence for o in table_orders) == list(range(1, len(table_orders) + 1))
+        assert len({o.table_session_id for o in table_orders}) == 1
+
+        # Numéros du jour sans trou ni doublon, par préfixe
+        for prefix, orders in (('T', table_orders), ('E', [o for o in created if not o.table_number])):
+            ranks = sorted(int(o.order_number[1:4]) for o in orders)
+            assert ranks == list(range(1, len(orders) + 1)), prefix
@@ -152,6 +152,17 @@ class TestHappyPath:
         draft_online.refresh_from_db()
         assert draft_online.status == "confirmed_online"
 
+    def test_draft_linked_to_order(self, draft_cash, django_capture_on_commit_callbacks):
+        """Le draft référence sa commande ; les long-polls sont réveillés au commit."""
+        with patch("api.services.draft_status._send_draft_resolved") as send:
+            with django_capture_on_commit_callbacks(execute=True):
+                order = create_order_from_draft(draft_cash, paid=False)
+
+        draft_cash.refresh_from_db()
+        assert draft_cash.order_id == order.pk
+        assert order.guest_draft == draft_cash
+        send.assert_called_once_with(draft_cash.pk)
+
     def test_order_fields_copied_from_draft(self, draft_cash):
         """Les champs de l'Order doivent correspondre au draft."""
         order = create_order_from_draft(draft_cash, paid=False)
@@ -511,7 +522,7 @@ class TestTransactionAtomicity:
         """
         initial_count = OrderItem.objects.count()
 
-        with patch("api.services.orders.OrderItem.objects.create",
+        with patch("api.services.orders.OrderItem.objects.bulk_create",
                    side_effect=IntegrityError("simulated item failure")):
             with pytest.raises(IntegrityError):
                 create_order_from_draft(draft_cash, paid=False)
@@ -524,7 +535,7 @@ class TestTransactionAtomicity:
         Même si c'est la création des items qui échoue, le statut du draft
         doit revenir à 'created' (pas rester 'confirmed_cash').
         """
-        with patch("api.services.orders.OrderItem.objects.create",
+        with patch("api.services.orders.OrderItem.objects.bulk_create",
                    side_effect=IntegrityError("simulated item failure")):
             with pytest.raises(IntegrityError):
                 create_order_from_draft(draft_cash, paid=False)
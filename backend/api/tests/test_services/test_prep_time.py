@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/prep_time.py — temps de préparation appris
+
+Axes couverts :
+  1. Enregistrement à la transition vers prête / servie (une seule fois par commande)
+  2. Moyenne glissante bornée par PREP_TIME_MEMORY
+  3. Prédiction : estimation statique sans historique, heure puis toutes heures
+  4. rebuild_prep_time_stats depuis les commandes
+  5. Progression (/progress/) : nombre de requêtes indépendant de l'historique
+"""
+
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Menu, MenuCategory, MenuItem, Order, OrderItem, PrepTimeStats
+from api.services import prep_time
+from api.tests.factories import RestaurantFactory, RestaurateurProfileFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory(owner=RestaurateurProfileFactory())
+
+
+@pytest.fixture
+def category(restaurant):
+    return MenuCategory.objects.create(restaurant=restaurant, name="Plat")
+
+
+@pytest.fixture
+def dish(restaurant, category):
+    menu = Menu.objects.create(name="Carte", restaurant=restaurant)
+    return MenuItem.objects.create(
+        menu=menu, category=category, name="Burger", price=Decimal("15.00"),
+        vat_rate=Decimal("0.10"), preparation_time=12,
+    )
+
+
+@pytest.fixture
+def finish(django_capture_on_commit_callbacks):
+    """Commande créée il y a `minutes` puis passée au statut `status`"""
+    def finish(restaurant, items=(), minutes=20, status="ready"):
+        order = Order.objects.create(
+            restaurant=restaurant, order_type="takeaway", status="preparing",
+            subtotal=Decimal("15.00"), total_amount=Decimal("15.00"),
+        )
+        for menu_item in items:
+            OrderItem.objects.create(
+                order=order, menu_item=menu_item, quantity=1,
+                unit_price=menu_item.price, total_price=menu_item.price,
+            )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(minutes=minutes)
+        )
+        order = Order.objects.get(pk=order.pk)
+        order.status = status
+        with django_capture_on_commit_callbacks(execute=True):
+            order.save()
+        return order
+    return finish
+
+
+def stats(restaurant, category_id=prep_time.ORDER_SCOPE):
+    return PrepTimeStats.objects.get(restaurant=restaurant, category_id=category_id)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestRecording:
+
+    def test_ready_records_order_and_categories(self, restaurant, category, dish, finish):
+        order = finish(restaurant, [dish], minutes=20)
+
+        for row in (stats(restaurant), stats(restaurant, category.id)):
+            assert row.samples == 1
+            assert row.hour == timezone.localtime(order.created_at).hour
+            assert row.avg_seconds == pytest.approx(1200, abs=5)
+
+    def test_served_after_ready_not_recounted(self, restaurant, dish, finish, django_capture_on_commit_callbacks):
+        order = finish(restaurant, [dish])
+
+        order.status = "served"
+        with django_capture_on_commit_callbacks(execute=True):
+            order.save()
+
+        assert stats(restaurant).samples == 1
+
+    def test_served_directly_recorded(self, restaurant, finish):
+        finish(restaurant, minutes=30, status="served")
+
+        assert stats(restaurant).avg_seconds == pytest.approx(1800, abs=5)
+
+    def test_moving_average(self, restaurant, monkeypatch):
+        monkeypatch.setattr(prep_time, "PREP_TIME_MEMORY", 2)
+        created_at = timezone.now() - timedelta(hours=1)
+
+        for minutes in (10, 10, 20):
+            prep_time.record_prep_time(
+                0, restaurant.id, created_at, created_at + timedelta(minutes=minutes)
+            )
+
+        row = stats(restaurant)
+        assert row.samples == 3
+        # 600 + (1200 - 600) / min(3, 2)
+        assert row.avg_seconds == pytest.approx(900)
+
+
+@pytest.mark.django_db
+class TestPrediction:
+
+    def test_static_estimate_without_history(self, restaurant, category):
+        # base 5 + 12 * 2 + marge max(5, 4.8)
+        assert prep_time.predict_prep_minutes(restaurant.id, [(category.id, 12, 2)]) == 34
+
+    def test_learned_category_time(self, restaurant, category):
+        at = timezone.now()
+        PrepTimeStats.objects.create(
+            restaurant=restaurant, category_id=category.id,
+            hour=timezone.localtime(at).hour, samples=5, avg_seconds=18 * 60,
+        )
+
+        assert prep_time.predict_prep_minutes(restaurant.id, [(category.id, 12, 2)], at=at) == 18
+        # Jamais sous le plat le plus long
+        assert prep_time.predict_prep_minutes(restaurant.id, [(category.id, 25, 1)], at=at) == 25
+
+    def test_falls_back_to_all_hours(self, restaurant):
+        at = timezone.now()
+        other_hour = (timezone.localtime(at).hour + 6) % 24
+        PrepTimeStats.objects.create(
+            restaurant=restaurant, hour=other_hour, samples=4, avg_seconds=20 * 60,
+        )
+
+        model = prep_time.load_prep_time_model(restaurant.id, at=at)
+
+        assert model.minutes() == pytest.approx(20)
+        assert model.samples == 4
+
+    def test_order_preparation_time(self, restaurant, dish, finish):
+        for _ in range(prep_time.PREP_TIME_MIN_SAMPLES):
+            finish(restaurant, [dish], minutes=30)
+
+        order = finish(restaurant, [dish], minutes=0, status="confirmed")
+
+        assert order.get_preparation_time() == 30
+
+
+@pytest.mark.django_db
+class TestRebuild:
+
+    def test_rebuild_from_orders(self, restaurant, category, dish, finish):
+        finish(restaurant, [dish], minutes=10)
+        finish(restaurant, minutes=20)
+        PrepTimeStats.objects.all().delete()
+
+        prep_time.rebuild_prep_time_stats([restaurant.id])
+
+        assert stats(restaurant).samples == 2
+        assert sum(r.samples for r in PrepTimeStats.objects.filter(category_id=category.id)) == 1
+
+
+@pytest.mark.django_db
+class TestProgressQueries:
+
+    def test_constant_queries_per_poll(self, restaurant, category, dish, finish):
+        finish(restaurant, [dish], minutes=40)
+        order = finish(restaurant, [dish], minutes=5, status="confirmed")
+
+        client = APIClient()
+        client.force_authenticate(user=restaurant.owner.user)
+        url = f"/api/v1/orders/{order.id}/progress/"
+        client.get(url)  # contexte d'autorisation en cache
+
+        with CaptureQueriesContext(connection) as few:
+            assert client.get(url).status_code == 200
+
+        for _ in range(10):
+            finish(restaurant, [dish], minutes=40)
+
+        with CaptureQueriesContext(connection) as many:
+            response = client.get(url)
+
+        assert response.status_code == 200
+        assert len(many) == len(few)
+        assert response.data["categories"][0]["estimated_time_minutes"] == pytest.approx(40, abs=1)
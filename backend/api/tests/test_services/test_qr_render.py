@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/qr_render.py — rendu des QR codes de table
+
+Axes couverts :
+  1. PNG mémoïsés par contenu (URL, taille, logo) : seuls les absents sont rendus
+  2. Export PDF en tâche de fond : 202, codes QR complétés, téléchargement, expiration
+"""
+
+import pytest
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import QrExportJob, Table
+from api.services import qr_render
+from api.tests.factories import RestaurantFactory, RestaurateurProfileFactory, TableFactory
+from api.utils.qrcode_utils import render_qr_png
+
+
+URLS = [f"https://eatquicker.test/t/R1T{n:03}/" for n in range(1, 5)]
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """URLs effectivement rendues (hors cache)"""
+    calls = []
+
+    def render(data, *args):
+        calls.append(data)
+        return render_qr_png(data, *args)
+
+    monkeypatch.setattr(qr_render, "render_qr_png", render)
+    return calls
+
+
+@pytest.fixture
+def owner(db):
+    return RestaurateurProfileFactory(is_active=True, stripe_verified=True)
+
+
+@pytest.fixture
+def restaurant(owner):
+    return RestaurantFactory(owner=owner)
+
+
+@pytest.fixture
+def client(owner):
+    client = APIClient()
+    client.force_authenticate(user=owner.user)
+    return client
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestMemoization:
+
+    def test_rendered_once_per_content(self, rendered):
+        first = qr_render.render_qr_pngs(URLS, box_size=8)
+
+        assert qr_render.render_qr_pngs(URLS, box_size=8) == first
+        assert rendered == URLS
+        assert first[0].startswith(b"\x89PNG")
+
+    def test_only_missing_rendered(self, rendered):
+        qr_render.render_qr_pngs(URLS[:2])
+        rendered.clear()
+
+        qr_render.render_qr_pngs(URLS + URLS[3:])
+
+        assert rendered == URLS[2:]
+
+    def test_size_is_part_of_key(self, rendered):
+        small, = qr_render.render_qr_pngs(URLS[:1], box_size=4)
+        large, = qr_render.render_qr_pngs(URLS[:1], box_size=10)
+
+        assert len(rendered) == 2
+        assert small != large
+
+
+@pytest.mark.django_db
+class TestExportJob:
+
+    def test_background_export(self, client, restaurant, django_capture_on_commit_callbacks):
+        tables = [TableFactory(restaurant=restaurant) for _ in range(3)]
+        Table.objects.filter(pk=tables[0].pk).update(qr_code="")
+
+        url = f"/api/v1/table/restaurants/{restaurant.id}/export_qr/"
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(url)
+
+        assert response.status_code == 202
+        status = client.get(response.data["status_url"])
+        assert status.data["status"] == "complete"
+        assert status.data["progress"] == 100
+        assert status.data["tables_count"] == 3
+
+        download = client.get(response.data["url"])
+        assert download.status_code == 200
+        assert b"".join(download.streaming_content).startswith(b"%PDF")
+
+        tables[0].refresh_from_db()
+        assert tables[0].qr_code == f"R{restaurant.id}T{tables[0].number.zfill(3)}"
+
+    def test_without_tables(self, client, restaurant):
+        response = client.post(f"/api/v1/table/restaurants/{restaurant.id}/export_qr/")
+
+        assert response.status_code == 404
+        assert not QrExportJob.objects.exists()
+
+    def test_expired_download(self, client, restaurant, django_capture_on_commit_callbacks):
+        TableFactory(restaurant=restaurant)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(f"/api/v1/table/restaurants/{restaurant.id}/export_qr/")
+        QrExportJob.objects.update(expires_at=timezone.now() - timedelta(days=1))
+
+        assert client.get(response.data["url"]).status_code == 410
+
+    def test_expired_jobs_purged_with_files(self, client, restaurant, django_capture_on_commit_callbacks):
+        TableFactory(restaurant=restaurant)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(f"/api/v1/table/restaurants/{restaurant.id}/export_qr/")
+            client.post(f"/api/v1/table/restaurants/{restaurant.id}/export_qr/")
+        expired, kept = QrExportJob.objects.order_by('created_at')
+        QrExportJob.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(days=1))
+        storage = expired.file.storage
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert qr_render.purge_expired_qr_exports() == 1
+
+        assert list(QrExportJob.objects.values_list('pk', flat=True)) == [kept.pk]
+        assert not storage.exists(expired.file.name)
+        assert storage.exists(kept.file.name)
+
+    def test_other_restaurant_job_hidden(self, client, restaurant):
+        other = RestaurantFactory(owner=RestaurateurProfileFactory())
+        job = QrExportJob.objects.create(restaurant=other, base_url="https://x.test")
+
+        response = client.get(f"/api/v1/table/restaurants/{restaurant.id}/qr_exports/{job.id}/")
+
+        assert response.status_code == 404
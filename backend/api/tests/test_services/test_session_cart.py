@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/session_cart.py — panier partagé versionné
+
+Axes couverts :
+  1. Fusion des changements (un changement par article, cleared)
+  2. Regroupement des mutations en une seule diffusion cart_diff
+  3. Repli sur l'instantané complet (changement expiré) et cache de l'instantané
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from api.models import CollaborativeTableSession, SessionCartItem, SessionParticipant
+from api.services import session_cart
+from api.tasks import broadcast_session_cart
+from api.tests.factories import MenuItemFactory, RestaurantFactory, TableFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def session(db):
+    restaurant = RestaurantFactory()
+    table = TableFactory(restaurant=restaurant)
+    return CollaborativeTableSession.objects.create(
+        restaurant=restaurant, table=table, table_number=table.number, status='active'
+    )
+
+
+@pytest.fixture
+def participant(session):
+    return SessionParticipant.objects.create(
+        session=session, guest_name='Alice', role='host', status='active'
+    )
+
+
+@pytest.fixture
+def add_item(session, participant):
+    def _add(quantity=1):
+        menu_item = MenuItemFactory(menu__restaurant=session.restaurant, price=Decimal('9.99'))
+        return SessionCartItem.objects.create(
+            session=session, participant=participant, menu_item=menu_item, quantity=quantity
+        )
+    return _add
+
+
+@pytest.fixture
+def channel_layer():
+    layer = AsyncMock()
+    with patch('api.services.session_cart.get_channel_layer', return_value=layer):
+        yield layer
+
+
+def sent_messages(layer):
+    return [call.args[1] for call in layer.group_send.call_args_list]
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class TestMergeChanges:
+
+    def test_one_change_per_item(self):
+        a = {'id': 'a', 'quantity': 1}
+        merged = session_cart.merge_changes([
+            [{'op': 'added', 'item': a}],
+            [{'op': 'changed', 'item': {**a, 'quantity': 3}}],
+            [{'op': 'changed', 'item': {'id': 'b', 'quantity': 2}}],
+            [{'op': 'removed', 'id': 'b'}],
+        ])
+
+        assert merged == [
+            {'op': 'added', 'item': {'id': 'a', 'quantity': 3}},
+            {'op': 'removed', 'id': 'b'},
+        ]
+
+    def test_added_then_removed_disappears(self):
+        merged = session_cart.merge_changes([
+            [{'op': 'added', 'item': {'id': 'a'}}],
+            [{'op': 'removed', 'id': 'a'}],
+        ])
+
+        assert merged == []
+
+    def test_cleared_drops_previous_changes(self):
+        merged = session_cart.merge_changes([
+            [{'op': 'changed', 'item': {'id': 'a'}}],
+            [{'op': 'cleared'}],
+            [{'op': 'added', 'item': {'id': 'b'}}],
+        ])
+
+        assert merged == [{'op': 'cleared'}, {'op': 'added', 'item': {'id': 'b'}}]
+
+
+@pytest.mark.django_db
+class TestCartBroadcast:
+
+    def test_mutations_coalesced_into_one_diff(self, session, add_item, channel_layer, monkeypatch):
+        scheduled = []
+        monkeypatch.setattr(
+            broadcast_session_cart, 'apply_async',
+            lambda args, countdown: scheduled.append(args)
+        )
+        first, second = add_item(), add_item(quantity=2)
+
+        session_cart.schedule_cart_broadcast(session.id, [session_cart.item_change('added', first)])
+        session_cart.schedule_cart_broadcast(session.id, [session_cart.item_change('added', second)])
+        first.quantity = 4
+        first.save()
+        session_cart.schedule_cart_broadcast(session.id, [session_cart.item_change('changed', first)])
+
+        assert scheduled == [[str(session.id)]]
+
+        session_cart.broadcast_cart(session.id)
+
+        [message] = sent_messages(channel_layer)
+        assert message['type'] == 'cart_diff'
+        assert (message['from_version'], message['version']) == (0, 3)
+        assert [c['op'] for c in message['changes']] == ['added', 'added']
+        assert message['changes'][1]['item']['quantity'] == 4
+        assert message['items_count'] == 6
+
+        # Rien de nouveau : pas de seconde diffusion
+        session_cart.broadcast_cart(session.id)
+        assert len(sent_messages(channel_layer)) == 1
+
+    def test_missing_change_falls_back_to_snapshot(self, session, add_item, channel_layer):
+        item = add_item()
+        version = session_cart.record_cart_change(session.id, [session_cart.item_change('added', item)])
+        session_cart.cache.delete(session_cart.changes_key(session.id, version))
+
+        session_cart.broadcast_cart(session.id)
+
+        [message] = sent_messages(channel_layer)
+        assert message['type'] == 'cart_updated'
+        assert message['version'] == version
+        assert [i['id'] for i in message['items']] == [str(item.id)]
+
+    def test_snapshot_cached_until_next_mutation(self, session, add_item, django_assert_num_queries):
+        item = add_item()
+        session_cart.get_cart_snapshot(session.id)
+
+        with django_assert_num_queries(0):
+            snapshot = session_cart.get_cart_snapshot(session.id)
+        assert snapshot['items_count'] == 1
+
+        session_cart.record_cart_change(session.id, [session_cart.removed_change(item.id)])
+        item.delete()
+
+        snapshot = session_cart.get_cart_snapshot(session.id)
+        assert snapshot['version'] == 1
+        assert snapshot['items'] == []
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Tests unitaires pour api/services/vat_ledger.py — grand livre TVA
+
+Axes couverts :
+  1. Écriture des lignes à la finalisation (record_vat_lines)
+  2. Récapitulatif mensuel en une requête, ventilé par tranche
+  3. Reconstruction des commandes antérieures (vat_details vides)
+  4. Commandes sans grand livre ventilées depuis leurs lignes ; grand livre
+     réécrit quand une ligne change
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import Order, OrderItem, OrderVatLine
+from api.services import vat_ledger
+from api.services.vat_ledger import (
+    annotate_order_vat,
+    iter_orders_with_vat,
+    order_vat_breakdown,
+    rebuild_vat_ledger,
+    vat_recap,
+)
+from api.tests.factories import RestaurantFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+def make_order(restaurant, vat_details, payment_status='paid'):
+    order = Order.objects.create(
+        restaurant=restaurant,
+        order_type='takeaway',
+        status='served',
+        payment_status=payment_status,
+        subtotal=Decimal('33.00'),
+        total_amount=Decimal('33.00'),
+        vat_details=vat_details,
+    )
+    order.record_vat_lines(replace=False)
+    return order
+
+
+MIXED = {
+    '10.0': {'ht': Decimal('20.00'), 'tva': Decimal('2.00'), 'ttc': Decimal('22.00')},
+    '20.0': {'ht': Decimal('10.00'), 'tva': Decimal('2.00'), 'ttc': Decimal('12.00')},
+    '5.5': {'ht': Decimal('10.00'), 'tva': Decimal('0.55'), 'ttc': Decimal('10.55')},
+}
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestVatLedger:
+
+    def test_record_vat_lines(self, restaurant):
+        order = make_order(restaurant, MIXED)
+
+        rates = sorted(order.vat_lines.values_list('vat_rate', flat=True))
+        assert rates == [Decimal('0.055'), Decimal('0.100'), Decimal('0.200')]
+
+        # Une nouvelle finalisation remplace les lignes au lieu de les doubler
+        order.record_vat_lines()
+        assert order.vat_lines.count() == 3
+
+    def test_breakdown_by_bucket(self, restaurant):
+        order = make_order(restaurant, MIXED)
+
+        breakdown = order_vat_breakdown(order)
+        assert breakdown['5.5'] == {'base': Decimal('10.00'), 'tva': Decimal('0.55')}
+        assert breakdown['10']['tva'] == Decimal('2.00')
+        assert breakdown['20']['base'] == Decimal('10.00')
+
+        annotated = annotate_order_vat(Order.objects.filter(pk=order.pk)).get()
+        assert annotated.vat_base_ht == Decimal('40.00')
+        assert annotated.vat_5_5 == Decimal('0.55')
+        assert annotated.vat_20 == Decimal('2.00')
+
+    def test_recap_constant_queries(self, restaurant, django_assert_num_queries):
+        make_order(restaurant, MIXED)
+        make_order(restaurant, {'10.0': MIXED['10.0']})
+        make_order(restaurant, MIXED, payment_status='unpaid')
+        today = timezone.localdate()
+
+        # Agrégat du grand livre + commandes sans grand livre
+        with django_assert_num_queries(2):
+            recap = vat_recap(restaurant.owner, today, today)
+
+        assert recap['nombre_factures'] == 2
+        assert recap['ca_ttc'] == Decimal('66.55')
+        assert recap['ca_ht'] == Decimal('60.00')
+        assert recap['tva_10_base'] == Decimal('40.00')
+        assert recap['tva_10_montant'] == Decimal('4.00')
+        assert recap['tva_5_5_montant'] == Decimal('0.55')
+        assert recap['tva_total'] == Decimal('6.55')
+
+    def test_rebuild_legacy_order(self, restaurant):
+        order = make_order(restaurant, {})
+        OrderItem.objects.create(
+            order=order,
+            quantity=2,
+            unit_price=Decimal('11.00'),
+            total_price=Decimal('22.00'),
+            vat_rate=Decimal('0.10'),
+            vat_amount=Decimal('2.00'),
+        )
+
+        assert rebuild_vat_ledger(restaurant_ids=[restaurant.id]) == 1
+
+        line = OrderVatLine.objects.get(order=order)
+        assert line.vat_rate == Decimal('0.100')
+        assert line.base_ht == Decimal('20.00')
+        order.refresh_from_db()
+        assert Decimal(str(order.vat_details['10.0']['tva'])) == Decimal('2.00')
+
+        # Idempotent
+        call_command('rebuild_vat_ledger', restaurant=[restaurant.id])
+        assert OrderVatLine.objects.filter(order=order).count() == 1
+
+    def test_unledgered_order_falls_back_to_lines(self, restaurant):
+        legacy = make_order(restaurant, {'20.0': MIXED['20.0']})
+        OrderVatLine.objects.filter(order=legacy).delete()
+        make_order(restaurant, MIXED)
+        today = timezone.localdate()
+
+        assert order_vat_breakdown(legacy)['20'] == {'base': Decimal('10.00'), 'tva': Decimal('2.00')}
+
+        recap = vat_recap(restaurant.owner, today, today)
+        assert recap['nombre_factures'] == 2
+        assert recap['tva_20_montant'] == Decimal('4.00')
+        assert recap['ca_ttc'] == Decimal('56.55')
+
+        exported = {o.pk: o for o in iter_orders_with_vat(Order.objects.filter(restaurant=restaurant))}
+        assert exported[legacy.pk].vat_base_ht == Decimal('10.00')
+        assert exported[legacy.pk].vat_20 == Decimal('2.00')
+
+    def test_line_change_rewrites_ledger(self, restaurant, django_capture_on_commit_callbacks):
+        order = make_order(restaurant, {})
+        with patch('api.services.vat_ledger.refresh_order_vat', wraps=vat_ledger.refresh_order_vat) as refresh, \
+                django_capture_on_commit_callbacks(execute=True):
+            for _ in range(2):
+                OrderItem.objects.create(
+                    order=order,
+                    quantity=1,
+                    unit_price=Decimal('11.00'),
+                    total_price=Decimal('11.00'),
+                    vat_rate=Decimal('0.10'),
+                )
+
+        # Une seule réécriture pour la transaction
+        refresh.assert_called_once_with(order.id)
+        line = OrderVatLine.objects.get(order=order)
+        assert line.total_ttc == Decimal('22.00')
+        order.refresh_from_db()
+        assert order.tax_amount == line.vat_amount
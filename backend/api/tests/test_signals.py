@@ -680,13 +680,33 @@ class TestCaptureOrderChanges:
         
         assert order._old_status == "pending"
 
+    def test_captures_old_status_without_query(self, order, django_assert_num_queries):
+        """Le statut précédent est suivi en mémoire : aucune relecture en base"""
+        order.status = "confirmed"
+
+        with django_assert_num_queries(0):
+            capture_order_changes(sender=Order, instance=order)
+            capture_payment_status_change(sender=Order, instance=order)
+            update_order_timestamps(sender=Order, instance=order)
+
+        assert order._old_status == "pending"
+
+    def test_snapshot_follows_saves(self, order):
+        """Après save(), la valeur suivie devient la nouvelle valeur persistée"""
+        order.status = "confirmed"
+        order.save()
+
+        order.status = "preparing"
+        capture_order_changes(sender=Order, instance=order)
+
+        assert order._old_status == "confirmed"
+
     def test_captures_old_waiting_time_attribute(self, order):
-        """Test la capture de l'attribut waiting_time si présent"""
+        """Sans suivi en mémoire, le signal relit l'ancien état en base"""
         # Note: waiting_time n'est pas un champ du modèle Order,
         # mais le signal essaie de le capturer via getattr
-        # On simule un attribut waiting_time sur l'instance
-        
-        # Simuler l'ancien état avec waiting_time
+        del order._loaded_values
+
         with patch.object(Order.objects, 'get') as mock_get:
             mock_old_instance = MagicMock()
             mock_old_instance.status = "pending"
@@ -719,6 +739,7 @@ class TestCaptureOrderChanges:
     def test_handles_deleted_order(self, order):
         """Test quand la commande n'existe plus en DB"""
         order_pk = order.pk
+        del order._loaded_values
         
         # Simuler une commande supprimée
         with patch.object(Order.objects, 'get', side_effect=Order.DoesNotExist):
@@ -906,7 +927,7 @@ class TestSendOrderPushNotifications:
             with patch.dict('sys.modules', {'api.services.notification_service': MagicMock(notification_service=mock_push)}):
                 send_order_push_notifications(sender=Order, instance=order, created=False)
         
-        mock_push.send_to_user.assert_called_once()
+        mock_push.send_to_users.assert_called_once()
 
     def test_notifies_cancelled_guest(self, order, monkeypatch):
         """Test la notification pour commande annulée (invité)"""
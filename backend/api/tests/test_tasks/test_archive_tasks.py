@@ -195,4 +195,33 @@ def test_force_archive_abandoned_sessions(notify_mock):
     assert session.status == "cancelled"
     assert session.is_archived is True
     assert "archivée" in result
-    assert notify_mock.call_count >= 1
\ No newline at end of file
+    assert notify_mock.call_count >= 1
+
+@pytest.mark.django_db
+def test_auto_archive_releases_tables_on_floorplan(notify_mock, monkeypatch):
+    """L'archivage automatique pousse le delta plan de salle des tables libérées"""
+    from api.utils import floorplan_notifications
+
+    deltas = []
+    monkeypatch.setattr(
+        floorplan_notifications, "notify_floorplan_tables",
+        lambda affected, event: deltas.append((list(affected), event)),
+    )
+    restaurant = RestaurantFactory()
+    table = Table.objects.create(restaurant=restaurant, number="14")
+    session = CollaborativeTableSession.objects.create(
+        restaurant=restaurant,
+        table=table,
+        table_number="14",
+        status="active",
+    )
+    CollaborativeTableSession.all_objects.filter(id=session.id).update(
+        updated_at=timezone.now() - timedelta(minutes=31)
+    )
+
+    tasks_module.auto_archive_eligible_sessions()
+
+    session.refresh_from_db()
+    assert session.status == "cancelled"
+    assert session.is_archived is True
+    assert deltas == [([(restaurant.id, table.id)], "table_released")]
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Tests des tâches de maintenance ensemblistes (api/tasks.py)
+
+Axes couverts :
+  1. auto_release_occupancies : filtres Exists, une notification par restaurant
+  2. fire_scheduled_preorders : heure de déclenchement calculée en base, outbox
+  3. expire_pending_reservations : rattrapage des payées, expiration des autres
+  4. Métriques (durée, lignes touchées) enregistrées pour chaque exécution
+"""
+
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.utils import timezone
+
+from api.models import Order, Reservation
+from api.models.table_occupancy_models import TableOccupancy
+from api.services import maintenance
+from api.services.maintenance import get_task_metrics
+from api.tasks import (
+    auto_release_occupancies,
+    expire_pending_reservations,
+    fire_scheduled_preorders,
+)
+from api.tests.factories import RestaurantFactory, TableFactory
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+@pytest.fixture
+def tables(restaurant):
+    return [TableFactory(restaurant=restaurant, number=str(n)) for n in (1, 2, 3)]
+
+
+@pytest.fixture
+def floorplan_notify():
+    with patch('api.utils.floorplan_notifications.notify_floorplan_update') as notify:
+        yield notify
+
+
+def occupy(table, source='order', expected_end_at=None):
+    return TableOccupancy.objects.create(
+        restaurant=table.restaurant,
+        table=table,
+        source=source,
+        expected_end_at=expected_end_at or timezone.now() + timedelta(minutes=30),
+    )
+
+
+def create_order(restaurant, status='pending', payment_status='unpaid', table_number=''):
+    return Order.objects.create(
+        restaurant=restaurant,
+        order_type='dine_in' if table_number else 'takeaway',
+        table_number=table_number,
+        status=status,
+        payment_status=payment_status,
+        subtotal=Decimal('20.00'),
+        total_amount=Decimal('20.00'),
+    )
+
+
+def reserve(table, minutes_from_now, **fields):
+    starts_at = timezone.now() + timedelta(minutes=minutes_from_now)
+    return Reservation.objects.create(
+        restaurant=table.restaurant,
+        table=table,
+        customer_name='Dupont',
+        customer_phone='0600000000',
+        starts_at=starts_at,
+        ends_at=starts_at + timedelta(minutes=90),
+        **fields,
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+@pytest.mark.django_db
+class TestAutoReleaseOccupancies:
+
+    def test_releases_in_one_pass(self, restaurant, tables, floorplan_notify):
+        finished = occupy(tables[0])
+        busy = occupy(tables[1])
+        create_order(restaurant, table_number=tables[1].number)
+        overdue = occupy(tables[2], source='manual',
+                         expected_end_at=timezone.now() - timedelta(hours=3))
+
+        result = auto_release_occupancies()
+
+        assert result == "2 table(s) libérée(s)"
+        assert set(TableOccupancy.objects.active()) == {busy}
+        for occ in (finished, overdue):
+            occ.refresh_from_db()
+            assert occ.ended_at is not None
+
+        floorplan_notify.assert_called_once()
+        args, kwargs = floorplan_notify.call_args
+        assert args == (restaurant.id,)
+        assert kwargs['event'] == 'table_released'
+        assert set(kwargs['table_ids']) == {tables[0].id, tables[2].id}
+
+    def test_manual_occupancy_kept(self, tables, floorplan_notify):
+        occupy(tables[0], source='manual')
+
+        assert auto_release_occupancies() == "0 table(s) libérée(s)"
+        floorplan_notify.assert_not_called()
+
+    def test_records_metrics(self, tables, floorplan_notify):
+        occupy(tables[0])
+
+        auto_release_occupancies()
+
+        metrics = get_task_metrics('auto_release_occupancies')
+        assert metrics['rows'] == {'released': 1}
+        assert metrics['duration_ms'] >= 0
+
+
+@pytest.mark.django_db
+class TestFireScheduledPreorders:
+
+    def test_fires_due_preorders(self, restaurant, tables, floorplan_notify,
+                                 django_capture_on_commit_callbacks):
+        due_order = create_order(restaurant, status='scheduled', payment_status='paid')
+        due = reserve(tables[0], 20, status='confirmed', pre_order=due_order,
+                      prep_lead_minutes=30)
+        later_order = create_order(restaurant, status='scheduled', payment_status='paid')
+        later = reserve(tables[1], 40, status='confirmed', pre_order=later_order,
+                        prep_lead_minutes=15)
+
+        with patch('api.services.order_events.schedule_order_event') as schedule:
+            with django_capture_on_commit_callbacks(execute=True):
+                result = fire_scheduled_preorders()
+
+        assert result == "1 commande(s) déclenchée(s)"
+        due.refresh_from_db()
+        later.refresh_from_db()
+        assert due.kitchen_fired_at is not None
+        assert later.kitchen_fired_at is None
+        assert Order.objects.get(pk=due_order.pk).status == 'pending'
+        assert Order.objects.get(pk=later_order.pk).status == 'scheduled'
+
+        [event] = [c.args[0] for c in schedule.call_args_list]
+        assert event['order_id'] == due_order.id
+        assert event['old_status'] == 'scheduled'
+        floorplan_notify.assert_called_once_with(
+            restaurant.id, event='kitchen_fired', table_id=tables[0].id
+        )
+
+    def test_unpaid_preorder_not_fired(self, restaurant, tables, floorplan_notify):
+        order = create_order(restaurant, status='scheduled')
+        reserve(tables[0], 5, status='confirmed', pre_order=order)
+
+        assert fire_scheduled_preorders() == "0 commande(s) déclenchée(s)"
+        assert Order.objects.get(pk=order.pk).status == 'scheduled'
+
+    def test_preorder_cancelled_after_scan_not_fired(self, restaurant, tables, floorplan_notify):
+        order = create_order(restaurant, status='scheduled', payment_status='paid')
+        reservation = reserve(tables[0], 20, status='confirmed', pre_order=order,
+                              prep_lead_minutes=30)
+        real_update_in_batches = maintenance.update_in_batches
+
+        def cancelled_before_lock(queryset, apply, **kwargs):
+            def apply_after_cancel(rows):
+                # Annulation concurrente entre le scan et le verrou de la commande
+                Order.objects.filter(pk=order.pk).update(status='cancelled')
+                apply(rows)
+            return real_update_in_batches(queryset, apply_after_cancel, **kwargs)
+
+        with patch('api.services.maintenance.update_in_batches', side_effect=cancelled_before_lock), \
+                patch('api.services.order_events.enqueue_bulk_order_events') as enqueue:
+            assert fire_scheduled_preorders() == "0 commande(s) déclenchée(s)"
+
+        reservation.refresh_from_db()
+        assert reservation.kitchen_fired_at is None
+        assert Order.objects.get(pk=order.pk).status == 'cancelled'
+        enqueue.assert_not_called()
+        floorplan_notify.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestExpirePendingReservations:
+
+    def test_expires_and_confirms(self, restaurant, tables, floorplan_notify):
+        expired_at = timezone.now() - timedelta(minutes=1)
+        unpaid_order = create_order(restaurant, status='scheduled')
+        unpaid = reserve(tables[0], 120, status='pending_payment',
+                         expires_at=expired_at, pre_order=unpaid_order)
+        paid = reserve(tables[1], 120, status='pending_payment', expires_at=expired_at,
+                       pre_order=create_order(restaurant, status='scheduled', payment_status='paid'))
+        without_order = reserve(tables[2], 120, status='pending_payment', expires_at=expired_at)
+
+        result = expire_pending_reservations()
+
+        assert result == "2 réservation(s) expirée(s)"
+        for reservation in (unpaid, paid, without_order):
+            reservation.refresh_from_db()
+        assert (unpaid.status, without_order.status) == ('expired', 'expired')
+        assert paid.status == 'confirmed'
+        assert paid.expires_at is None
+        assert Order.objects.get(pk=unpaid_order.pk).status == 'cancelled'
+
+        floorplan_notify.assert_called_once()
+        assert set(floorplan_notify.call_args.kwargs['table_ids']) == {tables[0].id, tables[2].id}
+        assert get_task_metrics('expire_pending_reservations')['rows'] == {
+            'confirmed': 1, 'expired': 2, 'pre_orders_cancelled': 1,
+        }
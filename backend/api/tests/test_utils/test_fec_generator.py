@@ -0,0 +1,115 @@
+import hashlib
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import ExportComptable, Order
+from api.tasks import generate_fec_export
+from api.tests.factories import RestaurantFactory
+from api.utils.fec_generator import FECGenerator
+
+
+@pytest.fixture
+def restaurant(db):
+    return RestaurantFactory()
+
+
+@pytest.fixture
+def paid_orders(restaurant):
+    return [
+        Order.objects.create(
+            restaurant=restaurant,
+            order_type="takeaway",
+            status="served",
+            payment_status="paid",
+            subtotal=Decimal("10.00"),
+            total_amount=Decimal("10.00"),
+        )
+        for _ in range(5)
+    ]
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_write_streams_in_chunks(restaurant, paid_orders, monkeypatch):
+    monkeypatch.setattr(FECGenerator, "CHUNK_SIZE", 2)
+    calls = []
+
+    class Stream:
+        def __init__(self):
+            self.writes = []
+
+        def write(self, data):
+            self.writes.append(data)
+
+    stream = Stream()
+    generator = FECGenerator(restaurant.owner, timezone.now().year)
+    result = generator.write(stream, progress=lambda done, total: calls.append((done, total)))
+
+    content = b"".join(stream.writes)
+    # Une écriture par lot de 2 commandes, plus le reliquat
+    assert len(stream.writes) == 3
+    assert calls == [(2, 5), (4, 5), (5, 5)]
+    # Client (411) + ventes HT (706) par commande
+    assert result.lines == 10
+    assert result.size == len(content)
+    assert result.checksum_md5 == hashlib.md5(content).hexdigest()
+
+
+@pytest.mark.django_db
+def test_generate_matches_stream(restaurant, paid_orders):
+    content, filename = FECGenerator(restaurant.owner, timezone.now().year).generate()
+
+    assert filename.startswith(restaurant.owner.siret)
+    assert content.count("\n") == 10
+    assert content.splitlines()[-1].split("\t")[0] == "VE"
+
+
+@pytest.mark.django_db
+def test_background_export_and_download(restaurant, paid_orders, media_root):
+    export = ExportComptable.objects.create(
+        restaurateur=restaurant.owner,
+        type_export="FEC",
+        periode_debut=timezone.now().date().replace(month=1, day=1),
+        periode_fin=timezone.now().date().replace(month=12, day=31),
+    )
+
+    generate_fec_export(export.id)
+
+    export.refresh_from_db()
+    assert export.statut == "complete"
+    assert export.progression == 100
+    assert export.nombre_lignes == 10
+
+    client = APIClient()
+    client.force_authenticate(user=restaurant.owner.user)
+    response = client.get(f"/api/v1/comptabilite/download/{export.id}/")
+
+    assert response.status_code == 200
+    body = b"".join(response.streaming_content)
+    assert hashlib.md5(body).hexdigest() == export.checksum_md5
+    assert response["X-Checksum-MD5"] == export.checksum_md5
+
+
+@pytest.mark.django_db
+def test_export_fec_is_queued(restaurant, django_capture_on_commit_callbacks, monkeypatch):
+    queued = []
+    monkeypatch.setattr(generate_fec_export, "delay", queued.append)
+    client = APIClient()
+    client.force_authenticate(user=restaurant.owner.user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post("/api/v1/comptabilite/export_fec/", {"annee": timezone.now().year})
+
+    assert response.status_code == 202
+    assert queued == [response.data["export_id"]]
+    status = client.get(response.data["status_url"])
+    assert status.data["statut"] == "en_cours"
+    assert status.data["progression"] == 0
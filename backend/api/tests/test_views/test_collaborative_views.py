@@ -1768,11 +1768,10 @@ class TestSessionCartAPI:
 class TestBroadcastCartUpdate:
     """Tests unitaires pour la fonction _broadcast_cart_update.
 
-    Ces tests ciblent les corrections apportées :
-    - guard sur channel_layer None
-    - conversion ReturnList → list Python native
-    - conversion Decimal → float via .get()
-    - absorption des exceptions de group_send
+    Contrat :
+    - les changements (diff) sont transmis tels quels à cart_state.notify_cart_change
+    - la diffusion n'a lieu qu'après le commit de la transaction
+    - les exceptions de la diffusion sont absorbées
     """
 
     def _get_broadcast_fn(self):
@@ -1780,173 +1779,86 @@ class TestBroadcastCartUpdate:
         from api.views.collaborative_session_views import _broadcast_cart_update
         return _broadcast_cart_update
 
-    def test_broadcast_no_channel_layer_does_not_raise(
+    def test_broadcast_forwards_item_change(
         self, collaborative_session, participant, menu_item
     ):
-        """Test que _broadcast_cart_update ne lève pas d'exception si le channel
-        layer est indisponible (Redis absent en CI par exemple)."""
-        SessionCartItem.objects.create(
-            session=collaborative_session,
-            participant=participant,
-            menu_item=menu_item,
-            quantity=1
-        )
+        """Test que le diff d'un article ajouté est transmis avec l'id de session."""
+        from api.services import session_cart as cart_state
 
-        _broadcast_cart_update = self._get_broadcast_fn()
-
-        with patch(
-            'channels.layers.get_channel_layer',
-            return_value=None
-        ):
-            # Ne doit pas lever d'exception
-            _broadcast_cart_update(collaborative_session)
-
-    def test_broadcast_calls_group_send_with_correct_type(
-        self, collaborative_session, participant, menu_item
-    ):
-        """Test que group_send est appelé avec type='cart_updated'."""
-        SessionCartItem.objects.create(
+        item = SessionCartItem.objects.create(
             session=collaborative_session,
             participant=participant,
             menu_item=menu_item,
             quantity=2
         )
+        changes = [cart_state.item_change('added', item)]
 
         _broadcast_cart_update = self._get_broadcast_fn()
 
-        mock_layer = MagicMock()
         with patch(
-            'channels.layers.get_channel_layer',
-            return_value=mock_layer
-        ):
-            with patch(
-                'asgiref.sync.async_to_sync',
-                side_effect=lambda f: f
-            ):
-                _broadcast_cart_update(collaborative_session)
-
-        mock_layer.group_send.assert_called_once()
-        call_args = mock_layer.group_send.call_args[0]
-        group_name, payload = call_args[0], call_args[1]
-        assert group_name == f'session_{collaborative_session.id}'
-        assert payload['type'] == 'cart_updated'
-
-    def test_broadcast_items_data_is_plain_list(
+            'api.views.collaborative_session_views.cart_state.notify_cart_change'
+        ) as notify:
+            _broadcast_cart_update(collaborative_session, changes)
+
+        notify.assert_called_once_with(collaborative_session.id, changes)
+
+    def test_broadcast_change_is_json_ready(
         self, collaborative_session, participant, menu_item
     ):
-        """Test que les items broadcastés sont une list Python native,
-        pas un ReturnList DRF (non JSON-sérialisable par Redis)."""
-        SessionCartItem.objects.create(
+        """Test que le diff ne contient que des types JSON natifs
+        (pas de ReturnList, UUID ni Decimal non sérialisables par Redis)."""
+        import json
+        from api.services import session_cart as cart_state
+
+        item = SessionCartItem.objects.create(
             session=collaborative_session,
             participant=participant,
             menu_item=menu_item,
             quantity=1
         )
 
-        _broadcast_cart_update = self._get_broadcast_fn()
+        change = cart_state.item_change('added', item)
 
-        captured_payload = {}
+        assert type(change['item']) is dict
+        assert json.loads(json.dumps(change)) == change
 
-        def fake_group_send(group, payload):
-            captured_payload.update(payload)
+    def test_broadcast_cleared_change(self, collaborative_session):
+        """Test _broadcast_cart_update avec un panier vidé."""
+        from api.services import session_cart as cart_state
 
-        mock_layer = MagicMock()
-        mock_layer.group_send = fake_group_send
+        _broadcast_cart_update = self._get_broadcast_fn()
 
         with patch(
-            'channels.layers.get_channel_layer',
-            return_value=mock_layer
-        ):
-            with patch(
-                'asgiref.sync.async_to_sync',
-                side_effect=lambda f: f
-            ):
-                _broadcast_cart_update(collaborative_session)
+            'api.views.collaborative_session_views.cart_state.notify_cart_change'
+        ) as notify:
+            _broadcast_cart_update(collaborative_session, [cart_state.cleared_change()])
 
-        assert type(captured_payload['items']) is list
-        assert isinstance(captured_payload['total'], float)
-        assert isinstance(captured_payload['items_count'], int)
+        notify.assert_called_once_with(collaborative_session.id, [{'op': 'cleared'}])
 
-    def test_broadcast_total_is_float_not_decimal(
-        self, collaborative_session, participant, menu_item
+    def test_broadcast_scheduled_after_commit(
+        self, collaborative_session, django_capture_on_commit_callbacks
     ):
-        """Test que le total broadcasté est un float (pas un Decimal) afin
-        d'être sérialisable en JSON par le channel layer."""
-        from decimal import Decimal
-        SessionCartItem.objects.create(
-            session=collaborative_session,
-            participant=participant,
-            menu_item=menu_item,
-            quantity=2   # 12.50 × 2 = 25.00
-        )
+        """Test que la diffusion n'est planifiée qu'au commit de la transaction."""
+        from api.services import session_cart as cart_state
 
         _broadcast_cart_update = self._get_broadcast_fn()
+        changes = [cart_state.cleared_change()]
 
-        captured_payload = {}
-
-        def fake_group_send(group, payload):
-            captured_payload.update(payload)
+        with patch('api.services.session_cart.schedule_cart_broadcast') as schedule:
+            with django_capture_on_commit_callbacks(execute=True):
+                _broadcast_cart_update(collaborative_session, changes)
+                schedule.assert_not_called()
 
-        mock_layer = MagicMock()
-        mock_layer.group_send = fake_group_send
+        schedule.assert_called_once_with(collaborative_session.id, changes)
 
-        with patch(
-            'channels.layers.get_channel_layer',
-            return_value=mock_layer
-        ):
-            with patch(
-                'asgiref.sync.async_to_sync',
-                side_effect=lambda f: f
-            ):
-                _broadcast_cart_update(collaborative_session)
-
-        assert type(captured_payload['total']) is float
-        assert captured_payload['total'] == pytest.approx(25.0)
-        assert not isinstance(captured_payload['total'], Decimal)
-
-    def test_broadcast_exception_in_group_send_does_not_propagate(
-        self, collaborative_session
-    ):
-        """Test que les exceptions levées par group_send sont absorbées
+    def test_broadcast_exception_does_not_propagate(self, collaborative_session):
+        """Test que les exceptions levées par la diffusion sont absorbées
         (le try/except dans _broadcast_cart_update protège le flux principal)."""
         _broadcast_cart_update = self._get_broadcast_fn()
 
-        mock_layer = MagicMock()
-
-        with patch(
-            'channels.layers.get_channel_layer',
-            return_value=mock_layer
-        ):
-            with patch(
-                'asgiref.sync.async_to_sync',
-                side_effect=lambda f: f
-            ):
-                mock_layer.group_send.side_effect = Exception("Redis unavailable")
-                # Ne doit pas lever d'exception
-                _broadcast_cart_update(collaborative_session)
-
-    def test_broadcast_empty_cart(self, collaborative_session):
-        """Test _broadcast_cart_update avec un panier vide (aucun article)."""
-        _broadcast_cart_update = self._get_broadcast_fn()
-
-        captured_payload = {}
-
-        def fake_group_send(group, payload):
-            captured_payload.update(payload)
-
-        mock_layer = MagicMock()
-        mock_layer.group_send = fake_group_send
-
         with patch(
-            'channels.layers.get_channel_layer',
-            return_value=mock_layer
+            'api.views.collaborative_session_views.cart_state.notify_cart_change',
+            side_effect=Exception("Redis unavailable")
         ):
-            with patch(
-                'asgiref.sync.async_to_sync',
-                side_effect=lambda f: f
-            ):
-                _broadcast_cart_update(collaborative_session)
-
-        assert captured_payload['items'] == []
-        assert captured_payload['total'] == 0.0
-        assert captured_payload['items_count'] == 0
\ No newline at end of file
+            # Ne doit pas lever d'exception
+            _broadcast_cart_update(collaborative_session, [{'op': 'cleared'}])
@@ -675,9 +675,10 @@ class TestPublicDailyMenuViewSet:
         ]
         
         if response.status_code == status.HTTP_200_OK:
-            assert response.data['title'] == daily_menu.title
+            data = response.json()
+            assert data['title'] == daily_menu.title
             # Vérifier que restaurant_image est présent (pas restaurant_logo)
-            assert 'restaurant_image' in response.data or 'restaurant_name' in response.data
+            assert 'restaurant_image' in data or 'restaurant_name' in data
 
     def test_public_today_available(self, api_client, daily_menu):
         """Test liste des restaurants avec menu du jour aujourd'hui"""
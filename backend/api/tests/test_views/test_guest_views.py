@@ -3,10 +3,11 @@
 Tests unitaires pour les vues invités
 - GuestPrepare (création brouillon de commande)
 - GuestConfirmCash (confirmation paiement espèces)
-- GuestDraftStatus (statut du brouillon)
+- guest_draft_status (statut du brouillon, long-polling)
 """
 
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
 from unittest.mock import patch, MagicMock
 from decimal import Decimal
 from django.utils import timezone
@@ -536,7 +537,7 @@ class TestGuestConfirmCash:
 
 
 # =============================================================================
-# TESTS - GuestDraftStatus
+# TESTS - guest_draft_status
 # =============================================================================
 
 @pytest.mark.django_db
@@ -552,7 +553,7 @@ class TestGuestDraftStatus:
         
         assert response.status_code == status.HTTP_200_OK
         # Default status is 'created', not 'pending'
-        assert response.data['status'] == 'created'
+        assert response.json()['status'] == 'created'
 
     def test_get_draft_status_confirmed(self, api_client, draft_order_cash):
         """Test de récupération du statut après confirmation"""
@@ -566,7 +567,94 @@ class TestGuestDraftStatus:
         )
         
         assert response.status_code == status.HTTP_200_OK
-        assert response.data['status'] == 'confirmed_cash'
+        assert response.json()['status'] == 'confirmed_cash'
+
+    def test_order_id_from_draft_link(self, api_client, draft_order_cash):
+        """order_id est la commande du brouillon, pas la dernière du même téléphone"""
+        confirmed = api_client.post(
+            '/api/v1/guest/confirm-cash/',
+            {'draft_order_id': str(draft_order_cash.id)}, format='json'
+        )
+        Order.objects.create(
+            restaurant=draft_order_cash.restaurant,
+            phone=draft_order_cash.phone,
+            guest_phone=draft_order_cash.phone,
+            subtotal=Decimal('5.00'),
+            total_amount=Decimal('5.00'),
+        )
+
+        response = api_client.get(
+            '/api/v1/guest/draft-status/',
+            {'draft_order_id': str(draft_order_cash.id)}
+        )
+
+        assert response.json()['order_id'] == confirmed.data['order_id']
+
+    def test_long_poll_skipped_when_resolved(self, api_client, draft_order_cash):
+        """Brouillon déjà confirmé : réponse immédiate"""
+        api_client.post(
+            '/api/v1/guest/confirm-cash/',
+            {'draft_order_id': str(draft_order_cash.id)}, format='json'
+        )
+
+        with patch('api.views.guest_views.wait_for_draft') as wait:
+            response = api_client.get(
+                '/api/v1/guest/draft-status/',
+                {'draft_order_id': str(draft_order_cash.id), 'wait': 20}
+            )
+
+        wait.assert_not_called()
+        assert response.json()['status'] == 'confirmed_cash'
+
+    def test_long_poll_returns_created_order(self, api_client, draft_order_online):
+        """Commande créée pendant l'attente (webhook) : renvoyée dans la réponse"""
+        from api.services import create_order_from_draft
+
+        async def webhook(draft_id, timeout):
+            assert timeout == 20
+            draft = await DraftOrder.objects.aget(id=draft_id)
+            await sync_to_async(create_order_from_draft)(draft, paid=True)
+
+        with patch('api.views.guest_views.wait_for_draft', side_effect=webhook):
+            response = api_client.get(
+                '/api/v1/guest/draft-status/',
+                {'draft_order_id': str(draft_order_online.id), 'wait': 20}
+            )
+
+        draft_order_online.refresh_from_db()
+        assert response.json()['status'] == 'confirmed_online'
+        assert draft_order_online.order_id is not None
+        assert response.json()['order_id'] == draft_order_online.order_id
+
+    def test_long_poll_capped_per_node(self, draft_order_online, monkeypatch):
+        """Trop d'attentes simultanées : réponse immédiate, sans canal Redis"""
+        from api.services import draft_status
+
+        monkeypatch.setattr(draft_status, "_waiters", draft_status.GUEST_DRAFT_MAX_WAITERS)
+        with patch('api.services.draft_status.get_channel_layer') as layer:
+            async_to_sync(draft_status.wait_for_draft)(draft_order_online.id, 20)
+
+        layer.assert_not_called()
+        assert draft_status._waiters == draft_status.GUEST_DRAFT_MAX_WAITERS
+
+    def test_throttled_before_long_poll(self, api_client, draft_order_cash):
+        """La vue async applique toujours le throttle anonyme : 429 sans attente"""
+        from rest_framework.throttling import AnonRateThrottle
+
+        class OnePerMinute(AnonRateThrottle):
+            rate = '1/min'
+
+        params = {'draft_order_id': str(draft_order_cash.id), 'wait': 20}
+        with patch('api.views.guest_views.api_settings') as drf_settings, \
+                patch('api.views.guest_views.wait_for_draft') as wait:
+            drf_settings.DEFAULT_THROTTLE_CLASSES = [OnePerMinute]
+            first = api_client.get('/api/v1/guest/draft-status/', params)
+            second = api_client.get('/api/v1/guest/draft-status/', params)
+
+        assert first.status_code == status.HTTP_200_OK
+        assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 'Retry-After' in second
+        wait.assert_called_once()
 
     def test_get_draft_status_invalid(self, api_client):
         """Test avec brouillon inexistant"""
@@ -302,7 +302,7 @@ class TestMenuPublic:
         
         assert response.status_code == status.HTTP_200_OK
         # Should return only available menus
-        assert isinstance(response.data, list)
+        assert isinstance(response.json(), list)
 
     def test_public_menus_only_available(self, api_client, restaurant, menu, second_menu):
         """Test que seuls les menus disponibles sont retournés"""
@@ -315,7 +315,7 @@ class TestMenuPublic:
         
         assert response.status_code == status.HTTP_200_OK
         # Only the available menu should be returned
-        available_names = [m['name'] for m in response.data]
+        available_names = [m['name'] for m in response.json()]
         assert menu.name in available_names
         assert second_menu.name not in available_names
 
@@ -646,6 +646,25 @@ class TestNotificationList:
         assert str(other_notif.id) in ids2
         assert str(notification.id) not in ids2
 
+    def test_list_with_cursor(self, auth_client, multiple_notifications):
+        """Test de la pagination par curseur : toutes les pages, sans count"""
+        ids, cursor = [], ''
+        while cursor is not None:
+            response = auth_client.get('/api/v1/notifications/', {'cursor': cursor, 'page_size': 6})
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            ids.extend(n['id'] for n in response.data['results'])
+            cursor = response.data['next_cursor']
+
+        assert len(ids) == 15
+        assert len(set(ids)) == 15
+
+    def test_list_with_invalid_cursor(self, auth_client, notification):
+        """Test d'un curseur invalide"""
+        response = auth_client.get('/api/v1/notifications/', {'cursor': 'invalide'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 
 # =============================================================================
 # TESTS - NotificationDetailView
@@ -892,7 +911,7 @@ class TestTestNotificationView:
 class TestNotificationIntegration:
     """Tests d'intégration et cas limites"""
 
-    def test_full_notification_workflow(self, auth_client, user):
+    def test_full_notification_workflow(self, auth_client, user, django_capture_on_commit_callbacks):
         """Test du workflow complet: créer, lire, marquer lu, supprimer"""
         notif = Notification.objects.create(
             user=user,
@@ -908,7 +927,9 @@ class TestNotificationIntegration:
         response = auth_client.get(f'/api/v1/notifications/{notif.id}/')
         assert response.status_code == status.HTTP_200_OK
         
-        response = auth_client.post(f'/api/v1/notifications/{notif.id}/read/')
+        # Le compteur de non-lus est décrémenté après le commit
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_client.post(f'/api/v1/notifications/{notif.id}/read/')
         assert response.status_code == status.HTTP_200_OK
         
         response = auth_client.get('/api/v1/notifications/unread-count/')
@@ -1216,4 +1216,116 @@ class TestEdgeCases:
             (t for t in response.data['tables'] if t['table_number'] == table.number),
             None
         )
-        assert table_data['active_session']['participant_count'] == 2
\ No newline at end of file
+        assert table_data['active_session']['participant_count'] == 2
+
+# =============================================================================
+# TESTS - Requêtes en nombre constant / archivage ensembliste
+# =============================================================================
+
+@pytest.fixture
+def notifications(monkeypatch):
+    """Notifications émises (sessions archivées, deltas plan de salle)"""
+    from api.utils import floorplan_notifications, websocket_notifications
+
+    sent = {'sessions': [], 'floorplan': []}
+    monkeypatch.setattr(
+        websocket_notifications, 'notify_session_archived',
+        lambda session_id, reason=None: sent['sessions'].append(session_id)
+    )
+    monkeypatch.setattr(
+        floorplan_notifications, 'notify_floorplan_tables',
+        lambda affected, event: sent['floorplan'].append((sorted(affected, key=str), event))
+    )
+    return sent
+
+
+def _occupy(restaurant, count, start=1):
+    """Crée `count` tables occupées, chacune avec deux participants actifs"""
+    from api.models import SessionParticipant
+
+    sessions = []
+    for i in range(start, start + count):
+        table = Table.objects.create(restaurant=restaurant, number=str(i), capacity=4)
+        session = CollaborativeTableSession.objects.create(
+            restaurant=restaurant, table=table, table_number=table.number, status='active'
+        )
+        SessionParticipant.objects.create(session=session, guest_name=f"Invité {i}", status='active')
+        SessionParticipant.objects.create(session=session, guest_name=f"Parti {i}", status='left')
+        SessionParticipant.objects.create(session=session, guest_name=f"Hôte {i}", status='active')
+        sessions.append(session)
+    return sessions
+
+
+@pytest.mark.django_db
+class TestConstantQueries:
+    """Plan d'occupation et archivage : requêtes indépendantes du volume"""
+
+    def test_table_status_queries_flat(self, restaurateur_client, restaurant):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = f"/api/v1/restaurants/sessions/sessions/table_status/?restaurant_id={restaurant.id}"
+        _occupy(restaurant, 2)
+        with CaptureQueriesContext(connection) as few:
+            restaurateur_client.get(url)
+
+        _occupy(restaurant, 10, start=3)
+        Table.objects.create(restaurant=restaurant, number="99")
+        with CaptureQueriesContext(connection) as many:
+            response = restaurateur_client.get(url)
+
+        assert len(many) <= len(few)
+        assert response.data['total_tables'] == 13
+        assert response.data['occupied_tables'] == 12
+        occupied = [t for t in response.data['tables'] if t['is_occupied']]
+        assert {t['active_session']['participant_count'] for t in occupied} == {2}
+
+    def test_bulk_archive_single_update(
+        self, restaurateur_client, restaurant, second_restaurant, notifications
+    ):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = "/api/v1/restaurants/sessions/sessions/bulk_archive/"
+        few = _occupy(restaurant, 2)
+        with CaptureQueriesContext(connection) as few_queries:
+            restaurateur_client.post(url, {'session_ids': [str(s.id) for s in few]}, format='json')
+
+        many = _occupy(restaurant, 6, start=10) + _occupy(second_restaurant, 4, start=20)
+        notifications['floorplan'].clear()
+        with CaptureQueriesContext(connection) as many_queries:
+            response = restaurateur_client.post(
+                url, {'session_ids': [str(s.id) for s in many]}, format='json'
+            )
+
+        assert len(many_queries) <= len(few_queries)
+        assert response.data['total_archived'] == 10
+        assert not CollaborativeTableSession.objects.filter(id__in=[s.id for s in many]).exists()
+        # Un seul envoi groupé (un delta par restaurant), une notification par session
+        (affected, event), = notifications['floorplan']
+        assert event == 'table_released'
+        assert {restaurant_id for restaurant_id, _ in affected} == {restaurant.id, second_restaurant.id}
+        assert len(notifications['sessions']) == 12
+
+    def test_release_table_reports_participants(
+        self, restaurateur_client, restaurant, notifications
+    ):
+        session, = _occupy(restaurant, 1)
+        session.refresh_from_db()
+        session_notes = session.session_notes
+
+        response = restaurateur_client.post(
+            "/api/v1/restaurants/sessions/sessions/release_table/",
+            {'table_id': session.table_id, 'reason': 'Client parti'}, format='json'
+        )
+
+        assert response.data['sessions'] == [{
+            'share_code': session.share_code, 'status': 'cancelled', 'participant_count': 2,
+        }]
+        archived = CollaborativeTableSession.all_objects.get(id=session.id)
+        assert archived.archived_at is not None
+        assert archived.session_notes.endswith("Archivé: Client parti")
+        assert archived.session_notes.startswith(session_notes)
+        assert notifications['floorplan'] == [
+            ([(restaurant.id, session.table_id)], 'table_released')
+        ]
@@ -18,6 +18,7 @@ IMPORTANT - Model field notes:
 
 import pytest
 from unittest.mock import patch, MagicMock
+from datetime import timedelta
 from decimal import Decimal
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -704,6 +705,87 @@ class TestRestaurantTablesStats:
         assert 'tables_stats' in response.data
         assert 'global_stats' in response.data
 
+    def test_stats_grouped_per_table(
+        self, restaurateur_client, restaurant, table, order, completed_order
+    ):
+        """Statistiques par table et détail des commandes actives"""
+        response = restaurateur_client.get(self.url, {'restaurant_id': restaurant.id})
+
+        stats = response.data['tables_stats'][table.number]
+        assert stats['total_orders'] == 2
+        assert stats['total_revenue'] == Decimal('80.00')
+        assert stats['average_order_value'] == Decimal('40.00')
+        assert stats['active_orders'] == 1
+        assert [o['id'] for o in stats['active_orders_detail']] == [order.id]
+
+    def test_stats_window(self, restaurateur_client, restaurant, table, order, completed_order):
+        """?days= exclut l'historique ; les commandes actives restent"""
+        Order.objects.filter(pk=completed_order.pk).update(
+            created_at=timezone.now() - timedelta(days=90)
+        )
+        Order.objects.create(
+            restaurant=restaurant, table_number="T9", order_number="ORD-TBLORD-OLD",
+            status='served', payment_status='paid', total_amount=Decimal('20.00'),
+            subtotal=Decimal('18.18'), tax_amount=Decimal('1.82'),
+        )
+        Order.objects.filter(order_number="ORD-TBLORD-OLD").update(
+            created_at=timezone.now() - timedelta(days=90)
+        )
+
+        response = restaurateur_client.get(self.url, {
+            'restaurant_id': restaurant.id, 'days': 30
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data['tables_stats']) == [table.number]
+        assert response.data['tables_stats'][table.number]['total_orders'] == 1
+
+    def test_stats_invalid_window(self, restaurateur_client, restaurant):
+        response = restaurateur_client.get(self.url, {
+            'restaurant_id': restaurant.id, 'days': 'abc'
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stats_window_too_large(self, restaurateur_client, restaurant):
+        """?days= énorme : 400 plutôt qu'un OverflowError de timedelta"""
+        response = restaurateur_client.get(self.url, {
+            'restaurant_id': restaurant.id, 'days': 10 ** 12
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stats_queries_constant_in_tables(
+        self, restaurateur_client, restaurant, order, client_user
+    ):
+        """Le nombre de requêtes ne dépend pas du nombre de tables"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def add_orders(first, count):
+            for n in range(first, first + count):
+                for order_status in ('pending', 'served'):
+                    Order.objects.create(
+                        restaurant=restaurant, table_number=f"T{n}", user=client_user,
+                        order_number=f"ST-{n}-{order_status[0]}",
+                        status=order_status, payment_status='pending',
+                        total_amount=Decimal('10.00'), subtotal=Decimal('9.09'),
+                        tax_amount=Decimal('0.91'),
+                    )
+
+        add_orders(100, 2)
+        restaurateur_client.get(self.url, {'restaurant_id': restaurant.id})
+
+        with CaptureQueriesContext(connection) as few:
+            restaurateur_client.get(self.url, {'restaurant_id': restaurant.id})
+
+        add_orders(200, 20)
+        with CaptureQueriesContext(connection) as many:
+            response = restaurateur_client.get(self.url, {'restaurant_id': restaurant.id})
+
+        assert len(response.data['tables_stats']) == 23
+        assert len(many) == len(few)
+
 
 # =============================================================================
 # TESTS - Sécurité (divers)
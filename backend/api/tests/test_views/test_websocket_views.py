@@ -11,10 +11,11 @@ Architecture SSE en deux temps :
 Le JWT ne transite jamais en query param.
 """
 
+import asyncio
 import pytest
 import uuid
 from decimal import Decimal
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from django.contrib.auth.models import User, Group
 from django.core.cache import cache
 from rest_framework.test import APIClient
@@ -345,6 +346,134 @@ class TestSseFullFlow:
         assert second.status_code == 401
 
 
+# =============================================================================
+# Diffusion SSE via le channel layer (multi-workers)
+# =============================================================================
+
+class TestSSEConnectionManager:
+    """Registre local : indexé par order_id, comptage par nœud"""
+
+    def test_index_by_order(self):
+        from api.views.websocket_views import SSEConnectionManager
+
+        manager = SSEConnectionManager()
+        manager.add_connection("c1", 1, [10, 11])
+        manager.add_connection("c2", 2, [10])
+
+        assert manager.get_connection_count() == 2
+        assert manager.get_order_connection_count(10) == 2
+        assert manager.get_order_connection_count(11) == 1
+
+        manager.remove_connection("c1")
+        assert manager.get_order_connection_count(10) == 1
+        assert manager.get_order_connection_count(11) == 0
+        assert 11 not in manager.by_order
+
+    def test_remove_unknown_connection_is_noop(self):
+        from api.views.websocket_views import SSEConnectionManager
+
+        manager = SSEConnectionManager()
+        manager.remove_connection("inconnue")
+        assert manager.get_connection_count() == 0
+
+
+class TestSseNodeStats:
+    """Statistiques par nœud : une case réservée par nœud, libérée au TTL"""
+
+    def _manager(self, node_id, connections):
+        from api.views.websocket_views import SSEConnectionManager
+
+        manager = SSEConnectionManager()
+        manager.node_id = node_id
+        for n in range(connections):
+            manager.add_connection(f"{node_id}-{n}", n, [n])
+        return manager
+
+    def test_each_node_holds_its_slot(self):
+        from asgiref.sync import async_to_sync
+        from api.views.websocket_views import get_sse_node_counts
+
+        first, second = self._manager("a:1", 2), self._manager("b:1", 1)
+        async_to_sync(first.publish_node_stats)()
+        async_to_sync(second.publish_node_stats)()
+        first.add_connection("extra", 9, [9])
+        async_to_sync(first.publish_node_stats)()
+
+        assert first.slot != second.slot
+        assert get_sse_node_counts() == {"a:1": 3, "b:1": 1}
+
+    def test_stale_node_pruned_and_slot_reclaimed(self):
+        from asgiref.sync import async_to_sync
+        from api.views.websocket_views import get_sse_node_counts, sse_node_slot_key
+
+        stale, live = self._manager("a:1", 1), self._manager("b:1", 1)
+        async_to_sync(stale.publish_node_stats)()
+        # TTL écoulé sans ping : la case du nœud arrêté disparaît
+        cache.delete(sse_node_slot_key(stale.slot))
+        assert get_sse_node_counts() == {}
+
+        async_to_sync(live.publish_node_stats)()
+        assert live.slot == stale.slot
+        async_to_sync(stale.publish_node_stats)()
+
+        assert stale.slot != live.slot
+        assert get_sse_node_counts() == {"a:1": 1, "b:1": 1}
+
+
+@pytest.mark.asyncio
+class TestSseChannelLayerFanOut:
+    """broadcast_to_sse publie sur le groupe Redis de la commande ; le stream
+    abonné le reçoit quel que soit le worker qui a publié."""
+
+    @pytest.fixture(autouse=True)
+    def in_memory_layer(self, settings):
+        settings.CHANNEL_LAYERS = {
+            "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+        }
+
+    async def test_broadcast_reaches_subscribed_stream_only(self):
+        from asgiref.sync import sync_to_async
+        from api.views.websocket_views import (
+            broadcast_to_sse, event_stream_generator, sse_manager,
+        )
+
+        with patch(
+            "api.views.websocket_views.get_orders_initial_status", return_value=[]
+        ), patch.object(sse_manager, "publish_node_stats", AsyncMock()):
+            stream = event_stream_generator(42, [1001])
+            connected = await stream.__anext__()
+            assert '"connected"' in connected
+            assert sse_manager.get_order_connection_count(1001) == 1
+
+            # Autre commande : ne doit pas arriver sur ce stream
+            await sync_to_async(broadcast_to_sse)(2002, {"order_id": 2002, "status": "ready"})
+            await sync_to_async(broadcast_to_sse)(1001, {"order_id": 1001, "status": "preparing"})
+
+            message = await asyncio.wait_for(stream.__anext__(), timeout=2)
+            assert '"order_id": 1001' in message
+            assert '"preparing"' in message
+
+            await stream.aclose()
+            assert sse_manager.get_order_connection_count(1001) == 0
+
+    async def test_pending_receive_kept_across_pings(self):
+        """Un ping n'annule pas le receive() en cours (désabonnement pub/sub)"""
+        from api.views.websocket_views import _ChannelReceiver
+
+        delivered = asyncio.get_running_loop().create_future()
+        layer = Mock()
+        layer.receive = Mock(side_effect=lambda channel: asyncio.shield(delivered))
+        receiver = _ChannelReceiver(layer, "sse.channel")
+
+        assert await receiver.next(timeout=0.01) is None
+        assert await receiver.next(timeout=0.01) is None
+        delivered.set_result({"payload": {"status": "ready"}})
+
+        assert await receiver.next(timeout=1) == {"payload": {"status": "ready"}}
+        layer.receive.assert_called_once_with("sse.channel")
+        receiver.close()
+
+
 # =============================================================================
 # Endpoints auxiliaires
 # =============================================================================
@@ -1,8 +1,8 @@
 from django.urls import path
-from api.views.guest_views import GuestPrepare, GuestConfirmCash, GuestDraftStatus
+from api.views.guest_views import GuestPrepare, GuestConfirmCash, guest_draft_status
 
 urlpatterns = [
     path("prepare/", GuestPrepare.as_view()),
     path("confirm-cash/", GuestConfirmCash.as_view()),
-    path("draft-status/", GuestDraftStatus.as_view()),
+    path("draft-status/", guest_draft_status),
 ]
@@ -6,7 +6,6 @@ commissions de la plateforme et aux revenus des restaurateurs.
 """
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any, Optional
-from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
@@ -169,6 +168,9 @@ def get_revenue_statistics(restaurant, period_days: int = 30) -> Dict[str, Any]:
     Calcule les statistiques de revenus détaillées pour un restaurant,
     incluant la répartition par méthode de paiement et les commissions.
     
+    Les jours complets sont lus dans RestaurantDailyStats, seule la
+    journée en cours l'est sur les commandes (cf. api.services.daily_stats).
+    
     Args:
         restaurant: Instance du modèle Restaurant
         period_days: Nombre de jours à analyser
@@ -176,47 +178,25 @@ def get_revenue_statistics(restaurant, period_days: int = 30) -> Dict[str, Any]:
     Returns:
         Dict avec les statistiques de revenus
     """
-    from api.models import Order
-    
-    start_date = timezone.now() - timedelta(days=period_days)
-    
-    # Filtrer les commandes payées
-    paid_orders = Order.objects.filter(
-        restaurant=restaurant,
-        payment_status='paid',
-        created_at__gte=start_date
-    )
-    
-    # Trois seaux : seul le premier porte la commission.
-    commissionable_revenue = paid_orders.filter(
-        payment_method__in=COMMISSIONABLE_METHODS
-    ).aggregate(
-        total=Sum('total_amount'),
-        count=Count('id')
+    from api.services.daily_stats import (
+        order_rollup, paid_by_bucket, day_bounds,
+        BUCKET_COMMISSIONABLE, BUCKET_CARD_OFFLINE, BUCKET_CASH,
     )
     
-    # TPE du restaurant : encaissé hors plateforme, donc hors commission.
-    card_offline_revenue = paid_orders.filter(
-        payment_method='card'
-    ).aggregate(
-        total=Sum('total_amount'),
-        count=Count('id')
-    )
+    start_day = timezone.localdate() - timedelta(days=period_days)
+    start_date = day_bounds(start_day)[0]
     
-    cash_revenue = paid_orders.filter(
-        payment_method__in=['cash', 'cash_pending']
-    ).aggregate(
-        total=Sum('total_amount'),
-        count=Count('id')
-    )
+    # Trois seaux : seul le premier porte la commission.
+    # Le TPE du restaurant est encaissé hors plateforme, donc hors commission.
+    buckets = paid_by_bucket(order_rollup(restaurant, start_day))
     
     # Valeurs par défaut
-    commissionable_total = Decimal(str(commissionable_revenue['total'] or 0))
-    commissionable_count = commissionable_revenue['count'] or 0
-    card_offline_total = Decimal(str(card_offline_revenue['total'] or 0))
-    card_offline_count = card_offline_revenue['count'] or 0
-    cash_total = Decimal(str(cash_revenue['total'] or 0))
-    cash_count = cash_revenue['count'] or 0
+    commissionable_total = buckets[BUCKET_COMMISSIONABLE]['total']
+    commissionable_count = buckets[BUCKET_COMMISSIONABLE]['count']
+    card_offline_total = buckets[BUCKET_CARD_OFFLINE]['total']
+    card_offline_count = buckets[BUCKET_CARD_OFFLINE]['count']
+    cash_total = buckets[BUCKET_CASH]['total']
+    cash_count = buckets[BUCKET_CASH]['count']
     
     # Commissions : uniquement sur ce qui a réellement transité par Stripe.
     platform_fee = calculate_platform_fee(commissionable_total)
@@ -284,42 +264,35 @@ def get_revenue_summary_periods(restaurant) -> Dict[str, Any]:
     """
     Retourne un résumé des revenus pour différentes périodes.
     
+    Une seule lecture de l'agrégat journalier (30 jours) et une des
+    commandes du jour, ventilées ensuite par période.
+    
     Args:
         restaurant: Instance du modèle Restaurant
         
     Returns:
         Dict avec les revenus pour aujourd'hui, semaine, mois
     """
-    from api.models import Order
+    from api.services.daily_stats import (
+        order_rollup, paid_by_bucket,
+        BUCKET_COMMISSIONABLE, BUCKET_CARD_OFFLINE, BUCKET_CASH,
+    )
     
-    now = timezone.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = today_start - timedelta(days=7)
-    month_start = today_start - timedelta(days=30)
+    today = timezone.localdate()
+    week_start = today - timedelta(days=7)
+    month_start = today - timedelta(days=30)
     
-    def get_period_stats(start_date):
-        orders = Order.objects.filter(
-            restaurant=restaurant,
-            payment_status='paid',
-            created_at__gte=start_date
-        )
-        
-        commissionable_total = orders.filter(
-            payment_method__in=COMMISSIONABLE_METHODS
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
-        
-        card_offline_total = orders.filter(
-            payment_method='card'
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
+    rows = order_rollup(restaurant, month_start, by_day=True)
+    
+    def get_period_stats(start_day):
+        buckets = paid_by_bucket(row for row in rows if row['day'] >= start_day)
         
-        cash_total = orders.filter(
-            payment_method__in=['cash', 'cash_pending']
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
+        commissionable_total = buckets[BUCKET_COMMISSIONABLE]['total']
+        card_offline_total = buckets[BUCKET_CARD_OFFLINE]['total']
+        cash_total = buckets[BUCKET_CASH]['total']
         
-        platform_fee = calculate_platform_fee(Decimal(str(commissionable_total)))
-        gross = (Decimal(str(commissionable_total))
-                 + Decimal(str(card_offline_total))
-                 + Decimal(str(cash_total)))
+        platform_fee = calculate_platform_fee(commissionable_total)
+        gross = commissionable_total + card_offline_total + cash_total
         
         return {
             'gross': float(gross),
@@ -331,7 +304,7 @@ def get_revenue_summary_periods(restaurant) -> Dict[str, Any]:
         }
     
     return {
-        'today': get_period_stats(today_start),
+        'today': get_period_stats(today),
         'week': get_period_stats(week_start),
         'month': get_period_stats(month_start),
-    }
\ No newline at end of file
+    }
@@ -13,6 +13,7 @@ from api.models import (
     Order,
     OrderItem
 )
+from api.services.vat_ledger import order_vat_breakdown
 
 
 class VATCalculator:
@@ -182,48 +183,17 @@ def generate_invoice_number(
 
 def calculate_order_vat_breakdown(order: Order) -> Dict[str, Dict[str, Decimal]]:
     """
-    Calcule la ventilation TVA complète d'une commande
+    Ventilation TVA complète d'une commande, lue sur le grand livre
+    (OrderVatLine) figé à la finalisation.
     
     Args:
-        order: Commande à analyser
+        order: Commande à analyser (précharger `vat_lines` pour un lot)
         
     Returns:
         Dict avec ventilation par taux de TVA
         Format: {'5.5': {'base': X, 'tva': Y}, ...}
     """
-    calculator = VATCalculator()
-    breakdown = {
-        '5.5': {'base': Decimal('0'), 'tva': Decimal('0')},
-        '10': {'base': Decimal('0'), 'tva': Decimal('0')},
-        '20': {'base': Decimal('0'), 'tva': Decimal('0')},
-    }
-    
-    for item in order.items.all():
-        # Déterminer le taux
-        vat_rate = calculator.get_rate_for_item(item)
-        
-        # Calculer HT et TVA
-        price_ttc = Decimal(str(item.total_price))
-        vat_calc = calculator.calculate_from_ttc(price_ttc, vat_rate)
-        
-        # Mapper au taux standard
-        if vat_rate <= Decimal('0.055'):
-            rate_key = '5.5'
-        elif vat_rate <= Decimal('0.10'):
-            rate_key = '10'
-        else:
-            rate_key = '20'
-        
-        # Ajouter aux totaux
-        breakdown[rate_key]['base'] += vat_calc['ht']
-        breakdown[rate_key]['tva'] += vat_calc['tva']
-    
-    # Arrondir les résultats
-    for rate in breakdown:
-        breakdown[rate]['base'] = breakdown[rate]['base'].quantize(Decimal('0.01'))
-        breakdown[rate]['tva'] = breakdown[rate]['tva'].quantize(Decimal('0.01'))
-    
-    return breakdown
+    return order_vat_breakdown(order)
 
 
 def format_fec_date(date: datetime) -> str:
@@ -290,7 +260,7 @@ class CSVExporter:
         Exporte les ventes en CSV
         
         Args:
-            orders: Liste des commandes
+            orders: Liste des commandes (précharger `vat_lines`)
             delimiter: Séparateur CSV
             
         Returns:
@@ -0,0 +1,101 @@
+"""
+Clés d'index du répertoire des restaurants (sans dépendance aux modèles).
+
+Géohash :
+    Chaque restaurant géolocalisé porte le géohash de sa position
+    (GEOHASH_PRECISION caractères, ~40 m). Deux points proches partagent
+    un préfixe : une recherche de proximité se ramène à quelques
+    `LIKE 'préfixe%'` servis par l'index B-tree de la colonne.
+    `covering_cells` choisit la précision dont la cellule dépasse le rayon
+    et retourne la cellule du point et ses voisines (9 au plus) : le
+    disque de recherche y est entièrement contenu.
+
+Texte de recherche :
+    Nom, adresse, ville et cuisine, en minuscules et sans accents, dans
+    une seule colonne indexée en trigrammes (GIN pg_trgm) :
+    `search_text LIKE '%terme%'` n'impose plus un parcours de table.
+"""
+import unicodedata
+from math import cos, radians
+
+GEOHASH_PRECISION = 8
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+KM_PER_LAT_DEGREE = 110.57
+KM_PER_LNG_DEGREE_EQUATOR = 111.32
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    """Géohash (base 32) du point, sur `precision` caractères"""
+    lat, lng = float(lat), float(lng)
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    value = bits = 0
+    even = True  # bits pairs : longitude
+
+    while len(chars) < precision:
+        interval, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coord >= mid:
+            value = value * 2 + 1
+            interval[0] = mid
+        else:
+            value *= 2
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            value = bits = 0
+
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    """(hauteur, largeur) d'une cellule en degrés"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _wrap_lng(lng):
+    return ((lng + 180.0) % 360.0) - 180.0
+
+
+def covering_precision(lat, radius_km, max_precision=GEOHASH_PRECISION):
+    """Précision la plus fine dont la cellule (à cette latitude) dépasse le rayon"""
+    lng_scale = KM_PER_LNG_DEGREE_EQUATOR * max(cos(radians(lat)), 0.01)
+    best = 1
+    for precision in range(1, max_precision + 1):
+        lat_deg, lng_deg = cell_size_degrees(precision)
+        if min(lat_deg * KM_PER_LAT_DEGREE, lng_deg * lng_scale) < radius_km:
+            break
+        best = precision
+    return best
+
+
+def covering_cells(lat, lng, radius_km, max_precision=GEOHASH_PRECISION):
+    """Préfixes géohash dont l'union contient le disque (lat, lng, radius_km)"""
+    precision = covering_precision(lat, radius_km, max_precision)
+    lat_deg, lng_deg = cell_size_degrees(precision)
+    cells = set()
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            cell_lat = min(max(lat + dy * lat_deg, -90.0), 90.0)
+            cells.add(geohash_encode(cell_lat, _wrap_lng(lng + dx * lng_deg), precision))
+    return sorted(cells)
+
+
+def normalize_text(value):
+    """Minuscules, sans accents ni espaces superflus"""
+    decomposed = unicodedata.normalize('NFKD', str(value or ''))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.lower().split())
+
+
+def build_search_text(*parts):
+    """Texte indexé : une ligne par champ, pour qu'un terme ne chevauche pas deux champs"""
+    return '\n'.join(text for text in map(normalize_text, parts) if text)
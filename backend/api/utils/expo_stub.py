@@ -0,0 +1,121 @@
+"""
+Serveur Expo Push factice (tests et benchmark).
+
+Reproduit les deux endpoints utilisés par NotificationService :
+    POST /--/api/v2/push/send         → un ticket par message
+    POST /--/api/v2/push/getReceipts  → un reçu par ticket connu
+
+Usage :
+    with ExpoStubServer(dead_tokens={"ExponentPushToken[dead]"}) as stub:
+        service.expo_push_url = stub.push_url
+        service.expo_receipts_url = stub.receipts_url
+
+Les tokens de `dead_tokens` reçoivent un reçu DeviceNotRegistered.
+`fail_next` fait répondre `fail_status` (503 par défaut, 429 pour un refus
+de débit) aux N prochaines requêtes (test des relances).
+"""
+
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PUSH_PATH = "/--/api/v2/push/send"
+RECEIPTS_PATH = "/--/api/v2/push/getReceipts"
+
+
+class ExpoStubServer:
+    def __init__(self, dead_tokens=None, fail_next=0, fail_status=503):
+        self.dead_tokens = set(dead_tokens or [])
+        self.fail_next = fail_next
+        self.fail_status = fail_status
+        self.requests = []  # (path, payload)
+        self.tickets = {}  # ticket_id → token
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def push_url(self):
+        return self.base_url + PUSH_PATH
+
+    @property
+    def receipts_url(self):
+        return self.base_url + RECEIPTS_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, path, payload):
+        with self._lock:
+            self.requests.append((path, payload))
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return self.fail_status, {"errors": [{"code": "UNAVAILABLE"}]}
+
+            if path == PUSH_PATH:
+                tickets = []
+                for message in payload:
+                    ticket_id = str(uuid.uuid4())
+                    self.tickets[ticket_id] = message["to"]
+                    tickets.append({"status": "ok", "id": ticket_id})
+                return 200, {"data": tickets}
+
+            if path == RECEIPTS_PATH:
+                receipts = {}
+                for ticket_id in payload.get("ids", []):
+                    token = self.tickets.get(ticket_id)
+                    if token is None:
+                        continue
+                    if token in self.dead_tokens:
+                        receipts[ticket_id] = {
+                            "status": "error",
+                            "message": f"{token} is not a registered push notification recipient",
+                            "details": {"error": "DeviceNotRegistered"},
+                        }
+                    else:
+                        receipts[ticket_id] = {"status": "ok"}
+                return 200, {"data": receipts}
+
+        return 404, {"errors": [{"code": "NOT_FOUND"}]}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"null")
+                status, body = stub._respond(self.path, payload)
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
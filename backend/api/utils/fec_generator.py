@@ -1,10 +1,20 @@
 import csv
 import io
 from datetime import datetime, date
-from decimal import Decimal
-from typing import List, Tuple
+from typing import BinaryIO, Callable, List, NamedTuple, Optional, Tuple
 import hashlib
+import logging
 from api.models import Order, OrderItem, RestaurateurProfile
+from api.services.vat_ledger import order_vat_breakdown
+
+logger = logging.getLogger(__name__)
+
+
+class FECWriteResult(NamedTuple):
+    """Résultat d'une écriture FEC en flux"""
+    lines: int
+    size: int
+    checksum_md5: str
 
 
 class FECGenerator:
@@ -35,32 +45,80 @@ class FECGenerator:
         'Idevise',          # Identifiant devise (facultatif)
     ]
     
+    # Commandes lues (et lignes écrites) par lot
+    CHUNK_SIZE = 500
+    
     def __init__(self, restaurateur: RestaurateurProfile, year: int):
         self.restaurateur = restaurateur
         self.year = year
         self.siret = restaurateur.siret or "00000000000000"
-        self.lines = []
         self.ecriture_counter = 0
         
     def generate(self) -> Tuple[str, str]:
         """
-        Génère le fichier FEC pour l'année donnée
+        Génère le fichier FEC pour l'année donnée, en mémoire
         Retourne: (contenu_fichier, nom_fichier)
         """
+        output = io.BytesIO()
+        self.write(output)
+        return output.getvalue().decode('utf-8'), self.filename
+    
+    @property
+    def filename(self) -> str:
         # Nom du fichier conforme aux normes
-        filename = self._generate_filename()
+        return self._generate_filename()
+    
+    def write(
+        self,
+        stream: BinaryIO,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> FECWriteResult:
+        """
+        Écrit le FEC dans `stream` (binaire, UTF-8) lot par lot.
         
-        # Récupérer toutes les commandes de l'année
+        Les commandes sont lues par paquets de CHUNK_SIZE : la mémoire ne
+        dépend pas du volume de l'année. Le checksum MD5 et la taille sont
+        calculés au fil de l'écriture. `progress(faites, total)` est
+        appelé après chaque lot.
+        """
         orders = self._get_orders()
+        total = orders.count() if progress else 0
         
-        # Générer les écritures comptables
-        for order in orders:
-            self._process_order(order)
-        
-        # Générer le contenu CSV
-        content = self._generate_csv()
-        
-        return content, filename
+        buffer = io.StringIO()
+        # Utiliser le séparateur TAB pour le FEC, pas d'en-têtes
+        writer = csv.DictWriter(
+            buffer,
+            fieldnames=self.FEC_COLUMNS,
+            delimiter='\t',
+            quoting=csv.QUOTE_NONE
+        )
+        md5 = hashlib.md5()
+        lines = size = done = 0
+        
+        def flush():
+            nonlocal size
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            md5.update(data)
+            stream.write(data)
+            size += len(data)
+        
+        for order in orders.iterator(chunk_size=self.CHUNK_SIZE):
+            for line in self._process_order(order):
+                writer.writerow(line)
+                lines += 1
+            done += 1
+            if done % self.CHUNK_SIZE == 0:
+                flush()
+                if progress:
+                    progress(done, total)
+        
+        flush()
+        if progress:
+            progress(done, total)
+        
+        return FECWriteResult(lines=lines, size=size, checksum_md5=md5.hexdigest())
     
     def _generate_filename(self) -> str:
         """Génère le nom de fichier conforme"""
@@ -75,12 +133,13 @@ class FECGenerator:
             created_at__year=self.year,
             payment_status='paid'
         ).order_by('created_at').select_related(
-            'restaurant', 'client', 'table'
-        ).prefetch_related('items__menu_item')
+            'restaurant', 'user'
+        ).prefetch_related('vat_lines')
     
-    def _process_order(self, order):
-        """Traite une commande et génère les écritures comptables"""
+    def _process_order(self, order) -> List[dict]:
+        """Traite une commande et retourne ses écritures comptables"""
         self.ecriture_counter += 1
+        lines = []
         
         # Calculer la ventilation TVA
         vat_breakdown = self._calculate_vat_breakdown(order)
@@ -90,15 +149,15 @@ class FECGenerator:
         piece_ref = f"FACT-{order.order_number}"
         
         # 1. Écriture client (débit 411)
-        self.lines.append({
+        lines.append({
             'JournalCode': 'VE',
             'JournalLib': 'Ventes',
             'EcritureNum': str(self.ecriture_counter),
             'EcritureDate': order_date.strftime('%Y%m%d'),
             'CompteNum': '411000',
             'CompteLib': 'Clients',
-            'CompAuxNum': f"C{order.client.id if order.client else '00000'}",
-            'CompAuxLib': order.client.user.get_full_name() if order.client else 'Client comptoir',
+            'CompAuxNum': f"C{order.user.id if order.user else '00000'}",
+            'CompAuxLib': order.user.get_full_name() if order.user else 'Client comptoir',
             'PieceRef': piece_ref,
             'PieceDate': order_date.strftime('%Y%m%d'),
             'EcritureLib': f"Vente restaurant {order.restaurant.name}",
@@ -113,7 +172,7 @@ class FECGenerator:
         
         # 2. Écriture ventes HT (crédit 706)
         total_ht = sum(vat_breakdown[rate]['base'] for rate in vat_breakdown)
-        self.lines.append({
+        lines.append({
             'JournalCode': 'VE',
             'JournalLib': 'Ventes',
             'EcritureNum': str(self.ecriture_counter),
@@ -138,7 +197,7 @@ class FECGenerator:
         for rate, amounts in vat_breakdown.items():
             if amounts['tva'] > 0:
                 compte_tva = self._get_compte_tva(rate)
-                self.lines.append({
+                lines.append({
                     'JournalCode': 'VE',
                     'JournalLib': 'Ventes',
                     'EcritureNum': str(self.ecriture_counter),
@@ -161,7 +220,7 @@ class FECGenerator:
         
         # 4. Si pourboire, écriture séparée
         if hasattr(order, 'tip_amount') and order.tip_amount > 0:
-            self.lines.append({
+            lines.append({
                 'JournalCode': 'VE',
                 'JournalLib': 'Ventes',
                 'EcritureNum': str(self.ecriture_counter),
@@ -181,49 +240,12 @@ class FECGenerator:
                 'Montantdevise': '',
                 'Idevise': '',
             })
-    
-    def _calculate_vat_breakdown(self, order):
-        """Calcule la ventilation TVA d'une commande"""
-        vat_breakdown = {
-            '5.5': {'base': Decimal('0'), 'tva': Decimal('0')},
-            '10': {'base': Decimal('0'), 'tva': Decimal('0')},
-            '20': {'base': Decimal('0'), 'tva': Decimal('0')},
-        }
         
-        for item in order.items.all():
-            # Déterminer le taux de TVA (par défaut 10% pour la restauration)
-            vat_rate = self._get_vat_rate(item)
-            rate_key = str(vat_rate * 100).replace('.0', '')
-            
-            # Calculer HT et TVA
-            price_ttc = Decimal(str(item.total_price))
-            price_ht = price_ttc / (1 + vat_rate)
-            tva = price_ttc - price_ht
-            
-            if rate_key in vat_breakdown:
-                vat_breakdown[rate_key]['base'] += price_ht.quantize(Decimal('0.01'))
-                vat_breakdown[rate_key]['tva'] += tva.quantize(Decimal('0.01'))
-        
-        return vat_breakdown
+        return lines
     
-    def _get_vat_rate(self, item):
-        """Détermine le taux de TVA d'un article"""
-        # Logique simplifiée - à adapter selon votre modèle
-        # Par défaut 10% pour la restauration sur place
-        if hasattr(item.menu_item, 'vat_rate'):
-            return Decimal(str(item.menu_item.vat_rate))
-        
-        # Si c'est une boisson alcoolisée
-        if item.menu_item.category in ['boissons', 'alcools']:
-            if 'alcool' in item.menu_item.name.lower() or 'vin' in item.menu_item.name.lower():
-                return Decimal('0.20')
-        
-        # Produits alimentaires emballés
-        if hasattr(item.menu_item, 'is_packaged') and item.menu_item.is_packaged:
-            return Decimal('0.055')
-        
-        # Par défaut: restauration sur place
-        return Decimal('0.10')
+    def _calculate_vat_breakdown(self, order):
+        """Ventilation TVA d'une commande, lue sur le grand livre préchargé"""
+        return order_vat_breakdown(order)
     
     def _get_compte_tva(self, rate):
         """Retourne le compte TVA selon le taux"""
@@ -233,27 +255,59 @@ class FECGenerator:
             '20': '445712',
         }
         return compte_map.get(rate, '445710')
+
+
+def run_fec_export(export) -> FECWriteResult:
+    """
+    Génère le FEC d'un ExportComptable et le stocke dans `export.fichier`.
     
-    def _generate_csv(self) -> str:
-        """Génère le contenu CSV du FEC"""
-        output = io.StringIO()
-        
-        # Utiliser le séparateur TAB pour le FEC
-        writer = csv.DictWriter(
-            output,
-            fieldnames=self.FEC_COLUMNS,
-            delimiter='\t',
-            quoting=csv.QUOTE_NONE
+    Écriture dans un fichier temporaire puis envoi vers le stockage par
+    morceaux : ni le contenu ni les lignes ne sont gardés en mémoire.
+    L'avancement est publié dans `progression` après chaque lot.
+    """
+    import tempfile
+    from datetime import timedelta
+    from django.core.files import File
+    from django.utils import timezone
+    from api.models import ExportComptable
+    
+    generator = FECGenerator(export.restaurateur, export.periode_debut.year)
+    
+    def progress(done, total):
+        percent = int(done * 100 / total) if total else 100
+        # Le dernier pourcent est posé une fois le fichier stocké
+        ExportComptable.objects.filter(pk=export.pk).update(
+            progression=min(percent, 99)
         )
-        
-        # Pas d'en-têtes dans le FEC standard
-        # writer.writeheader()
-        
-        # Écrire les lignes
-        for line in self.lines:
-            writer.writerow(line)
-        
-        return output.getvalue()
+    
+    with tempfile.TemporaryFile() as tmp:
+        result = generator.write(tmp, progress=progress)
+        tmp.seek(0)
+        export.fichier.save(generator.filename, File(tmp), save=False)
+    
+    export.fichier_nom = generator.filename
+    export.fichier_url = f"/api/v1/comptabilite/download/{export.id}/"
+    export.fichier_taille = result.size
+    export.nombre_lignes = result.lines
+    export.checksum_md5 = result.checksum_md5
+    export.progression = 100
+    export.statut = 'complete'
+    export.expires_at = timezone.now() + timedelta(days=30)
+    export.save()
+    return result
+
+
+def schedule_fec_export(export_id):
+    """Planifie la génération ; sans Celery, génération immédiate"""
+    from api.tasks import generate_fec_export
+    
+    try:
+        generate_fec_export.delay(export_id)
+    except Exception:
+        logger.exception(
+            f"Planification impossible, génération FEC immédiate (export {export_id})"
+        )
+        generate_fec_export(export_id)
 
 
 class PDFReportGenerator:
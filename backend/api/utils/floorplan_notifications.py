@@ -8,45 +8,98 @@ Usage :
     from api.utils.floorplan_notifications import notify_floorplan_update
     notify_floorplan_update(restaurant_id, event='table_occupied', table_id=table.id)
 
+    # Traitements en masse : un événement par restaurant
+    notify_floorplan_tables([(restaurant_id, table_id), ...], event='table_released')
+
 Fire-and-forget : ne lève JAMAIS — un échec de broadcast (Redis down, channel
 layer absent en tests) ne doit jamais faire échouer un paiement, un check-in
 ou une tâche Celery. L'erreur est loggée, le client se rattrapera au prochain
 polling de secours.
 
+Chaque événement invalide l'instantané en cache du plan de salle et porte
+une version croissante ainsi que l'état courant de la table concernée
+(cf. api.services.floor_plan). Le calcul et l'envoi ont lieu après le
+commit de la transaction en cours : le delta reflète l'état validé.
+
 Événements émis dans le code :
     reservation_created / reservation_confirmed / reservation_cancelled
     reservation_seated / reservation_no_show / reservation_reassigned
     kitchen_fired
     table_occupied / table_released / table_extended
-    layout_changed / order_activity
+    layout_changed / settings_changed / order_activity
 """
 import logging
+from collections import defaultdict
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db import transaction
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 
-def notify_floorplan_update(restaurant_id, event='update', table_id=None):
-    """Pousse un événement léger au groupe floorplan_{restaurant_id}.
+def notify_floorplan_update(restaurant_id, event='update', table_id=None, table_ids=None):
+    """Pousse un delta au groupe floorplan_{restaurant_id} après le commit.
 
-    Le payload ne contient AUCUNE donnée métier : le client refait un
-    GET /floor-plan/ (débounce). Simple, toujours cohérent.
+    Le payload contient la version du plan et l'état de la table concernée
+    (`table`), ou de chacune des tables `table_ids` (`tables`). Sans table
+    (layout_changed, settings_changed, pas de table_id) ou si le client
+    détecte un trou de version, il refait un GET /floor-plan/ (débounce).
     """
+    try:
+        transaction.on_commit(
+            lambda: _send_floorplan_update(restaurant_id, event, table_id, table_ids)
+        )
+    except Exception as e:
+        logger.warning(
+            "Broadcast floorplan échoué (restaurant %s, event %s): %s",
+            restaurant_id, event, e,
+        )
+
+
+def notify_floorplan_tables(affected, event):
+    """Un seul delta par restaurant pour des couples (restaurant_id, table_id)"""
+    by_restaurant = defaultdict(set)
+    for restaurant_id, table_id in affected:
+        tables = by_restaurant[restaurant_id]
+        if table_id:
+            tables.add(table_id)
+
+    for restaurant_id, table_ids in by_restaurant.items():
+        if len(table_ids) == 1:
+            notify_floorplan_update(restaurant_id, event=event, table_id=next(iter(table_ids)))
+        else:
+            notify_floorplan_update(restaurant_id, event=event, table_ids=sorted(table_ids, key=str))
+
+
+def _send_floorplan_update(restaurant_id, event, table_id, table_ids=None):
+    try:
+        from api.services.floor_plan import build_floorplan_event
+        message = build_floorplan_event(restaurant_id, event, table_id, table_ids)
+    except Exception as e:
+        # Cache indisponible : événement sans version ni delta, le client
+        # refait un GET.
+        logger.warning(
+            "Delta floorplan non calculé (restaurant %s, event %s): %s",
+            restaurant_id, event, e,
+        )
+        message = {
+            'type': 'floorplan.update',
+            'event': event,
+            'table_id': str(table_id) if table_id else None,
+            'version': None,
+            'table': None,
+            'tables': None,
+            'timestamp': timezone.now().isoformat(),
+        }
+
     try:
         channel_layer = get_channel_layer()
         if channel_layer is None:
             return
         async_to_sync(channel_layer.group_send)(
-            f"floorplan_{restaurant_id}",
-            {
-                'type': 'floorplan.update',
-                'event': event,
-                'table_id': str(table_id) if table_id else None,
-                'timestamp': timezone.now().isoformat(),
-            },
+            f"floorplan_{restaurant_id}", message
         )
     except Exception as e:
         logger.warning(
@@ -6,6 +6,7 @@ L'incrustation du logo au centre nécessite un niveau de correction d'erreur
 """
 import logging
 import os
+from functools import lru_cache
 from io import BytesIO
 
 import qrcode
@@ -54,6 +55,29 @@ def _get_logo_path():
     return None
 
 
+@lru_cache(maxsize=8)
+def _load_logo(logo_path, mtime, logo_max):
+    """
+    Logo décodé et redimensionné, gardé en mémoire du processus : les QR
+    d'un export partagent la même image. `mtime` périme l'entrée si le
+    fichier est remplacé.
+    """
+    logo = Image.open(logo_path).convert('RGBA')
+    logo.thumbnail((logo_max, logo_max), Image.LANCZOS)
+    return logo
+
+
+def logo_cache_key(logo_path=None):
+    """Identité du logo courant (chemin + date de modification), ou '' sans logo"""
+    logo_path = logo_path or _get_logo_path()
+    if not logo_path:
+        return ''
+    try:
+        return f"{logo_path}:{os.path.getmtime(logo_path)}"
+    except OSError:
+        return ''
+
+
 def _embed_logo(qr_img, logo_path=None):
     """
     Incruste le logo au centre d'une image QR code PIL.
@@ -74,13 +98,12 @@ def _embed_logo(qr_img, logo_path=None):
 
     try:
         qr_img = qr_img.convert('RGBA')
-        logo = Image.open(logo_path).convert('RGBA')
 
         qr_w, qr_h = qr_img.size
         logo_max = int(qr_w * LOGO_RATIO)
 
-        # Redimensionner le logo en conservant les proportions
-        logo.thumbnail((logo_max, logo_max), Image.LANCZOS)
+        # Logo redimensionné en conservant les proportions (en cache)
+        logo = _load_logo(logo_path, os.path.getmtime(logo_path), logo_max)
         logo_w, logo_h = logo.size
 
         # Position du logo (centré)
@@ -154,15 +177,26 @@ def make_qr_with_logo(
     return _embed_logo(qr_img, logo_path=logo_path)
 
 
+def render_qr_png(data, box_size=10, border=4, logo_path=None):
+    """
+    Octets PNG d'un QR code avec logo, rendu en mémoire.
+
+    Fonction de module sans accès aux settings quand `logo_path` est fourni
+    ('' = sans logo) : exécutable dans un processus du pool de rendu
+    (cf. api.services.qr_render).
+    """
+    buffer = BytesIO()
+    make_qr_with_logo(
+        data, box_size=box_size, border=border, logo_path=logo_path
+    ).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
 def generate_qr_for_table(table):
     """
     Génère et sauvegarde le QR code d'une table avec le logo au centre.
     """
     url = f"{settings.DOMAIN}/table/{table.identifiant}"
-    qr_img = make_qr_with_logo(url)
-
-    buffer = BytesIO()
-    qr_img.save(buffer, format='PNG')
 
     filename = f"qr_{table.identifiant}.png"
-    table.qr_code_file.save(filename, ContentFile(buffer.getvalue()), save=True)
\ No newline at end of file
+    table.qr_code_file.save(filename, ContentFile(render_qr_png(url)), save=True)
\ No newline at end of file
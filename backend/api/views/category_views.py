@@ -14,6 +14,8 @@ from api.serializers.category_serializers import (
 )
 from api.serializers.menu_serializers import MenuItemSerializer
 from api.permissions import IsRestaurateur, IsValidatedRestaurateur
+from api.services.authz import owned_restaurant_ids
+from api.services.compiled_menu import invalidate_restaurant_menus
 
 
 @extend_schema(tags=["Categories • Management"])
@@ -53,7 +55,7 @@ class MenuCategoryViewSet(viewsets.ModelViewSet):
             else:
                 # Toutes les catégories du restaurateur
                 return base_queryset.filter(
-                    restaurant__owner=self.request.user.restaurateur_profile
+                    restaurant_id__in=owned_restaurant_ids(self.request)
                 )
         except AttributeError:
             return MenuCategory.objects.none()
@@ -223,6 +225,8 @@ class MenuCategoryViewSet(viewsets.ModelViewSet):
             id__in=category_ids,
             restaurant=restaurant
         ).update(is_active=is_active)
+        # update() ne déclenche pas les signaux : périmer les menus publics
+        invalidate_restaurant_menus(restaurant.id)
         
         return Response({
             'message': f'{updated_count} catégorie(s) {"activée(s)" if is_active else "désactivée(s)"}',
@@ -340,18 +344,18 @@ class MenuSubCategoryViewSet(viewsets.ModelViewSet):
                 # Filtrer par catégorie spécifique
                 return base_queryset.filter(
                     category_id=category_id,
-                    category__restaurant__owner=self.request.user.restaurateur_profile
+                    category__restaurant_id__in=owned_restaurant_ids(self.request)
                 )
             elif restaurant_id:
                 # Filtrer par restaurant spécifique
                 return base_queryset.filter(
                     category__restaurant_id=restaurant_id,
-                    category__restaurant__owner=self.request.user.restaurateur_profile
+                    category__restaurant_id__in=owned_restaurant_ids(self.request)
                 )
             else:
                 # Toutes les sous-catégories du restaurateur
                 return base_queryset.filter(
-                    category__restaurant__owner=self.request.user.restaurateur_profile
+                    category__restaurant_id__in=owned_restaurant_ids(self.request)
                 )
         except AttributeError:
             return MenuSubCategory.objects.none()
@@ -412,7 +416,7 @@ class MenuSubCategoryViewSet(viewsets.ModelViewSet):
         try:
             category = MenuCategory.objects.get(
                 id=category_id,
-                restaurant__owner=self.request.user.restaurateur_profile
+                restaurant_id__in=owned_restaurant_ids(self.request)
             )
         except MenuCategory.DoesNotExist:
             return Response(
@@ -459,7 +463,7 @@ class MenuSubCategoryViewSet(viewsets.ModelViewSet):
         category = get_object_or_404(
             MenuCategory,
             id=category_id,
-            restaurant__owner=request.user.restaurateur_profile
+            restaurant_id__in=owned_restaurant_ids(request)
         )
         
         subcategories = MenuSubCategory.objects.filter(
@@ -37,6 +37,8 @@ from api.consumers import (
     notify_session_archived
 )
 
+from api.services import session_cart as cart_state
+
 from django.core.cache import cache
 
 import logging
@@ -804,8 +806,8 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
             get_active_daily_menu, formula_pricing_context, unit_price_for,
             validate_formula_completeness,
         )
-        from decimal import Decimal
-        import random, string as string_module
+        from api.services.order_numbers import GROUP_PREFIX, allocate_order_number
+        from decimal import Decimal, ROUND_HALF_UP
 
         session = self.get_object()
 
@@ -860,8 +862,8 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
             for item in cart_items
         )
 
-        # Générer un numéro de commande unique
-        order_number = f"GRP-{''.join(random.choices(string_module.digits, k=6))}"
+        # Numéro unique du jour (compteur partagé avec les autres créations)
+        order_number = allocate_order_number(session.restaurant_id, GROUP_PREFIX)
 
         # Créer la commande (owner = host)
         host_participant = session.participants.filter(
@@ -884,10 +886,13 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
             order.user = request.user
             order.save(update_fields=['user'])
 
-        # Créer les OrderItems (avec prix formule menu du jour si applicable)
+        # Créer les OrderItems (avec prix formule menu du jour si applicable),
+        # TVA comprise, en un seul bulk_create comme OrderCreateSerializer
+        cents = Decimal('0.01')
+        lines = []
         for cart_item in cart_items:
             unit = _line_unit_price(cart_item.menu_item)
-            OrderItem.objects.create(
+            line = OrderItem(
                 order=order,
                 menu_item=cart_item.menu_item,
                 quantity=cart_item.quantity,
@@ -895,7 +900,24 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
                 total_price=unit * cart_item.quantity,
                 special_instructions=cart_item.special_instructions,
                 customizations=cart_item.customizations or {},
+                vat_rate=cart_item.menu_item.vat_rate or Decimal('0.10'),
             )
+            line.apply_dish_vat()
+            line.total_price = Decimal(line.total_price).quantize(cents, rounding=ROUND_HALF_UP)
+            line.vat_amount = Decimal(line.vat_amount).quantize(cents, rounding=ROUND_HALF_UP)
+            lines.append((line, []))
+        OrderItem.objects.bulk_create([line for line, _ in lines])
+
+        # Ventilation TVA et grand livre (exports FEC / CSV / récap TVA)
+        order.calculate_vat_breakdown(lines=lines)
+        order.tax_amount = sum(
+            (Decimal(str(b['tva'])) for b in order.vat_details.values()),
+            Decimal('0.00')
+        )
+        Order.objects.filter(pk=order.pk).update(
+            tax_amount=order.tax_amount, vat_details=order.vat_details
+        )
+        order.record_vat_lines(replace=False)
 
         # Passer la session en mode paiement
         session.status = 'payment'
@@ -974,7 +996,7 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
             except Exception as e:
                 logger.warning(f"WS notify order_placed failed: {e}")
 
-        _broadcast_cart_update(session)  # Envoyer panier vide
+        _broadcast_cart_update(session, [cart_state.cleared_change()])  # Panier vidé
 
         response_data = {
             'message': 'Commande groupée créée avec succès',
@@ -1002,6 +1024,7 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
         items_data = list(serializer.data)
         total = float(sum(float(item.get('total_price', 0)) for item in items_data))
         return Response({
+            'version': cart_state.get_version(session.id),
             'items': items_data,
             'total': total,
             'items_count': sum(int(item.get('quantity', 0)) for item in items_data),
@@ -1040,14 +1063,16 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
             }
             existing_item.save()
             item = existing_item
+            change = cart_state.item_change('changed', item)
         else:
             item = SessionCartItem.objects.create(
                 session=session,
                 participant=participant,
                 **serializer.validated_data
             )
+            change = cart_state.item_change('added', item)
 
-        _broadcast_cart_update(session)
+        _broadcast_cart_update(session, [change])
         return Response(
             SessionCartItemSerializer(item, context={'request': request}).data,
             status=status.HTTP_201_CREATED
@@ -1073,8 +1098,9 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
         quantity = request.data.get('quantity')
         if quantity is not None:
             if int(quantity) <= 0:
+                item_pk = item.pk
                 item.delete()
-                _broadcast_cart_update(session)
+                _broadcast_cart_update(session, [cart_state.removed_change(item_pk)])
                 return Response(status=status.HTTP_204_NO_CONTENT)
             item.quantity = int(quantity)
 
@@ -1084,7 +1110,7 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
             item.customizations = request.data['customizations']
 
         item.save()
-        _broadcast_cart_update(session)
+        _broadcast_cart_update(session, [cart_state.item_change('changed', item)])
         return Response(SessionCartItemSerializer(item, context={'request': request}).data)
 
     @action(detail=True, methods=['delete'], url_path=r'cart_remove/(?P<item_id>[^/.]+)')
@@ -1104,8 +1130,9 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        item_pk = item.pk
         item.delete()
-        _broadcast_cart_update(session)
+        _broadcast_cart_update(session, [cart_state.removed_change(item_pk)])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['delete'])
@@ -1116,8 +1143,11 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
         """
         session = self.get_object()
         participant = self._get_current_participant(request, session)
-        session.cart_items.filter(participant=participant).delete()
-        _broadcast_cart_update(session)
+        own_items = session.cart_items.filter(participant=participant)
+        removed = [cart_state.removed_change(pk) for pk in own_items.values_list('pk', flat=True)]
+        own_items.delete()
+        if removed:
+            _broadcast_cart_update(session, removed)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     # ── Utilitaires ───────────────────────────────────────────────────────────
@@ -1292,43 +1322,16 @@ class CollaborativeSessionViewSet(viewsets.ModelViewSet):
 
 # ─── Fonction utilitaire au niveau module ─────────────────────────────────────
 
-def _broadcast_cart_update(session):
+def _broadcast_cart_update(session, changes):
     """
-    Broadcast l'état complet du panier à tous les participants via WS.
+    Diffuse les changements du panier à tous les participants via WS
+    (diff versionné, regroupé et envoyé après le commit — cf.
+    api.services.session_cart).
     Définie au niveau module pour être accessible depuis les méthodes
     de CollaborativeSessionViewSet via le scope global Python (LEGB).
     """
-    import json
-    from asgiref.sync import async_to_sync
-    from channels.layers import get_channel_layer
-    from api.serializers.collaborative_session_serializers import SessionCartItemSerializer
-
-    channel_layer = get_channel_layer()
-    if not channel_layer:
-        logger.warning("_broadcast_cart_update: channel layer indisponible")
-        return
-
     try:
-        # Reset inactivity timer — toute activité panier maintient la session vivante
-        CollaborativeTableSession.objects.filter(id=session.id).update(updated_at=timezone.now())
-
-        items = session.cart_items.select_related(
-            'participant', 'participant__user', 'menu_item'
-        ).all()
-        serializer = SessionCartItemSerializer(items, many=True)
-        items_data = json.loads(json.dumps(list(serializer.data), default=str))
-        total = float(sum(float(item.get('total_price', 0)) for item in items_data))
-        items_count = sum(int(item.get('quantity', 0)) for item in items_data)
-
-        async_to_sync(channel_layer.group_send)(
-            f'session_{session.id}',
-            {
-                'type': 'cart_updated',
-                'items': items_data,
-                'total': total,
-                'items_count': items_count,
-            }
-        )
+        cart_state.notify_cart_change(session.id, changes)
     except Exception as exc:
         logger.error(f"_broadcast_cart_update failed (session {session.id}): {exc}")
 
@@ -9,9 +9,9 @@ from decimal import Decimal
 import stripe
 import csv
 import io
-import hashlib
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import FileResponse, HttpResponse
 from api.models import (
     ComptabiliteSettings, 
     EcritureComptable,
@@ -26,7 +26,8 @@ from api.serializers.comptabilite_serializers import (
     ExportComptableSerializer,
     FactureSequenceSerializer
 )
-from api.utils.fec_generator import FECGenerator, PDFReportGenerator
+from api.services.vat_ledger import iter_orders_with_vat, vat_recap
+from api.utils.fec_generator import PDFReportGenerator, schedule_fec_export
 
 
 class ComptabiliteViewSet(viewsets.ViewSet):
@@ -174,14 +175,18 @@ class ComptabiliteViewSet(viewsets.ViewSet):
     
     @extend_schema(
         summary="Export FEC",
-        description="Génère le Fichier des Écritures Comptables (format légal)",
+        description=(
+            "Lance la génération du Fichier des Écritures Comptables (format "
+            "légal) en tâche de fond. Suivre l'avancement via "
+            "GET /exports/{export_id}/, puis télécharger via l'URL retournée."
+        ),
         parameters=[
             OpenApiParameter(name='annee', type=int, required=True),
         ]
     )
     @action(detail=False, methods=['post'])
     def export_fec(self, request):
-        """Génère un export FEC (Fichier des Écritures Comptables)"""
+        """Planifie un export FEC (Fichier des Écritures Comptables)"""
         restaurateur = self.get_restaurateur()
         annee = int(request.data.get('annee', timezone.now().year))
         
@@ -194,45 +199,62 @@ class ComptabiliteViewSet(viewsets.ViewSet):
             statut='en_cours'
         )
         
-        try:
-            # Générer le FEC
-            generator = FECGenerator(restaurateur, annee)
-            file_content, file_name = generator.generate()
-            
-            # Calculer le checksum
-            checksum = hashlib.md5(file_content.encode()).hexdigest()
-            
-            # Sauvegarder le fichier (ici en local, en prod utiliser S3)
-            file_path = f"exports/{restaurateur.id}/{file_name}"
-            # TODO: Sauvegarder sur S3
-            
-            # Mettre à jour l'export
-            export.fichier_nom = file_name
-            export.fichier_url = f"/api/v1/comptabilite/download/{export.id}/"
-            export.fichier_taille = len(file_content)
-            export.checksum_md5 = checksum
-            export.statut = 'complete'
-            export.expires_at = timezone.now() + timedelta(days=30)
-            export.save()
-            
-            return Response({
-                'export_id': export.id,
-                'fichier': file_name,
-                'taille': export.fichier_taille,
-                'checksum': checksum,
-                'url': export.fichier_url,
-                'expires': export.expires_at.isoformat(),
-            })
-            
-        except Exception as e:
-            export.statut = 'erreur'
-            export.message_erreur = str(e)
-            export.save()
-            
+        transaction.on_commit(lambda: schedule_fec_export(export.id))
+        
+        return Response({
+            'export_id': export.id,
+            'statut': export.statut,
+            'progression': export.progression,
+            'status_url': f"/api/v1/comptabilite/exports/{export.id}/",
+            'url': f"/api/v1/comptabilite/download/{export.id}/",
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @extend_schema(
+        summary="Statut d'un export",
+        description="Avancement, taille et checksum d'un export comptable",
+        responses=ExportComptableSerializer,
+    )
+    @action(detail=False, methods=['get'], url_path=r'exports/(?P<export_id>\d+)')
+    def export_status(self, request, export_id=None):
+        export = ExportComptable.objects.filter(
+            id=export_id, restaurateur=self.get_restaurateur()
+        ).first()
+        if export is None:
             return Response(
-                {'error': 'Erreur lors de la génération du fichier FEC.'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Export introuvable.'},
+                status=status.HTTP_404_NOT_FOUND
             )
+        return Response(ExportComptableSerializer(export).data)
+    
+    @extend_schema(
+        summary="Télécharger un export",
+        description="Fichier stocké d'un export terminé, transmis en flux",
+    )
+    @action(detail=False, methods=['get'], url_path=r'download/(?P<export_id>\d+)')
+    def download(self, request, export_id=None):
+        export = ExportComptable.objects.filter(
+            id=export_id, restaurateur=self.get_restaurateur()
+        ).first()
+        if export is None or export.statut != 'complete' or not export.fichier:
+            return Response(
+                {'error': 'Export introuvable ou non terminé.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if export.expires_at and export.expires_at < timezone.now():
+            return Response(
+                {'error': 'Lien de téléchargement expiré.'},
+                status=status.HTTP_410_GONE
+            )
+        
+        response = FileResponse(
+            export.fichier.open('rb'),
+            as_attachment=True,
+            filename=export.fichier_nom,
+            content_type='text/plain; charset=utf-8',
+        )
+        if export.checksum_md5:
+            response['X-Checksum-MD5'] = export.checksum_md5
+        return response
     
     @extend_schema(
         summary="Export CSV",
@@ -271,20 +293,19 @@ class ComptabiliteViewSet(viewsets.ViewSet):
                 created_at__date__gte=date_debut,
                 created_at__date__lte=date_fin,
                 payment_status='paid'
-            ).order_by('created_at')
+            ).select_related('user').order_by('created_at')
             
-            for order in orders:
-                # Calculer la TVA (simplifié, à adapter selon votre modèle)
-                tva_details = self._calculate_order_vat(order)
-                
+            # Ventilation TVA sommée en SQL depuis le grand livre (repli sur
+            # les lignes pour les commandes sans grand livre)
+            for order in iter_orders_with_vat(orders):
                 writer.writerow([
                     order.created_at.strftime('%Y-%m-%d %H:%M'),
                     order.order_number,
-                    order.client.user.get_full_name() if order.client else 'Client anonyme',
-                    f"{float(order.total_amount / 1.1):.2f}",  # HT approximatif
-                    f"{tva_details.get('5.5', 0):.2f}",
-                    f"{tva_details.get('10', 0):.2f}",
-                    f"{tva_details.get('20', 0):.2f}",
+                    order.user.get_full_name() if order.user_id else (order.customer_name or 'Client anonyme'),
+                    f"{order.vat_base_ht:.2f}",
+                    f"{order.vat_5_5:.2f}",
+                    f"{order.vat_10:.2f}",
+                    f"{order.vat_20:.2f}",
                     f"{float(order.total_amount):.2f}",
                     'Carte bancaire',  # À adapter
                     order.payment_status,
@@ -424,30 +445,14 @@ class ComptabiliteViewSet(viewsets.ViewSet):
             )
     
     def _update_recap_tva(self, recap, date_debut, date_fin):
-        """Met à jour le récapitulatif TVA"""
-        from api.models import Order, OrderItem
-        
-        # Récupérer toutes les commandes payées de la période
-        orders = Order.objects.filter(
-            restaurant__owner=recap.restaurateur,
-            created_at__date__gte=date_debut,
-            created_at__date__lte=date_fin,
-            payment_status='paid'
-        )
-        
-        # Calculer les totaux
-        recap.ca_ttc = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-        recap.nombre_factures = orders.count()
+        """Met à jour le récapitulatif TVA depuis le grand livre (une requête)"""
+        for field, value in vat_recap(recap.restaurateur, date_debut, date_fin).items():
+            setattr(recap, field, value)
         
-        if recap.nombre_factures > 0:
-            recap.ticket_moyen = recap.ca_ttc / recap.nombre_factures
-        
-        # Calculer la TVA par taux (simplifié)
-        # En production, utiliser les taux réels des OrderItem
-        recap.ca_ht = recap.ca_ttc / Decimal('1.10')  # Approximation 10%
-        recap.tva_10_base = recap.ca_ht
-        recap.tva_10_montant = recap.ca_ttc - recap.ca_ht
-        recap.tva_total = recap.tva_10_montant
+        recap.ticket_moyen = (
+            (recap.ca_ttc / recap.nombre_factures).quantize(Decimal('0.01'))
+            if recap.nombre_factures else Decimal('0.00')
+        )
         
         recap.save()
     
@@ -469,13 +474,6 @@ class ComptabiliteViewSet(viewsets.ViewSet):
         except:
             return None
     
-    def _calculate_order_vat(self, order):
-        """Calcule la ventilation TVA d'une commande"""
-        # Simplifié - à adapter selon votre modèle
-        return {
-            '10': float(order.total_amount) * 0.0909,  # TVA 10%
-        }
-    
     def _get_alertes_comptables(self, restaurateur, recap_tva):
         """Génère les alertes comptables"""
         alertes = []
@@ -18,6 +18,8 @@ from api.serializers.daily_menu_serializers import (
     DailyMenuPublicSerializer, DailyMenuItemSerializer, DailyMenuTemplateSerializer
 )
 from api.permissions import IsRestaurateur, IsValidatedRestaurateur
+from api.services.authz import owned_restaurant_ids, owns_restaurant
+from api.services.compiled_menu import DAILY, serve_document
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
 logger = logging.getLogger(__name__)
@@ -44,7 +46,7 @@ class DailyMenuViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtre les menus par restaurant du restaurateur connecté"""
         return DailyMenu.objects.filter(
-            restaurant__owner=self.request.user.restaurateur_profile
+            restaurant_id__in=owned_restaurant_ids(self.request)
         ).select_related('restaurant').prefetch_related('daily_menu_items__menu_item__category')
 
     def get_serializer_class(self):
@@ -59,7 +61,7 @@ class DailyMenuViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Assure que le restaurant appartient au restaurateur connecté"""
         restaurant = serializer.validated_data['restaurant']
-        if restaurant.owner != self.request.user.restaurateur_profile:
+        if not owns_restaurant(self.request, restaurant.id):
             raise PermissionDenied("Ce restaurant ne vous appartient pas")
         serializer.save()
 
@@ -776,23 +778,16 @@ class PublicDailyMenuViewSet(viewsets.ReadOnlyModelViewSet):
             OpenApiParameter(name="restaurant_id", type=str, required=True, location="path")
         ]
     )
-    @action(detail=False, methods=['get'], url_path=r'restaurant/(?P<restaurant_id>[^/.]+)')
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'restaurant/(?P<restaurant_id>[^/.]+)',
+        authentication_classes=[],
+    )
     def by_restaurant(self, request, restaurant_id=None):
-        today = timezone.now().date()
-
-        try:
-            daily_menu = DailyMenu.objects.get(
-                restaurant_id=restaurant_id,
-                date=today,
-                is_active=True
-            )
-            serializer = self.get_serializer(daily_menu)
-            return Response(serializer.data)
-        except DailyMenu.DoesNotExist:
-            return Response(
-                {'message': 'Aucun menu du jour disponible pour ce restaurant'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Document compilé du jour servi depuis le cache, avec ETag / 304
+        # (cf. services.compiled_menu).
+        return serve_document(request, DAILY, restaurant_id)
 
     @extend_schema(
         summary="Menus du jour disponibles aujourd'hui",
@@ -829,7 +824,7 @@ class DailyMenuTemplateViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return DailyMenuTemplate.objects.filter(
-            restaurant__owner=self.request.user.restaurateur_profile
+            restaurant_id__in=owned_restaurant_ids(self.request)
         ).prefetch_related('template_items__menu_item__category')
 
     @extend_schema(
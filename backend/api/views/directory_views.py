@@ -8,7 +8,8 @@ Briques :
 
   1. `nearby_restaurants`  (GET, public)
      Restaurants partenaires autour d'un point (lat/lng) triés par distance.
-     Bounding-box SQL puis distance exacte (Haversine) en Python, sans PostGIS.
+     Cellules géohash indexées puis distance exacte (Haversine) des seuls
+     candidats, sans PostGIS (cf. api.services.directory).
 
   2. `SiretEnrichmentView` (POST, restaurateur authentifié)
      Enrichit un SIRET via l'API Sirene + géocodage BAN.
@@ -20,7 +21,6 @@ Briques :
      formulaire côté UI.
 """
 import logging
-from math import asin, cos, radians, sin, sqrt
 
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiParameter, extend_schema
@@ -40,11 +40,11 @@ from api.serializers.review_serializers import (
     SiretEnrichmentRequestSerializer,
     latest_qualifying_order,
 )
+from api.services.directory import nearest_restaurants, public_restaurants
 from api.services.sirene_service import sirene_service
 
 logger = logging.getLogger(__name__)
 
-EARTH_RADIUS_KM = 6371.0
 DEFAULT_RADIUS_KM = 10.0
 MAX_RADIUS_KM = 50.0
 MAX_RESULTS = 100
@@ -54,26 +54,12 @@ MAX_RESULTS = 100
 def _visible_restaurants_qs():
     """Restaurants publiquement listables (miroir de PublicRestaurantViewSet)."""
     return (
-        Restaurant.objects.filter(
-            is_active=True,
-            owner__is_active=True,
-            owner__stripe_verified=True,
-            is_stripe_active=True,
-            is_manually_overridden=False,
-        )
+        public_restaurants()
         .select_related("owner")
         .prefetch_related("opening_hours__periods")
     )
 
 
-def _haversine_km(lat1, lon1, lat2, lon2) -> float:
-    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
-
-
 # ── 1. Restaurants à proximité ───────────────────────────────────────────────
 @extend_schema(
     tags=["Public • Restaurants"],
@@ -116,30 +102,12 @@ def nearby_restaurants(request):
     except (TypeError, ValueError):
         limit = MAX_RESULTS
 
-    # Bounding-box : ~111 km / degré de latitude ; longitude corrigée par cos(lat).
-    lat_delta = radius / 111.0
-    lon_delta = radius / (111.0 * max(cos(radians(lat)), 0.01))
-
-    qs = _visible_restaurants_qs().filter(
-        latitude__isnull=False,
-        longitude__isnull=False,
-        latitude__gte=lat - lat_delta,
-        latitude__lte=lat + lat_delta,
-        longitude__gte=lng - lon_delta,
-        longitude__lte=lng + lon_delta,
-    )
-
+    qs = _visible_restaurants_qs()
     cuisine = request.query_params.get("cuisine")
     if cuisine:
         qs = qs.filter(cuisine=cuisine)
 
-    scored = []
-    for r in qs:
-        d = _haversine_km(lat, lng, float(r.latitude), float(r.longitude))
-        if d <= radius:
-            scored.append((d, r))
-    scored.sort(key=lambda t: t[0])
-    scored = scored[:limit]
+    scored = nearest_restaurants(qs, lat, lng, radius, limit)
 
     serializer = RestaurantSerializer(
         [r for _, r in scored], many=True, context={"request": request}
@@ -2,7 +2,7 @@
 Plan de salle restaurateur.
 
 Endpoints (router: r'floor-plan') :
-  GET  /floor-plan/?restaurant_id=          → tables + statut temps réel
+  GET  /floor-plan/?restaurant_id=          → tables + statut temps réel (version)
   POST /floor-plan/bulk_setup/              → "6 tables de 2, 4 tables de 4..."
   POST /floor-plan/layout/                  → positions des tables sur le plan
   POST /floor-plan/occupy/                  → marquer une table occupée (walk-in)
@@ -11,6 +11,9 @@ Endpoints (router: r'floor-plan') :
 
 Statuts retournés (priorité décroissante) :
   blocked > seated > occupied > reserved_soon > free
+
+L'instantané est servi depuis le cache (api.services.floor_plan) ; les
+mutations publient un delta versionné sur ws/floorplan/<restaurant_id>/.
 """
 import logging
 from datetime import timedelta
@@ -23,34 +26,24 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from api.models import Order, Reservation, Restaurant, Table
+from api.models import Reservation, Restaurant, Table
 from api.models.table_occupancy_models import (
     DEFAULT_OCCUPANCY_MINUTES,
     TableOccupancy,
 )
+from api.services.availability import AvailabilityIndex
+from api.services.authz import owns_restaurant
+from api.services.floor_plan import get_floor_plan
 from api.utils.floorplan_notifications import notify_floorplan_update
 
 logger = logging.getLogger(__name__)
 
-# Fenêtre d'affichage "réservée bientôt" sur le plan
-RESERVED_SOON_MINUTES = 90
-
 
 def _get_owned_restaurant(request, restaurant_id):
     """Restaurant appartenant au restaurateur connecté, ou None."""
-    if not restaurant_id:
-        return None
-    try:
-        restaurant = Restaurant.objects.get(id=restaurant_id)
-    except Restaurant.DoesNotExist:
+    if not restaurant_id or not owns_restaurant(request, restaurant_id):
         return None
-    user = request.user
-    if (
-        hasattr(user, 'restaurateur_profile')
-        and restaurant.owner == user.restaurateur_profile
-    ):
-        return restaurant
-    return None
+    return Restaurant.objects.filter(id=restaurant_id).first()
 
 
 class FloorPlanViewSet(viewsets.ViewSet):
@@ -64,8 +57,9 @@ class FloorPlanViewSet(viewsets.ViewSet):
         summary="Plan de salle avec statuts temps réel",
         description=(
             "Fusionne réservations, occupations walk-in et commandes actives "
-            "pour donner le statut de chaque table. Prévu pour polling 15s "
-            "ou push WebSocket."
+            "pour donner le statut de chaque table. Instantané en cache, "
+            "versionné : les deltas WebSocket portent la version suivante, "
+            "le client ne refait un GET qu'en cas de trou."
         ),
     )
     def list(self, request):
@@ -77,120 +71,7 @@ class FloorPlanViewSet(viewsets.ViewSet):
                 {'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN
             )
 
-        now = timezone.now()
-        soon = now + timedelta(minutes=RESERVED_SOON_MINUTES)
-        tables = list(
-            Table.objects.filter(restaurant=restaurant, is_active=True)
-            .order_by('number')
-        )
-        table_ids = [t.id for t in tables]
-
-        # ── 1. Réservations du moment + à venir (fenêtre "soon") ─────────
-        reservations = Reservation.objects.filter(
-            table_id__in=table_ids,
-            status__in=('confirmed', 'seated'),
-            starts_at__lt=soon,
-            ends_at__gt=now,
-        ).select_related('pre_order')
-        res_by_table = {}
-        for r in reservations:
-            res_by_table.setdefault(r.table_id, []).append(r)
-
-        # ── 2. Occupations actives (manuel + blocages) ───────────────────
-        occupancies = TableOccupancy.objects.active().filter(
-            table_id__in=table_ids
-        )
-        occ_by_table = {o.table_id: o for o in occupancies}
-
-        # ── 3. Commandes actives par table_number (walk-ins avec app) ────
-        active_orders = (
-            Order.objects.filter(
-                restaurant=restaurant,
-                status__in=['pending', 'confirmed', 'preparing', 'ready'],
-                table_number__isnull=False,
-            )
-            .exclude(table_number='')
-            .values('table_number')
-            .distinct()
-        )
-        tables_with_orders = {o['table_number'] for o in active_orders}
-
-        # ── Fusion ────────────────────────────────────────────────────────
-        payload = []
-        for table in tables:
-            occ = occ_by_table.get(table.id)
-            table_res = sorted(
-                res_by_table.get(table.id, []), key=lambda r: r.starts_at
-            )
-            seated_res = next(
-                (r for r in table_res
-                 if r.status == 'seated' and r.starts_at <= now < r.ends_at),
-                None,
-            )
-            next_res = next(
-                (r for r in table_res if r.starts_at > now), None
-            )
-            has_app_orders = table.number in tables_with_orders
-
-            if occ and occ.source == 'blocked':
-                table_status = 'blocked'
-            elif seated_res:
-                table_status = 'seated'
-            elif occ or has_app_orders:
-                table_status = 'occupied'
-            elif next_res:
-                table_status = 'reserved_soon'
-            else:
-                table_status = 'free'
-
-            payload.append({
-                'id': str(table.id),
-                'number': table.number,
-                'capacity': table.capacity,
-                'capacity_max': getattr(table, 'capacity_max', None),
-                'zone': getattr(table, 'zone', '') or '',
-                'pos_x': getattr(table, 'pos_x', None),
-                'pos_y': getattr(table, 'pos_y', None),
-                'shape': getattr(table, 'shape', 'square'),
-                'status': table_status,
-                'has_app_orders': has_app_orders,
-                'occupancy': {
-                    'id': str(occ.id),
-                    'source': occ.source,
-                    'party_size': occ.party_size,
-                    'started_at': occ.started_at,
-                    'expected_end_at': occ.expected_end_at,
-                    'is_overdue': occ.is_overdue,
-                    'notes': occ.notes,
-                } if occ else None,
-                'current_reservation': {
-                    'id': str(seated_res.id),
-                    'customer_name': seated_res.customer_name,
-                    'party_size': seated_res.party_size,
-                    'ends_at': seated_res.ends_at,
-                    'has_paid_pre_order': seated_res.has_paid_pre_order,
-                } if seated_res else None,
-                'next_reservation': {
-                    'id': str(next_res.id),
-                    'customer_name': next_res.customer_name,
-                    'party_size': next_res.party_size,
-                    'starts_at': next_res.starts_at,
-                    'time': timezone.localtime(next_res.starts_at).strftime('%H:%M'),
-                    'has_paid_pre_order': next_res.has_paid_pre_order,
-                } if next_res else None,
-            })
-
-        counts = {}
-        for t in payload:
-            counts[t['status']] = counts.get(t['status'], 0) + 1
-
-        return Response({
-            'restaurant_id': str(restaurant.id),
-            'timestamp': now.isoformat(),
-            'reservations_enabled': getattr(restaurant, 'reservations_enabled', False),
-            'tables': payload,
-            'summary': counts,
-        })
+        return Response(get_floor_plan(restaurant))
 
     # ══════════════════════════════════════════════════════════════════
     # Activation/désactivation des réservations en ligne
@@ -229,6 +110,7 @@ class FloorPlanViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         restaurant.save(update_fields=update_fields)
+        notify_floorplan_update(restaurant.id, event='settings_changed')
 
         logger.info(
             "Paramètres réservation mis à jour pour %s (%s): %s",
@@ -320,6 +202,8 @@ class FloorPlanViewSet(viewsets.ViewSet):
                     })
                     next_number += 1
 
+        notify_floorplan_update(restaurant.id, event='layout_changed')
+
         return Response(
             {'created': created, 'count': len(created)},
             status=status.HTTP_201_CREATED,
@@ -636,17 +520,6 @@ class FloorPlanViewSet(viewsets.ViewSet):
         if exclude:
             tables = tables.exclude(id=exclude)
         table_ids = list(tables.values_list('id', flat=True))
-
-        busy = set(
-            Reservation.objects.filter(
-                table_id__in=table_ids,
-                status__in=Reservation.BLOCKING_STATUSES,
-                starts_at__lt=ends_at,
-                ends_at__gt=starts_at,
-            ).values_list('table_id', flat=True)
-        )
-        busy |= set(
-            TableOccupancy.objects.overlapping(table_ids, starts_at, ends_at)
-            .values_list('table_id', flat=True)
-        )
-        return [tid for tid in table_ids if tid not in busy]
\ No newline at end of file
+        return AvailabilityIndex.build(
+            table_ids, starts_at, ends_at
+        ).free_tables(starts_at, ends_at)
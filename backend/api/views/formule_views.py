@@ -26,10 +26,11 @@ from rest_framework.response import Response
 
 from api.models import Formule
 from api.permissions import IsRestaurateur
+from api.services.authz import owns_restaurant
+from api.services.compiled_menu import FORMULES, serve_document
 from api.serializers.formule_serializers import (
     FormuleSerializer,
     FormuleListSerializer,
-    FormuleClientSerializer,
 )
 
 logger = logging.getLogger(__name__)
@@ -71,8 +72,7 @@ class FormuleViewSet(viewsets.ModelViewSet):
         # Garde-fou supplémentaire (le queryset du champ est déjà restreint au
         # propriétaire, mais on double-verrouille comme pour les menus).
         restaurant = serializer.validated_data.get('restaurant')
-        profile = self.request.user.restaurateur_profile
-        if not restaurant or restaurant.owner != profile:
+        if not restaurant or not owns_restaurant(self.request, restaurant.id):
             raise PermissionDenied("Ce restaurant ne vous appartient pas.")
         serializer.save()
 
@@ -101,13 +101,6 @@ class FormuleViewSet(viewsets.ModelViewSet):
         Accessible sans authentification. `?lang=` résout les noms/descriptions
         des plats dans la langue demandée (repli français).
         """
-        qs = (
-            Formule.objects
-            .filter(restaurant_id=restaurant_id, is_active=True)
-            .prefetch_related('courses__items__menu_item')
-            .order_by('order', 'name')
-        )
-        # Contexte explicite : garantit que `request` (donc ?lang=) est dispo
-        # dans FormuleClientItemSerializer pour résoudre les traductions.
-        serializer = FormuleClientSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        # Document compilé par (restaurant, ?lang=), servi depuis le cache
+        # avec ETag / 304 (cf. services.compiled_menu).
+        return serve_document(request, FORMULES, restaurant_id)
\ No newline at end of file
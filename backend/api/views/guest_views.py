@@ -1,18 +1,24 @@
 import logging
-from decimal import Decimal
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, throttling
+from rest_framework.settings import api_settings
+from asgiref.sync import sync_to_async
 from django.conf import settings
 import datetime, stripe
 
-from api.models import DraftOrder, Restaurant, MenuItem
+from api.models import DraftOrder, Restaurant
 from api.utils.commission_utils import build_stripe_payment_params
-from api.utils.formule_validation import validate_guest_formules, formules_amount_cents
-from api.serializers import GuestPrepareSerializer, GuestPrepareResponse, DraftStatusQuery, DraftStatusResponse
+from api.serializers import (
+    GuestPrepareSerializer, GuestPrepareResponse, DraftStatusQuery, DraftStatusPollQuery, DraftStatusResponse,
+)
 from api.services import create_order_from_draft
+from api.services.cart_pricing import price_guest_cart
+from api.services.draft_status import is_pending, wait_for_draft
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 logger = logging.getLogger(__name__)
@@ -22,18 +28,6 @@ class GuestThrottle(throttling.UserRateThrottle):
     rate = "10/min"
 
 
-def compute_amount_cents(restaurant, items):
-    amount_cents = 0
-    for it in items:
-        mi = get_object_or_404(
-            MenuItem, id=it["menu_item_id"],
-            menu__restaurant=restaurant, is_available=True
-        )
-        # MenuItem.price en euros → centimes
-        amount_cents += int(Decimal(mi.price) * 100) * int(it["quantity"])
-    return amount_cents
-
-
 class GuestPrepare(APIView):
     permission_classes = [permissions.AllowAny]
     throttle_classes = [GuestThrottle]
@@ -43,22 +37,23 @@ class GuestPrepare(APIView):
         s.is_valid(raise_exception=True)
         data = s.validated_data
 
-        rest = get_object_or_404(Restaurant, id=data["restaurant_id"], is_active=True)
+        # owner chargé avec le restaurant : can_receive_orders le lit
+        rest = get_object_or_404(
+            Restaurant.objects.select_related("owner"), id=data["restaurant_id"], is_active=True
+        )
         if not rest.can_receive_orders:
             return Response({"detail": "Restaurant indisponible"}, status=403)
 
-        # Valider les formules contre le restaurant résolu (éligibilité, min/max)
-        # et obtenir une forme normalisée stockable dans le draft.
-        formules = validate_guest_formules(rest, data.get("formules", []))
-
-        amount = compute_amount_cents(rest, data["items"])
-        amount += formules_amount_cents(rest, formules)
+        # Plats et formules du panier résolus en bloc (disponibilité,
+        # éligibilité, min/max) ; forme normalisée des formules pour le draft.
+        cart = price_guest_cart(rest, data["items"], data.get("formules", []))
+        amount = cart.amount_cents
 
         draft = DraftOrder.objects.create(
             restaurant=rest,
             table_number=data.get("table_number") or None,
             items=data["items"],
-            formules=formules,
+            formules=cart.formules_json(),
             amount=amount,
             currency="eur",
             customer_name=data["customer_name"],
@@ -118,16 +113,14 @@ class GuestConfirmCash(APIView):
             if "already consumed" in error_msg:
                 # Rejeu détecté : renvoyer 409 Conflict avec l'id de commande
                 # existante pour que le client puisse afficher la confirmation.
-                from api.models import Order
-                existing = Order.objects.filter(
-                    restaurant=draft.restaurant,
-                    guest_phone=draft.phone,
-                    created_at__gte=draft.created_at,
-                ).order_by("-id").first()
+                # `draft` est la snapshot d'avant l'appel : relire le lien.
+                existing_id = DraftOrder.objects.filter(pk=draft.pk).values_list(
+                    "order_id", flat=True
+                ).first()
                 return Response(
                     {
                         "detail": "Order already created for this draft.",
-                        "order_id": existing.id if existing else None,
+                        "order_id": existing_id,
                     },
                     status=status.HTTP_409_CONFLICT,
                 )
@@ -144,20 +137,51 @@ class GuestConfirmCash(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class GuestDraftStatus(APIView):
-    permission_classes = [permissions.AllowAny]
-
-    def get(self, request):
-        q = DraftStatusQuery(data=request.query_params)
-        q.is_valid(raise_exception=True)
-        draft = get_object_or_404(DraftOrder, id=q.validated_data["draft_order_id"])
-        from api.models import Order
-        o = Order.objects.filter(
-            restaurant=draft.restaurant,
-            guest_phone=draft.phone,
-            created_at__gte=draft.created_at
-        ).order_by("-id").first()
-        return Response(DraftStatusResponse({
-            "status": draft.status,
-            "order_id": o.id if o else None
-        }).data)
\ No newline at end of file
+def _throttle_wait(request):
+    """
+    Throttles DRF par défaut (anon/user), appliqués à la main : la vue
+    async ne passe pas par APIView.check_throttles. Retourne le délai
+    d'attente en secondes si la requête est refusée, sinon None.
+    """
+    throttles = [throttle() for throttle in api_settings.DEFAULT_THROTTLE_CLASSES]
+    waits = [
+        throttle.wait() for throttle in throttles
+        if not throttle.allow_request(request, None)
+    ]
+    if not waits:
+        return None
+    return max((wait for wait in waits if wait is not None), default=0)
+
+
+@require_GET
+async def guest_draft_status(request):
+    """
+    Statut d'un brouillon invité et commande produite (vue async, servie par ASGI).
+
+    `wait` (secondes) : long-polling — tant qu'aucune commande n'est créée,
+    la réponse attend la confirmation (webhook Stripe, espèces) au lieu
+    d'obliger le client à interroger en boucle. L'attente n'occupe ni
+    thread ni connexion à la base.
+    """
+    wait = await sync_to_async(_throttle_wait)(request)
+    if wait is not None:
+        response = JsonResponse({"detail": "Request was throttled."}, status=429)
+        response["Retry-After"] = str(int(wait))
+        return response
+
+    q = DraftStatusPollQuery(data=request.GET)
+    if not q.is_valid():
+        return JsonResponse(q.errors, status=400)
+    draft = await DraftOrder.objects.only("id", "status", "order_id").filter(
+        id=q.validated_data["draft_order_id"]
+    ).afirst()
+    if draft is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    if q.validated_data["wait"] and is_pending(draft):
+        await wait_for_draft(draft.id, q.validated_data["wait"])
+        await draft.arefresh_from_db(fields=["status", "order"])
+    return JsonResponse(DraftStatusResponse({
+        "status": draft.status,
+        "order_id": draft.order_id
+    }).data)
@@ -8,6 +8,8 @@ from django.db import transaction
 from api.models import Menu, MenuItem, MenuCategory, MenuSubCategory, Restaurant
 from api.serializers import MenuSerializer, MenuItemSerializer
 from api.permissions import IsRestaurateur, IsOwnerOrReadOnly
+from api.services.authz import owned_restaurant_ids, owns_restaurant
+from api.services.compiled_menu import MENUS, serve_document
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 
@@ -23,7 +25,7 @@ class MenuViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsRestaurateur, IsOwnerOrReadOnly]
 
     def get_queryset(self):
-        qs = Menu.objects.filter(restaurant__owner=self.request.user.restaurateur_profile)
+        qs = Menu.objects.filter(restaurant_id__in=owned_restaurant_ids(self.request))
         restaurant_id = self.request.query_params.get('restaurant')
         if restaurant_id:
             qs = qs.filter(restaurant_id=restaurant_id)
@@ -31,7 +33,7 @@ class MenuViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         restaurant = serializer.validated_data.get('restaurant')
-        if not restaurant or restaurant.owner != self.request.user.restaurateur_profile:
+        if not restaurant or not owns_restaurant(self.request, restaurant.id):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Ce restaurant ne vous appartient pas.")
         with transaction.atomic():
@@ -192,15 +194,9 @@ class MenuViewSet(viewsets.ModelViewSet):
         authentication_classes=[],
     )
     def public_by_restaurant(self, request, restaurant_id=None):
-        qs = Menu.objects.filter(
-            restaurant_id=restaurant_id,
-            is_available=True
-        ).prefetch_related("items")  # si le serializer inclut les items
-        # Contexte explicite : garantit que `request` (donc ?lang=) est
-        # disponible dans MenuItemSerializer pour resoudre display_name /
-        # available_languages selon la langue demandee.
-        serializer = self.get_serializer(qs, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Document compilé par (restaurant, ?lang=) servi depuis le cache,
+        # avec ETag / 304 et corps précompressé (cf. services.compiled_menu).
+        return serve_document(request, MENUS, restaurant_id)
     
 @extend_schema(tags=["Menu Items"])
 class MenuItemViewSet(viewsets.ModelViewSet):
@@ -214,7 +210,7 @@ class MenuItemViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         try:
-            return MenuItem.objects.filter(menu__restaurant__owner=self.request.user.restaurateur_profile)
+            return MenuItem.objects.filter(menu__restaurant_id__in=owned_restaurant_ids(self.request))
         except AttributeError:
             # Si l'utilisateur n'a pas de restaurateur_profile
             return MenuItem.objects.none()
@@ -8,8 +8,6 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from django.db.models import Q
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
@@ -26,6 +24,16 @@ from api.serializers.notification_serializers import (
     RegisterTokenSerializer,
     UnreadCountSerializer
 )
+from api.services.notification_inbox import (
+    NOTIFICATION_PAGE_SIZE,
+    NOTIFICATION_PAGE_SIZE_MAX,
+    delete_notification,
+    inbox,
+    inbox_page,
+    mark_all_read,
+    mark_read,
+    unread_count
+)
 
 import logging
 
@@ -286,15 +294,24 @@ class NotificationListView(APIView):
     @extend_schema(
         summary="Liste des notifications",
         description="""
-        Récupère les notifications de l'utilisateur avec pagination.
+        Récupère les notifications de l'utilisateur, plus récentes d'abord.
+        
+        **Pagination par curseur (recommandée):** passer `cursor` (vide pour
+        la première page) puis la valeur `next_cursor` de la réponse ;
+        `next_cursor` vaut null sur la dernière page.
+        
+        **Pagination par numéro de page (historique):** sans `cursor`,
+        `page` et `page_size` avec `count` et `total_pages`.
         
         **Paramètres de requête:**
+        - `cursor`: Curseur de la page suivante
         - `page`: Numéro de page (défaut: 1)
         - `page_size`: Taille de page (défaut: 20, max: 100)
         - `unread_only`: Si true, ne retourne que les non lues
         - `type`: Filtrer par type de notification
         """,
         parameters=[
+            OpenApiParameter("cursor", OpenApiTypes.STR, description="Curseur de la page suivante"),
             OpenApiParameter("page", OpenApiTypes.INT, description="Numéro de page"),
             OpenApiParameter("page_size", OpenApiTypes.INT, description="Taille de page"),
             OpenApiParameter("unread_only", OpenApiTypes.BOOL, description="Non lues uniquement"),
@@ -303,28 +320,37 @@ class NotificationListView(APIView):
         responses={200: NotificationListSerializer}
     )
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        page_size = min(int(request.query_params.get('page_size', 20)), 100)
+        page_size = min(
+            int(request.query_params.get('page_size', NOTIFICATION_PAGE_SIZE)),
+            NOTIFICATION_PAGE_SIZE_MAX
+        )
         unread_only = request.query_params.get('unread_only', 'false').lower() == 'true'
         notification_type = request.query_params.get('type')
         
-        queryset = Notification.objects.filter(user=request.user)
+        queryset = inbox(request.user, unread_only, notification_type)
         
-        if unread_only:
-            queryset = queryset.filter(is_read=False)
-        
-        if notification_type:
-            queryset = queryset.filter(notification_type=notification_type)
-        
-        queryset = queryset.filter(
-            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
-        )
+        if 'cursor' in request.query_params:
+            try:
+                notifications, next_cursor = inbox_page(
+                    queryset, request.query_params['cursor'], page_size
+                )
+            except ValueError:
+                return Response(
+                    {"error": "Curseur invalide"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response({
+                "results": NotificationSerializer(notifications, many=True).data,
+                "page_size": page_size,
+                "next_cursor": next_cursor
+            })
         
+        page = int(request.query_params.get('page', 1))
         total = queryset.count()
         start = (page - 1) * page_size
         end = start + page_size
         
-        notifications = queryset.order_by('-created_at')[start:end]
+        notifications = queryset[start:end]
         
         return Response({
             "results": NotificationSerializer(notifications, many=True).data,
@@ -362,7 +388,7 @@ class NotificationDetailView(APIView):
             id=notification_id,
             user=request.user
         )
-        notification.delete()
+        delete_notification(notification)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -382,7 +408,7 @@ class MarkNotificationReadView(APIView):
             id=notification_id,
             user=request.user
         )
-        notification.mark_as_read()
+        mark_read(notification)
         return Response(NotificationSerializer(notification).data)
 
 
@@ -407,13 +433,7 @@ class MarkAllReadView(APIView):
         }
     )
     def post(self, request):
-        count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        count = mark_all_read(request.user)
         
         return Response({"marked_count": count})
 
@@ -429,14 +449,7 @@ class UnreadCountView(APIView):
         responses={200: UnreadCountSerializer}
     )
     def get(self, request):
-        count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).filter(
-            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
-        ).count()
-        
-        return Response({"unread_count": count})
+        return Response({"unread_count": unread_count(request.user.id)})
 
 
 # =============================================================================
@@ -462,8 +475,8 @@ class TestNotificationView(APIView):
         title = request.data.get('title', '🔔 Notification de test')
         body = request.data.get('body', 'Ceci est une notification de test depuis EatQuickeR')
         
-        success = notification_service.send_to_user(
-            user_id=request.user.id,
+        success = notification_service.send_to_users(
+            [request.user.id],
             title=title,
             body=body,
             data={"test": True},
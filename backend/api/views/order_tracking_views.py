@@ -6,6 +6,8 @@ from django.db.models import Avg, F, Q, Count
 from django.utils import timezone
 from datetime import timedelta
 from ..models import Order, OrderItem, MenuItem
+from ..services.authz import owns_restaurant
+from ..services.prep_time import load_prep_time_model
 from collections import defaultdict
 import hmac
 import math
@@ -20,31 +22,27 @@ def _check_progress_access(request, order) -> bool:
 
     Trois chemins légitimes :
     1. Utilisateur authentifié propriétaire de la commande (order.user == request.user).
-    2. Restaurateur propriétaire du restaurant (order.restaurant.owner == user.restaurateur_profile).
+    2. Restaurateur propriétaire du restaurant (contexte d'autorisation, api.services.authz).
     3. Commande invité (order.user is None) + header X-Receipt-Token valide.
 
     Retourne True si l'accès est autorisé, False sinon.
     """
     if request.user and request.user.is_authenticated:
         # Chemin 1 : client propriétaire
-        if order.user is not None and order.user == request.user:
+        if order.user_id is not None and order.user_id == request.user.pk:
             return True
 
         # Chemin 2 : restaurateur propriétaire du restaurant
-        try:
-            profile = request.user.restaurateur_profile
-            if order.restaurant.owner == profile:
-                return True
-        except Exception:
-            pass
+        if owns_restaurant(request, order.restaurant_id):
+            return True
 
         # Aucun des chemins authentifiés ne correspond → refus
         # (évite de tomber dans le chemin invité avec un JWT valide mais étranger)
-        if order.user is not None:
+        if order.user_id is not None:
             return False
 
     # Chemin 3 : commande invité (order.user is None) + token opaque
-    if order.user is not None:
+    if order.user_id is not None:
         return False
 
     provided_token = (
@@ -115,7 +113,9 @@ class OrderTrackingViewSet(viewsets.ViewSet):
             )
         
         # Récupérer les items avec leurs catégories
-        order_items = order.items.select_related('menu_item').all()
+        order_items = list(
+            order.items.select_related('menu_item__category__restaurant')
+        )
         
         if not order_items:
             return Response(
@@ -123,12 +123,19 @@ class OrderTrackingViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Temps appris du restaurant, à l'heure de la commande (une requête)
+        prep_model = load_prep_time_model(
+            order.restaurant_id,
+            {item.menu_item.category_id for item in order_items if item.menu_item_id},
+            at=order.created_at,
+        )
+        
         # Calculer la progression réelle basée sur le statut
-        real_progress = self._calculate_real_order_progress(order)
+        real_progress = self._calculate_real_order_progress(order, prep_model)
         
         # Grouper les items par catégorie avec progression réelle
         categories_progress = self._calculate_categories_progress(
-            order, order_items, real_progress
+            order, order_items, real_progress, prep_model
         )
         
         # Progression globale pondérée
@@ -158,10 +165,12 @@ class OrderTrackingViewSet(viewsets.ViewSet):
                 cat['estimated_time_minutes'] for cat in categories_progress
             ),
             'real_time_insights': insights,
-            'completion_prediction': self._predict_completion_time(order, categories_progress)
+            'completion_prediction': self._predict_completion_time(
+                order, categories_progress, prep_model
+            )
         })
     
-    def _calculate_real_order_progress(self, order):
+    def _calculate_real_order_progress(self, order, prep_model):
         """
         Calcule la progression réelle basée sur le statut de la commande
         avec des étapes intermédiaires plus précises
@@ -182,7 +191,7 @@ class OrderTrackingViewSet(viewsets.ViewSet):
             elapsed_minutes = time_elapsed.total_seconds() / 60
             
             # Calcul du temps moyen pour ce restaurant
-            avg_prep_time = self._get_restaurant_avg_prep_time(order.restaurant)
+            avg_prep_time = self._get_restaurant_avg_prep_time(prep_model)
             
             if avg_prep_time > 0:
                 time_factor = min(elapsed_minutes / avg_prep_time, 1.0)
@@ -191,7 +200,7 @@ class OrderTrackingViewSet(viewsets.ViewSet):
         
         return base_progress
     
-    def _calculate_categories_progress(self, order, order_items, real_progress):
+    def _calculate_categories_progress(self, order, order_items, real_progress, prep_model):
         """
         Calcule la progression par catégorie avec étapes de préparation
         """
@@ -207,14 +216,13 @@ class OrderTrackingViewSet(viewsets.ViewSet):
             })
         
         categories_progress = []
-        restaurant = order.restaurant
         
         for category_obj, items in items_by_category.items():
             category_name = str(category_obj)
             
             # Temps estimé pour cette catégorie
             avg_time = self._calculate_category_average_time(
-                restaurant, category_obj
+                prep_model, category_obj
             )
             
             max_prep_time = max(
@@ -721,7 +729,7 @@ class OrderTrackingViewSet(viewsets.ViewSet):
         
         return insights
     
-    def _predict_completion_time(self, order, categories):
+    def _predict_completion_time(self, order, categories, prep_model):
         """
         Prédit le temps de complétion basé sur les données réelles
         """
@@ -749,10 +757,12 @@ class OrderTrackingViewSet(viewsets.ViewSet):
             'completed': False,
             'estimated_remaining_minutes': round(avg_remaining, 1),
             'predicted_completion_time': predicted_completion.isoformat(),
-            'confidence': self._calculate_prediction_confidence(order, categories)
+            'confidence': self._calculate_prediction_confidence(
+                order, categories, prep_model
+            )
         }
     
-    def _calculate_prediction_confidence(self, order, categories):
+    def _calculate_prediction_confidence(self, order, categories, prep_model):
         """
         Calcule le niveau de confiance de la prédiction (0-100)
         """
@@ -760,7 +770,7 @@ class OrderTrackingViewSet(viewsets.ViewSet):
         factors = []
         
         # Facteur 1: Historique du restaurant
-        historical_data = self._get_restaurant_historical_accuracy(order.restaurant)
+        historical_data = self._get_restaurant_historical_accuracy(prep_model)
         factors.append(historical_data)
         
         # Facteur 2: Cohérence de la progression actuelle
@@ -775,18 +785,11 @@ class OrderTrackingViewSet(viewsets.ViewSet):
         confidence = sum(factors) / len(factors)
         return round(confidence, 1)
     
-    def _get_restaurant_historical_accuracy(self, restaurant):
+    def _get_restaurant_historical_accuracy(self, prep_model):
         """
         Récupère la précision historique du restaurant (0-100)
         """
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        completed = Order.objects.filter(
-            restaurant=restaurant,
-            status='served',
-            served_at__isnull=False,
-            created_at__gte=thirty_days_ago
-        ).count()
+        completed = prep_model.samples
         
         if completed > 20:
             return 85  # Haute confiance
@@ -948,53 +951,22 @@ class OrderTrackingViewSet(viewsets.ViewSet):
         return min(total_score, 100)
     
     # Méthodes utilitaires existantes améliorées
-    def _get_restaurant_avg_prep_time(self, restaurant):
+    def _get_restaurant_avg_prep_time(self, prep_model):
         """
         Obtient le temps moyen de préparation pour ce restaurant
         """
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        completed_orders = Order.objects.filter(
-            restaurant=restaurant,
-            status='served',
-            served_at__isnull=False,
-            created_at__gte=thirty_days_ago
-        )
-        
-        times = []
-        for order in completed_orders:
-            time_diff = (order.served_at - order.created_at).total_seconds() / 60
-            times.append(time_diff)
-        
-        if times:
-            return sum(times) / len(times)
+        avg_minutes = prep_model.minutes()
+        if avg_minutes is not None:
+            return avg_minutes
         return 25  # Défaut
     
-    def _calculate_category_average_time(self, restaurant, category):
+    def _calculate_category_average_time(self, prep_model, category):
         """
         Temps moyen pour une catégorie spécifique
         """
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        completed_orders = Order.objects.filter(
-            restaurant=restaurant,
-            status='served',
-            served_at__isnull=False,
-            created_at__gte=thirty_days_ago
-        )
-        
-        category_times = []
-        for order in completed_orders:
-            has_category = order.items.filter(
-                menu_item__category=category
-            ).exists()
-            
-            if has_category:
-                time_diff = (order.served_at - order.created_at).total_seconds() / 60
-                category_times.append(time_diff)
-        
-        if category_times:
-            return round(sum(category_times) / len(category_times))
+        avg_minutes = prep_model.minutes(category.id) if category else None
+        if avg_minutes is not None:
+            return round(avg_minutes)
         
         # Temps par défaut
         default_times = {
@@ -3,9 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q, Avg, Sum
 from django.utils import timezone
-from api.models import Order, Table, MenuItem
+from api.models import Order, Table, MenuItem, Restaurant
 from api.serializers.order_serializers import (
     OrderListSerializer,
     OrderDetailSerializer, 
@@ -22,7 +21,12 @@ from api.consumers import (
 )
 from api.permissions import IsRestaurateur, IsOwnerOrReadOnly, IsValidatedRestaurateur
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+from api.services.daily_stats import order_rollup, order_rows, count_where, day_bounds
+from api.services.kitchen_feed import decode_cursor, kitchen_feed
+from api.services.prep_time import predict_prep_minutes, static_prep_minutes
+from collections import defaultdict
 from datetime import timedelta
+from decimal import Decimal
 import uuid
 import logging
 
@@ -89,7 +93,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         if self.action == 'create':
             # Création ouverte (client ou restaurateur)
             permission_classes = [AllowAny]
-        elif self.action in ['update_status', 'mark_as_paid', 'kitchen_view']:
+        elif self.action in ['update_status', 'mark_as_paid', 'kitchen_view', 'kitchen_feed']:
             # Actions staff uniquement
             permission_classes = [IsAuthenticated, IsRestaurateur]
         else:
@@ -394,10 +398,20 @@ class OrderViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Commandes actives groupées par table
-        active_orders = self.get_queryset().filter(
+        active_orders = list(self.get_queryset().filter(
             restaurant_id=restaurant_id,
             status__in=['pending', 'confirmed', 'preparing', 'ready']
-        ).select_related('restaurant').prefetch_related('items__menu_item', 'items__components__menu_item')
+        ).select_related('restaurant').prefetch_related('items__menu_item', 'items__components__menu_item'))
+
+        # Attente par table : commande non prête la plus ancienne, calculée
+        # sur le lot chargé plutôt qu'une requête par commande
+        now = timezone.now()
+        oldest_waiting = {}
+        for order in active_orders:
+            if order.status != 'ready':
+                key = order.table_number or 'Takeaway'
+                if key not in oldest_waiting or order.created_at < oldest_waiting[key]:
+                    oldest_waiting[key] = order.created_at
 
         # Grouper par table
         tables = {}
@@ -420,10 +434,11 @@ class OrderViewSet(viewsets.ModelViewSet):
             ).data
 
             tables[table_key]['orders'].append(order_data)
-            tables[table_key]['total_items'] += order.items.count()
+            tables[table_key]['total_items'] += len(order.items.all())
 
             # Calculer l'urgence
-            waiting_time = order.get_table_waiting_time()
+            oldest = oldest_waiting.get(table_key)
+            waiting_time = int((now - oldest).total_seconds() / 60) if oldest else 0
             if waiting_time > 30:
                 tables[table_key]['urgency_level'] = 'urgent'
             elif waiting_time > 20:
@@ -441,10 +456,48 @@ class OrderViewSet(viewsets.ModelViewSet):
         return Response({
             'restaurant_id': restaurant_id,
             'tables': sorted_tables,
-            'total_active_orders': active_orders.count(),
-            'last_updated': timezone.now().isoformat()
+            'total_active_orders': len(active_orders),
+            'last_updated': now.isoformat()
         })
 
+    @extend_schema(
+        summary="Flux cuisine",
+        description=(
+            "Tickets compacts des commandes en cours (lignes, composants, "
+            "instructions, minutes écoulées). Avec `since`, seules les commandes "
+            "modifiées après le curseur sont renvoyées, avec `active_ids` pour "
+            "retirer les tickets terminés. Les mêmes tickets sont poussés sur "
+            "ws/kitchen/<restaurant_id>/."
+        ),
+        parameters=[
+            OpenApiParameter(name="restaurant", type=int, required=True, description="ID du restaurant"),
+            OpenApiParameter(name="since", type=str, description="Curseur renvoyé par l'appel précédent"),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    def kitchen_feed(self, request):
+        """Flux cuisine incrémental (tickets en cours depuis un curseur)"""
+        restaurant_id = request.query_params.get('restaurant')
+        if not restaurant_id:
+            return Response({
+                'error': 'ID restaurant requis'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_cursor(since)
+            except (ValueError, OverflowError, OSError):
+                return Response({
+                    'error': 'Curseur invalide'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        feed = kitchen_feed(
+            self.get_queryset().filter(restaurant_id=restaurant_id),
+            since=since or None,
+        )
+        return Response({'restaurant_id': restaurant_id, **feed})
+
     @extend_schema(
         summary="Statistiques des commandes",
         description="Statistiques détaillées des commandes par période.",
@@ -459,33 +512,48 @@ class OrderViewSet(viewsets.ModelViewSet):
         restaurant_id = request.query_params.get('restaurant')
         period = request.query_params.get('period', 'today')
 
-        queryset = self.get_queryset()
-        if restaurant_id:
-            queryset = queryset.filter(restaurant_id=restaurant_id)
-
-        # Filtrer par période
-        now = timezone.now()
-        if period == 'today':
-            queryset = queryset.filter(created_at__date=now.date())
-        elif period == 'week':
-            start_week = now - timedelta(days=7)
-            queryset = queryset.filter(created_at__gte=start_week)
-        elif period == 'month':
-            start_month = now - timedelta(days=30)
-            queryset = queryset.filter(created_at__gte=start_month)
+        # Restaurateur : agrégat journalier (jours complets) + commandes du
+        # jour. Client : ses propres commandes, lues directement.
+        today = timezone.localdate()
+        start_day = {
+            'today': today,
+            'week': today - timedelta(days=7),
+            'month': today - timedelta(days=30),
+        }.get(period)
+
+        if hasattr(request.user, 'restaurateur_profile'):
+            restaurants = Restaurant.objects.filter(owner=request.user.restaurateur_profile)
+            if restaurant_id:
+                restaurants = restaurants.filter(id=restaurant_id)
+            rows = order_rollup(list(restaurants.values_list('id', flat=True)), start_day)
+        else:
+            queryset = self.get_queryset()
+            if restaurant_id:
+                queryset = queryset.filter(restaurant_id=restaurant_id)
+            if start_day:
+                queryset = queryset.filter(created_at__gte=day_bounds(start_day)[0])
+            rows = order_rows(queryset)
 
         # Calculer les statistiques
-        stats = queryset.aggregate(
-            total_orders=Count('id'),
-            pending=Count('id', filter=Q(status='pending')),
-            confirmed=Count('id', filter=Q(status='confirmed')),
-            preparing=Count('id', filter=Q(status='preparing')),
-            ready=Count('id', filter=Q(status='ready')),
-            served=Count('id', filter=Q(status='served')),
-            cancelled=Count('id', filter=Q(status='cancelled')),
-            paid_orders=Count('id', filter=Q(payment_status='paid')),
-            total_revenue=Sum('total_amount', filter=Q(payment_status='paid')) or 0,
-        )
+        orders_by_status = {}
+        for row in rows:
+            orders_by_status[row['status']] = orders_by_status.get(row['status'], 0) + row['orders_count']
+
+        stats = {
+            'total_orders': count_where(rows),
+            'pending': orders_by_status.get('pending', 0),
+            'confirmed': orders_by_status.get('confirmed', 0),
+            'preparing': orders_by_status.get('preparing', 0),
+            'ready': orders_by_status.get('ready', 0),
+            'served': orders_by_status.get('served', 0),
+            'cancelled': orders_by_status.get('cancelled', 0),
+            'orders_by_status': orders_by_status,
+            'paid_orders': count_where(rows, payment_status='paid'),
+            'total_revenue': sum(
+                (row['total_amount'] for row in rows if row['payment_status'] == 'paid'),
+                Decimal('0')
+            ),
+        }
 
         # Calculs dérivés
         stats['unpaid_orders'] = stats['total_orders'] - stats['paid_orders']
@@ -495,13 +563,11 @@ class OrderViewSet(viewsets.ModelViewSet):
         else:
             stats['average_order_value'] = 0
 
-        # Temps de préparation moyen
-        served_orders = queryset.filter(status='served', ready_at__isnull=False)
-        if served_orders.exists():
-            avg_prep = served_orders.aggregate(
-                avg_time=Avg('ready_at') - Avg('created_at')
-            )['avg_time']
-            stats['average_preparation_time'] = int(avg_prep.total_seconds() / 60) if avg_prep else 0
+        # Temps de préparation moyen (commandes servies avec ready_at)
+        prep_count = sum(row['prep_time_count'] for row in rows)
+        if prep_count:
+            prep_total = sum((row['prep_time_total'] for row in rows), timedelta())
+            stats['average_preparation_time'] = int(prep_total.total_seconds() / prep_count / 60)
         else:
             stats['average_preparation_time'] = 0
 
@@ -624,24 +690,26 @@ class OrderViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            total_minutes = 0
-
+            quantities = defaultdict(int)
             for item in items_data:
-                menu_item_id = item.get('menu_item')
-                quantity = item.get('quantity', 1)
-
                 try:
-                    menu_item = MenuItem.objects.get(id=menu_item_id)
-                    prep_time = getattr(menu_item, 'preparation_time', 5)  # 5min par défaut
-                    total_minutes += prep_time * quantity
-                except MenuItem.DoesNotExist:
+                    quantities[int(item.get('menu_item'))] += int(item.get('quantity', 1))
+                except (TypeError, ValueError):
                     continue
 
-            # Ajouter buffer et temps de base
-            base_time = 5  # 5 minutes de base
-            buffer = max(5, total_minutes * 0.2)  # 20% de buffer, minimum 5min
-
-            estimated_minutes = int(base_time + total_minutes + buffer)
+            menu_items = list(
+                MenuItem.objects.filter(id__in=quantities)
+                .values_list('id', 'category_id', 'preparation_time', 'menu__restaurant_id')
+            )
+            lines = [
+                (category_id, preparation_time, quantities[menu_item_id])
+                for menu_item_id, category_id, preparation_time, _ in menu_items
+            ]
+
+            if menu_items:
+                estimated_minutes = predict_prep_minutes(menu_items[0][3], lines)
+            else:
+                estimated_minutes = static_prep_minutes(lines)
 
             return Response({
                 'estimated_minutes': estimated_minutes,
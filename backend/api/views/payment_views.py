@@ -7,7 +7,6 @@ from django.conf import settings
 from django.core.cache import cache
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.db import transaction
 from decimal import Decimal
 import logging
 
@@ -15,9 +14,10 @@ from api.utils.commission_utils import calculate_platform_fee_cents, build_strip
 
 from api.models import (
     Order, RestaurateurProfile,
-    DraftOrder, OrderItem, MenuItem,
+    DraftOrder,
     SplitPaymentPortion
 )
+from api.services import create_order_from_draft
 from api.throttles import StripeCheckoutThrottle
 import stripe
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
@@ -33,68 +33,6 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 WEBHOOK_EVENT_DEDUP_TTL = 60 * 60 * 24
 
 
-# ---------- Helper : transformer une DraftOrder en Order ----------
-@transaction.atomic
-def _create_order_from_draft(draft: DraftOrder, paid: bool) -> Order:
-    """
-    Crée une Order finale depuis une DraftOrder (invité).
-    - Montants : draft.amount (centimes) -> Order (euros Decimal)
-    - Items : copie MenuItem, quantité, prix unitaire
-    - Statuts : payment_status en fonction de 'paid'
-    """
-    # Gestion expiration simple (si ton modèle expose is_expired(), utilise-le)
-    if hasattr(draft, "is_expired") and draft.is_expired():
-        draft.status = "expired"
-        draft.save(update_fields=["status"])
-        raise ValueError("Draft expired")
-
-    subtotal = Decimal(draft.amount) / Decimal(100)  # centimes -> euros
-    tax_amount = Decimal("0.00")  # adapte si TVA
-    total_amount = subtotal + tax_amount
-
-    order = Order.objects.create(
-        restaurant=draft.restaurant,
-        order_type="dine_in" if draft.table_number else "takeaway",
-        table_number=draft.table_number or "",
-        customer_name=getattr(draft, "customer_name", "") or "",
-        phone=getattr(draft, "phone", "") or "",
-        status="pending",
-        payment_status="paid" if paid else "pending",
-        payment_method=draft.payment_method,
-        subtotal=subtotal,
-        tax_amount=tax_amount,
-        total_amount=total_amount,
-        notes="",
-        source="guest",
-        guest_contact_name=getattr(draft, "customer_name", "") or "",
-        guest_phone=getattr(draft, "phone", "") or "",
-        guest_email=getattr(draft, "email", None),
-    )
-
-    # Création des items
-    # draft.items est supposé être un JSON du type [{menu_item_id, quantity, options?}, ...]
-    for it in draft.items or []:
-        mi = MenuItem.objects.get(
-            id=it["menu_item_id"],
-            menu__restaurant=draft.restaurant
-        )
-        qty = int(it["quantity"])
-        unit_price = mi.price  # Decimal en euros (selon ton modèle)
-        OrderItem.objects.create(
-            order=order,
-            # ⚠️ Si ton OrderItem pointe sur un autre champ, adapte ici :
-            menu_item=mi,
-            quantity=qty,
-            unit_price=unit_price,
-            total_price=unit_price * qty,
-            # Si tu as un champ 'customizations' JSONField :
-            customizations=it.get("options") or {},
-            special_instructions=""
-        )
-
-    return order
-
-
 # ---------- Helper : contrôle de propriété d'une commande ----------
 def _is_order_owner(user, order: Order) -> bool:
     """
@@ -478,12 +416,10 @@ class StripeWebhookView(APIView):
             logger.error(f"DraftOrder {draft_order_id} not found for webhook")
             return
 
-        if draft.status == 'confirmed':
-            logger.info(f"DraftOrder {draft_order_id} already confirmed (idempotent)")
-            return
-
         try:
-            order = _create_order_from_draft(draft, paid=True)
+            # Même chemin que GuestConfirmCash : verrou, garde anti-rejeu,
+            # lien draft → commande et réveil des long-polls du statut.
+            order = create_order_from_draft(draft, paid=True)
             logger.info(
                 f"Order {order.id} created from DraftOrder {draft_order_id} "
                 f"via webhook (PI {payment_intent_id})"
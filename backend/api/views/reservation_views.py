@@ -3,11 +3,13 @@ API Réservations.
 
 Endpoints (router: r'reservations') :
   GET  /reservations/availability/        → créneaux disponibles (public)
+  GET  /reservations/calendar/            → créneaux sur une plage de jours (public)
   POST /reservations/                     → créer une réservation (public)
   GET  /reservations/mine/                → réservations du client connecté
   GET  /reservations/planning/            → planning restaurateur (jour)
   GET  /reservations/history/             → historique/à venir restaurateur
   POST /reservations/{id}/set_status/     → statut manuel (restaurateur)
+  POST /reservations/{id}/reassign/       → changer de table (restaurateur)
   POST /reservations/{id}/pre_order/      → pré-commande + PaymentIntent 100%
   POST /reservations/{id}/cancel/         → annulation (+ refund si éligible)
   POST /reservations/{id}/check_in/       → arrivée client (scan QR table)
@@ -34,36 +36,29 @@ from api.models.reservation_models import reservation_payment_deadline
 from api.serializers.order_serializers import OrderCreateSerializer
 from api.serializers.reservation_serializers import (
     AvailabilityQuerySerializer,
+    AvailabilityRangeQuerySerializer,
     ReservationCreateSerializer,
     ReservationSerializer,
 )
+from api.services.authz import owns_restaurant
+from api.services.availability import (
+    DEFAULT_DURATION_MINUTES,
+    AvailabilityIndex,
+    available_slots,
+    periods_for,
+    weekly_periods,
+)
 from api.utils.commission_utils import build_stripe_payment_params
 from api.utils.floorplan_notifications import notify_floorplan_update
 
 logger = logging.getLogger(__name__)
 
-SLOT_STEP_MINUTES = 30
-DEFAULT_DURATION_MINUTES = 90
-
 
 class ReservationCreateThrottle(AnonRateThrottle):
     scope = 'reservation_create'
     rate = '10/hour'
 
 
-def _overlapping(table_ids, starts_at, ends_at, exclude_id=None):
-    """Réservations bloquantes qui chevauchent [starts_at, ends_at)."""
-    qs = Reservation.objects.filter(
-        table_id__in=table_ids,
-        status__in=Reservation.BLOCKING_STATUSES,
-        starts_at__lt=ends_at,
-        ends_at__gt=starts_at,
-    )
-    if exclude_id:
-        qs = qs.exclude(id=exclude_id)
-    return qs
-
-
 def _candidate_tables(restaurant, party_size):
     """Tables pouvant accueillir party_size, rallonge comprise.
 
@@ -92,23 +87,6 @@ def _candidate_tables(restaurant, party_size):
     )
 
 
-def _day_periods(restaurant, date):
-    """Périodes d'ouverture (start_time, end_time) pour la date donnée.
-
-    OpeningHours.day_of_week : 0 = dimanche (convention frontend existante).
-    Python date.weekday()    : 0 = lundi → conversion.
-    """
-    dow = (date.weekday() + 1) % 7
-    oh = restaurant.opening_hours.filter(day_of_week=dow, is_closed=False).first()
-    if not oh:
-        return []
-    periods = [(p.start_time, p.end_time) for p in oh.periods.all()]
-    if not periods and oh.opening_time and oh.closing_time:
-        # Rétrocompatibilité ancien format
-        periods = [(oh.opening_time, oh.closing_time)]
-    return periods
-
-
 def _is_order_paid(order):
     return order and order.payment_status == 'paid'
 
@@ -162,50 +140,9 @@ class ReservationViewSet(viewsets.GenericViewSet):
                 'reason': 'no_table_for_party_size',
             })
 
-        table_ids = [t.id for t in tables]
-        duration = timedelta(minutes=DEFAULT_DURATION_MINUTES)
-        step = timedelta(minutes=SLOT_STEP_MINUTES)
-        tz = timezone.get_current_timezone()
-        now = timezone.now()
-
-        # Précharger toutes les résas bloquantes de la journée en une requête
-        day_start = timezone.make_aware(
-            datetime.combine(data['date'], datetime.min.time()), tz
-        )
-        day_end = day_start + timedelta(days=1)
-        day_reservations = list(
-            _overlapping(table_ids, day_start, day_end)
-            .values('table_id', 'starts_at', 'ends_at')
-        )
-
-        slots = []
-        for start_time, end_time in _day_periods(restaurant, data['date']):
-            period_start = timezone.make_aware(
-                datetime.combine(data['date'], start_time), tz
-            )
-            period_end = timezone.make_aware(
-                datetime.combine(data['date'], end_time), tz
-            )
-            cursor = period_start
-            while cursor + duration <= period_end:
-                if cursor > now + timedelta(minutes=30):
-                    slot_end = cursor + duration
-                    free_tables = sum(
-                        1 for t in tables
-                        if not any(
-                            r['table_id'] == t.id
-                            and r['starts_at'] < slot_end
-                            and r['ends_at'] > cursor
-                            for r in day_reservations
-                        )
-                    )
-                    if free_tables > 0:
-                        slots.append({
-                            'starts_at': cursor.isoformat(),
-                            'time': timezone.localtime(cursor).strftime('%H:%M'),
-                            'available_tables': free_tables,
-                        })
-                cursor += step
+        slots = available_slots(
+            restaurant, [t.id for t in tables], [data['date']]
+        )[data['date']]
 
         return Response({
             'date': data['date'].isoformat(),
@@ -217,6 +154,59 @@ class ReservationViewSet(viewsets.GenericViewSet):
             'slots': slots,
         })
 
+    @extend_schema(
+        summary="Calendrier des disponibilités",
+        description=(
+            "Créneaux réservables jour par jour sur une plage "
+            "(?restaurant_id=&start_date=&end_date=&party_size=, 31 jours max)."
+        ),
+    )
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        query = AvailabilityRangeQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+
+        try:
+            restaurant = Restaurant.objects.get(
+                id=data['restaurant_id'], is_active=True
+            )
+        except Restaurant.DoesNotExist:
+            return Response(
+                {'error': 'Restaurant introuvable'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if not getattr(restaurant, 'reservations_enabled', False):
+            return Response(
+                {'error': 'reservations_disabled',
+                 'message': "Ce restaurant n'accepte pas les réservations en ligne."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        days = (data['end_date'] - data['start_date']).days + 1
+        dates = [data['start_date'] + timedelta(days=i) for i in range(days)]
+        table_ids = list(
+            _candidate_tables(restaurant, data['party_size'])
+            .values_list('id', flat=True)
+        )
+        slots_by_date = available_slots(restaurant, table_ids, dates)
+
+        return Response({
+            'start_date': data['start_date'].isoformat(),
+            'end_date': data['end_date'].isoformat(),
+            'party_size': data['party_size'],
+            'duration_minutes': DEFAULT_DURATION_MINUTES,
+            'days': [
+                {
+                    'date': date.isoformat(),
+                    'available': bool(slots_by_date[date]),
+                    'slots': slots_by_date[date],
+                }
+                for date in dates
+            ],
+        })
+
     # ══════════════════════════════════════════════════════════════════
     # Création
     # ══════════════════════════════════════════════════════════════════
@@ -259,7 +249,7 @@ class ReservationViewSet(viewsets.GenericViewSet):
 
         # Le créneau doit tomber dans une période d'ouverture
         local_start = timezone.localtime(starts_at)
-        periods = _day_periods(restaurant, local_start.date())
+        periods = periods_for(weekly_periods(restaurant), local_start.date())
         in_period = any(
             st <= local_start.time()
             and timezone.localtime(ends_at).time() <= et
@@ -288,13 +278,11 @@ class ReservationViewSet(viewsets.GenericViewSet):
                     status=status.HTTP_409_CONFLICT,
                 )
 
-            busy_table_ids = set(
-                _overlapping([t.id for t in tables], starts_at, ends_at)
-                .values_list('table_id', flat=True)
-            )
-            table = next(
-                (t for t in tables if t.id not in busy_table_ids), None
+            index = AvailabilityIndex.build(
+                [t.id for t in tables], starts_at, ends_at
             )
+            free_id = index.first_free(starts_at, ends_at)
+            table = next((t for t in tables if t.id == free_id), None)
             if table is None:
                 return Response(
                     {'error': 'slot_full',
@@ -627,12 +615,7 @@ class ReservationViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        user = request.user
-        is_restaurateur = (
-            user.is_authenticated
-            and hasattr(user, 'restaurateur_profile')
-            and restaurant.owner == user.restaurateur_profile
-        )
+        is_restaurateur = owns_restaurant(request, restaurant.id)
         if not is_restaurateur:
             return Response(
                 {'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN
@@ -673,12 +656,7 @@ class ReservationViewSet(viewsets.GenericViewSet):
     @action(detail=True, methods=['post'])
     def set_status(self, request, pk=None):
         reservation = self.get_object()
-        user = request.user
-        is_owner = (
-            user.is_authenticated
-            and hasattr(user, 'restaurateur_profile')
-            and reservation.restaurant.owner == user.restaurateur_profile
-        )
+        is_owner = owns_restaurant(request, reservation.restaurant_id)
         if not is_owner:
             return Response(
                 {'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN
@@ -725,7 +703,81 @@ class ReservationViewSet(viewsets.GenericViewSet):
         )
         logger.info(
             "Réservation %s → %s par le restaurateur %s",
-            reservation.id, new_status, user.id,
+            reservation.id, new_status, request.user.id,
+        )
+        return Response(ReservationSerializer(reservation).data)
+
+    @extend_schema(
+        summary="Changer la réservation de table (restaurateur)",
+        description=(
+            "Body: {table_id?}. Sans table_id, la plus petite table libre "
+            "adaptée est choisie. 409 si la table demandée (ou toute autre "
+            "table) est prise sur le créneau."
+        ),
+    )
+    @action(detail=True, methods=['post'])
+    def reassign(self, request, pk=None):
+        reservation = self.get_object()
+        is_owner = owns_restaurant(request, reservation.restaurant_id)
+        if not is_owner:
+            return Response(
+                {'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN
+            )
+        if reservation.status not in Reservation.BLOCKING_STATUSES:
+            return Response(
+                {'error': 'reservation_closed',
+                 'message': 'Seule une réservation à venir ou en cours peut changer de table.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        requested_id = request.data.get('table_id')
+        old_table_id = reservation.table_id
+
+        with transaction.atomic():
+            tables = list(
+                _candidate_tables(reservation.restaurant, reservation.party_size)
+                .select_for_update()
+            )
+            candidate_ids = [t.id for t in tables]
+            if requested_id is not None:
+                try:
+                    requested_id = int(requested_id)
+                except (TypeError, ValueError):
+                    requested_id = None
+                if requested_id not in candidate_ids:
+                    return Response(
+                        {'error': 'table_unavailable',
+                         'message': "Cette table n'existe pas ou ne peut pas accueillir ce nombre de couverts."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                candidate_ids = [requested_id]
+            else:
+                candidate_ids = [tid for tid in candidate_ids if tid != old_table_id]
+
+            index = AvailabilityIndex.build(
+                candidate_ids, reservation.starts_at, reservation.ends_at,
+                exclude_reservation_id=reservation.id,
+            )
+            free_id = index.first_free(reservation.starts_at, reservation.ends_at)
+            if free_id is None:
+                return Response(
+                    {'error': 'table_busy' if requested_id else 'slot_full',
+                     'message': 'Aucune table libre sur ce créneau.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            reservation.table = next(t for t in tables if t.id == free_id)
+            reservation.save(update_fields=['table', 'updated_at'])
+
+        for table_id in {old_table_id, reservation.table_id} - {None}:
+            notify_floorplan_update(
+                reservation.restaurant_id,
+                event='reservation_reassigned',
+                table_id=table_id,
+            )
+        logger.info(
+            "Réservation %s déplacée de la table %s vers %s par le restaurateur %s",
+            reservation.id, old_table_id, reservation.table_id, request.user.id,
         )
         return Response(ReservationSerializer(reservation).data)
 
@@ -755,12 +807,7 @@ class ReservationViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        user = request.user
-        is_restaurateur = (
-            user.is_authenticated
-            and hasattr(user, 'restaurateur_profile')
-            and restaurant.owner == user.restaurateur_profile
-        )
+        is_restaurateur = owns_restaurant(request, restaurant.id)
         if not is_restaurateur:
             return Response(
                 {'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN
@@ -846,10 +893,7 @@ class ReservationViewSet(viewsets.GenericViewSet):
             return False
         if reservation.user_id == user.id:
             return True
-        return (
-            hasattr(user, 'restaurateur_profile')
-            and reservation.restaurant.owner == user.restaurateur_profile
-        )
+        return owns_restaurant(request, reservation.restaurant_id)
 
     def _find_payment_intent_id(self, reservation):
         """Retrouve le PaymentIntent de la pré-commande via metadata Stripe."""
@@ -8,6 +8,8 @@ import logging
 
 from api.models import CollaborativeTableSession, Table, Restaurant
 from api.serializers.collaborative_session_serializers import CollaborativeSessionSerializer
+from api.services.authz import owned_restaurant_ids
+from api.services.session_board import archive_sessions, tables_with_active_session
 
 logger = logging.getLogger(__name__)
 
@@ -86,45 +88,32 @@ class RestaurantSessionManagementViewSet(viewsets.ViewSet):
             table = Table.objects.get(id=table_id)
             
             # Vérifier les permissions
-            if not self._can_manage_restaurant(request.user, table.restaurant.id):
+            if not self._can_manage_restaurant(request.user, table.restaurant_id):
                 return Response({
                     'error': 'Non autorisé pour ce restaurant'
                 }, status=status.HTTP_403_FORBIDDEN)
             
-            # Trouver toutes les sessions non archivées de cette table
-            sessions = CollaborativeTableSession.objects.filter(
-                table=table,
-                is_archived=False
+            # Archiver en un UPDATE toutes les sessions non archivées de la table
+            archived = archive_sessions(
+                CollaborativeTableSession.objects.filter(table=table),
+                reason=reason,
             )
             
-            archived_count = 0
-            session_details = []
-            
-            for session in sessions:
-                # Marquer comme cancelled si pas déjà terminée
-                if session.status not in ['completed', 'cancelled']:
-                    session.status = 'cancelled'
-                    session.save(update_fields=['status'])
-                
-                # Archiver
-                session.archive(reason=reason)
-                archived_count += 1
-                
-                session_details.append({
-                    'share_code': session.share_code,
-                    'status': session.status,
-                    'participant_count': session.participant_count
-                })
+            session_details = [{
+                'share_code': session['share_code'],
+                'status': session['status'],
+                'participant_count': session['participant_count']
+            } for session in archived]
             
             logger.info(
                 f"Table {table.number} libérée par {request.user.email} "
-                f"- {archived_count} session(s) archivée(s)"
+                f"- {len(archived)} session(s) archivée(s)"
             )
             
             return Response({
                 'message': f'Table {table.number} libérée',
                 'table_number': table.number,
-                'archived_sessions': archived_count,
+                'archived_sessions': len(archived),
                 'sessions': session_details
             })
         
@@ -151,55 +140,29 @@ class RestaurantSessionManagementViewSet(viewsets.ViewSet):
                 'error': 'session_ids requis (liste d\'UUIDs)'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Récupérer les sessions
-        sessions = CollaborativeTableSession.objects.filter(
-            id__in=session_ids,
-            is_archived=False
-        )
+        # Sessions demandées, restreintes aux restaurants gérés
+        sessions = CollaborativeTableSession.objects.filter(id__in=session_ids)
+        if not request.user.is_staff:
+            sessions = sessions.filter(restaurant_id__in=owned_restaurant_ids(request))
         
-        # Vérifier les permissions pour chaque session
-        authorized_sessions = []
-        for session in sessions:
-            if self._can_manage_restaurant(request.user, session.restaurant.id):
-                authorized_sessions.append(session)
+        archived = archive_sessions(sessions, reason=reason)
         
-        if not authorized_sessions:
+        if not archived:
             return Response({
                 'error': 'Aucune session autorisée trouvée'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Archiver
-        archived_count = 0
-        results = []
-        
-        for session in authorized_sessions:
-            try:
-                # Marquer comme cancelled si nécessaire
-                if session.status not in ['completed', 'cancelled']:
-                    session.status = 'cancelled'
-                    session.save(update_fields=['status'])
-                
-                session.archive(reason=reason)
-                archived_count += 1
-                
-                results.append({
-                    'id': str(session.id),
-                    'share_code': session.share_code,
-                    'status': 'archived',
-                    'table_number': session.table_number
-                })
-            except Exception as e:
-                logger.error(f"Erreur archivage session {session.id}: {e}")
-                results.append({
-                    'id': str(session.id),
-                    'status': 'error',
-                    'error': 'Erreur lors de l\'archivage.'
-                })
+        results = [{
+            'id': str(session['id']),
+            'share_code': session['share_code'],
+            'status': 'archived',
+            'table_number': session['table_number']
+        } for session in archived]
         
         return Response({
-            'message': f'{archived_count} session(s) archivée(s)',
+            'message': f'{len(archived)} session(s) archivée(s)',
             'total_requested': len(session_ids),
-            'total_archived': archived_count,
+            'total_archived': len(archived),
             'results': results
         })
     
@@ -223,16 +186,11 @@ class RestaurantSessionManagementViewSet(viewsets.ViewSet):
         
         try:
             restaurant = Restaurant.objects.get(id=restaurant_id)
-            tables = Table.objects.filter(restaurant=restaurant)
             
+            # Tables + session active et participants : requêtes en nombre constant
             table_statuses = []
-            for table in tables:
-                # Chercher une session active sur cette table
-                active_session = CollaborativeTableSession.objects.filter(
-                    table=table,
-                    status__in=['active', 'locked', 'payment'],
-                    is_archived=False
-                ).first()
+            for table in tables_with_active_session(restaurant):
+                active_session = table.active_session
                 
                 table_statuses.append({
                     'table_id': table.id,
@@ -242,7 +200,7 @@ class RestaurantSessionManagementViewSet(viewsets.ViewSet):
                     'active_session': {
                         'id': str(active_session.id),
                         'share_code': active_session.share_code,
-                        'participant_count': active_session.participant_count,
+                        'participant_count': active_session.active_participants,
                         'status': active_session.status,
                         'created_at': active_session.created_at
                     } if active_session else None
@@ -8,7 +8,7 @@ from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
 from django.http import Http404
 from django.db.models import Count, Q, Sum, Avg, F, Case, When, FloatField
-from django.db.models.functions import ExtractHour, ExtractWeekDay
+from django.db.models.functions import ExtractHour
 from django.utils import timezone
 from datetime import datetime, timedelta
 from api.models import (
@@ -22,6 +22,8 @@ from api.serializers.restaurant_serializers import (
     RestaurantHoursTemplateSerializer
 )
 from api.permissions import IsRestaurateur, IsOwnerOrReadOnly, IsValidatedRestaurateur
+from api.services.authz import owns_restaurant
+from api.services.directory import DirectorySearchFilter, get_directory_facets, public_restaurants
 from drf_spectacular.utils import extend_schema, OpenApiRequest, OpenApiResponse, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 import os
@@ -220,7 +222,7 @@ class RestaurantViewSet(viewsets.ModelViewSet):
         restaurant = self.get_object()
         
         # Vérifier que l'utilisateur a accès à ce restaurant
-        if not request.user.is_staff and restaurant.owner != request.user.restaurateur_profile:
+        if not request.user.is_staff and not owns_restaurant(request, restaurant.id):
             return Response(
                 {'error': 'Vous n\'avez pas accès à ces statistiques'},
                 status=status.HTTP_403_FORBIDDEN
@@ -229,24 +231,38 @@ class RestaurantViewSet(viewsets.ModelViewSet):
         try:
             # Période d'analyse (30 derniers jours par défaut)
             period_days = int(request.query_params.get('period_days', 30))
-            start_date = timezone.now() - timedelta(days=period_days)
+            
+            # Compteurs et revenus : agrégat journalier (jours complets) +
+            # commandes du jour. Périodes alignées sur les jours locaux.
+            from api.services.daily_stats import (
+                order_rollup, paid_by_bucket, count_where, day_bounds,
+                BUCKET_COMMISSIONABLE, BUCKET_CARD_OFFLINE, BUCKET_CASH,
+            )
+            
+            today = timezone.localdate()
+            start_day = today - timedelta(days=period_days)
+            previous_start_day = start_day - timedelta(days=period_days)
+            start_date = day_bounds(start_day)[0]
+            
+            all_time_rows = order_rollup(restaurant)
+            period_rows = order_rollup(restaurant, previous_start_day, by_day=True)
+            current_rows = [row for row in period_rows if row['day'] >= start_day]
+            previous_rows = [row for row in period_rows if row['day'] < start_day]
             
             # ====================================================================
             # 1. STATISTIQUES GÉNÉRALES
             # ====================================================================
             
-            orders_stats = Order.objects.filter(
-                restaurant=restaurant
-            ).aggregate(
-                total=Count('id'),
-                total_last_period=Count('id', filter=Q(created_at__gte=start_date)),
-                pending=Count('id', filter=Q(status='pending')),
-                in_progress=Count('id', filter=Q(status='in_progress')),
-                served=Count('id', filter=Q(status='served')),
-                cancelled=Count('id', filter=Q(status='cancelled')),
-                paid=Count('id', filter=Q(payment_status='paid')),
-                unpaid=Count('id', filter=Q(payment_status='unpaid')),
-            )
+            orders_stats = {
+                'total': count_where(all_time_rows),
+                'total_last_period': count_where(current_rows),
+                'pending': count_where(all_time_rows, status='pending'),
+                'in_progress': count_where(all_time_rows, status='in_progress'),
+                'served': count_where(all_time_rows, status='served'),
+                'cancelled': count_where(all_time_rows, status='cancelled'),
+                'paid': count_where(all_time_rows, payment_status='paid'),
+                'unpaid': count_where(all_time_rows, payment_status='unpaid'),
+            }
             
             # Taux d'annulation
             total_orders = orders_stats['total'] or 1
@@ -324,53 +340,22 @@ class RestaurantViewSet(viewsets.ModelViewSet):
             # ====================================================================
             
             # Source unique de vérité : ne pas redéfinir le taux ici.
-            from api.utils.commission_utils import (
-                PLATFORM_COMMISSION_RATE,
-                COMMISSIONABLE_METHODS,
-            )
-            
-            # Encaissements passant par Stripe : seuls porteurs de la commission
-            # ('online' au QR code, 'terminal' en Tap to Pay, 'stripe' historique)
-            commissionable_revenue = Order.objects.filter(
-                restaurant=restaurant,
-                payment_status='paid',
-                payment_method__in=COMMISSIONABLE_METHODS,
-                created_at__gte=start_date
-            ).aggregate(
-                total=Sum('total_amount'),
-                count=Count('id')
-            )
-            
-            # TPE du restaurant : l'argent ne transite pas par la plateforme,
-            # donc aucune commission n'est prélevable dessus.
-            card_offline_revenue = Order.objects.filter(
-                restaurant=restaurant,
-                payment_status='paid',
-                payment_method='card',
-                created_at__gte=start_date
-            ).aggregate(
-                total=Sum('total_amount'),
-                count=Count('id')
-            )
-            
-            # Revenus par méthode de paiement - ESPÈCES
-            cash_revenue = Order.objects.filter(
-                restaurant=restaurant,
-                payment_status='paid',
-                payment_method__in=['cash', 'cash_pending'],
-                created_at__gte=start_date
-            ).aggregate(
-                total=Sum('total_amount'),
-                count=Count('id')
-            )
-            
-            # Valeurs avec fallback à 0
-            commissionable_total = Decimal(str(commissionable_revenue['total'] or 0))
-            commissionable_count = commissionable_revenue['count'] or 0
-            card_offline_total = Decimal(str(card_offline_revenue['total'] or 0))
-            card_offline_count = card_offline_revenue['count'] or 0
-            cash_total = Decimal(str(cash_revenue['total'] or 0))
-            cash_count = cash_revenue['count'] or 0
+            from api.utils.commission_utils import PLATFORM_COMMISSION_RATE
+            
+            # Seaux de paiement (cf. commission_utils) :
+            # - commissionnable : passe par Stripe ('online', 'terminal', 'stripe'),
+            #   seul porteur de la commission
+            # - TPE du restaurant : l'argent ne transite pas par la plateforme,
+            #   donc aucune commission n'est prélevable dessus
+            # - espèces
+            buckets = paid_by_bucket(current_rows)
+            
+            commissionable_total = buckets[BUCKET_COMMISSIONABLE]['total']
+            commissionable_count = buckets[BUCKET_COMMISSIONABLE]['count']
+            card_offline_total = buckets[BUCKET_CARD_OFFLINE]['total']
+            card_offline_count = buckets[BUCKET_CARD_OFFLINE]['count']
+            cash_total = buckets[BUCKET_CASH]['total']
+            cash_count = buckets[BUCKET_CASH]['count']
             
             # Calcul des totaux
             gross_total = commissionable_total + card_offline_total + cash_total
@@ -391,15 +376,10 @@ class RestaurantViewSet(viewsets.ModelViewSet):
             avg_cash_order = float(cash_total / max(cash_count, 1))
             
             # Comparaison avec la période précédente
-            previous_start = start_date - timedelta(days=period_days)
-            previous_revenue = Order.objects.filter(
-                restaurant=restaurant,
-                payment_status='paid',
-                created_at__gte=previous_start,
-                created_at__lt=start_date
-            ).aggregate(
-                total=Sum('total_amount')
-            )['total'] or Decimal('0')
+            previous_revenue = sum(
+                (row['total_amount'] for row in previous_rows if row['payment_status'] == 'paid'),
+                Decimal('0')
+            )
             
             # Évolution en pourcentage
             revenue_evolution = 0
@@ -492,15 +472,20 @@ class RestaurantViewSet(viewsets.ModelViewSet):
             # 7. INDICATEURS PAR JOUR DE LA SEMAINE
             # ====================================================================
             
-            daily_stats = Order.objects.filter(
-                restaurant=restaurant,
-                created_at__gte=start_date
-            ).annotate(
-                day=ExtractWeekDay('created_at')
-            ).values('day').annotate(
-                orders_count=Count('id'),
-                revenue=Sum('total_amount', filter=Q(payment_status='paid'))
-            ).order_by('day')
+            # Numérotation ExtractWeekDay : 1 = dimanche … 7 = samedi
+            weekdays = {}
+            for row in current_rows:
+                weekday = weekdays.setdefault(
+                    row['day'].isoweekday() % 7 + 1,
+                    {'orders_count': 0, 'revenue': None}
+                )
+                weekday['orders_count'] += row['orders_count']
+                if row['payment_status'] == 'paid':
+                    weekday['revenue'] = (weekday['revenue'] or Decimal('0')) + row['total_amount']
+            
+            daily_stats = [
+                {'day': day, **weekdays[day]} for day in sorted(weekdays)
+            ]
             
             # Meilleur/pire jour
             days_names = {
@@ -814,7 +799,7 @@ class RestaurantViewSet(viewsets.ModelViewSet):
         restaurant = self.get_object()
         
         # Vérifier les permissions
-        if not request.user.is_staff and restaurant.owner != request.user.restaurateur_profile:
+        if not request.user.is_staff and not owns_restaurant(request, restaurant.id):
             return Response(
                 {'error': 'Vous n\'avez pas accès à ce dashboard'},
                 status=status.HTTP_403_FORBIDDEN
@@ -2380,20 +2365,14 @@ class PublicRestaurantViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = RestaurantSerializer
     permission_classes = [AllowAny]  # Accès public
     authentication_classes = []
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DirectorySearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'address', 'city', 'cuisine']
     ordering_fields = ['name', 'rating', 'created_at']
     ordering = ['-rating', 'name']
     
     def get_queryset(self):
         """Retourne uniquement les restaurants actifs qui peuvent recevoir des commandes"""
-        return Restaurant.objects.filter(
-            is_active=True,
-            owner__is_active=True,
-            owner__stripe_verified=True,
-            is_stripe_active=True,
-            is_manually_overridden=False  # NOUVEAU: Exclure les restaurants fermés manuellement
-        ).select_related('owner').prefetch_related('opening_hours__periods')
+        return public_restaurants().select_related('owner').prefetch_related('opening_hours__periods')
     
     @extend_schema(
         summary="Liste des restaurants publics",
@@ -2441,34 +2420,12 @@ class PublicRestaurantViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def cuisines(self, request):
         """Retourne la liste des types de cuisine disponibles"""
-        cuisines = Restaurant.objects.filter(
-            is_active=True,
-            owner__is_active=True,
-            owner__stripe_verified=True,
-            is_stripe_active=True,
-            is_manually_overridden=False
-        ).values_list('cuisine', flat=True).distinct()
-        
-        cuisine_choices = dict(Restaurant.CUISINE_CHOICES)
-        available_cuisines = [
-            {'value': cuisine, 'label': cuisine_choices.get(cuisine, cuisine)}
-            for cuisine in cuisines if cuisine
-        ]
-        
-        return Response(available_cuisines)
+        return Response(get_directory_facets()['cuisines'])
     
     @action(detail=False, methods=['get'])
     def cities(self, request):
         """Retourne la liste des villes avec restaurants"""
-        cities = Restaurant.objects.filter(
-            is_active=True,
-            owner__is_active=True,
-            owner__stripe_verified=True,
-            is_stripe_active=True,
-            is_manually_overridden=False
-        ).values_list('city', flat=True).distinct().order_by('city')
-        
-        return Response(list(cities))
+        return Response(get_directory_facets()['cities'])
     
     @action(detail=False, methods=['get'])
     def meal_voucher_restaurants(self, request):
@@ -6,11 +6,16 @@ from django.shortcuts import get_object_or_404
 from django.http import Http404
 from django.db.models import Q, Sum, Avg, Count
 from django.utils import timezone
+from datetime import datetime, timedelta
 from api.models import Order, Restaurant, Table, TableSession
 from api.permissions import IsRestaurateur, IsValidatedRestaurateur
+from api.services.authz import owns_restaurant
 from api.serializers import OrderWithTableInfoSerializer, TableSessionSerializer, OrderCreateSerializer, OrderListSerializer
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
+# Fenêtre maximale des statistiques (?days=) : au-delà, timedelta déborde
+STATS_MAX_DAYS = 3650
+
 class TableOrdersViewSet(viewsets.ViewSet):
     """
     ViewSet pour gérer les commandes multiples par table
@@ -60,11 +65,7 @@ class TableOrdersViewSet(viewsets.ViewSet):
             
             # Vérifier les permissions
             user = request.user
-            is_restaurateur = (
-                user.is_authenticated and 
-                hasattr(user, 'restaurateur_profile') and 
-                restaurant.owner == user.restaurateur_profile
-            )
+            is_restaurateur = owns_restaurant(request, restaurant.id)
             
             # Récupérer les commandes de la table
             all_orders = Order.objects.for_table(restaurant, table_number)
@@ -292,11 +293,7 @@ class TableOrdersViewSet(viewsets.ViewSet):
             
             # Vérifier les permissions pour voir les détails
             user = request.user
-            is_restaurateur = (
-                user.is_authenticated and 
-                hasattr(user, 'restaurateur_profile') and 
-                restaurant.owner == user.restaurateur_profile
-            )
+            is_restaurateur = owns_restaurant(request, restaurant.id)
             
             # Les clients peuvent voir la session s'ils en font partie
             if not is_restaurateur:
@@ -361,10 +358,7 @@ class TableOrdersViewSet(viewsets.ViewSet):
             
             # Vérifier les permissions
             user = request.user
-            is_restaurateur = (
-                hasattr(user, 'restaurateur_profile') and 
-                restaurant.owner == user.restaurateur_profile
-            )
+            is_restaurateur = owns_restaurant(request, restaurant.id)
             
             # Chercher la session active
             active_session = TableSession.objects.filter(
@@ -432,9 +426,35 @@ class TableOrdersViewSet(viewsets.ViewSet):
                 'error': 'Erreur lors de la fin de session.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @staticmethod
+    def _stats_window(request):
+        """Début de la fenêtre des statistiques (?days= ou ?since=), ou None"""
+        days = request.query_params.get('days')
+        since = request.query_params.get('since')
+        if days:
+            days = int(days)
+            if not 0 < days <= STATS_MAX_DAYS:
+                raise ValueError(days)
+            return timezone.now() - timedelta(days=days)
+        if since:
+            start = datetime.fromisoformat(since)
+            if timezone.is_naive(start):
+                start = timezone.make_aware(start)
+            return start
+        return None
+    
     @extend_schema(
         summary="Statistiques des tables",
-        description="Statistiques globales pour toutes les tables du restaurant",
+        description=(
+            "Statistiques globales pour toutes les tables du restaurant. "
+            "`days` (ou `since`, date ISO) limite les statistiques aux commandes "
+            "récentes ; les commandes actives sont toujours incluses."
+        ),
+        parameters=[
+            OpenApiParameter(name="restaurant_id", type=int, required=True),
+            OpenApiParameter(name="days", type=int, required=False),
+            OpenApiParameter(name="since", type=str, required=False),
+        ]
     )
     @action(detail=False, methods=['get'])
     def restaurant_tables_stats(self, request):
@@ -446,6 +466,13 @@ class TableOrdersViewSet(viewsets.ViewSet):
                 'error': 'restaurant_id est requis'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        try:
+            since = self._stats_window(request)
+        except (ValueError, OverflowError):
+            return Response({
+                'error': f'days doit être un entier entre 1 et {STATS_MAX_DAYS} et since une date ISO (AAAA-MM-JJ)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             restaurant = get_object_or_404(
                 Restaurant,
@@ -453,27 +480,28 @@ class TableOrdersViewSet(viewsets.ViewSet):
                 owner=request.user.restaurateur_profile
             )
             
-            # Statistiques par table
-            tables_stats = {}
-            
-            # Récupérer toutes les tables qui ont des commandes
-            tables_with_orders = Order.objects.filter(
-                restaurant=restaurant,
-                table_number__isnull=False
-            ).values_list('table_number', flat=True).distinct()
-            
-            for table_number in tables_with_orders:
-                stats = Order.objects.table_statistics(restaurant, table_number)
-                
-                # Ajouter les commandes actives
-                active_orders = Order.objects.active_for_table(restaurant, table_number)
+            # Statistiques de toutes les tables (une requête groupée) et
+            # commandes actives de toutes les tables (une requête + items)
+            tables_stats = Order.objects.tables_statistics(restaurant, since=since)
+            active_by_table = Order.objects.active_by_table(restaurant)
+            
+            for table_number, active_orders in active_by_table.items():
+                if table_number not in tables_stats:
+                    # Table active hors fenêtre : statistiques de ses seules commandes actives
+                    revenue = sum(o.total_amount or 0 for o in active_orders)
+                    tables_stats[table_number] = {
+                        'total_orders': len(active_orders),
+                        'total_revenue': revenue,
+                        'average_order_value': revenue / len(active_orders),
+                        'active_orders': len(active_orders),
+                    }
+            
+            for table_number, stats in tables_stats.items():
                 stats['active_orders_detail'] = OrderListSerializer(
-                    active_orders, 
-                    many=True, 
+                    active_by_table.get(table_number, []),
+                    many=True,
                     context={'request': request}
                 ).data
-                
-                tables_stats[table_number] = stats
             
             # Statistiques globales
             today = timezone.now().date()
@@ -493,7 +521,8 @@ class TableOrdersViewSet(viewsets.ViewSet):
                 'restaurant_name': restaurant.name,
                 'tables_stats': tables_stats,
                 'global_stats': global_stats,
-                'date': today.isoformat()
+                'date': today.isoformat(),
+                'since': since.isoformat() if since else None,
             })
             
         except Http404:
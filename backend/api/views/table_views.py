@@ -4,26 +4,20 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, Http404, HttpResponse
 from django.db import transaction
-from api.models import Table, Restaurant, Menu, MenuItem
+from api.models import Table, QrExportJob, Restaurant
 from api.serializers import TableSerializer, TableCreateSerializer
 from api.permissions import IsRestaurateur, IsValidatedRestaurateur
-from api.utils.qrcode_utils import make_qr_with_logo
+from api.services.authz import owned_restaurant_ids
+from api.services.compiled_menu import QR, get_document
+from api.services.qr_render import (
+    get_qr_png, qr_export_filename, render_restaurant_qr_pdf, schedule_qr_export, table_qr_url,
+)
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
-import qrcode
 import logging
-from io import BytesIO
 import base64
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table as PDFTable, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-import os
-import tempfile
 
 logger = logging.getLogger(__name__)
 
@@ -52,8 +46,7 @@ def _build_qr_url(request, qr_code: str) -> str:
     `TableQRRouterView`) pour les QR codes physiques déjà imprimés avant
     cette migration.
     """
-    base_url = request.build_absolute_uri('/').rstrip('/')
-    return f"{base_url}/t/{qr_code}/"
+    return table_qr_url(request.build_absolute_uri('/'), qr_code)
 
 
 @extend_schema(tags=["Tables • Management"])
@@ -81,7 +74,7 @@ class TableViewSet(viewsets.ModelViewSet):
         """Filtre les tables par restaurant du propriétaire"""
         try:
             return Table.objects.filter(
-                restaurant__owner=self.request.user.restaurateur_profile
+                restaurant_id__in=owned_restaurant_ids(self.request)
             ).select_related('restaurant').order_by('restaurant', 'number')
         except AttributeError:
             return Table.objects.none()
@@ -209,13 +202,8 @@ class TableViewSet(viewsets.ModelViewSet):
             # si installée, sinon page de fallback vers les stores).
             qr_url = _build_qr_url(request, table.qr_code)
             
-            # Générer le QR code avec logo EatQuickeR au centre
-            qr_img = make_qr_with_logo(qr_url, box_size=10, border=4)
-            
-            # Convertir en base64 pour la réponse
-            buffer = BytesIO()
-            qr_img.save(buffer, format='PNG')
-            qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+            # QR code avec logo EatQuickeR au centre (PNG mémoïsé), en base64
+            qr_base64 = base64.b64encode(get_qr_png(qr_url, box_size=10, border=4)).decode()
             
             return Response({
                 'success': True,
@@ -317,102 +305,114 @@ class RestaurantTableManagementViewSet(viewsets.ViewSet):
 
     @extend_schema(
         summary="Export PDF des QR codes",
-        description="Génère un PDF avec tous les QR codes du restaurant"
+        description=(
+            "GET : PDF de tous les QR codes du restaurant, généré dans la requête. "
+            "POST : génération en tâche de fond ; suivre l'avancement via "
+            "GET /qr_exports/{job_id}/, puis télécharger via l'URL retournée."
+        )
     )
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get', 'post'])
     def export_qr(self, request, pk=None):
         """Exporte les QR codes en PDF"""
-        try:
-            restaurant = get_object_or_404(
-                Restaurant, 
-                id=pk, 
-                owner=request.user.restaurateur_profile
-            )
-            
-            tables = Table.objects.filter(restaurant=restaurant).order_by('number')
-            
-            if not tables:
+        restaurant = get_object_or_404(
+            Restaurant,
+            id=pk,
+            owner=request.user.restaurateur_profile
+        )
+
+        if request.method == 'POST':
+            if not Table.objects.filter(restaurant=restaurant).exists():
                 return Response({
                     'error': 'Aucune table trouvée pour ce restaurant'
                 }, status=status.HTTP_404_NOT_FOUND)
-            
-            # Créer le PDF
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Style personnalisé
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.HexColor('#059669')
+
+            job = QrExportJob.objects.create(
+                restaurant=restaurant,
+                created_by=request.user,
+                base_url=request.build_absolute_uri('/').rstrip('/'),
             )
-            
-            # Titre
-            story.append(Paragraph(f"QR Codes - {restaurant.name}", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Générer les QR codes pour chaque table
-            for table in tables:
-                if not table.qr_code:
-                    table.qr_code = f"R{restaurant.id}T{str(table.number).zfill(3)}"
-                    table.save(update_fields=['qr_code'])
-                
-                # URL Universal Links / App Links
-                qr_url = _build_qr_url(request, table.qr_code)
-                
-                # Générer QR code avec logo EatQuickeR au centre
-                qr_img = make_qr_with_logo(qr_url, box_size=8, border=4)
-                
-                # Sauvegarder temporairement l'image
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-                    qr_img.save(tmp_file.name)
-                    
-                    # Contenu de la table
-                    table_data = [
-                        [Paragraph("<b>EatQuickeR</b>", styles['Heading2']), ""],
-                        [Paragraph(f"<b>Table {table.number}</b>", styles['Heading3']), ""],
-                        [Image(tmp_file.name, width=2*inch, height=2*inch), ""],
-                        [Paragraph(f"<b>Code manuel :</b><br/>{table.qr_code}", styles['Normal']), ""],
-                        [Paragraph("Scannez le QR code ou saisissez le code manuel", styles['Normal']), ""]
-                    ]
-                    
-                    table_pdf = PDFTable(table_data, colWidths=[3*inch, 2*inch])
-                    table_pdf.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 12),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('BOX', (0, 0), (-1, -1), 2, colors.black),
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0fdf4')),
-                    ]))
-                    
-                    story.append(table_pdf)
-                    story.append(Spacer(1, 30))
-                    
-                    # Nettoyer le fichier temporaire
-                    os.unlink(tmp_file.name)
-            
-            # Construire le PDF
-            doc.build(story)
-            buffer.seek(0)
-            
-            # Retourner le PDF
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="qr_codes_{restaurant.name.replace(" ", "_")}.pdf"'
-            return response
-            
-        except Exception as e:
+            transaction.on_commit(lambda: schedule_qr_export(job.id))
+            return Response(
+                _qr_export_payload(restaurant, job), status=status.HTTP_202_ACCEPTED
+            )
+
+        try:
+            content, _ = render_restaurant_qr_pdf(
+                restaurant, request.build_absolute_uri('/')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception:
             logger.exception("Erreur lors de la génération du PDF QR codes")
             return Response({
                 'error': 'Erreur lors de la génération du PDF.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        response = HttpResponse(content, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{qr_export_filename(restaurant.name)}"'
+        return response
+
+    @extend_schema(
+        summary="Statut d'un export de QR codes",
+        description="Avancement d'un export PDF lancé par POST /export_qr/"
+    )
+    @action(detail=True, methods=['get'], url_path=r'qr_exports/(?P<job_id>[0-9a-f-]+)')
+    def qr_export_status(self, request, pk=None, job_id=None):
+        restaurant, job = self._get_qr_export(request, pk, job_id)
+        return Response(_qr_export_payload(restaurant, job))
+
+    @extend_schema(
+        summary="Télécharger un export de QR codes",
+        description="PDF stocké d'un export terminé, transmis en flux"
+    )
+    @action(detail=True, methods=['get'], url_path=r'qr_exports/(?P<job_id>[0-9a-f-]+)/download')
+    def qr_export_download(self, request, pk=None, job_id=None):
+        _, job = self._get_qr_export(request, pk, job_id)
+        if job.status != QrExportJob.Status.COMPLETE or not job.file:
+            return Response(
+                {'error': 'Export introuvable ou non terminé.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if job.is_expired:
+            return Response(
+                {'error': 'Lien de téléchargement expiré.'},
+                status=status.HTTP_410_GONE
+            )
+
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename=job.file_name,
+            content_type='application/pdf',
+        )
+
+    def _get_qr_export(self, request, pk, job_id):
+        restaurant = get_object_or_404(
+            Restaurant,
+            id=pk,
+            owner=request.user.restaurateur_profile
+        )
+        try:
+            job = get_object_or_404(QrExportJob, id=job_id, restaurant=restaurant)
+        except ValidationError:
+            raise Http404
+        return restaurant, job
+
+
+def _qr_export_payload(restaurant, job):
+    base = f"/api/v1/table/restaurants/{restaurant.id}/qr_exports/{job.id}/"
+    return {
+        'job_id': str(job.id),
+        'status': job.status,
+        'progress': job.progress,
+        'tables_count': job.tables_count,
+        'file_size': job.file_size,
+        'error_message': job.error_message or None,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'status_url': base,
+        'url': f"{base}download/",
+    }
+
 
 @extend_schema(
     tags=["Tables • Public"],
@@ -450,8 +450,10 @@ class TableQRRouterView(APIView):
 
     def get(self, request, identifiant):
         try:
-            # Chercher la table par son identifiant QR
-            table = get_object_or_404(Table, qr_code=identifiant, is_active=True)
+            # Chercher la table (et son restaurant) par son identifiant QR
+            table = get_object_or_404(
+                Table.objects.select_related('restaurant'), qr_code=identifiant, is_active=True
+            )
             restaurant = table.restaurant
             
             # Vérifier que le restaurant est actif
@@ -461,11 +463,8 @@ class TableQRRouterView(APIView):
                     "message": "Ce restaurant n'accepte pas de commandes pour le moment."
                 }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
             
-            # Chercher le menu actif
-            menu = Menu.objects.filter(
-                restaurant=restaurant, 
-                is_available=True
-            ).first()
+            # Carte active regroupée par catégorie, compilée et mise en cache
+            menu = get_document(QR, restaurant.id)['data']
 
             if not menu:
                 return Response({
@@ -478,30 +477,6 @@ class TableQRRouterView(APIView):
                     }
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            # Récupérer les items du menu
-            items = MenuItem.objects.filter(
-                menu=menu, 
-                is_available=True
-            ).order_by('category', 'name')
-
-            # Organiser les items par catégorie
-            categories = {}
-            for item in items:
-                if item.category not in categories:
-                    categories[item.category] = []
-                
-                categories[item.category].append({
-                    "id": str(item.id),
-                    "name": item.name,
-                    "description": item.description,
-                    "price": float(item.price),
-                    "allergens": item.allergen_display,
-                    "dietary_tags": item.dietary_tags,
-                    "is_vegetarian": item.is_vegetarian,
-                    "is_vegan": item.is_vegan,
-                    "is_gluten_free": item.is_gluten_free
-                })
-
             response_data = {
                 "success": True,
                 "restaurant": {
@@ -520,11 +495,7 @@ class TableQRRouterView(APIView):
                     "identifiant": table.qr_code,
                     "capacity": table.capacity
                 },
-                "menu": {
-                    "id": str(menu.id),
-                    "name": menu.name,
-                    "categories": categories
-                },
+                "menu": menu,
                 "ordering_info": {
                     "can_order": restaurant.can_receive_orders,
                     "payment_methods": ["card", "cash"] if restaurant.is_stripe_active else ["cash"],
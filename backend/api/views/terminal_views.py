@@ -34,6 +34,7 @@ from rest_framework.views import APIView
 
 from api.models import Order, Restaurant
 from api.permissions import IsValidatedRestaurateur
+from api.services.authz import owns_restaurant
 from api.utils.commission_utils import build_stripe_payment_params
 
 logger = logging.getLogger(__name__)
@@ -47,17 +48,11 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 
 def _owned_restaurant(request, restaurant_id):
     """Restaurant appartenant au restaurateur authentifié, ou None."""
-    try:
-        restaurant = Restaurant.objects.select_related('owner', 'owner__user').get(
-            pk=restaurant_id
-        )
-    except (Restaurant.DoesNotExist, ValueError, TypeError):
-        return None
-
-    owner = getattr(restaurant, 'owner', None)
-    if owner is None or getattr(owner, 'user_id', None) != request.user.id:
+    if not owns_restaurant(request, restaurant_id):
         return None
-    return restaurant
+    return Restaurant.objects.select_related('owner', 'owner__user').filter(
+        pk=restaurant_id
+    ).first()
 
 
 def _stripe_unavailable():
@@ -8,55 +8,121 @@ from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.tokens import UntypedToken
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.cache import cache
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from collections import defaultdict
+import asyncio
 import json
+import os
+import socket
 import time
-import queue
-import threading
 import logging
 import jwt
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-# Gestionnaire global des connexions SSE
+SSE_PING_INTERVAL = 30  # secondes — keep-alive envoyé en l'absence de message
+SSE_NODE_STATS_TTL = 3 * SSE_PING_INTERVAL  # un nœud muet disparaît des stats
+SSE_NODE_SLOTS = 64  # nœuds ASGI suivis au plus dans les statistiques
+
+
+def sse_node_slot_key(slot):
+    """Case du cache partagé occupée par un nœud ({'node': id, 'connections': n})."""
+    return f"sse:node_slot:{slot}"
+
+
+def sse_group_name(order_id):
+    """Groupe du channel layer (canal pub/sub Redis) d'une commande côté SSE."""
+    return f"sse_order_{order_id}"
+
+
+# Registre local des connexions SSE
 class SSEConnectionManager:
-    """Gestionnaire simple des connexions SSE"""
-    
+    """Registre des connexions SSE ouvertes sur CE nœud (process ASGI).
+
+    La diffusion ne passe plus par ce registre : chaque stream est abonné aux
+    groupes `sse_order_<id>` du channel layer Redis, donc n'importe quel
+    worker peut publier et n'importe quel worker peut livrer. Le registre sert
+    uniquement au comptage (total, par commande, par nœud) ; il est indexé par
+    order_id pour ne jamais parcourir toutes les connexions.
+
+    Toutes les mutations ont lieu sur la boucle asyncio du nœud : pas de verrou.
+    """
+
     def __init__(self):
-        self.connections = {}  # {connection_id: {'user_id': int, 'order_ids': set, 'queue': Queue}}
-        self.lock = threading.Lock()
-    
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.slot = None  # case sse:node_slot:<n> réservée par ce nœud
+        self.connections = {}  # {connection_id: {'user_id': int, 'order_ids': set, 'created_at': float}}
+        self.by_order = defaultdict(set)  # {order_id: {connection_id, ...}}
+
     def add_connection(self, connection_id, user_id, order_ids):
         """Ajouter une connexion SSE"""
-        with self.lock:
-            self.connections[connection_id] = {
-                'user_id': user_id,
-                'order_ids': set(order_ids),
-                'queue': queue.Queue(),
-                'created_at': time.time()
-            }
-    
+        self.connections[connection_id] = {
+            'user_id': user_id,
+            'order_ids': set(order_ids),
+            'created_at': time.time()
+        }
+        for order_id in order_ids:
+            self.by_order[order_id].add(connection_id)
+
     def remove_connection(self, connection_id):
         """Supprimer une connexion SSE"""
-        with self.lock:
-            self.connections.pop(connection_id, None)
-    
-    def broadcast_to_order(self, order_id, message):
-        """Diffuser un message à toutes les connexions intéressées par cette commande"""
-        with self.lock:
-            for conn_id, conn_data in self.connections.items():
-                if order_id in conn_data['order_ids']:
-                    try:
-                        conn_data['queue'].put(message, timeout=1)
-                    except queue.Full:
-                        logger.warning(f"Queue full for SSE connection {conn_id}")
-    
+        conn = self.connections.pop(connection_id, None)
+        if not conn:
+            return
+        for order_id in conn['order_ids']:
+            subscribers = self.by_order.get(order_id)
+            if subscribers is not None:
+                subscribers.discard(connection_id)
+                if not subscribers:
+                    del self.by_order[order_id]
+
     def get_connection_count(self):
-        """Obtenir le nombre de connexions actives"""
-        with self.lock:
-            return len(self.connections)
+        """Obtenir le nombre de connexions actives sur ce nœud"""
+        return len(self.connections)
+
+    def get_order_connection_count(self, order_id):
+        """Nombre de connexions de ce nœud abonnées à une commande"""
+        return len(self.by_order.get(order_id, ()))
+
+    async def publish_node_stats(self):
+        """Publie le compteur de ce nœud dans le cache partagé (TTL court).
+
+        Appelé à chaque connexion/déconnexion et à chaque ping. Le nœud
+        réserve une case sse:node_slot:<n> par cache.add (SET NX, atomique)
+        puis l'entretient : pas de registre partagé à relire et réécrire.
+        Un nœud arrêté libère sa case après SSE_NODE_STATS_TTL secondes.
+        """
+        stats = {'node': self.node_id, 'connections': self.get_connection_count()}
+        try:
+            if self.slot is not None:
+                key = sse_node_slot_key(self.slot)
+                current = await cache.aget(key)
+                if current and current['node'] == self.node_id:
+                    await cache.aset(key, stats, timeout=SSE_NODE_STATS_TTL)
+                    return
+                # Case expirée (nœud resté muet plus que le TTL) : en reprendre une
+                self.slot = None
+
+            keys = [sse_node_slot_key(slot) for slot in range(SSE_NODE_SLOTS)]
+            taken = await cache.aget_many(keys)
+            for slot, key in enumerate(keys):
+                if key not in taken and await cache.aadd(key, stats, timeout=SSE_NODE_STATS_TTL):
+                    self.slot = slot
+                    return
+            logger.warning("SSE: aucune case libre pour les statistiques du nœud %s", self.node_id)
+        except Exception:
+            logger.warning("SSE: publication des statistiques du nœud impossible", exc_info=True)
+
+
+def get_sse_node_counts():
+    """Connexions SSE par nœud, tous workers confondus ({node_id: count})."""
+    slots = cache.get_many([sse_node_slot_key(slot) for slot in range(SSE_NODE_SLOTS)])
+    return {stats['node']: stats['connections'] for stats in slots.values()}
 
-# Instance globale
+# Instance globale (par nœud)
 sse_manager = SSEConnectionManager()
 
 # ── Ticket SSE à usage unique ─────────────────────────────────────────────────
@@ -138,15 +204,16 @@ def _redeem_sse_ticket(ticket: str):
     return user, order_ids
 
 
-@api_view(['GET'])
-@permission_classes([])  # Auth via ticket SSE (voir _redeem_sse_ticket)
-def order_status_stream(request):
+async def order_status_stream(request):
     """
-    Endpoint SSE pour les mises à jour de commandes.
+    Endpoint SSE pour les mises à jour de commandes (vue async, servie par ASGI).
 
     Authentification via ticket à usage unique obtenu depuis POST /orders/sse-ticket/.
     Le ticket est passé en query param (?ticket=<uuid>) — durée de vie 30 s,
     invalide après la première connexion.
+
+    Le stream n'occupe aucun thread : il attend les messages du channel layer
+    sur la boucle asyncio de daphne.
     """
     try:
         # 1. Authentification par ticket SSE (usage unique)
@@ -154,7 +221,7 @@ def order_status_stream(request):
         if not ticket:
             return JsonResponse({"error": "Paramètre ticket requis"}, status=401)
 
-        user, accessible_orders = _redeem_sse_ticket(ticket)
+        user, accessible_orders = await sync_to_async(_redeem_sse_ticket)(ticket)
         if not user:
             return JsonResponse({"error": "Ticket invalide ou expiré"}, status=401)
 
@@ -179,16 +246,30 @@ def order_status_stream(request):
         logger.error(f"SSE endpoint error: {e}")
         return JsonResponse({'error': 'Internal server error'}, status=500)
 
-def event_stream_generator(user_id, order_ids):
-    """Générateur pour le stream SSE"""
-    connection_id = f"sse_{user_id}_{int(time.time())}"
-    
+async def event_stream_generator(user_id, order_ids):
+    """Générateur async pour le stream SSE.
+
+    S'abonne aux groupes `sse_order_<id>` du channel layer : les messages
+    publiés par broadcast_to_sse depuis n'importe quel worker arrivent ici.
+    """
+    channel_layer = get_channel_layer()
+    channel_name = await channel_layer.new_channel() if channel_layer else None
+    connection_id = channel_name or f"sse_{user_id}_{int(time.time())}"
+    groups = [sse_group_name(order_id) for order_id in order_ids]
+    receiver = _ChannelReceiver(channel_layer, channel_name)
+
     try:
         # Enregistrer la connexion
         sse_manager.add_connection(connection_id, user_id, order_ids)
-        
+        await sse_manager.publish_node_stats()
+        if channel_layer:
+            for group in groups:
+                await channel_layer.group_add(group, channel_name)
+        else:
+            logger.warning("SSE: channel layer non configuré, aucun message ne sera livré")
+
         # Envoyer les statuts initiaux
-        initial_statuses = get_orders_initial_status(order_ids)
+        initial_statuses = await sync_to_async(get_orders_initial_status)(order_ids)
         for status_data in initial_statuses:
             yield format_sse_message({
                 'type': 'initial_status',
@@ -206,26 +287,67 @@ def event_stream_generator(user_id, order_ids):
         })
         
         # Boucle d'écoute
-        connection = sse_manager.connections.get(connection_id)
-        if connection:
-            while True:
-                try:
-                    # Attendre un message avec timeout
-                    message = connection['queue'].get(timeout=30)
-                    yield format_sse_message(message)
-                except queue.Empty:
-                    # Envoyer un ping pour maintenir la connexion
-                    yield format_sse_message({
-                        'type': 'ping',
-                        'timestamp': time.time()
-                    })
+        while True:
+            # Attendre un message avec timeout
+            message = await receiver.next(timeout=SSE_PING_INTERVAL)
+            if message is not None:
+                yield format_sse_message(message.get('payload', {}))
+                continue
+
+            # Envoyer un ping pour maintenir la connexion
+            await sse_manager.publish_node_stats()
+            yield format_sse_message({
+                'type': 'ping',
+                'timestamp': time.time()
+            })
                 
-    except GeneratorExit:
+    except (GeneratorExit, asyncio.CancelledError):
         logger.info(f"SSE connection {connection_id} closed")
+        raise
     except Exception as e:
         logger.error(f"SSE stream error for {connection_id}: {e}")
     finally:
+        receiver.close()
         sse_manager.remove_connection(connection_id)
+        if channel_layer:
+            for group in groups:
+                try:
+                    await channel_layer.group_discard(group, channel_name)
+                except Exception:
+                    logger.warning(f"SSE: group_discard {group} impossible", exc_info=True)
+        await sse_manager.publish_node_stats()
+
+class _ChannelReceiver:
+    """
+    Lecture du channel SSE à travers les pings.
+
+    Un seul receive() reste en attente d'un ping à l'autre : l'annuler
+    (asyncio.wait_for) ferait désabonner le channel par la couche pub/sub
+    Redis, et les messages publiés pendant le ping seraient perdus.
+    """
+
+    def __init__(self, channel_layer, channel_name):
+        self.channel_layer = channel_layer
+        self.channel_name = channel_name
+        self._task = None
+
+    async def next(self, timeout):
+        """Message suivant du channel, ou None après `timeout` secondes."""
+        if self.channel_layer is None:
+            await asyncio.sleep(timeout)
+            return None
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.channel_layer.receive(self.channel_name))
+        done, _ = await asyncio.wait({self._task}, timeout=timeout)
+        if not done:
+            return None
+        task, self._task = self._task, None
+        return task.result()
+
+    def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
 
 def format_sse_message(data):
     """Formater un message SSE"""
@@ -298,8 +420,18 @@ def get_orders_initial_status(order_ids):
 
 # Fonction pour intégrer SSE avec les signaux
 def broadcast_to_sse(order_id, message):
-    """Diffuser un message via SSE (appelé depuis signals.py)"""
-    sse_manager.broadcast_to_order(order_id, message)
+    """Diffuser un message via SSE (appelé depuis signals.py).
+
+    Publie sur le groupe Redis de la commande : seuls les streams abonnés à
+    cette commande le reçoivent, quel que soit le worker qui les sert.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        sse_group_name(order_id),
+        {"type": "sse.message", "payload": message},
+    )
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -312,13 +444,16 @@ def websocket_status(request):
         return Response({
             'websocket_enabled': channel_layer is not None,
             'sse_connections': sse_manager.get_connection_count(),
+            'sse_node': sse_manager.node_id,
+            'sse_nodes': get_sse_node_counts(),
             'channels_backend': str(type(channel_layer)) if channel_layer else None
         })
     except Exception as e:
         logger.exception("Erreur récupération statut WebSocket")
         return Response({
             'websocket_enabled': False,
-            'sse_connections': sse_manager.get_connection_count()
+            'sse_connections': sse_manager.get_connection_count(),
+            'sse_node': sse_manager.node_id,
         }, status=500)
 
 @api_view(['POST'])
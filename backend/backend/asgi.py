@@ -11,7 +11,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
 # Import après setup Django
-from api.consumers import OrderConsumer, SessionConsumer, FloorPlanConsumer
+from api.consumers import OrderConsumer, SessionConsumer, FloorPlanConsumer, KitchenConsumer
 
 # Routes WebSocket
 websocket_urlpatterns = [
@@ -20,6 +20,8 @@ websocket_urlpatterns = [
     # Plan de salle restaurateur — token JWT obligatoire, owner uniquement
     # (auth/authz vérifiées dans le consumer AVANT accept, codes 4001/4003/4403)
     re_path(r'ws/floorplan/(?P<restaurant_id>\d+)/$', FloorPlanConsumer.as_asgi()),
+    # Flux cuisine — mêmes règles d'auth/authz que le plan de salle
+    re_path(r'ws/kitchen/(?P<restaurant_id>\d+)/$', KitchenConsumer.as_asgi()),
 ]
 
 # Configuration ASGI complète
@@ -85,6 +85,32 @@ app.conf.update(
             'schedule': crontab(minute='*/5'),
             'options': {'expires': 240},
         },
+        # ── Statistiques ──────────────────────────────────────────────
+        # Scelle les journées précédentes (modifications faites par update()).
+        'rollup-daily-stats': {
+            'task': 'api.tasks.rollup_daily_stats',
+            'schedule': crontab(hour=0, minute=15),
+            'kwargs': {'days': 2},
+            'options': {'expires': 3600},
+        },
+        # ── Notifications push ────────────────────────────────────────
+        # Expo publie les reçus ~15 min après l'envoi (conservés 24h).
+        'process-push-receipts': {
+            'task': 'api.tasks.process_push_receipts',
+            'schedule': crontab(minute='*/15'),
+            'options': {'expires': 600},
+        },
+        'purge-expired-notifications': {
+            'task': 'api.tasks.purge_expired_notifications',
+            'schedule': crontab(minute=30),
+            'options': {'expires': 3600},
+        },
+        # ── Exports QR ────────────────────────────────────────────────
+        'purge-expired-qr-exports': {
+            'task': 'api.tasks.purge_expired_qr_exports',
+            'schedule': crontab(hour=3, minute=30),
+            'options': {'expires': 3600},
+        },
     },
 )
 
@@ -377,4 +377,11 @@ MENU_AI_PROVIDER = config("MENU_AI_PROVIDER", default="anthropic")  # anthropic
 ANTHROPIC_API_KEY = config("ANTHROPIC_API_KEY", default="")
 OPENAI_API_KEY = config("OPENAI_API_KEY", default="")
 MENU_AI_VISION_MODEL = config("MENU_AI_VISION_MODEL", default="")   # override optionnel
-MENU_AI_TEXT_MODEL = config("MENU_AI_TEXT_MODEL", default="")       # override optionnel
\ No newline at end of file
+MENU_AI_TEXT_MODEL = config("MENU_AI_TEXT_MODEL", default="")       # override optionnel
+# Traduction : appels paralleles, valeurs par appel, requetes/minute par fournisseur
+MENU_AI_TRANSLATION_CONCURRENCY = config("MENU_AI_TRANSLATION_CONCURRENCY", default=4, cast=int)
+MENU_AI_TRANSLATION_BATCH_SIZE = config("MENU_AI_TRANSLATION_BATCH_SIZE", default=60, cast=int)
+MENU_AI_RATE_LIMITS = {
+    "anthropic": config("ANTHROPIC_REQUESTS_PER_MINUTE", default=50, cast=int),
+    "openai": config("OPENAI_REQUESTS_PER_MINUTE", default=60, cast=int),
+}
\ No newline at end of file